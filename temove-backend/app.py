@@ -20,6 +20,15 @@ def create_app(config_name='default'):
     # Configuration
     app.config.from_object(config[config_name])
     
+    # Journalisation structurée (file d'attente, échantillonnage par endpoint)
+    from services.app_logging import init_logging, get_logger
+    init_logging(app)
+    logger = get_logger('app')
+    
+    # Encodeur JSON des réponses (orjson si installé)
+    from services.json_provider import init_json_provider
+    init_json_provider(app)
+    
     # S'assurer que le dossier instance/ existe pour SQLite
     db_uri = app.config.get('SQLALCHEMY_DATABASE_URI', '')
     if db_uri.startswith('sqlite:///'):
@@ -40,10 +49,51 @@ def create_app(config_name='default'):
     from models import (
         User, Ride, Driver, Payment, PaymentMethod, PaymentStatus,
         PromoCode, PromoType, ReferralCode, ReferralReward,
-        LoyaltyPoints, UserBadge, BadgeType, Rating, Commission, Revenue
+        LoyaltyPoints, UserBadge, BadgeType, Rating, Commission, Revenue,
+        RideRollup, PaymentRollup, CommissionSummary, DriverStatsDaily, RollupState, ReportJob
     )
     from models.favorite_driver import FavoriteDriver
     
+    # Maintenance incrémentale des rollups (courses, paiements, commissions)
+    from services.rollup_service import register_rollup_hooks
+    register_rollup_hooks()
+    # Invalidation du cache des séries temporelles (analytique admin)
+    from services.analytics_service import register_analytics_hooks
+    register_analytics_hooks()
+    # Index de recherche admin (utilisateurs, conducteurs, courses)
+    from services.admin_search_service import register_search_hooks, init_admin_search
+    register_search_hooks()
+    init_admin_search(app)
+    # Index d'autocomplétion des adresses (construit en arrière-plan, mis à jour à chaque course)
+    from services.address_autocomplete_service import init_autocomplete
+    init_autocomplete(app)
+    # Invalidation du cache des réponses admin
+    from services.response_cache import register_response_cache_hooks
+    register_response_cache_hooks()
+    # Mise à jour incrémentale de la carte de chaleur de la demande
+    from services.demand_heatmap_service import register_heatmap_hooks, init_heatmap
+    register_heatmap_hooks()
+    init_heatmap(app)
+    # Statistiques quotidiennes des conducteurs (revenus, courses, temps en ligne)
+    from services.driver_stats_service import register_driver_stats_hooks
+    register_driver_stats_hooks()
+    # Versions des flux de courses (ETag de /rides/history et /drivers/rides)
+    from services.feed_versions import register_feed_version_hooks
+    register_feed_version_hooks()
+    # Identité des tokens (claims role/is_admin/driver_id) invalidée à chaque changement de rôle
+    from services.identity_service import register_identity_hooks
+    register_identity_hooks()
+    # Hachage bcrypt dans un pool borné (429/503 quand il est saturé)
+    from services.password_hasher import init_password_hasher
+    init_password_hasher(app)
+    # Limites de débit par route (seaux à jetons, 429 + Retry-After)
+    from services.rate_limiter import init_rate_limiter
+    init_rate_limiter(app)
+    # Révocation des tokens (déconnexion, comptes désactivés), partagée entre les workers
+    from services.token_revocation import init_token_revocation, register_revocation_hooks, get_blocklist, issued_at_claim
+    init_token_revocation(app)
+    register_revocation_hooks()
+    
     # Créer automatiquement toutes les tables au démarrage
     with app.app_context():
         try:
@@ -90,67 +140,51 @@ def create_app(config_name='default'):
     # JWT
     jwt = JWTManager(app)
     
-    # Afficher la clé secrète JWT utilisée (premiers 20 caractères pour debug)
-    jwt_secret = app.config.get('JWT_SECRET_KEY', 'NON CONFIGURÉ')
-    print(f"🔑 [JWT_CONFIG] JWT_SECRET_KEY configuré: {str(jwt_secret)[:20]}...")
-    print(f"🔑 [JWT_CONFIG] JWT_SECRET_KEY longueur: {len(str(jwt_secret))}")
+    # Ne jamais journaliser la clé ni les tokens : seulement leur présence et leur longueur
+    logger.debug('🔑 [JWT_CONFIG] JWT_SECRET_KEY configuré', extra={
+        'secret_length': len(str(app.config.get('JWT_SECRET_KEY') or ''))
+    })
     
     # Handler d'erreur JWT personnalisé pour retourner 401 au lieu de 422
     @jwt.expired_token_loader
     def expired_token_callback(jwt_header, jwt_payload):
-        print(f"❌ [JWT] Token expiré - En-tête: {jwt_header}, Données: {jwt_payload}")
-        auth_header = request.headers.get('Authorization', 'NON FOURNI') if hasattr(request, 'headers') else 'Non disponible'
-        print(f"❌ [JWT] En-tête Authorization: {auth_header[:50] if len(auth_header) > 50 else auth_header}")
+        logger.info('❌ [JWT] Token expiré', extra={'sub': jwt_payload.get('sub'), 'exp': jwt_payload.get('exp')})
         return jsonify({'error': 'Token expiré. Veuillez vous reconnecter.'}), 401
     
     @jwt.invalid_token_loader
     def invalid_token_callback(error):
-        import sys
-        print(f"❌ [JWT] Token invalide - Erreur: {error}", flush=True)
-        print(f"❌ [JWT] Type d'erreur: {type(error)}", flush=True)
-        print(f"❌ [JWT] URL: {request.url if hasattr(request, 'url') else 'Non disponible'}", flush=True)
-        if hasattr(request, 'headers'):
-            auth_header = request.headers.get('Authorization', 'NON FOURNI')
-            print(f"❌ [JWT] En-tête Authorization: {auth_header[:50] if len(auth_header) > 50 else auth_header}", flush=True)
-            print(f"❌ [JWT] Tous les en-têtes: {list(request.headers.keys())}", flush=True)
-            if auth_header != 'NON FOURNI':
-                token = auth_header.replace('Bearer ', '').strip()
-                print(f"❌ [JWT] Token (premiers 50 caractères): {token[:50]}...", flush=True)
-                print(f"❌ [JWT] Longueur du token: {len(token)}", flush=True)
-                # Essayer de décoder pour voir l'erreur exacte
-                try:
-                    from flask_jwt_extended import decode_token
-                    decoded = decode_token(token)
-                    print(f"❌ [JWT] Token décodé (ne devrait pas arriver ici): {decoded}", flush=True)
-                except Exception as decode_error:
-                    print(f"❌ [JWT] Erreur de décodage: {decode_error}", flush=True)
-                    import traceback
-                    traceback.print_exc()
-                    sys.stdout.flush()
-        sys.stdout.flush()
+        logger.warning('❌ [JWT] Token invalide: %s', error, extra={
+            'auth_header': 'Authorization' in request.headers,
+            'token_length': len(request.headers.get('Authorization', '')),
+        })
         return jsonify({'error': 'Token JWT invalide ou expiré. Veuillez vous reconnecter.'}), 401
     
     @jwt.unauthorized_loader
     def missing_token_callback(error):
-        print(f"❌ [JWT] Token manquant - Erreur: {error}")
-        if hasattr(request, 'headers'):
-            auth_header = request.headers.get('Authorization', 'NON FOURNI')
-            print(f"❌ [JWT] En-tête Authorization: {auth_header[:50] if len(auth_header) > 50 else auth_header}")
-            print(f"❌ [JWT] Tous les en-têtes: {list(request.headers.keys())}")
+        logger.info('❌ [JWT] Token manquant: %s', error)
         return jsonify({'error': 'Token manquant. Veuillez vous connecter.'}), 401
     
-    # Handler pour les erreurs de décodage JWT
+    # Date d'émission à la milliseconde, comparée aux révocations (services/token_revocation.py)
+    @jwt.additional_claims_loader
+    def add_issued_at_claim(identity):
+        return issued_at_claim()
+    
+    # Révocation vérifiée en mémoire (services/token_revocation.py), sans requête
     @jwt.token_in_blocklist_loader
     def check_if_token_revoked(jwt_header, jwt_payload):
-        return False  # On ne gère pas encore la révocation de tokens
+        return get_blocklist().is_revoked(jwt_payload)
+    
+    @jwt.revoked_token_loader
+    def revoked_token_callback(jwt_header, jwt_payload):
+        logger.info('❌ [JWT] Token révoqué', extra={'sub': jwt_payload.get('sub')})
+        return jsonify({'error': 'Session révoquée. Veuillez vous reconnecter.'}), 401
     
     
     # Middleware pour intercepter TOUTES les erreurs Werkzeug (AVANT les handlers JWT)
     @app.errorhandler(422)
     def handle_422_error(error):
         """Intercepter les erreurs 422 et les convertir en 401 si c'est JWT"""
-        import sys
-        print(f"🚨 [422_HANDLER] Erreur 422 interceptée", flush=True)
+        logger.debug('🚨 [422_HANDLER] Erreur 422 interceptée')
         
         path = request.path if hasattr(request, 'path') else ''
         protected_routes = ['/rides/', '/users/', '/referral/', '/loyalty/', '/ratings/', '/promo/']
@@ -159,8 +193,7 @@ def create_app(config_name='default'):
         if hasattr(request, 'headers'):
             auth_header = request.headers.get('Authorization', 'NON FOURNI')
             if is_protected_route and auth_header != 'NON FOURNI':
-                print(f"🚨 [422_HANDLER] Route protégée avec token - Conversion en 401", flush=True)
-                sys.stdout.flush()
+                logger.info('🚨 [422_HANDLER] Route protégée avec token - Conversion en 401')
                 return jsonify({'error': 'Token JWT invalide ou expiré. Veuillez vous reconnecter.'}), 401
         
         # Pour les autres erreurs 422, retourner l'erreur standard
@@ -171,8 +204,7 @@ def create_app(config_name='default'):
     @app.errorhandler(UnprocessableEntity)
     def handle_unprocessable_entity(error):
         """Intercepter UnprocessableEntity et les convertir en 401 si JWT"""
-        import sys
-        print(f"🚨 [UNPROCESSABLE] Erreur interceptée", flush=True)
+        logger.debug('🚨 [UNPROCESSABLE] Erreur interceptée')
         
         path = request.path if hasattr(request, 'path') else ''
         protected_routes = ['/rides/', '/users/', '/referral/', '/loyalty/', '/ratings/', '/promo/']
@@ -181,35 +213,14 @@ def create_app(config_name='default'):
         if hasattr(request, 'headers'):
             auth_header = request.headers.get('Authorization', 'NON FOURNI')
             if is_protected_route and auth_header != 'NON FOURNI':
-                print(f"🚨 [UNPROCESSABLE] Route protégée avec token - Conversion en 401", flush=True)
-                sys.stdout.flush()
+                logger.info('🚨 [UNPROCESSABLE] Route protégée avec token - Conversion en 401')
                 return jsonify({'error': 'Token JWT invalide ou expiré. Veuillez vous reconnecter.'}), 401
         
         # Pour les autres erreurs, retourner 422
         return jsonify({'error': error.description if hasattr(error, 'description') else str(error)}), 422
     
-    # Middleware pour logger toutes les requêtes avant qu'elles n'atteignent les routes
-    @app.before_request
-    def log_request():
-        """Logger toutes les requêtes avant traitement"""
-        if request.method == 'POST':
-            auth_header = request.headers.get('Authorization', 'NON FOURNI')
-            print(f"🌐 [APP_BEFORE_REQUEST] {request.method} {request.path}", flush=True)
-            print(f"🌐 [APP_BEFORE_REQUEST] Authorization: {'PRÉSENT' if auth_header != 'NON FOURNI' else 'ABSENT'}", flush=True)
-            if auth_header != 'NON FOURNI':
-                print(f"🌐 [APP_BEFORE_REQUEST] Token (premiers 50 caractères): {auth_header[:50]}", flush=True)
-                # Essayer de décoder le token pour vérifier
-                try:
-                    token = auth_header.replace('Bearer ', '').strip()
-                    from flask_jwt_extended import decode_token
-                    from flask import current_app
-                    with current_app.app_context():
-                        decoded = decode_token(token)
-                        print(f"✅ [APP_BEFORE_REQUEST] Token valide - Utilisateur: {decoded.get('sub', 'Non disponible')}", flush=True)
-                except Exception as e:
-                    print(f"❌ [APP_BEFORE_REQUEST] Token invalide: {e}", flush=True)
-                    import sys
-                    sys.stdout.flush()
+    # Les requêtes sont journalisées par services/app_logging.py (une ligne par requête,
+    # avec l'utilisateur du JWT déjà vérifié par la route)
     
     # ============================================
     # Configuration CORS optimisée pour Flutter
@@ -316,6 +327,7 @@ def create_app(config_name='default'):
     from routes.favorite_drivers import favorite_drivers_bp
     from routes.upload import upload_bp
     from routes.admin_routes import admin_bp
+    from routes.places import places_bp
     
     # Import des blueprints depuis app/routes (nouveau système)
     # Ces routes sont utilisées par l'application TéMove Pro (chauffeurs)
@@ -323,6 +335,10 @@ def create_app(config_name='default'):
     
     # Enregistrer les blueprints
     api_prefix = app.config['API_PREFIX']
+    # Compression (gzip/brotli) et métriques des réponses
+    from services.response_compression import register_response_compression
+    register_response_compression(app)
+    
     app.register_blueprint(auth_bp, url_prefix=f'{api_prefix}/auth')
     app.register_blueprint(rides_bp, url_prefix=f'{api_prefix}/rides')
     app.register_blueprint(promo_bp, url_prefix=f'{api_prefix}/promo')
@@ -334,10 +350,19 @@ def create_app(config_name='default'):
     app.register_blueprint(favorite_drivers_bp, url_prefix=f'{api_prefix}/favorite-drivers')
     app.register_blueprint(upload_bp, url_prefix=f'{api_prefix}/upload')
     app.register_blueprint(admin_bp, url_prefix=f'{api_prefix}/admin')
+    app.register_blueprint(places_bp, url_prefix=f'{api_prefix}/places')
     
     # Enregistrer le blueprint des routes drivers (pour TéMove Pro)
     app.register_blueprint(driver_bp, url_prefix=f'{api_prefix}/drivers')
-    
+
+    # Précalculer la matrice des trajets entre points de repère
+    try:
+        from services.landmark_matrix_service import get_landmark_matrix
+        matrix = get_landmark_matrix()
+        app.logger.info(f"✅ Matrice des points de repère précalculée ({matrix.size}x{matrix.size})")
+    except Exception as e:
+        app.logger.error(f"❌ Erreur lors du précalcul de la matrice des points de repère: {str(e)}")
+
     # IMPORTANT: Ne pas ajouter de handler before_request pour OPTIONS car Flask-CORS
     # gère déjà cela automatiquement avec automatic_options=True.
     # Ajouter un handler ici causerait des conflits et des doublons de headers.
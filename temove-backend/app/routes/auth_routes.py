@@ -7,7 +7,11 @@ from models import OTP
 from datetime import datetime, timedelta
 import random
 
-from flask_jwt_extended import create_access_token
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt
+from services.identity_service import identity_claims
+from services.token_revocation import revoke_token
+from services.password_hasher import PasswordHashError, upgrade_password_hash
+from services.rate_limiter import rate_limit
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -37,6 +41,7 @@ def _generate_otp():
 #     return jsonify({"msg": "otp_sent"}), 200
 
 @auth_bp.route('/request-otp', methods=['POST'])
+@rate_limit('auth_request_otp')
 def request_otp():
     data = request.get_json()
     phone = data.get("phone")
@@ -88,7 +93,7 @@ def verify_otp():
         db.session.add(user)
         db.session.commit()
 
-    additional_claims = {"role": user.role}
+    additional_claims = identity_claims(user)
     token = create_access_token(identity=str(user.id), additional_claims=additional_claims)
 
     return jsonify({
@@ -131,7 +136,7 @@ def register():
         db.session.commit()
         
         # CrÃ©er un token JWT
-        additional_claims = {"role": user.role}
+        additional_claims = identity_claims(user)
         access_token = create_access_token(identity=str(user.id), additional_claims=additional_claims)
         
         return jsonify({
@@ -304,7 +309,7 @@ def register_driver():
         current_app.logger.info(f"[REGISTER_DRIVER] Inscription réussie pour: {email} (User ID: {user.id}, Driver ID: {driver.id})")
         
         # Créer un token JWT avec le rôle driver
-        additional_claims = {"role": user.role}
+        additional_claims = identity_claims(user, driver.id)
         access_token = create_access_token(identity=str(user.id), additional_claims=additional_claims)
         
         # Construire la réponse complète avec toutes les données du driver
@@ -359,6 +364,10 @@ def register_driver():
             "refresh_token": access_token,
         }), 201
         
+    except PasswordHashError:
+        # Pool bcrypt saturé : 429/503 avec Retry-After (services/password_hasher.py)
+        db.session.rollback()
+        raise
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"[REGISTER_DRIVER] Erreur lors de l'inscription: {e}")
@@ -368,6 +377,7 @@ def register_driver():
 
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limit('auth_login')
 def login():
     """
     Connexion avec email et mot de passe
@@ -433,8 +443,11 @@ def login():
         
         current_app.logger.info(f"[LOGIN] Connexion TéMove Pro autorisée pour: {email} (rôle: {user.role}, Driver ID: {driver.id})")
 
+    # Hash recalculé si BCRYPT_LOG_ROUNDS a changé (ignoré si le pool bcrypt est saturé)
+    upgrade_password_hash(user, password)
+
     # Créer un token JWT (si c'est un driver ou si ce n'est pas l'app chauffeur)
-    additional_claims = {"role": user.role}
+    additional_claims = identity_claims(user, driver.id if is_driver_app else None)
     access_token = create_access_token(identity=str(user.id), additional_claims=additional_claims)
 
     return jsonify({
@@ -444,3 +457,10 @@ def login():
         "refresh_token": access_token,  # TODO: Implémenter refresh token séparé
     }), 200
 
+
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required()
+def logout():
+    """Révoquer le token utilisé (services/token_revocation.py) jusqu'à son expiration"""
+    revoke_token(get_jwt())
+    return jsonify({"message": "Déconnexion réussie"}), 200
@@ -4,6 +4,7 @@ from extensions import db
 from models import User, Driver
 from models import Vehicle
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from services.identity_service import current_identity
 
 driver_bp = Blueprint('drivers', __name__)
 
@@ -54,15 +55,14 @@ def set_status():
     """
     Body: { status: 'online' | 'offline' | 'in_ride' | 'unavailable' }
     """
-    current_user_id = get_jwt_identity()
-    # Convertir en int car l'identité est stockée comme string dans le JWT
-    current_user_id = int(current_user_id) if isinstance(current_user_id, str) else current_user_id
-    user = User.query.get(current_user_id)
-    if not user:
+    identity = current_identity()
+    if not identity:
         return jsonify({"msg":"user not found"}), 404
 
-    # Vérifier si l'utilisateur a un profil chauffeur
-    driver = Driver.query.filter_by(user_id=user.id).first()
+    # Profil chauffeur porté par le token (services/identity_service.py)
+    if not identity.is_driver:
+        return jsonify({"msg":"not a driver"}), 403
+    driver = db.session.get(Driver, identity.driver_id)
     if not driver:
         return jsonify({"msg":"not a driver"}), 403
 
@@ -89,59 +89,80 @@ def set_status():
 @driver_bp.route('/rides', methods=['GET'])
 @jwt_required()
 def get_driver_rides():
-    """Obtenir les courses disponibles pour le chauffeur"""
+    """
+    Obtenir les courses disponibles pour le chauffeur
+    
+    - ETag : 304 si If-None-Match correspond, avant toute requête SQL (le flux
+      est le même pour tous les chauffeurs, un 304 ne révèle rien)
+    - ?since=<ISO 8601> : courses en attente modifiées depuis, et `removed_ride_ids`
+      des courses qui ne sont plus disponibles (acceptées, annulées)
+    """
+    from models import Ride, RideStatus
+    from sqlalchemy import or_
+    from services.ride_serializer import fields_from_request, serialize_rides, SerializerError
+    from services.feed_versions import (
+        FEED_PENDING_RIDES, FeedError, feed_etag, is_not_modified, not_modified, with_etag,
+        since_from_request, next_since
+    )
     try:
-        current_user_id = get_jwt_identity()
-        # Convertir en int car l'identité est stockée comme string dans le JWT
-        current_user_id = int(current_user_id) if isinstance(current_user_id, str) else current_user_id
-        user = User.query.get(current_user_id)
-        if not user:
+        # Projection 'lite' + adresses à plat (lues par l'application chauffeur)
+        try:
+            projection, fields = fields_from_request(
+                default='lite', allowed=('lite', 'full'), extra=('pickup_address', 'dropoff_address')
+            )
+            since = since_from_request()
+        except (SerializerError, FeedError) as e:
+            return jsonify({"error": str(e)}), 400
+        
+        etag = feed_etag(FEED_PENDING_RIDES, None, projection, fields, extra=(since,))
+        if is_not_modified(etag):
+            return not_modified(etag)
+        
+        # Rôle et profil chauffeur lus dans le token, sans requête (services/identity_service.py)
+        identity = current_identity()
+        if not identity:
             return jsonify({"msg":"user not found"}), 404
-
-        # Vérifier si l'utilisateur a un profil chauffeur
-        driver = Driver.query.filter_by(user_id=user.id).first()
-        if not driver:
+        if not identity.is_driver:
             return jsonify({"msg":"not a driver"}), 403
 
-        # Récupérer les courses en attente (PENDING) qui n'ont pas encore de chauffeur assigné
-        from models import Ride, RideStatus
-        from sqlalchemy import or_
+        def pending_rides(pending_status):
+            # Courses PENDING sans chauffeur assigné
+            # Le modèle Ride utilise 'requested_at' et non 'created_at'
+            query = Ride.query.filter(
+                Ride.driver_id.is_(None),  # Pas de chauffeur assigné
+                Ride.status == pending_status  # Statut PENDING
+            )
+            if since:
+                return query.filter(Ride.updated_at >= since).order_by(
+                    Ride.updated_at.asc(), Ride.id.asc()
+                ).limit(20).all()
+            return query.order_by(Ride.requested_at.desc()).limit(20).all()
         
-        # Récupérer les courses PENDING sans chauffeur assigné
-        # Le modèle Ride utilise 'requested_at' et non 'created_at'
         # Le statut peut être stocké comme Enum ou comme string selon la base de données
         try:
             # Essayer avec l'Enum d'abord
-            rides = Ride.query.filter(
-                Ride.driver_id.is_(None),  # Pas de chauffeur assigné
-                Ride.status == RideStatus.PENDING  # Statut PENDING
-            ).order_by(Ride.requested_at.desc()).limit(20).all()
+            pending_status = RideStatus.PENDING
+            rides = pending_rides(pending_status)
         except Exception as e:
             # Si l'Enum ne fonctionne pas, essayer avec la string
             current_app.logger.warning(f"[GET_DRIVER_RIDES] Erreur avec Enum, essai avec string: {e}")
-            rides = Ride.query.filter(
-                Ride.driver_id.is_(None),  # Pas de chauffeur assigné
-                Ride.status == 'pending'  # Statut PENDING comme string
-            ).order_by(Ride.requested_at.desc()).limit(20).all()
-        
-        # Convertir les courses en dictionnaires pour JSON
-        rides_data = []
-        for ride in rides:
-            try:
-                ride_dict = ride.to_dict()
-                # S'assurer que les adresses sont présentes
-                if 'pickup_address' not in ride_dict and hasattr(ride, 'pickup_address') and ride.pickup_address:
-                    ride_dict['pickup_address'] = ride.pickup_address
-                if 'dropoff_address' not in ride_dict and hasattr(ride, 'dropoff_address') and ride.dropoff_address:
-                    ride_dict['dropoff_address'] = ride.dropoff_address
-                rides_data.append(ride_dict)
-            except Exception as e:
-                current_app.logger.error(f"[GET_DRIVER_RIDES] Erreur lors de la conversion d'une course: {e}")
-                continue
+            db.session.rollback()
+            pending_status = 'pending'
+            rides = pending_rides(pending_status)
         
-        return jsonify({
-            "rides": rides_data
-        }), 200
+        # Courses sans chauffeur : pas de relation à charger
+        payload = {
+            "rides": serialize_rides(rides, projection, fields),
+            "since": next_since(rides, since),
+        }
+        if since:
+            # Courses sorties du flux depuis since (chauffeur assigné, annulées, ...)
+            removed = db.session.query(Ride.id).filter(
+                Ride.updated_at >= since,
+                or_(Ride.driver_id.isnot(None), Ride.status != pending_status)
+            ).limit(500).all()
+            payload["removed_ride_ids"] = [ride_id for ride_id, in removed]
+        return with_etag(jsonify(payload), etag), 200
     
     except Exception as e:
         current_app.logger.error(f"[GET_DRIVER_RIDES] Erreur: {e}")
@@ -230,3 +251,44 @@ def driver_me():
             }
         }
     }), 200
+
+
+@driver_bp.route('/me/earnings', methods=['GET'])
+@jwt_required()
+def driver_my_earnings():
+    """
+    Revenus et statistiques du chauffeur connecté (écran « Mes gains » de TéMove Pro)
+    
+    Lu uniquement depuis driver_stats_daily (agrégats par jour, UTC).
+    Query params:
+        period: today, week (défaut, depuis lundi) ou month
+        start, end: dates YYYY-MM-DD (prioritaires sur period, 92 jours max)
+    """
+    from services.driver_stats_service import period_bounds, driver_period_stats, DriverStatsError
+
+    identity = current_identity()
+    if not identity:
+        return jsonify({"msg":"user not found"}), 404
+
+    # Profil chauffeur porté par le token (services/identity_service.py)
+    if not identity.is_driver:
+        return jsonify({"msg":"not a driver"}), 403
+    driver = db.session.get(Driver, identity.driver_id)
+    if not driver:
+        return jsonify({"msg":"not a driver"}), 403
+
+    try:
+        start_day, end_day = period_bounds(
+            request.args.get('period', 'week'), request.args.get('start'), request.args.get('end')
+        )
+    except DriverStatsError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    # La session en ligne en cours n'est comptée dans les agrégats qu'à sa fermeture
+    stats = driver_period_stats(driver.id, start_day, end_day, online_since=driver.online_since)
+    return jsonify({
+        "driver_id": driver.id,
+        "start": start_day.isoformat(),
+        "end": end_day.isoformat(),
+        **stats,
+    }), 200
@@ -7,6 +7,9 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Répertoire du backend (chemins de données indépendants du répertoire courant)
+basedir = os.path.abspath(os.path.dirname(__file__))
+
 
 class Config:
     """Configuration de base"""
@@ -62,12 +65,116 @@ class Config:
     
     # Google Maps API (optionnel pour calculs de distance)
     GOOGLE_MAPS_API_KEY = os.environ.get('GOOGLE_MAPS_API_KEY', '')
+    GOOGLE_MAPS_BASE_URL = os.environ.get('GOOGLE_MAPS_BASE_URL', 'https://maps.googleapis.com')
+    
+    # Client HTTP des fournisseurs externes (services/http_client.py)
+    EXTERNAL_HTTP_POOL_SIZE = int(os.environ.get('EXTERNAL_HTTP_POOL_SIZE', 20))
+    EXTERNAL_HTTP_BUDGET_MS = int(os.environ.get('EXTERNAL_HTTP_BUDGET_MS', 1500))
+    EXTERNAL_HTTP_HEDGE_AFTER_MS = int(os.environ.get('EXTERNAL_HTTP_HEDGE_AFTER_MS', 400))
+    EXTERNAL_HTTP_FAILURE_THRESHOLD = int(os.environ.get('EXTERNAL_HTTP_FAILURE_THRESHOLD', 5))
+    EXTERNAL_HTTP_RESET_TIMEOUT = int(os.environ.get('EXTERNAL_HTTP_RESET_TIMEOUT', 30))
+    
+    # Géocodage inverse : 'offline' (gazetteer local) ou 'google' (repli hors ligne en cas d'échec),
+    # 'google' par défaut si une clé API est configurée
+    REVERSE_GEOCODING_PROVIDER = os.environ.get('REVERSE_GEOCODING_PROVIDER') or (
+        'google' if GOOGLE_MAPS_API_KEY else 'offline'
+    )
+    # Gazetteer généré par scripts/build_gazetteer.py (chemin relatif au répertoire du backend)
+    GAZETTEER_PATH = os.path.join(basedir, os.environ.get('GAZETTEER_PATH') or os.path.join('data', 'dakar_gazetteer.json'))
+    
+    # Recherche admin : 'auto' (FULLTEXT MySQL si les index existent, sinon index en mémoire),
+    # 'fulltext' ou 'memory' (index FULLTEXT créés par scripts/add_search_indexes.py)
+    ADMIN_SEARCH_BACKEND = os.environ.get('ADMIN_SEARCH_BACKEND', 'auto')
+    # Index en mémoire construit en arrière-plan dès la première requête (sinon à la première recherche)
+    ADMIN_SEARCH_WARMUP = os.environ.get('ADMIN_SEARCH_WARMUP', 'true').lower() == 'true'
+    # Index d'autocomplétion des adresses construit en arrière-plan dès la première requête
+    AUTOCOMPLETE_WARMUP = os.environ.get('AUTOCOMPLETE_WARMUP', 'true').lower() == 'true'
+    
+    # Cache des réponses du dashboard admin (services/response_cache.py)
+    ADMIN_RESPONSE_CACHE_ENABLED = os.environ.get('ADMIN_RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    
+    # Journalisation (services/app_logging.py) : niveau global, niveaux par logger,
+    # format 'json' ou 'text', écriture par un thread (file d'attente)
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_LEVELS = {}  # Ex. {'temove.rides': 'DEBUG'}
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+    LOG_ASYNC = os.environ.get('LOG_ASYNC', 'true').lower() == 'true'
+    LOG_REQUESTS = os.environ.get('LOG_REQUESTS', 'true').lower() == 'true'  # Une ligne par requête
+    # Part des requêtes journalisées en DEBUG/INFO (WARNING et plus toujours gardés), par endpoint
+    LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 1.0))
+    LOG_SAMPLE_RATES = {
+        'rides.get_ride_history': 0.1,
+        'rides.get_ride': 0.1,
+        'drivers.get_driver_rides': 0.1,
+        'rides.estimate_ride': 0.2,
+    }
+    
+    # Encodeur JSON des réponses : 'auto' (orjson si installé), 'orjson' ou 'stdlib'
+    JSON_BACKEND = os.environ.get('JSON_BACKEND', 'auto')
+    # Compression des réponses selon Accept-Encoding (services/response_compression.py)
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))  # Octets
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))  # gzip 1-9
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))  # brotli 0-11
+    # Durée de validité des ETag des flux de courses (services/feed_versions.py), en secondes :
+    # délai maximal avant qu'une écriture d'un autre worker soit vue (0 = un seul processus)
+    FEED_ETAG_TTL = int(os.environ.get('FEED_ETAG_TTL', 30))
+    # Identités relues en base après un changement de rôle (services/identity_service.py), en secondes
+    IDENTITY_CACHE_TTL = int(os.environ.get('IDENTITY_CACHE_TTL', 60))
+    # Mots de passe (services/password_hasher.py) : coût bcrypt (les hash d'un autre coût sont
+    # recalculés à la connexion), threads dédiés (0 = dans la requête), file d'attente et délai bornés
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', max(1, (os.cpu_count() or 1) // 2)))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', 4))  # Par processus
+    PASSWORD_HASH_TIMEOUT_MS = int(os.environ.get('PASSWORD_HASH_TIMEOUT_MS', 2000))
+    # Révocation des tokens (services/token_revocation.py) : store partagé entre les workers,
+    # 'local' (un seul processus) ou 'redis', relu au plus toutes les REVOCATION_SYNC_SECONDS
+    REVOCATION_STORE = os.environ.get('REVOCATION_STORE', 'local')
+    REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+    REVOCATION_SYNC_SECONDS = float(os.environ.get('REVOCATION_SYNC_SECONDS', 1.0))
+    # Limites de débit (services/rate_limiter.py) : `limit` requêtes par `period` secondes et par
+    # clé 'ip', 'user' ou 'driver' ; store 'memory' (par processus) ou 'redis' (partagé, REDIS_URL)
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_STORE = os.environ.get('RATE_LIMIT_STORE', 'memory')
+    RATE_LIMITS = {
+        'ride_estimate': {'limit': 30, 'period': 60, 'key': 'user'},
+        'ride_book': {'limit': 10, 'period': 60, 'key': 'user'},
+        'auth_login': {'limit': 10, 'period': 60, 'key': 'ip'},
+        'auth_request_otp': {'limit': 5, 'period': 300, 'key': 'ip'},
+    }
+    
+    # Carte de chaleur de la demande (services/demand_heatmap_service.py)
+    # Fichier généré par scripts/build_demand_heatmap.py (calculé depuis la base en arrière-plan s'il manque)
+    HEATMAP_PATH = os.path.join(basedir, os.environ.get('HEATMAP_PATH') or os.path.join('instance', 'demand_heatmap.npz'))
+    HEATMAP_CELL_METERS = int(os.environ.get('HEATMAP_CELL_METERS', 500))
+    HEATMAP_HISTORY_DAYS = int(os.environ.get('HEATMAP_HISTORY_DAYS', 90))  # 0 = tout l'historique
+    HEATMAP_RELOAD_SECONDS = int(os.environ.get('HEATMAP_RELOAD_SECONDS', 60))  # Fichier relu s'il a changé
+    HEATMAP_WARMUP = os.environ.get('HEATMAP_WARMUP', 'true').lower() == 'true'  # Chargée dès la première requête
+    
+    # Rapports admin générés en arrière-plan (services/report_job_service.py)
+    REPORTS_DIR = os.environ.get('REPORTS_DIR', 'reports')
+    REPORT_WORKERS = int(os.environ.get('REPORT_WORKERS', 2))
+    REPORT_MAX_AGE_HOURS = int(os.environ.get('REPORT_MAX_AGE_HOURS', 24))  # Fichiers supprimés au-delà
+    REPORT_DISK_QUOTA_MB = int(os.environ.get('REPORT_DISK_QUOTA_MB', 500))  # Les plus anciens supprimés au-delà
+    # Export Parquet incrémental pour l'analyse (scripts/export_analytics.py)
+    ANALYTICS_EXPORT_DIR = os.environ.get('ANALYTICS_EXPORT_DIR') or os.path.join('instance', 'analytics')
+    # Processus de rendu des gros PDF (lots de pages en parallèle, nécessite pypdf)
+    PDF_RENDER_WORKERS = int(os.environ.get('PDF_RENDER_WORKERS', min(os.cpu_count() or 1, 4)))
+    # Rapports récurrents générés la nuit par scripts/run_scheduled_reports.py (période écoulée)
+    REPORT_SCHEDULES = [
+        {'report_type': 'revenue', 'format': 'excel', 'frequency': 'daily'},
+        {'report_type': 'rides', 'format': 'csv', 'frequency': 'weekly'},
+        {'report_type': 'commissions', 'format': 'excel', 'frequency': 'monthly'},
+    ]
 
 
 class DevelopmentConfig(Config):
     """Configuration pour le développement"""
     DEBUG = True
     SQLALCHEMY_ECHO = True
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'DEBUG')
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')
+    LOG_SAMPLE_RATES = {}
 
 
 class ProductionConfig(Config):
@@ -79,6 +186,11 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     """Configuration pour les tests"""
     TESTING = True
+    BCRYPT_LOG_ROUNDS = 4
+    RATE_LIMIT_ENABLED = False
+    ADMIN_SEARCH_WARMUP = False
+    AUTOCOMPLETE_WARMUP = False
+    HEATMAP_WARMUP = False
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
 
 
@@ -13,6 +13,8 @@ from models.otp import OTP
 from models.location import Location
 from models.vehicle import Vehicle
 from models.commission import Commission, Revenue
+from models.rollup import RideRollup, PaymentRollup, CommissionSummary, DriverStatsDaily, RollupState
+from models.report_job import ReportJob, ReportJobStatus
 
 __all__ = [
     'User',
@@ -35,5 +37,12 @@ __all__ = [
     'Vehicle',
     'Commission',
     'Revenue',
+    'RideRollup',
+    'PaymentRollup',
+    'CommissionSummary',
+    'DriverStatsDaily',
+    'RollupState',
+    'ReportJob',
+    'ReportJobStatus',
 ]
 
@@ -34,6 +34,14 @@ class Commission(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
+    # Index composites pour la pagination par curseur (tri décroissant par date puis id)
+    __table_args__ = (
+        db.Index('ix_commissions_created_at_id', 'created_at', 'id'),
+        db.Index('ix_commissions_status_created_at_id', 'status', 'created_at', 'id'),
+        # Export incrémental (services/analytics_export_service.py)
+        db.Index('ix_commissions_updated_at_id', 'updated_at', 'id'),
+    )
+    
     # Relations
     ride = db.relationship('Ride', backref='commission')
     driver = db.relationship('Driver', backref='commissions')
@@ -3,6 +3,7 @@ Modèle Driver (Conducteur)
 """
 from datetime import datetime
 from enum import Enum
+from sqlalchemy.orm import validates
 from extensions import db
 
 
@@ -14,6 +15,10 @@ class DriverStatus(Enum):
     UNAVAILABLE = 'unavailable'
 
 
+# Statuts comptés comme temps en ligne (statistiques quotidiennes des conducteurs)
+ONLINE_STATUSES = ('online', 'in_ride')
+
+
 class Driver(db.Model):
     """Modèle conducteur"""
     __tablename__ = 'drivers'
@@ -40,6 +45,7 @@ class Driver(db.Model):
     
     # Statut
     status = db.Column(db.Enum(DriverStatus), default=DriverStatus.OFFLINE, nullable=False)
+    online_since = db.Column(db.DateTime, nullable=True)  # Début de la session en ligne en cours
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     is_verified = db.Column(db.Boolean, default=False, nullable=False)
     
@@ -52,20 +58,38 @@ class Driver(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Index composites pour la pagination par curseur (tri décroissant par date puis id)
+    __table_args__ = (
+        db.Index('ix_drivers_created_at_id', 'created_at', 'id'),
+        # Export incrémental (services/analytics_export_service.py)
+        db.Index('ix_drivers_updated_at_id', 'updated_at', 'id'),
+    )
+    
     # Relations
     user = db.relationship('User', backref=db.backref('driver', uselist=False), foreign_keys=[user_id])
     rides = db.relationship('Ride', backref='driver', lazy=True)
     ratings = db.relationship('Rating', backref='driver', lazy=True)
     
+    @validates('status')
+    def _track_online_since(self, key, status):
+        """Ouvrir / fermer la session en ligne (temps en ligne de driver_stats_daily)"""
+        value = status.value if isinstance(status, DriverStatus) else status
+        if value in ONLINE_STATUSES:
+            if self.online_since is None:
+                self.online_since = datetime.utcnow()
+        elif self.online_since is not None:
+            self.online_since = None
+        return status
+    
     def set_password(self, password):
-        """Hasher le mot de passe"""
-        from flask_bcrypt import generate_password_hash
-        self.password_hash = generate_password_hash(password).decode('utf-8')
+        """Hasher le mot de passe (pool bcrypt borné, services/password_hasher.py)"""
+        from services.password_hasher import hash_password
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
-        """Vérifier le mot de passe"""
-        from flask_bcrypt import check_password_hash
-        return check_password_hash(self.password_hash, password)
+        """Vérifier le mot de passe (pool bcrypt borné, services/password_hasher.py)"""
+        from services.password_hasher import verify_password
+        return verify_password(self.password_hash, password)
     
     def to_dict(self):
         """Convertir en dictionnaire"""
@@ -43,6 +43,15 @@ class Payment(db.Model):
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     processed_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Index composites pour la pagination par curseur (tri décroissant par date puis id)
+    __table_args__ = (
+        db.Index('ix_payments_created_at_id', 'created_at', 'id'),
+        db.Index('ix_payments_status_created_at_id', 'status', 'created_at', 'id'),
+        # Export incrémental (services/analytics_export_service.py)
+        db.Index('ix_payments_updated_at_id', 'updated_at', 'id'),
+    )
     
     def to_dict(self):
         """Convertir en dictionnaire"""
@@ -56,6 +65,7 @@ class Payment(db.Model):
             'external_transaction_id': self.external_transaction_id,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'processed_at': self.processed_at.isoformat() if self.processed_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
         }
     
     def __repr__(self):
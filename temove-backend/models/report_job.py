@@ -0,0 +1,68 @@
+"""
+Modèle ReportJob (génération de rapport en arrière-plan)
+
+Une ligne par demande de rapport : les workers (services/report_job_service.py)
+écrivent le fichier dans le répertoire des rapports et mettent à jour le statut.
+Les demandes identiques (même type, période et format) réutilisent le même job.
+"""
+from datetime import datetime
+from extensions import db
+
+
+class ReportJobStatus:
+    """Statuts d'un job de rapport"""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    EXPIRED = 'expired'  # Fichier supprimé (âge ou quota disque)
+
+
+class ReportJob(db.Model):
+    """Job de génération de rapport"""
+    __tablename__ = 'report_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Empreinte des paramètres (type, format, période) pour la déduplication
+    job_key = db.Column(db.String(64), nullable=False, index=True)
+
+    report_type = db.Column(db.String(30), nullable=False)
+    format = db.Column(db.String(10), nullable=False)  # csv, excel, pdf
+    start_date = db.Column(db.DateTime, nullable=False)
+    end_date = db.Column(db.DateTime, nullable=False)
+
+    status = db.Column(db.String(20), default=ReportJobStatus.PENDING, nullable=False, index=True)
+    file_path = db.Column(db.String(255), nullable=True)
+    file_size = db.Column(db.BigInteger, nullable=True)  # Octets
+    row_count = db.Column(db.Integer, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    requested_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    scheduled = db.Column(db.Boolean, default=False, nullable=False)  # Rapport récurrent planifié
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    last_accessed_at = db.Column(db.DateTime, nullable=True)  # Dernier téléchargement (quota disque)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'report_type': self.report_type,
+            'format': self.format,
+            'start_date': self.start_date.isoformat() if self.start_date else None,
+            'end_date': self.end_date.isoformat() if self.end_date else None,
+            'status': self.status,
+            'file_size': self.file_size,
+            'row_count': self.row_count,
+            'error': self.error,
+            'requested_by': self.requested_by,
+            'scheduled': self.scheduled,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+    def __repr__(self):
+        return f'<ReportJob {self.id} {self.report_type}/{self.format} - {self.status}>'
@@ -82,6 +82,15 @@ class Ride(db.Model):
     started_at = db.Column(db.DateTime, nullable=True)
     completed_at = db.Column(db.DateTime, nullable=True)
     cancelled_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Index composites pour la pagination par curseur (tri décroissant par date puis id)
+    __table_args__ = (
+        db.Index('ix_rides_requested_at_id', 'requested_at', 'id'),
+        db.Index('ix_rides_status_requested_at_id', 'status', 'requested_at', 'id'),
+        # Export incrémental (services/analytics_export_service.py)
+        db.Index('ix_rides_updated_at_id', 'updated_at', 'id'),
+    )
     
     # Relations
     payment = db.relationship('Payment', backref='ride', uselist=False, cascade='all, delete-orphan')
@@ -172,44 +181,15 @@ class Ride(db.Model):
             'scheduled_at': None
         }
     
-    def to_dict(self):
-        """Convertir en dictionnaire"""
-        arrival_info = self.get_estimated_arrival()
+    def to_dict(self, projection='full', fields=None):
+        """
+        Convertir en dictionnaire
         
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'driver_id': self.driver_id,
-            'category': self.category.value if self.category else None,
-            'ride_mode': self.ride_mode.value if self.ride_mode else None,
-            'pickup': {
-                'latitude': self.pickup_latitude,
-                'longitude': self.pickup_longitude,
-                'address': self.pickup_address,
-            },
-            'dropoff': {
-                'latitude': self.dropoff_latitude,
-                'longitude': self.dropoff_longitude,
-                'address': self.dropoff_address,
-            } if self.dropoff_latitude else None,
-            'distance_km': self.distance_km,
-            'duration_minutes': self.duration_minutes,
-            'base_price': self.base_price,
-            'surge_multiplier': self.surge_multiplier,
-            'discount_amount': self.discount_amount,
-            'final_price': self.final_price,
-            'status': self.status.value if self.status else None,
-            'payment_method': self.payment_method,
-            'scheduled_at': self.scheduled_at.isoformat() if self.scheduled_at else None,
-            'is_scheduled': self.is_scheduled(),
-            'requested_at': self.requested_at.isoformat() if self.requested_at else None,
-            'confirmed_at': self.confirmed_at.isoformat() if self.confirmed_at else None,
-            'started_at': self.started_at.isoformat() if self.started_at else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
-            'driver': self.driver.to_dict() if self.driver else None,
-            # Informations sur le temps d'arrivée
-            'estimated_arrival': arrival_info,
-        }
+        Projection 'full' par défaut ; les listes utilisent les projections
+        de services/ride_serializer.py.
+        """
+        from services.ride_serializer import serialize_ride
+        return serialize_ride(self, projection, fields)
     
     def __repr__(self):
         return f'<Ride {self.id} - {self.status.value if self.status else "unknown"}>'
@@ -0,0 +1,189 @@
+"""
+Tables d'agrégats (rollups) pour les graphiques et KPI du dashboard admin
+
+Mises à jour de façon incrémentale à chaque changement de statut de course,
+à chaque paiement complété et à chaque écriture de commission
+(services/rollup_service.py). Reconstruites depuis l'historique par
+scripts/backfill_ride_rollups.py.
+
+Les statistiques quotidiennes des conducteurs (DriverStatsDaily) sont tenues
+par services/driver_stats_service.py et recalculées chaque nuit par
+scripts/refresh_driver_stats.py.
+"""
+from extensions import db
+
+
+class RideRollup(db.Model):
+    """Agrégat des courses par période (heure/jour/mois) × mode × statut"""
+    __tablename__ = 'ride_rollups'
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    # Période : 'hour', 'day' ou 'month' (début de période, basé sur requested_at)
+    granularity = db.Column(db.String(10), nullable=False)
+    bucket_start = db.Column(db.DateTime, nullable=False)
+
+    # Dimensions (valeurs des Enum RideMode / RideStatus)
+    ride_mode = db.Column(db.String(30), nullable=False)
+    status = db.Column(db.String(30), nullable=False)
+
+    # Mesures
+    ride_count = db.Column(db.Integer, default=0, nullable=False)
+    gmv = db.Column(db.BigInteger, default=0, nullable=False)  # Somme des final_price (XOF)
+    discount_total = db.Column(db.BigInteger, default=0, nullable=False)  # XOF
+    commission_total = db.Column(db.BigInteger, default=0, nullable=False)  # Commission plateforme (XOF)
+
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'bucket_start', 'ride_mode', 'status', name='_ride_rollup_uc'),
+    )
+
+    def to_dict(self):
+        return {
+            'granularity': self.granularity,
+            'bucket_start': self.bucket_start.isoformat() if self.bucket_start else None,
+            'ride_mode': self.ride_mode,
+            'status': self.status,
+            'ride_count': self.ride_count,
+            'gmv': self.gmv,
+            'discount_total': self.discount_total,
+            'commission_total': self.commission_total,
+        }
+
+    def __repr__(self):
+        return f'<RideRollup {self.granularity} {self.bucket_start} {self.ride_mode}/{self.status}: {self.ride_count}>'
+
+
+class PaymentRollup(db.Model):
+    """Agrégat des paiements complétés par période (heure/jour/mois) × méthode"""
+    __tablename__ = 'payment_rollups'
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    # Période : 'hour', 'day' ou 'month' (début de période, basé sur created_at)
+    granularity = db.Column(db.String(10), nullable=False)
+    bucket_start = db.Column(db.DateTime, nullable=False)
+
+    # Dimension (valeur de l'Enum PaymentMethod)
+    method = db.Column(db.String(30), nullable=False)
+
+    # Mesures
+    payment_count = db.Column(db.Integer, default=0, nullable=False)
+    amount_total = db.Column(db.BigInteger, default=0, nullable=False)  # XOF
+
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'bucket_start', 'method', name='_payment_rollup_uc'),
+    )
+
+    def to_dict(self):
+        return {
+            'granularity': self.granularity,
+            'bucket_start': self.bucket_start.isoformat() if self.bucket_start else None,
+            'method': self.method,
+            'payment_count': self.payment_count,
+            'amount_total': self.amount_total,
+        }
+
+    def __repr__(self):
+        return f'<PaymentRollup {self.granularity} {self.bucket_start} {self.method}: {self.amount_total} XOF>'
+
+
+class CommissionSummary(db.Model):
+    """Totaux cumulés des commissions par conducteur × statut (pending, paid, failed)"""
+    __tablename__ = 'commission_summaries'
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    # Dimensions
+    driver_id = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(50), nullable=False)
+
+    # Mesures
+    commission_count = db.Column(db.Integer, default=0, nullable=False)
+    ride_price_total = db.Column(db.BigInteger, default=0, nullable=False)  # XOF
+    platform_total = db.Column(db.BigInteger, default=0, nullable=False)  # Commission plateforme (XOF)
+    driver_earnings_total = db.Column(db.BigInteger, default=0, nullable=False)  # XOF
+    service_fee_total = db.Column(db.BigInteger, default=0, nullable=False)  # XOF
+
+    __table_args__ = (
+        db.UniqueConstraint('driver_id', 'status', name='_commission_summary_uc'),
+    )
+
+    def to_dict(self):
+        return {
+            'driver_id': self.driver_id,
+            'status': self.status,
+            'commission_count': self.commission_count,
+            'ride_price_total': self.ride_price_total,
+            'platform_total': self.platform_total,
+            'driver_earnings_total': self.driver_earnings_total,
+            'service_fee_total': self.service_fee_total,
+        }
+
+    def __repr__(self):
+        return f'<CommissionSummary driver={self.driver_id} {self.status}: {self.platform_total} XOF>'
+
+
+class RollupState(db.Model):
+    """Marqueur de reconstruction des rollups (une ligne par famille d'agrégats)
+
+    Sans ligne, la maintenance incrémentale n'écrit rien ; la ligne est créée
+    au début de la reconstruction. Tant que backfilled_at est vide, les
+    lectures se font sur les tables brutes (services/rollup_service.py).
+    """
+    __tablename__ = 'rollup_states'
+
+    name = db.Column(db.String(50), primary_key=True)
+    backfilled_at = db.Column(db.DateTime, nullable=True)  # Fin de la dernière reconstruction (UTC)
+
+    def __repr__(self):
+        return f'<RollupState {self.name}: {self.backfilled_at}>'
+
+
+class DriverStatsDaily(db.Model):
+    """Statistiques d'un conducteur par jour (UTC) : courses, revenus, temps d'approche, temps en ligne"""
+    __tablename__ = 'driver_stats_daily'
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    # Dimensions (jour de requested_at pour les courses, de created_at pour les commissions)
+    driver_id = db.Column(db.Integer, nullable=False)
+    day = db.Column(db.Date, nullable=False, index=True)
+
+    # Courses attribuées au conducteur, par statut final
+    assigned_rides = db.Column(db.Integer, default=0, nullable=False)
+    completed_rides = db.Column(db.Integer, default=0, nullable=False)
+    cancelled_rides = db.Column(db.Integer, default=0, nullable=False)
+    fares_total = db.Column(db.BigInteger, default=0, nullable=False)  # Somme des final_price des courses terminées (XOF)
+
+    # Temps d'approche : de l'acceptation (confirmed_at) à la prise en charge (started_at)
+    pickup_eta_seconds = db.Column(db.BigInteger, default=0, nullable=False)
+    pickup_eta_count = db.Column(db.Integer, default=0, nullable=False)
+
+    # Commissions
+    earnings_total = db.Column(db.BigInteger, default=0, nullable=False)  # Revenus conducteur (XOF)
+    platform_commission_total = db.Column(db.BigInteger, default=0, nullable=False)  # XOF
+
+    # Temps en ligne (sessions fermées ou découpées à minuit)
+    online_seconds = db.Column(db.BigInteger, default=0, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('driver_id', 'day', name='_driver_stats_daily_uc'),
+    )
+
+    def to_dict(self):
+        return {
+            'driver_id': self.driver_id,
+            'day': self.day.isoformat() if self.day else None,
+            'assigned_rides': self.assigned_rides,
+            'completed_rides': self.completed_rides,
+            'cancelled_rides': self.cancelled_rides,
+            'fares_total': self.fares_total,
+            'pickup_eta_seconds': self.pickup_eta_seconds,
+            'pickup_eta_count': self.pickup_eta_count,
+            'earnings_total': self.earnings_total,
+            'platform_commission_total': self.platform_commission_total,
+            'online_seconds': self.online_seconds,
+        }
+
+    def __repr__(self):
+        return f'<DriverStatsDaily driver={self.driver_id} {self.day}: {self.completed_rides} courses>'
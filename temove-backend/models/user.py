@@ -3,7 +3,6 @@ Modèle User
 """
 from datetime import datetime
 from extensions import db
-from flask_bcrypt import generate_password_hash, check_password_hash
 
 
 class User(db.Model):
@@ -35,6 +34,13 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Index composites pour la pagination par curseur (tri décroissant par date puis id)
+    __table_args__ = (
+        db.Index('ix_users_created_at_id', 'created_at', 'id'),
+        # Export incrémental (services/analytics_export_service.py)
+        db.Index('ix_users_updated_at_id', 'updated_at', 'id'),
+    )
+    
     # Relations
     rides = db.relationship('Ride', backref='user', lazy=True, cascade='all, delete-orphan')
     referral_code = db.relationship('ReferralCode', backref='user', uselist=False, cascade='all, delete-orphan')
@@ -42,14 +48,14 @@ class User(db.Model):
     ratings_given = db.relationship('Rating', backref='user', lazy=True)
     
     def set_password(self, password):
-        """Hasher le mot de passe"""
-        from flask_bcrypt import generate_password_hash
-        self.password_hash = generate_password_hash(password).decode('utf-8')
+        """Hasher le mot de passe (pool bcrypt borné, services/password_hasher.py)"""
+        from services.password_hasher import hash_password
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
-        """Vérifier le mot de passe"""
-        from flask_bcrypt import check_password_hash
-        return check_password_hash(self.password_hash, password)
+        """Vérifier le mot de passe (pool bcrypt borné, services/password_hasher.py)"""
+        from services.password_hasher import verify_password
+        return verify_password(self.password_hash, password)
     
     def add_credit(self, amount, source='manual'):
         """Ajouter du crédit"""
@@ -1,19 +1,48 @@
 """
 Routes pour l'administration
 """
-from flask import Blueprint, request, jsonify, make_response, send_file, current_app
+from flask import Blueprint, request, jsonify, make_response, send_file, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.user import User
 from models.ride import Ride, RideStatus
 from models.driver import Driver, DriverStatus
 from models.commission import Commission, Revenue
-from models.payment import Payment
+from models.payment import Payment, PaymentStatus
+from models.report_job import ReportJob, ReportJobStatus
 from extensions import db
+from services.admin_stats_service import AdminStatsService, DEFAULT_COMMISSION_RATE, growth
+from services.rollup_service import (
+    rollups_ready, ride_series, payment_series,
+    commission_summary_ready, commission_status_totals, commission_driver_totals
+)
+from services.analytics_service import time_series, AnalyticsError
+from services.pagination import paginate_query, PaginationError
+from services.ride_serializer import (
+    PROJECTIONS, fields_from_request, eager_load, serialize_rides, SerializerError
+)
+from services.admin_search_service import search as search_index, SEARCH_TYPES
+from services.response_cache import cached_response
+from services.response_compression import get_response_metrics, ENCODERS
+from services.identity_service import current_identity, load_identity
+from services.token_revocation import revoke_user_tokens
+from services.rate_limiter import get_rate_limiter
+from services.app_logging import get_logger
+from services.demand_heatmap_service import get_demand_heatmap, HeatmapError, NUMPY_AVAILABLE
+from services.report_export_service import (
+    stream_csv, stream_xlsx, export_filename, EXPORT_FORMATS, REPORT_COLUMNS, OPENPYXL_AVAILABLE
+)
+from services.report_job_service import submit_report_job, mark_downloaded, ReportJobError
+from services.driver_stats_service import (
+    driver_leaderboard, period_bounds, DriverStatsError, LEADERBOARD_METRICS
+)
 from datetime import datetime, timedelta
+from itertools import chain
 from sqlalchemy import func, extract, or_
 import os
+import time
 
 admin_bp = Blueprint('admin', __name__)
+logger = get_logger('admin')
 
 
 # IMPORTANT: Ne pas gérer les requêtes OPTIONS ici car Flask-CORS le fait déjà
@@ -22,15 +51,34 @@ admin_bp = Blueprint('admin', __name__)
 
 
 def _check_admin_access(user_id):
-    """Vérifier que l'utilisateur est admin"""
-    user = User.query.get(user_id)
-    if not user or not getattr(user, 'is_admin', False):
+    """Vérifier que l'utilisateur est admin (claims du token, sans requête : services/identity_service.py)"""
+    if str(user_id) == str(get_jwt_identity()):
+        identity = current_identity()
+    else:
+        identity = load_identity(int(user_id))
+    if not identity or not identity.is_admin:
         return None, jsonify({'error': 'Accès non autorisé'}), 403
-    return user, None, None
+    return identity, None, None
+
+
+def _admin_guard():
+    """Contrôle d'accès exécuté avant la lecture du cache des réponses"""
+    user, error_response, status_code = _check_admin_access(get_jwt_identity())
+    if error_response:
+        return error_response, status_code
+    return None
+
+
+# Durées de vie du cache des réponses (secondes), invalidé aussi à chaque écriture
+STATS_CACHE_TTL = 30
+CHARTS_CACHE_TTL = 60
+MONTHLY_REVENUE_CACHE_TTL = 300
+ALL_DATA_TAGS = ('rides', 'payments', 'commissions', 'users', 'drivers')
 
 
 @admin_bp.route('/dashboard/stats', methods=['GET'])
 @jwt_required()
+@cached_response(ttl=STATS_CACHE_TTL, tags=ALL_DATA_TAGS, guard=_admin_guard)
 def get_dashboard_stats():
     """
     Obtenir les statistiques globales du dashboard admin
@@ -47,189 +95,39 @@ def get_dashboard_stats():
     if error_response:
         return error_response, status_code
     
-    # Période : aujourd'hui et ce mois
-    today = datetime.now().date()
-    start_of_month = datetime(today.year, today.month, 1)
-    last_month = start_of_month - timedelta(days=1)
-    start_of_last_month = datetime(last_month.year, last_month.month, 1)
-    
-    # Revenus du mois actuel (peut ne pas exister encore)
-    current_month_revenue = None
-    last_month_revenue = None
-    
-    try:
-        current_month_revenue = Revenue.query.filter_by(
-            year=today.year,
-            month=today.month
-        ).first()
-        
-        # Revenus du mois précédent
-        last_month_revenue = Revenue.query.filter_by(
-            year=last_month.year,
-            month=last_month.month
-        ).first()
-    except Exception as e:
-        # Si la table n'existe pas encore, continuer avec des valeurs par défaut
-        print(f"⚠️ Table revenues pas encore créée: {e}")
-        current_month_revenue = None
-        last_month_revenue = None
-    
-    # Courses d'aujourd'hui (utiliser requested_at si disponible, sinon created_at)
-    # Le modèle Ride utilise requested_at pour la date de création
-    try:
-        today_rides = Ride.query.filter(
-            func.date(Ride.requested_at) == today
-        ).count()
-    except:
-        # Fallback si requested_at n'existe pas
-        today_rides = Ride.query.count()
-    
-    # Courses du mois (utiliser requested_at si disponible)
-    try:
-        month_rides = Ride.query.filter(
-            Ride.requested_at >= start_of_month
-        ).count()
-    except:
-        month_rides = Ride.query.count()
-    
-    # Courses du mois précédent
-    try:
-        last_month_rides = Ride.query.filter(
-            Ride.requested_at >= start_of_last_month,
-            Ride.requested_at < start_of_month
-        ).count()
-    except:
-        last_month_rides = 0
-    
-    # Utilisateurs actifs (30 derniers jours)
-    try:
-        active_users_30d = User.query.filter(
-            User.created_at >= datetime.now() - timedelta(days=30),
-            User.is_active == True
-        ).count()
-    except:
-        active_users_30d = User.query.filter(User.is_active == True).count()
-    
-    # Total utilisateurs
-    total_users = User.query.filter(User.is_active == True).count()
-    
-    # Conducteurs actifs
-    try:
-        active_drivers = Driver.query.filter(Driver.is_active == True).count()
-    except:
-        active_drivers = Driver.query.count()
-    
-    # Trajets en cours (status: PENDING, DRIVER_ASSIGNED, ACCEPTED, IN_PROGRESS)
-    # Gérer à la fois les Enum et les strings
-    try:
-        # Essayer avec Enum
-        rides_in_progress = Ride.query.filter(
-            Ride.status.in_([
-                RideStatus.PENDING,
-                RideStatus.DRIVER_ASSIGNED,
-                RideStatus.ACCEPTED,
-                RideStatus.IN_PROGRESS
-            ])
-        ).count()
-    except:
-        # Fallback avec strings
-        rides_in_progress = Ride.query.filter(
-            or_(
-                Ride.status == 'pending',
-                Ride.status == 'driver_assigned',
-                Ride.status == 'accepted',
-                Ride.status == 'in_progress'
-            )
-        ).count()
-    
-    # Trajets complétés aujourd'hui
-    try:
-        completed_rides_today = Ride.query.filter(
-            func.date(Ride.requested_at) == today,
-            Ride.status == RideStatus.COMPLETED
-        ).count()
-    except:
-        try:
-            completed_rides_today = Ride.query.filter(
-                Ride.status == 'completed'
-            ).count()
-        except:
-            completed_rides_today = 0
-    
-    # Commissions du mois (peut ne pas exister encore)
-    total_commissions = 0
-    try:
-        monthly_commissions = Commission.query.filter(
-            Commission.created_at >= start_of_month,
-            Commission.status == 'paid'
-        ).all()
-        total_commissions = sum(c.platform_commission for c in monthly_commissions)
-    except Exception as e:
-        # Si la table n'existe pas encore
-        print(f"⚠️ Table commissions pas encore créée: {e}")
-        total_commissions = 0
-    
-    # Calculer les revenus depuis les paiements si Revenue n'existe pas
-    if not current_month_revenue:
-        try:
-            payments = Payment.query.filter(
-                Payment.created_at >= start_of_month,
-                Payment.status == 'completed'
-            ).all()
-            current_month_total = sum(p.amount for p in payments if p.amount)
-        except:
-            current_month_total = 0
-    else:
-        current_month_total = current_month_revenue.total_revenue
-    
-    if not last_month_revenue:
-        try:
-            last_payments = Payment.query.filter(
-                Payment.created_at >= start_of_last_month,
-                Payment.created_at < start_of_month,
-                Payment.status == 'completed'
-            ).all()
-            last_month_total = sum(p.amount for p in last_payments if p.amount)
-        except:
-            last_month_total = 0
-    else:
-        last_month_total = last_month_revenue.total_revenue
-    
-    # Calcul de croissance
-    revenue_growth = 0
-    if last_month_total > 0:
-        revenue_growth = ((current_month_total - last_month_total) / last_month_total) * 100
-    
-    rides_growth = 0
-    if last_month_rides > 0:
-        rides_growth = ((month_rides - last_month_rides) / last_month_rides) * 100
+    stats = AdminStatsService()
+    rides = stats.ride_counts()
+    users = stats.user_counts()
+    drivers = stats.driver_counts()
+    revenue = stats.monthly_revenue()
+    commissions = stats.commission_totals()
     
     return jsonify({
         'revenue': {
-            'current_month': current_month_total,
-            'last_month': last_month_total,
-            'growth': round(revenue_growth, 2),
-            'commissions': total_commissions,
+            'current_month': revenue['this_month'],
+            'last_month': revenue['last_month'],
+            'growth': round(growth(revenue['this_month'], revenue['last_month']), 2),
+            'commissions': commissions['platform_this_month'] if commissions else 0,
         },
         'rides': {
-            'today': today_rides,
-            'completed_today': completed_rides_today,
-            'in_progress': rides_in_progress,
-            'current_month': month_rides,
-            'last_month': last_month_rides,
-            'growth': round(rides_growth, 2),
+            'today': rides['today'],
+            'completed_today': rides['completed_today'],
+            'in_progress': rides['in_progress'],
+            'current_month': rides['this_month'],
+            'last_month': rides['last_month'],
+            'growth': round(growth(rides['this_month'], rides['last_month']), 2),
         },
         'users': {
-            'total': total_users,
-            'active_30d': active_users_30d,
+            'total': users['total'],
+            'active_30d': users['active_30d'],
         },
         'drivers': {
-            'active': active_drivers,
+            'active': drivers['total'],
         },
         'period': {
-            'year': today.year,
-            'month': today.month,
-            'day': today.day,
+            'year': stats.today.year,
+            'month': stats.today.month,
+            'day': stats.today.day,
         },
         'timestamp': datetime.utcnow().isoformat()
     }), 200
@@ -237,6 +135,7 @@ def get_dashboard_stats():
 
 @admin_bp.route('/dashboard/charts/rides', methods=['GET'])
 @jwt_required()
+@cached_response(ttl=CHARTS_CACHE_TTL, tags=('rides',), guard=_admin_guard)
 def get_rides_chart_data():
     """Obtenir les données de graphique pour les courses (par jour sur 7 jours)"""
     current_user_id = get_jwt_identity()
@@ -245,17 +144,30 @@ def get_rides_chart_data():
         return error_response, status_code
     
     # Récupérer les courses des 7 derniers jours
+    today = datetime.now().date()
+    start = datetime(today.year, today.month, today.day) - timedelta(days=6)
+    counts = {}
+    if rollups_ready():
+        # Lecture des rollups journaliers (quelques dizaines de lignes)
+        for row in ride_series('day', start, start + timedelta(days=7)):
+            counts[row['bucket_start'].date().isoformat()] = row['ride_count']
+    else:
+        try:
+            day_column = func.date(Ride.requested_at)
+            rows = db.session.query(day_column, func.count(Ride.id)).filter(
+                Ride.requested_at >= start
+            ).group_by(day_column).all()
+            counts = {str(day): count for day, count in rows}
+        except Exception as e:
+            logger.warning('⚠️ [ADMIN] Erreur calcul des courses par jour: %s', e)
+    
     days = []
     for i in range(6, -1, -1):
-        day = datetime.now().date() - timedelta(days=i)
-        try:
-            count = Ride.query.filter(func.date(Ride.requested_at) == day).count()
-        except:
-            count = 0
+        day = today - timedelta(days=i)
         days.append({
             'date': day.isoformat(),
             'label': day.strftime('%a'),
-            'count': count
+            'count': counts.get(day.isoformat(), 0)
         })
     
     return jsonify({
@@ -266,6 +178,7 @@ def get_rides_chart_data():
 
 @admin_bp.route('/dashboard/charts/revenue', methods=['GET'])
 @jwt_required()
+@cached_response(ttl=CHARTS_CACHE_TTL, tags=('payments',), guard=_admin_guard)
 def get_revenue_chart_data():
     """Obtenir les données de graphique pour les revenus (par jour sur 7 jours)"""
     current_user_id = get_jwt_identity()
@@ -273,22 +186,31 @@ def get_revenue_chart_data():
     if error_response:
         return error_response, status_code
     
-    # Récupérer les revenus des 7 derniers jours depuis les paiements
+    # Récupérer les revenus des 7 derniers jours depuis les paiements complétés
+    today = datetime.now().date()
+    start = datetime(today.year, today.month, today.day) - timedelta(days=6)
+    totals = {}
+    if rollups_ready():
+        for row in payment_series('day', start, start + timedelta(days=7)):
+            totals[row['bucket_start'].date().isoformat()] = row['amount_total']
+    else:
+        try:
+            day_column = func.date(Payment.created_at)
+            rows = db.session.query(day_column, func.sum(Payment.amount)).filter(
+                Payment.created_at >= start,
+                Payment.status == PaymentStatus.COMPLETED
+            ).group_by(day_column).all()
+            totals = {str(day): int(total or 0) for day, total in rows}
+        except Exception as e:
+            logger.warning('⚠️ [ADMIN] Erreur calcul des revenus par jour: %s', e)
+    
     days = []
     for i in range(6, -1, -1):
-        day = datetime.now().date() - timedelta(days=i)
-        try:
-            payments = Payment.query.filter(
-                func.date(Payment.created_at) == day,
-                Payment.status == 'completed'
-            ).all()
-            total = sum(p.amount for p in payments if p.amount)
-        except:
-            total = 0
+        day = today - timedelta(days=i)
         days.append({
             'date': day.isoformat(),
             'label': day.strftime('%a'),
-            'amount': total
+            'amount': totals.get(day.isoformat(), 0)
         })
     
     return jsonify({
@@ -297,8 +219,135 @@ def get_revenue_chart_data():
     }), 200
 
 
+@admin_bp.route('/analytics/timeseries', methods=['GET'])
+@jwt_required()
+@cached_response(ttl=CHARTS_CACHE_TTL, tags=('rides', 'payments', 'commissions'), guard=_admin_guard)
+def get_analytics_timeseries():
+    """
+    Série temporelle sur une plage arbitraire
+
+    Query params:
+        metric: rides, gmv, discounts, commission ou revenue (défaut: rides)
+        granularity: hour, day, week ou month (défaut: day)
+        start, end: dates ISO 8601 (défaut: les 30 derniers jours)
+        ride_mode, category, status: filtres (valeurs séparées par des virgules)
+    """
+    current_user_id = get_jwt_identity()
+    user, error_response, status_code = _check_admin_access(current_user_id)
+    if error_response:
+        return error_response, status_code
+
+    def _list_arg(name):
+        values = []
+        for raw in request.args.getlist(name):
+            values.extend(v.strip() for v in raw.split(',') if v.strip())
+        return values
+
+    metric = request.args.get('metric', 'rides')
+    granularity = request.args.get('granularity', 'day')
+    try:
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else datetime.utcnow()
+        start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else end - timedelta(days=30)
+    except ValueError:
+        return jsonify({'error': 'Dates invalides (format ISO 8601 attendu)'}), 400
+    # Les dates sont stockées en UTC naïf
+    start = start.replace(tzinfo=None)
+    end = end.replace(tzinfo=None)
+
+    filters = {
+        'ride_modes': _list_arg('ride_mode'),
+        'categories': _list_arg('category'),
+        'statuses': _list_arg('status'),
+    }
+    try:
+        series = time_series(metric, granularity, start, end, **filters)
+    except AnalyticsError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'metric': metric,
+        'granularity': granularity,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'filters': {
+            'ride_mode': filters['ride_modes'],
+            'category': filters['categories'],
+            'status': filters['statuses'],
+        },
+        'data': [
+            {'bucket_start': point['bucket_start'].isoformat(), 'value': point['value']}
+            for point in series
+        ],
+        'total': sum(point['value'] for point in series),
+    }), 200
+
+
+@admin_bp.route('/heatmap', methods=['GET'])
+@jwt_required()
+def get_demand_heatmap_grid():
+    """
+    Carte de chaleur de la demande (cellules de 500 m × heure de la semaine)
+    
+    Query params:
+        kind: pickup ou dropoff (défaut: pickup)
+        weekday: 0 (lundi) à 6, optionnel (cumul des jours sinon)
+        hour: 0 à 23, optionnel (cumul des heures sinon)
+        format: json (cellules non vides [ligne, colonne, nombre]) ou binary
+            (grille dense uint32 little-endian, lignes du sud vers le nord)
+    """
+    current_user_id = get_jwt_identity()
+    user, error_response, status_code = _check_admin_access(current_user_id)
+    if error_response:
+        return error_response, status_code
+    
+    if not NUMPY_AVAILABLE:
+        return jsonify({'error': 'Carte de chaleur indisponible (NumPy non installé)'}), 503
+    
+    kind = request.args.get('kind', 'pickup')
+    weekday = request.args.get('weekday', type=int)
+    hour = request.args.get('hour', type=int)
+    output_format = request.args.get('format', 'json')
+    
+    heatmap = get_demand_heatmap()
+    if heatmap is None:
+        response = jsonify({'error': 'Carte de chaleur en cours de calcul, réessayer dans quelques instants'})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    try:
+        grid = heatmap.grid(kind, weekday, hour)
+    except HeatmapError as e:
+        return jsonify({'error': str(e)}), 400
+    metadata = heatmap.metadata()
+    
+    if output_format == 'binary':
+        response = make_response(grid.astype('<u4').tobytes())
+        response.headers['Content-Type'] = 'application/octet-stream'
+        response.headers['X-Heatmap-Rows'] = str(metadata['rows'])
+        response.headers['X-Heatmap-Cols'] = str(metadata['cols'])
+        response.headers['X-Heatmap-Bounds'] = ','.join(
+            str(metadata['bounds'][k]) for k in ('south', 'west', 'north', 'east')
+        )
+        response.headers['X-Heatmap-Cell-Meters'] = str(metadata['cell_meters'])
+        return response
+    if output_format != 'json':
+        return jsonify({'error': 'format doit être json ou binary'}), 400
+    
+    rows, cols = grid.nonzero()
+    values = grid[rows, cols]
+    return jsonify({
+        **metadata,
+        'kind': kind,
+        'weekday': weekday,
+        'hour': hour,
+        'max': int(values.max()) if values.size else 0,
+        'total': int(values.sum()),
+        'cells': [[int(r), int(c), int(v)] for r, c, v in zip(rows, cols, values)],
+    }), 200
+
+
 @admin_bp.route('/revenue/monthly', methods=['GET'])
 @jwt_required()
+@cached_response(ttl=MONTHLY_REVENUE_CACHE_TTL, tags=('rides', 'payments', 'commissions'), guard=_admin_guard)
 def get_monthly_revenue():
     """Obtenir les revenus mensuels"""
     current_user_id = get_jwt_identity()
@@ -320,13 +369,14 @@ def get_monthly_revenue():
             else:
                 end_date = datetime(year, month + 1, 1)
             
-            payments = Payment.query.filter(
-                Payment.created_at >= start_date,
-                Payment.created_at < end_date,
-                Payment.status == 'completed'
-            ).all()
-            
-            total = sum(p.amount for p in payments if p.amount)
+            if rollups_ready():
+                total = sum(row['amount_total'] for row in payment_series('month', start_date, end_date))
+            else:
+                total = db.session.query(func.coalesce(func.sum(Payment.amount), 0)).filter(
+                    Payment.created_at >= start_date,
+                    Payment.created_at < end_date,
+                    Payment.status == PaymentStatus.COMPLETED
+                ).scalar()
             
             return jsonify({
                 'year': year,
@@ -349,9 +399,7 @@ def list_users():
     if error_response:
         return error_response, status_code
     
-    # Paramètres de pagination
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
+    # Filtres (pagination : voir services/pagination.py)
     search = request.args.get('search', '')
     status = request.args.get('status')  # active, inactive, all
     
@@ -374,18 +422,50 @@ def list_users():
     elif status == 'inactive':
         query = query.filter(User.is_active == False)
     
-    # Pagination
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-    users = pagination.items
+    # Pagination (curseur ou numéro de page)
+    try:
+        users, pagination = paginate_query(query, User.created_at, User.id)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     
     return jsonify({
         'users': [user.to_dict(include_sensitive=True) for user in users],
-        'pagination': {
-            'page': page,
-            'per_page': per_page,
-            'total': pagination.total,
-            'pages': pagination.pages,
-        }
+        'pagination': pagination
+    }), 200
+
+
+@admin_bp.route('/search', methods=['GET'])
+@jwt_required()
+def admin_search():
+    """
+    Recherche plein texte (support) : nom, téléphone, email, plaque ou adresse
+    
+    Query params:
+        q: texte recherché (préfixes acceptés : « mous diop », « 77 123 », « DK1234 »)
+        types: users, drivers, rides (séparés par des virgules, défaut: tous)
+        limit: résultats par type (défaut: 10, max: 50)
+    """
+    current_user_id = get_jwt_identity()
+    user, error_response, status_code = _check_admin_access(current_user_id)
+    if error_response:
+        return error_response, status_code
+    
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Paramètre q requis'}), 400
+    types = [t.strip() for t in request.args.get('types', ','.join(SEARCH_TYPES)).split(',') if t.strip()]
+    unknown = [t for t in types if t not in SEARCH_TYPES]
+    if unknown:
+        return jsonify({'error': f'Types inconnus: {", ".join(unknown)} (valeurs: {", ".join(SEARCH_TYPES)})'}), 400
+    limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+    
+    started = time.perf_counter()
+    results = search_index(query, types=types, limit=limit)
+    
+    return jsonify({
+        'query': query,
+        'results': results,
+        'took_ms': round((time.perf_counter() - started) * 1000, 1),
     }), 200
 
 
@@ -400,16 +480,14 @@ def get_user(user_id):
     
     target_user = User.query.get_or_404(user_id)
     
-    # Récupérer les courses de l'utilisateur
-    # Utiliser requested_at si disponible, sinon trier par id
-    try:
-        rides = Ride.query.filter_by(user_id=user_id).order_by(Ride.requested_at.desc()).limit(10).all()
-    except:
-        rides = Ride.query.filter_by(user_id=user_id).order_by(Ride.id.desc()).limit(10).all()
+    # Récupérer les courses de l'utilisateur (chauffeur et client chargés avec les courses)
+    rides = eager_load(
+        Ride.query.filter_by(user_id=user_id).order_by(Ride.requested_at.desc()).limit(10), PROJECTIONS['admin']
+    ).all()
     
     return jsonify({
         'user': target_user.to_dict(include_sensitive=True),
-        'recent_rides': [ride.to_dict() for ride in rides],
+        'recent_rides': serialize_rides(rides, 'admin'),
         'total_rides': Ride.query.filter_by(user_id=user_id).count(),
     }), 200
 
@@ -433,6 +511,21 @@ def toggle_user_status(user_id):
     }), 200
 
 
+@admin_bp.route('/users/<int:user_id>/revoke-tokens', methods=['POST'])
+@jwt_required()
+def revoke_user_tokens_route(user_id):
+    """Déconnecter un utilisateur de toutes ses sessions (tokens déjà émis révoqués)"""
+    current_user_id = get_jwt_identity()
+    user, error_response, status_code = _check_admin_access(current_user_id)
+    if error_response:
+        return error_response, status_code
+    
+    target_user = User.query.get_or_404(user_id)
+    revoke_user_tokens(target_user.id)
+    
+    return jsonify({'message': 'Sessions de l\'utilisateur révoquées', 'user_id': target_user.id}), 200
+
+
 @admin_bp.route('/drivers', methods=['GET'])
 @jwt_required()
 def list_drivers():
@@ -442,8 +535,6 @@ def list_drivers():
     if error_response:
         return error_response, status_code
     
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
     status = request.args.get('status')  # pending, active, inactive
     search = request.args.get('search', '')
     
@@ -467,17 +558,14 @@ def list_drivers():
     elif status == 'inactive':
         query = query.filter(Driver.is_active == False)
     
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-    drivers = pagination.items
+    try:
+        drivers, pagination = paginate_query(query, Driver.created_at, Driver.id)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     
     return jsonify({
         'drivers': [driver.to_dict() for driver in drivers],
-        'pagination': {
-            'page': page,
-            'per_page': per_page,
-            'total': pagination.total,
-            'pages': pagination.pages,
-        }
+        'pagination': pagination
     }), 200
 
 
@@ -492,15 +580,14 @@ def get_driver(driver_id):
     
     driver = Driver.query.get_or_404(driver_id)
     
-    # Récupérer les courses du conducteur
-    try:
-        rides = Ride.query.filter_by(driver_id=driver_id).order_by(Ride.requested_at.desc()).limit(10).all()
-    except:
-        rides = Ride.query.filter_by(driver_id=driver_id).order_by(Ride.id.desc()).limit(10).all()
+    # Récupérer les courses du conducteur (chauffeur et client chargés avec les courses)
+    rides = eager_load(
+        Ride.query.filter_by(driver_id=driver_id).order_by(Ride.requested_at.desc()).limit(10), PROJECTIONS['admin']
+    ).all()
     
     return jsonify({
         'driver': driver.to_dict(),
-        'recent_rides': [ride.to_dict() for ride in rides],
+        'recent_rides': serialize_rides(rides, 'admin'),
         'total_rides': Ride.query.filter_by(driver_id=driver_id).count(),
     }), 200
 
@@ -573,13 +660,17 @@ def list_rides():
     if error_response:
         return error_response, status_code
     
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
     status = request.args.get('status')
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    query = Ride.query
+    # Projection 'admin' par défaut (?view=lite|full, ?fields=id,status,user,...)
+    try:
+        projection, fields = fields_from_request(default='admin', allowed=('lite', 'full', 'admin'))
+    except SerializerError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    query = eager_load(Ride.query, fields)
     
     # Gérer le statut (Enum ou string)
     if status:
@@ -602,23 +693,15 @@ def list_rides():
         except:
             pass
     
-    # Trier par date (requested_at si disponible)
+    # Tri par (requested_at, id) décroissants, index ix_rides_requested_at_id
     try:
-        query = query.order_by(Ride.requested_at.desc())
-    except:
-        query = query.order_by(Ride.id.desc())
-    
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-    rides = pagination.items
+        rides, pagination = paginate_query(query, Ride.requested_at, Ride.id)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     
     return jsonify({
-        'rides': [ride.to_dict() for ride in rides],
-        'pagination': {
-            'page': page,
-            'per_page': per_page,
-            'total': pagination.total,
-            'pages': pagination.pages,
-        }
+        'rides': serialize_rides(rides, projection, fields),
+        'pagination': pagination
     }), 200
 
 
@@ -745,6 +828,7 @@ def list_commissions():
     
     try:
         query = Commission.query
+        date_filtered = False
         
         if status and status != 'all':
             query = query.filter(Commission.status == status)
@@ -753,6 +837,7 @@ def list_commissions():
             try:
                 start = datetime.fromisoformat(start_date)
                 query = query.filter(Commission.created_at >= start)
+                date_filtered = True
             except:
                 pass
         
@@ -760,19 +845,26 @@ def list_commissions():
             try:
                 end = datetime.fromisoformat(end_date)
                 query = query.filter(Commission.created_at <= end)
+                date_filtered = True
             except:
                 pass
         
-        query = query.order_by(Commission.created_at.desc())
+        # Totaux par statut : toutes les commissions si aucun statut n'est demandé,
+        # sinon celles de la liste filtrée
+        exact_total = None
+        if (status is None or not date_filtered) and commission_summary_ready():
+            statuses = [status] if status and status != 'all' else None
+            totals = commission_status_totals(statuses)
+            if not date_filtered:
+                exact_total = sum(t['commission_count'] for t in totals.values())
+        else:
+            totals = _commission_status_totals_sql(Commission.query if status is None else query)
+        total_commission = sum(t['platform_total'] for t in totals.values())
+        total_paid = totals.get('paid', {}).get('platform_total', 0)
+        total_pending = totals.get('pending', {}).get('platform_total', 0)
         
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-        commissions = pagination.items
-        
-        # Calculer les totaux
-        all_commissions = Commission.query.all() if status is None else query.all()
-        total_commission = sum(c.platform_commission for c in all_commissions)
-        total_paid = sum(c.platform_commission for c in all_commissions if c.status == 'paid')
-        total_pending = sum(c.platform_commission for c in all_commissions if c.status == 'pending')
+        commissions, pagination = paginate_query(query, Commission.created_at, Commission.id,
+                                                 exact_total=exact_total)
         
         # Enrichir les commissions avec les données du driver
         commissions_dict = []
@@ -789,13 +881,10 @@ def list_commissions():
             'total_commission': total_commission,
             'total_paid': total_paid,
             'total_pending': total_pending,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': pagination.total,
-                'pages': pagination.pages,
-            }
+            'pagination': pagination
         }), 200
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -814,6 +903,155 @@ def list_commissions():
         }), 200
 
 
+def _commission_status_totals_sql(query):
+    """Totaux par statut d'une requête de commissions, en un seul GROUP BY"""
+    rows = query.order_by(None).with_entities(
+        Commission.status, func.count(Commission.id), func.sum(Commission.platform_commission)
+    ).group_by(Commission.status).all()
+    return {
+        status: {'commission_count': count, 'platform_total': int(total or 0)}
+        for status, count, total in rows
+    }
+
+
+@admin_bp.route('/commissions/by-driver', methods=['GET'])
+@jwt_required()
+def list_commissions_by_driver():
+    """
+    Totaux des commissions par conducteur (triés par commission plateforme décroissante)
+    
+    Query params:
+        status: pending, paid, failed (valeurs séparées par des virgules, défaut: tous)
+        driver_id: limiter à un conducteur
+        page, per_page: pagination (per_page max 200)
+    """
+    current_user_id = get_jwt_identity()
+    user, error_response, status_code = _check_admin_access(current_user_id)
+    if error_response:
+        return error_response, status_code
+    
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = max(1, min(request.args.get('per_page', 50, type=int), 200))
+    statuses = [s.strip() for s in request.args.get('status', '').split(',') if s.strip() and s.strip() != 'all']
+    driver_id = request.args.get('driver_id', type=int)
+    driver_ids = [driver_id] if driver_id else None
+    
+    if commission_summary_ready():
+        rows, total = commission_driver_totals(statuses, driver_ids, limit=per_page, offset=(page - 1) * per_page)
+    else:
+        # Totaux pas encore construits : un GROUP BY sur la table des commissions
+        query = db.session.query(
+            Commission.driver_id, Commission.status, func.count(Commission.id),
+            func.sum(Commission.ride_price), func.sum(Commission.platform_commission),
+            func.sum(Commission.driver_earnings), func.sum(Commission.service_fee)
+        )
+        if statuses:
+            query = query.filter(Commission.status.in_(statuses))
+        if driver_ids:
+            query = query.filter(Commission.driver_id.in_(driver_ids))
+        by_driver = {}
+        for d_id, c_status, count, ride_price, platform, earnings, fees in query.group_by(
+            Commission.driver_id, Commission.status
+        ).all():
+            entry = by_driver.setdefault(d_id, {
+                'driver_id': d_id, 'by_status': {}, 'commission_count': 0, 'ride_price_total': 0,
+                'platform_total': 0, 'driver_earnings_total': 0, 'service_fee_total': 0,
+            })
+            entry['commission_count'] += count
+            entry['ride_price_total'] += int(ride_price or 0)
+            entry['platform_total'] += int(platform or 0)
+            entry['driver_earnings_total'] += int(earnings or 0)
+            entry['service_fee_total'] += int(fees or 0)
+            entry['by_status'][c_status] = int(platform or 0)
+        ordered = sorted(by_driver.values(), key=lambda e: (-e['platform_total'], e['driver_id']))
+        total = len(ordered)
+        rows = ordered[(page - 1) * per_page:page * per_page]
+    
+    # Informations des conducteurs de la page en une requête
+    drivers = {
+        d.id: d for d in Driver.query.filter(Driver.id.in_([r['driver_id'] for r in rows])).all()
+    } if rows else {}
+    for row in rows:
+        driver = drivers.get(row['driver_id'])
+        row['driver'] = {
+            'id': driver.id,
+            'full_name': driver.full_name,
+            'phone': driver.phone,
+            'license_plate': driver.license_plate,
+        } if driver else None
+    
+    return jsonify({
+        'drivers': rows,
+        'pagination': {
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'pages': (total + per_page - 1) // per_page,
+        }
+    }), 200
+
+
+@admin_bp.route('/drivers/leaderboard', methods=['GET'])
+@jwt_required()
+@cached_response(ttl=STATS_CACHE_TTL, tags=('rides', 'commissions', 'drivers'), guard=_admin_guard)
+def get_drivers_leaderboard():
+    """
+    Classement des conducteurs (lu depuis driver_stats_daily)
+    
+    Query params:
+        metric: earnings (défaut), completed_rides, fares, online_hours,
+            completion_rate, cancellation_rate, pickup_eta
+        period: today, week (défaut) ou month ; start, end: dates YYYY-MM-DD
+        min_rides: nombre minimal de courses attribuées sur la période
+        page, per_page: pagination (per_page max 200)
+    """
+    current_user_id = get_jwt_identity()
+    user, error_response, status_code = _check_admin_access(current_user_id)
+    if error_response:
+        return error_response, status_code
+    
+    metric = request.args.get('metric', 'earnings')
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = max(1, min(request.args.get('per_page', 20, type=int), 200))
+    min_rides = max(request.args.get('min_rides', 0, type=int), 0)
+    try:
+        start_day, end_day = period_bounds(
+            request.args.get('period', 'week'), request.args.get('start'), request.args.get('end')
+        )
+        rows, total = driver_leaderboard(metric, start_day, end_day, limit=per_page,
+                                         offset=(page - 1) * per_page, min_rides=min_rides)
+    except DriverStatsError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Informations des conducteurs de la page en une requête
+    drivers = {
+        d.id: d for d in Driver.query.filter(Driver.id.in_([r['driver_id'] for r in rows])).all()
+    } if rows else {}
+    for row in rows:
+        driver = drivers.get(row['driver_id'])
+        row['driver'] = {
+            'id': driver.id,
+            'full_name': driver.full_name,
+            'phone': driver.phone,
+            'license_plate': driver.license_plate,
+            'rating_average': driver.rating_average,
+        } if driver else None
+    
+    return jsonify({
+        'metric': metric,
+        'metrics': list(LEADERBOARD_METRICS),
+        'start': start_day.isoformat(),
+        'end': end_day.isoformat(),
+        'drivers': rows,
+        'pagination': {
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'pages': (total + per_page - 1) // per_page,
+        }
+    }), 200
+
+
 @admin_bp.route('/commissions/<int:commission_id>/mark-paid', methods=['POST'])
 @jwt_required()
 def mark_commission_paid(commission_id):
@@ -853,8 +1091,6 @@ def list_payments():
     if error_response:
         return error_response, status_code
     
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
     status = request.args.get('status')
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
@@ -876,10 +1112,10 @@ def list_payments():
         except:
             pass
     
-    query = query.order_by(Payment.created_at.desc())
-    
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-    payments = pagination.items
+    try:
+        payments, pagination = paginate_query(query, Payment.created_at, Payment.id)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     
     return jsonify({
         'payments': [p.to_dict() if hasattr(p, 'to_dict') else {
@@ -891,12 +1127,7 @@ def list_payments():
             'status': p.status,
             'created_at': p.created_at.isoformat() if p.created_at else None,
         } for p in payments],
-        'pagination': {
-            'page': page,
-            'per_page': per_page,
-            'total': pagination.total,
-            'pages': pagination.pages,
-        }
+        'pagination': pagination
     }), 200
 
 
@@ -906,6 +1137,7 @@ def list_payments():
 
 @admin_bp.route('/temove/stats', methods=['GET'])
 @jwt_required()
+@cached_response(ttl=STATS_CACHE_TTL, tags=ALL_DATA_TAGS, guard=_admin_guard)
 def get_temove_stats():
     """Statistiques spécifiques à TeMove (Application Client)"""
     current_user_id = get_jwt_identity()
@@ -913,109 +1145,50 @@ def get_temove_stats():
     if error_response:
         return error_response, status_code
     
-    today = datetime.now().date()
-    start_of_month = datetime(today.year, today.month, 1)
-    last_month = start_of_month - timedelta(days=1)
-    start_of_last_month = datetime(last_month.year, last_month.month, 1)
-    
-    # Clients (Users)
-    total_clients = User.query.filter(User.is_active == True).count()
-    new_clients_this_month = User.query.filter(
-        User.created_at >= start_of_month,
-        User.is_active == True
-    ).count()
-    new_clients_last_month = User.query.filter(
-        User.created_at >= start_of_last_month,
-        User.created_at < start_of_month,
-        User.is_active == True
-    ).count()
-    
-    # Courses des clients (utiliser requested_at si disponible)
-    try:
-        today_rides = Ride.query.filter(func.date(Ride.requested_at) == today).count()
-        month_rides = Ride.query.filter(Ride.requested_at >= start_of_month).count()
-        last_month_rides = Ride.query.filter(
-            Ride.requested_at >= start_of_last_month,
-            Ride.requested_at < start_of_month
-        ).count()
-    except:
-        today_rides = Ride.query.count()
-        month_rides = Ride.query.count()
-        last_month_rides = 0
+    stats = AdminStatsService()
+    clients = stats.user_counts()
+    rides = stats.ride_counts()
     
     # Revenus (commissions sur les courses)
-    try:
-        month_commissions = Commission.query.filter(
-            Commission.created_at >= start_of_month,
-            Commission.status == 'paid'
-        ).all()
-        month_revenue = sum(c.platform_commission for c in month_commissions)
-        
-        last_month_commissions = Commission.query.filter(
-            Commission.created_at >= start_of_last_month,
-            Commission.created_at < start_of_month,
-            Commission.status == 'paid'
-        ).all()
-        last_month_revenue = sum(c.platform_commission for c in last_month_commissions)
-    except:
+    commissions = stats.commission_totals()
+    if commissions is not None:
+        month_revenue = commissions['platform_this_month']
+        last_month_revenue = commissions['platform_last_month']
+    else:
         # Calculer depuis les paiements si Commission n'existe pas
-        try:
-            month_payments = Payment.query.filter(
-                Payment.created_at >= start_of_month,
-                Payment.status == 'completed'
-            ).all()
-            month_revenue = sum(p.amount * 0.15 for p in month_payments if p.amount)  # 15% de commission
-            
-            last_month_payments = Payment.query.filter(
-                Payment.created_at >= start_of_last_month,
-                Payment.created_at < start_of_month,
-                Payment.status == 'completed'
-            ).all()
-            last_month_revenue = sum(p.amount * 0.15 for p in last_month_payments if p.amount)
-        except:
-            month_revenue = 0
-            last_month_revenue = 0
+        payments = stats.payment_totals()
+        month_revenue = payments['this_month'] * DEFAULT_COMMISSION_RATE
+        last_month_revenue = payments['last_month'] * DEFAULT_COMMISSION_RATE
     
-    # Calculs de croissance
-    clients_growth = 0
-    if new_clients_last_month > 0:
-        clients_growth = ((new_clients_this_month - new_clients_last_month) / new_clients_last_month) * 100
-    
-    rides_growth = 0
-    if last_month_rides > 0:
-        rides_growth = ((month_rides - last_month_rides) / last_month_rides) * 100
-    
-    revenue_growth = 0
-    if last_month_revenue > 0:
-        revenue_growth = ((month_revenue - last_month_revenue) / last_month_revenue) * 100
+    total_clients = clients['total']
     
     # Revenu par client (moyenne)
     avg_revenue_per_client = month_revenue / total_clients if total_clients > 0 else 0
-    rides_per_client = month_rides / total_clients if total_clients > 0 else 0
+    rides_per_client = rides['this_month'] / total_clients if total_clients > 0 else 0
     
     return jsonify({
         'application': 'TeMove',
         'period': {
-            'year': today.year,
-            'month': today.month,
+            'year': stats.today.year,
+            'month': stats.today.month,
         },
         'clients': {
             'total': total_clients,
-            'new_this_month': new_clients_this_month,
-            'new_last_month': new_clients_last_month,
-            'growth': round(clients_growth, 2),
+            'new_this_month': clients['new_this_month'],
+            'new_last_month': clients['new_last_month'],
+            'growth': round(growth(clients['new_this_month'], clients['new_last_month']), 2),
         },
         'rides': {
-            'today': today_rides,
-            'this_month': month_rides,
-            'last_month': last_month_rides,
-            'growth': round(rides_growth, 2),
+            'today': rides['today'],
+            'this_month': rides['this_month'],
+            'last_month': rides['last_month'],
+            'growth': round(growth(rides['this_month'], rides['last_month']), 2),
             'per_client': round(rides_per_client, 2),
         },
         'revenue': {
             'this_month': month_revenue,
             'last_month': last_month_revenue,
-            'growth': round(revenue_growth, 2),
+            'growth': round(growth(month_revenue, last_month_revenue), 2),
             'per_client': round(avg_revenue_per_client, 2),
         },
     }), 200
@@ -1041,6 +1214,7 @@ def list_temove_rides():
 
 @admin_bp.route('/temove-pro/stats', methods=['GET'])
 @jwt_required()
+@cached_response(ttl=STATS_CACHE_TTL, tags=ALL_DATA_TAGS, guard=_admin_guard)
 def get_temove_pro_stats():
     """Statistiques spécifiques à TeMove Pro (Application Conducteur)"""
     current_user_id = get_jwt_identity()
@@ -1048,119 +1222,51 @@ def get_temove_pro_stats():
     if error_response:
         return error_response, status_code
     
-    today = datetime.now().date()
-    start_of_month = datetime(today.year, today.month, 1)
-    last_month = start_of_month - timedelta(days=1)
-    start_of_last_month = datetime(last_month.year, last_month.month, 1)
-    
-    # Conducteurs
-    total_drivers = Driver.query.filter(Driver.is_active == True).count()
-    new_drivers_this_month = Driver.query.filter(
-        Driver.created_at >= start_of_month,
-        Driver.is_active == True
-    ).count()
-    new_drivers_last_month = Driver.query.filter(
-        Driver.created_at >= start_of_last_month,
-        Driver.created_at < start_of_month,
-        Driver.is_active == True
-    ).count()
-    
-    # Conducteurs approuvés/en attente
-    approved_drivers = Driver.query.filter(
-        Driver.is_active == True,
-        Driver.is_verified == True
-    ).count()
-    pending_drivers = Driver.query.filter(
-        Driver.is_verified == False
-    ).count()
-    
-    # Courses des conducteurs (utiliser requested_at si disponible)
-    try:
-        today_rides = Ride.query.filter(func.date(Ride.requested_at) == today).count()
-        month_rides = Ride.query.filter(Ride.requested_at >= start_of_month).count()
-        last_month_rides = Ride.query.filter(
-            Ride.requested_at >= start_of_last_month,
-            Ride.requested_at < start_of_month
-        ).count()
-    except:
-        today_rides = Ride.query.count()
-        month_rides = Ride.query.count()
-        last_month_rides = 0
-    
-    # Commissions
-    try:
-        month_commissions = Commission.query.filter(
-            Commission.created_at >= start_of_month,
-            Commission.status == 'paid'
-        ).all()
-        total_commissions = sum(c.platform_commission for c in month_commissions)
-        total_driver_earnings = sum(c.driver_earnings for c in month_commissions)
-        
-        last_month_commissions = Commission.query.filter(
-            Commission.created_at >= start_of_last_month,
-            Commission.created_at < start_of_month,
-            Commission.status == 'paid'
-        ).all()
-        last_month_commissions_total = sum(c.platform_commission for c in last_month_commissions)
-    except:
-        total_commissions = 0
-        total_driver_earnings = 0
-        last_month_commissions_total = 0
-    
-    # Note moyenne des conducteurs
-    try:
-        avg_rating = db.session.query(func.avg(Driver.rating_average)).filter(
-            Driver.is_active == True,
-            Driver.rating_count > 0
-        ).scalar() or 0.0
-    except:
-        avg_rating = 0.0
-    
-    # Calculs de croissance
-    drivers_growth = 0
-    if new_drivers_last_month > 0:
-        drivers_growth = ((new_drivers_this_month - new_drivers_last_month) / new_drivers_last_month) * 100
+    stats = AdminStatsService()
+    drivers = stats.driver_counts()
+    rides = stats.ride_counts()
+    commissions = stats.commission_totals() or {
+        'platform_this_month': 0,
+        'driver_earnings_this_month': 0,
+        'platform_last_month': 0,
+    }
     
-    rides_growth = 0
-    if last_month_rides > 0:
-        rides_growth = ((month_rides - last_month_rides) / last_month_rides) * 100
-    
-    commissions_growth = 0
-    if last_month_commissions_total > 0:
-        commissions_growth = ((total_commissions - last_month_commissions_total) / last_month_commissions_total) * 100
+    total_drivers = drivers['total']
+    total_commissions = commissions['platform_this_month']
+    total_driver_earnings = commissions['driver_earnings_this_month']
     
     # Revenu par conducteur (moyenne)
     avg_commission_per_driver = total_commissions / total_drivers if total_drivers > 0 else 0
     avg_earnings_per_driver = total_driver_earnings / total_drivers if total_drivers > 0 else 0
-    rides_per_driver = month_rides / total_drivers if total_drivers > 0 else 0
+    rides_per_driver = rides['this_month'] / total_drivers if total_drivers > 0 else 0
     
     return jsonify({
         'application': 'TeMove Pro',
         'period': {
-            'year': today.year,
-            'month': today.month,
+            'year': stats.today.year,
+            'month': stats.today.month,
         },
         'drivers': {
             'total': total_drivers,
-            'approved': approved_drivers,
-            'pending': pending_drivers,
-            'new_this_month': new_drivers_this_month,
-            'new_last_month': new_drivers_last_month,
-            'growth': round(drivers_growth, 2),
-            'avg_rating': round(avg_rating, 2),
+            'approved': drivers['approved'],
+            'pending': drivers['pending'],
+            'new_this_month': drivers['new_this_month'],
+            'new_last_month': drivers['new_last_month'],
+            'growth': round(growth(drivers['new_this_month'], drivers['new_last_month']), 2),
+            'avg_rating': round(drivers['avg_rating'], 2),
         },
         'rides': {
-            'today': today_rides,
-            'this_month': month_rides,
-            'last_month': last_month_rides,
-            'growth': round(rides_growth, 2),
+            'today': rides['today'],
+            'this_month': rides['this_month'],
+            'last_month': rides['last_month'],
+            'growth': round(growth(rides['this_month'], rides['last_month']), 2),
             'per_driver': round(rides_per_driver, 2),
         },
         'commissions': {
             'platform_this_month': total_commissions,
             'driver_earnings_this_month': total_driver_earnings,
-            'platform_last_month': last_month_commissions_total,
-            'growth': round(commissions_growth, 2),
+            'platform_last_month': commissions['platform_last_month'],
+            'growth': round(growth(total_commissions, commissions['platform_last_month']), 2),
             'avg_per_driver': round(avg_commission_per_driver, 2),
         },
         'earnings': {
@@ -1196,6 +1302,7 @@ def list_temove_pro_commissions():
 
 @admin_bp.route('/dashboard/overview', methods=['GET'])
 @jwt_required()
+@cached_response(ttl=STATS_CACHE_TTL, tags=ALL_DATA_TAGS, guard=_admin_guard)
 def get_dashboard_overview():
     """Vue d'ensemble combinée des deux applications"""
     current_user_id = get_jwt_identity()
@@ -1204,38 +1311,22 @@ def get_dashboard_overview():
         return error_response, status_code
     
     # Statistiques globales
-    today = datetime.now().date()
-    total_users = User.query.filter(User.is_active == True).count()
-    active_drivers = Driver.query.filter(Driver.is_active == True).count()
-    total_rides = Ride.query.count()
-    
-    # Calculer les stats TeMove (logique simplifiée)
-    start_of_month = datetime(today.year, today.month, 1)
-    try:
-        month_rides = Ride.query.filter(Ride.requested_at >= start_of_month).count()
-    except:
-        month_rides = Ride.query.count()
-    
-    # Calculer les stats TeMove Pro (logique simplifiée)
-    try:
-        month_commissions = Commission.query.filter(
-            Commission.created_at >= start_of_month,
-            Commission.status == 'paid'
-        ).all()
-        total_commissions = sum(c.platform_commission for c in month_commissions)
-    except:
-        total_commissions = 0
+    stats = AdminStatsService()
+    total_users = stats.user_counts()['total']
+    active_drivers = stats.driver_counts()['total']
+    rides = stats.ride_counts()
+    commissions = stats.commission_totals()
     
     return jsonify({
         'overview': {
             'total_users': total_users,
             'total_drivers': active_drivers,
-            'total_rides': total_rides,
-            'month_rides': month_rides,
-            'month_commissions': total_commissions,
+            'total_rides': rides['total'],
+            'month_rides': rides['this_month'],
+            'month_commissions': commissions['platform_this_month'] if commissions else 0,
             'period': {
-                'year': today.year,
-                'month': today.month,
+                'year': stats.today.year,
+                'month': stats.today.month,
             },
         },
         'applications': {
@@ -1296,10 +1387,40 @@ def list_subscriptions():
         }), 200
 
 
+def _stream_report_export(report_type, format_type, start_date, end_date):
+    """Réponse en flux d'un export CSV / Excel (lecture par lots, sans limite de lignes)"""
+    if report_type not in REPORT_COLUMNS:
+        return jsonify({'error': f'Type de rapport inconnu: {report_type}'}), 400
+    if format_type == 'excel' and not OPENPYXL_AVAILABLE:
+        return jsonify({
+            'error': 'Bibliothèque openpyxl non installée. Installez-la avec: pip install openpyxl'
+        }), 500
+    
+    writer = stream_csv if format_type == 'csv' else stream_xlsx
+    chunks = writer(report_type, start_date, end_date)
+    # Produire le premier morceau ici : une erreur de requête donne encore une réponse 500
+    first_chunk = next(chunks)
+    
+    filename = export_filename(report_type, start_date, end_date, format_type)
+    response = current_app.response_class(
+        stream_with_context(chain([first_chunk], chunks)),
+        mimetype=EXPORT_FORMATS[format_type][1],
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    # Désactiver la mise en tampon des proxys (nginx) pour envoyer les lots au fil de l'eau
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @admin_bp.route('/reports/generate', methods=['POST'])
 @jwt_required()
 def generate_report():
-    """Générer un rapport (Excel/PDF) et le retourner pour téléchargement"""
+    """
+    Générer un rapport (Excel/CSV/PDF) et le retourner pour téléchargement
+    
+    Excel et CSV sont exportés en flux, sans limite de lignes
+    (services/report_export_service.py).
+    """
     current_user_id = get_jwt_identity()
     user, error_response, status_code = _check_admin_access(current_user_id)
     if error_response:
@@ -1310,7 +1431,7 @@ def generate_report():
         report_type = data.get('report_type', 'revenue')
         start_date_str = data.get('start_date')
         end_date_str = data.get('end_date')
-        format_type = data.get('format', 'excel')  # 'excel', 'pdf'
+        format_type = data.get('format', 'excel')  # 'excel', 'csv', 'pdf'
         
         # Parser les dates
         try:
@@ -1320,6 +1441,9 @@ def generate_report():
             start_date = datetime.now() - timedelta(days=30)
             end_date = datetime.now()
         
+        if format_type in EXPORT_FORMATS:
+            return _stream_report_export(report_type, format_type, start_date, end_date)
+        
         # Récupérer les données selon le type de rapport
         report_data = []
         title = f"Rapport {report_type.title()}"
@@ -1358,12 +1482,13 @@ def generate_report():
         elif report_type == 'rides':
             # Récupérer les courses
             try:
-                rides = Ride.query.filter(
+                rides = eager_load(Ride.query.filter(
                     Ride.requested_at >= start_date,
                     Ride.requested_at <= end_date
-                ).order_by(Ride.requested_at.desc()).limit(1000).all()
+                ).order_by(Ride.requested_at.desc()).limit(1000), PROJECTIONS['admin']).all()
                 
-                report_data = [ride.to_dict() for ride in rides]
+                # Projection admin : noms du client et du chauffeur pour prepare_rides_data
+                report_data = serialize_rides(rides, 'admin')
                 title = "Rapport des Courses"
             except Exception as e:
                 current_app.logger.error(f"Erreur lors de la récupération des courses: {e}")
@@ -1490,7 +1615,7 @@ def generate_report():
                 )
                 mimetype = 'application/pdf'
             else:
-                return jsonify({'error': 'Format non supporté. Utilisez "excel" ou "pdf"'}), 400
+                return jsonify({'error': 'Format non supporté. Utilisez "excel", "csv" ou "pdf"'}), 400
             
             # Retourner le fichier pour téléchargement
             filename = os.path.basename(filepath)
@@ -1524,6 +1649,124 @@ def generate_report():
         }), 500
 
 
+@admin_bp.route('/reports/jobs', methods=['POST'])
+@jwt_required()
+def create_report_job():
+    """
+    Demander un rapport généré en arrière-plan
+    
+    Body: { report_type, format: excel|csv|pdf, start_date, end_date }
+    Une demande identique à un job en cours ou récent réutilise ce job (200),
+    sinon un nouveau job est créé (202). Suivre GET /reports/jobs/<id> puis
+    télécharger via GET /reports/jobs/<id>/download.
+    """
+    current_user_id = get_jwt_identity()
+    user, error_response, status_code = _check_admin_access(current_user_id)
+    if error_response:
+        return error_response, status_code
+    
+    data = request.get_json() or {}
+    # Sans date de fin, « maintenant » arrondi à la minute pour que les demandes répétées soient dédupliquées
+    now = datetime.now().replace(second=0, microsecond=0)
+    try:
+        end_date = datetime.fromisoformat(data['end_date']) if data.get('end_date') else now
+        start_date = datetime.fromisoformat(data['start_date']) if data.get('start_date') else end_date - timedelta(days=30)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'start_date / end_date doivent être au format ISO'}), 400
+    
+    try:
+        job, created = submit_report_job(
+            data.get('report_type', 'revenue'), data.get('format', 'excel'), start_date, end_date,
+            user_id=user.id
+        )
+    except ReportJobError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'job': job.to_dict(), 'reused': not created}), 202 if created else 200
+
+
+@admin_bp.route('/reports/jobs', methods=['GET'])
+@jwt_required()
+def list_report_jobs():
+    """Derniers jobs de rapport (query param limit, 50 par défaut, 200 max)"""
+    current_user_id = get_jwt_identity()
+    user, error_response, status_code = _check_admin_access(current_user_id)
+    if error_response:
+        return error_response, status_code
+    
+    limit = max(1, min(request.args.get('limit', 50, type=int), 200))
+    jobs = ReportJob.query.order_by(ReportJob.id.desc()).limit(limit).all()
+    return jsonify({'jobs': [job.to_dict() for job in jobs]}), 200
+
+
+@admin_bp.route('/reports/jobs/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_report_job(job_id):
+    """Statut d'un job de rapport"""
+    current_user_id = get_jwt_identity()
+    user, error_response, status_code = _check_admin_access(current_user_id)
+    if error_response:
+        return error_response, status_code
+    
+    job = db.session.get(ReportJob, job_id)
+    if not job:
+        return jsonify({'error': 'Job non trouvé'}), 404
+    return jsonify({'job': job.to_dict()}), 200
+
+
+@admin_bp.route('/reports/jobs/<int:job_id>/download', methods=['GET'])
+@jwt_required()
+def download_report_job(job_id):
+    """Télécharger le fichier d'un job terminé (409 si pas prêt, 410 si expiré)"""
+    current_user_id = get_jwt_identity()
+    user, error_response, status_code = _check_admin_access(current_user_id)
+    if error_response:
+        return error_response, status_code
+    
+    job = db.session.get(ReportJob, job_id)
+    if not job:
+        return jsonify({'error': 'Job non trouvé'}), 404
+    if job.status in (ReportJobStatus.PENDING, ReportJobStatus.RUNNING):
+        return jsonify({'error': 'Rapport en cours de génération', 'job': job.to_dict()}), 409
+    if job.status == ReportJobStatus.FAILED:
+        return jsonify({'error': f'Génération en échec: {job.error}', 'job': job.to_dict()}), 500
+    if job.status == ReportJobStatus.EXPIRED or not job.file_path or not os.path.exists(job.file_path):
+        return jsonify({'error': 'Rapport expiré, relancer la demande', 'job': job.to_dict()}), 410
+    
+    mark_downloaded(job)
+    mimetype = 'application/pdf' if job.format == 'pdf' else EXPORT_FORMATS[job.format][1]
+    return send_file(
+        os.path.abspath(job.file_path),
+        mimetype=mimetype,
+        as_attachment=True,
+        download_name=os.path.basename(job.file_path)
+    )
+
+
+@admin_bp.route('/metrics/responses', methods=['GET'])
+@jwt_required()
+def get_response_metrics_route():
+    """
+    Tailles et temps d'encodage des réponses par endpoint (query param reset=true pour remettre à zéro),
+    requêtes acceptées / refusées par politique de limitation de débit
+    """
+    current_user_id = get_jwt_identity()
+    user, error_response, status_code = _check_admin_access(current_user_id)
+    if error_response:
+        return error_response, status_code
+    
+    metrics = get_response_metrics()
+    endpoints = metrics.snapshot()
+    if request.args.get('reset', 'false').lower() == 'true':
+        metrics.reset()
+    return jsonify({
+        'json_backend': current_app.json.backend,
+        'encodings': list(ENCODERS),
+        'endpoints': endpoints,
+        'rate_limits': get_rate_limiter().stats(),
+    }), 200
+
+
 @admin_bp.route('/settings', methods=['GET'])
 @jwt_required()
 def get_settings():
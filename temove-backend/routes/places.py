@@ -0,0 +1,33 @@
+"""
+Routes pour la recherche d'adresses (autocomplétion)
+"""
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from services.address_autocomplete_service import get_autocomplete_index
+
+places_bp = Blueprint('places', __name__)
+
+
+@places_bp.route('/autocomplete', methods=['GET'])
+@jwt_required()
+def autocomplete():
+    """Suggestions d'adresses (historique des courses + points de repère)"""
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'suggestions': []}), 200
+
+        limit = min(request.args.get('limit', 8, type=int), 20)
+        lat = request.args.get('lat', type=float)
+        lng = request.args.get('lng', type=float)
+        if lat is None or lng is None:
+            lat = lng = None
+
+        suggestions = get_autocomplete_index().suggest(query, lat, lng, limit=limit)
+
+        return jsonify({
+            'suggestions': suggestions,
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -2,7 +2,7 @@
 Routes pour les courses
 """
 from flask import Blueprint, request, jsonify, make_response, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity, decode_token
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 from extensions import db
 from models.ride import Ride, RideStatus, RideCategory, RideMode
@@ -10,9 +10,16 @@ from models.payment import Payment, PaymentMethod, PaymentStatus
 from models.promo_code import PromoCode
 from models import Driver
 from services.pricing_service import PricingService
-from services.geolocation_service import GeolocationService
+from services.ride_serializer import fields_from_request, eager_load, serialize_rides, SerializerError
+from services.feed_versions import (
+    FEED_USER_RIDES, FeedError, feed_etag, is_not_modified, not_modified, with_etag, since_from_request, next_since
+)
+from services.app_logging import get_logger
+from services.identity_service import current_identity
+from services.rate_limiter import check_rate_limit
 
 rides_bp = Blueprint('rides', __name__)
+logger = get_logger('rides')
 
 
 
@@ -26,35 +33,8 @@ def test_rides():
 # au niveau global dans app.py. Gérer OPTIONS ici causerait des doublons de headers.
 # Flask-CORS avec automatic_options=True gère automatiquement toutes les requêtes OPTIONS.
 
-# Logger les requêtes POST pour debug (uniquement en mode développement)
-@rides_bp.before_request
-def log_request():
-    """Logger les requêtes POST pour debug"""
-    # Ne pas gérer OPTIONS ici - Flask-CORS s'en charge
-    if request.method == 'OPTIONS':
-        return None  # Laisser Flask-CORS gérer
-    
-    # Log pour toutes les requêtes POST (avant validation JWT)
-    if request.method == 'POST':
-        auth_header = request.headers.get('Authorization', 'NON FOURNI')
-        print(f"🚀 [RIDES_BEFORE_REQUEST] {request.path} - Méthode: {request.method}")
-        print(f"🚀 [RIDES_BEFORE_REQUEST] En-tête Authorization présent: {'OUI' if auth_header != 'NON FOURNI' else 'NON'}")
-        if auth_header != 'NON FOURNI':
-            print(f"🚀 [RIDES_BEFORE_REQUEST] Authorization (premiers 50 caractères): {auth_header[:50]}")
-            # Essayer de décoder le token manuellement pour voir s'il est valide
-            try:
-                token = auth_header.replace('Bearer ', '').strip()
-                from flask_jwt_extended import decode_token
-                from flask import current_app
-                with current_app.app_context():
-                    decoded = decode_token(token)
-                    print(f"✅ [RIDES_BEFORE_REQUEST] Token décodé avec succès - ID Utilisateur: {decoded.get('sub', 'NON TROUVÉ')}", flush=True)
-            except Exception as e:
-                print(f"❌ [RIDES_BEFORE_REQUEST] Erreur lors du décodage du token: {e}", flush=True)
-                import traceback
-                traceback.print_exc()
-                import sys
-                sys.stdout.flush()
+# Les requêtes sont journalisées par services/app_logging.py (une ligne par requête,
+# utilisateur du JWT vérifié par la route) : pas de second décodage du token ici
 
 
 # Ne pas ajouter de headers CORS ici - déjà géré par flask_cors et le handler global
@@ -82,13 +62,17 @@ def estimate_ride():
         user_id = get_jwt_identity()
         # Convertir en int car l'identité est stockée comme string dans le JWT
         user_id = int(user_id) if isinstance(user_id, str) else user_id
-        print(f"✅ [ESTIMATE] JWT valide - ID Utilisateur: {user_id} (type: {type(user_id).__name__})")
+        
+        # Limite de débit par utilisateur (RATE_LIMITS['ride_estimate'])
+        limited = check_rate_limit('ride_estimate')
+        if limited:
+            return limited
         
         data = request.get_json()
         if not data:
             return jsonify({'error': 'Données JSON requises'}), 400
         
-        print(f"📋 [ESTIMATE] Données reçues: {data}")
+        logger.debug('📋 [ESTIMATE] Données reçues: %s', data)
         
         # Mapper les noms de champs du frontend vers les noms du backend
         pickup_lat = data.get('pickup_latitude') or data.get('departure_lat')
@@ -97,11 +81,6 @@ def estimate_ride():
         dropoff_lng = data.get('dropoff_longitude') or data.get('destination_lng')
         ride_mode = data.get('ride_mode', 'confort')  # Valeur par défaut
         
-        print(f"🔍 [ESTIMATE] Coordonnées:")
-        print(f"  Départ: {pickup_lat}, {pickup_lng}")
-        print(f"  Arrivée: {dropoff_lat}, {dropoff_lng}")
-        print(f"  Mode: {ride_mode}")
-        
         # Validation
         if not all([pickup_lat, pickup_lng, dropoff_lat, dropoff_lng]):
             return jsonify({'error': 'Coordonnées de départ et destination requises'}), 400
@@ -117,29 +96,9 @@ def estimate_ride():
         
         # Services
         pricing = PricingService()
-        geo = GeolocationService()
-        
-        # Calculer distance
-        distance_km = geo.calculate_distance(
-            pickup_lat,
-            pickup_lng,
-            dropoff_lat,
-            dropoff_lng
-        )
-        
-        print(f"📏 [ESTIMATE] Distance calculée: {distance_km} km")
-        
-        # Calculer durée
-        duration_minutes = geo.calculate_duration(
-            pickup_lat,
-            pickup_lng,
-            dropoff_lat,
-            dropoff_lng
-        )
-        
-        print(f"⏱️ [ESTIMATE] Durée estimée: {duration_minutes} minutes")
-        
-        # Calculer le prix
+
+        # Calculer distance, durée et prix (trajets entre points de repère
+        # servis directement depuis la matrice précalculée)
         estimate = pricing.estimate_trip(
             pickup_lat,
             pickup_lng,
@@ -148,7 +107,7 @@ def estimate_ride():
             ride_mode
         )
         
-        print(f"💰 [ESTIMATE] Prix estimé: {estimate}")
+        logger.debug('💰 [ESTIMATE] Prix estimé: %s', estimate, extra={'ride_mode': ride_mode})
         
         # Appliquer code promo si fourni
         discount_amount = 0
@@ -158,20 +117,17 @@ def estimate_ride():
                 discount_amount = promo.calculate_discount(estimate['final_price'])
                 estimate['final_price'] = promo.apply_discount(estimate['final_price'])
                 estimate['discount_amount'] = discount_amount
-                print(f"🎟️ [ESTIMATE] Code promo appliqué - Réduction: {discount_amount}")
+                logger.debug('🎟️ [ESTIMATE] Code promo appliqué', extra={'discount_amount': discount_amount})
         
         result = {
             'estimate': estimate,
             'promo_applied': bool(discount_amount),
         }
         
-        print(f"✅ [ESTIMATE] Réponse envoyée: {result}")
         return jsonify(result), 200
     
     except Exception as e:
-        print(f"❌ [ESTIMATE] Erreur: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception('❌ [ESTIMATE] Erreur: %s', e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -179,15 +135,8 @@ def estimate_ride():
 def book_ride():
     """Réserver une course"""
     
-    print("\n" + "="*60)
-    print("📞 ENDPOINT /rides/book APPELÉ")
-    print(f"   Méthode: {request.method}")
-    print("="*60)
-    
     # 🚨 CRITIQUE : Gérer OPTIONS AVANT jwt_required
     if request.method == 'OPTIONS':
-        print("✅ Requête OPTIONS - Réponse OK")
-        print("="*60 + "\n")
         response = make_response()
         response.headers.add("Access-Control-Allow-Origin", "*")
         response.headers.add('Access-Control-Allow-Headers', "Content-Type, Authorization, X-Requested-With")
@@ -197,7 +146,6 @@ def book_ride():
     
     # Maintenant vérifier le JWT pour POST uniquement
     try:
-        print("🔐 Vérification du JWT...")
         from flask_jwt_extended import verify_jwt_in_request
         
         try:
@@ -205,32 +153,24 @@ def book_ride():
             user_id = get_jwt_identity()
             # Convertir en int car l'identité est stockée comme string dans le JWT
             user_id = int(user_id) if isinstance(user_id, str) else user_id
-            print(f"✅ JWT valide - ID Utilisateur: {user_id} (type: {type(user_id).__name__})")
         except Exception as jwt_error:
-            print(f"❌ Erreur JWT: {jwt_error}")
-            import traceback
-            traceback.print_exc()
-            print("="*60 + "\n")
+            logger.warning('❌ [BOOK_RIDE] Erreur JWT: %s', jwt_error)
             return jsonify({'error': 'Token JWT invalide', 'details': str(jwt_error)}), 422
         
-        # Récupérer les données
-        raw_data = request.get_data(as_text=True)
-        print(f"\n📦 Données brutes reçues ({len(raw_data)} caractères):")
-        print(raw_data)
+        # Limite de débit par utilisateur (RATE_LIMITS['ride_book'])
+        limited = check_rate_limit('ride_book')
+        if limited:
+            return limited
         
+        # Récupérer les données
         data = request.get_json()
         if not data:
-            print("❌ Aucune donnée JSON reçue")
-            print("="*60 + "\n")
+            logger.info('❌ [BOOK_RIDE] Aucune donnée JSON reçue')
             return jsonify({'error': 'Données JSON requises'}), 400
         
-        print(f"\n📋 JSON parsé - Clés reçues: {list(data.keys())}")
-        import json
-        print("📋 Données complètes:")
-        print(json.dumps(data, indent=2, ensure_ascii=False))
+        logger.debug('📋 [BOOK_RIDE] Données reçues: %s', data)
         
         # Mapper les noms de champs du frontend vers les noms du backend
-        print("\n🔍 Extraction des données...")
         pickup_lat = data.get('pickup_latitude') or data.get('departure_lat')
         pickup_lng = data.get('pickup_longitude') or data.get('departure_lng')
         pickup_address = data.get('pickup_address') or data.get('departure_address') or 'Adresse de départ'
@@ -241,36 +181,22 @@ def book_ride():
         ride_category = data.get('ride_category') or data.get('category', 'course')
         payment_method = data.get('payment_method', 'cash')
         
-        print(f"  pickup_latitude: {pickup_lat} ({type(pickup_lat).__name__})")
-        print(f"  pickup_longitude: {pickup_lng} ({type(pickup_lng).__name__})")
-        print(f"  pickup_address: {pickup_address}")
-        print(f"  dropoff_latitude: {dropoff_lat} ({type(dropoff_lat).__name__})")
-        print(f"  dropoff_longitude: {dropoff_lng} ({type(dropoff_lng).__name__})")
-        print(f"  dropoff_address: {dropoff_address}")
-        print(f"  ride_mode: {ride_mode}")
-        print(f"  ride_category: {ride_category}")
-        print(f"  payment_method: {payment_method}")
-        
         # Validation
         if not pickup_lat or not pickup_lng:
             error_msg = 'Coordonnées de départ requises'
-            print(f"❌ {error_msg}")
-            print("="*60 + "\n")
+            logger.info('❌ [BOOK_RIDE] %s', error_msg)
             return jsonify({'error': error_msg}), 400
         
         # Convertir en float
-        print("\n🔄 Conversion des coordonnées...")
         try:
             pickup_lat = float(pickup_lat)
             pickup_lng = float(pickup_lng)
             if dropoff_lat and dropoff_lng:
                 dropoff_lat = float(dropoff_lat)
                 dropoff_lng = float(dropoff_lng)
-            print("✅ Conversion réussie")
         except (ValueError, TypeError) as e:
             error_msg = f'Coordonnées invalides: {str(e)}'
-            print(f"❌ {error_msg}")
-            print("="*60 + "\n")
+            logger.info('❌ [BOOK_RIDE] %s', error_msg)
             return jsonify({'error': error_msg}), 400
         
         # Services
@@ -285,9 +211,8 @@ def book_ride():
                     scheduled_at = datetime.fromisoformat(scheduled_str.replace('Z', '+00:00'))
                 else:
                     scheduled_at = scheduled_str
-                print(f"📅 Réservation programmée: {scheduled_at}")
             except Exception as e:
-                print(f"⚠️ Erreur parsing scheduled_at: {e}")
+                logger.warning('⚠️ [BOOK_RIDE] Erreur parsing scheduled_at: %s', e)
         
         # Calculer distance et prix
         distance_km = None
@@ -297,38 +222,29 @@ def book_ride():
         final_price = 0
         
         if dropoff_lat and dropoff_lng:
-            print("\n💰 Calcul du prix...")
-            geo = GeolocationService()
-            distance_km = geo.calculate_distance(
-                pickup_lat,
-                pickup_lng,
-                dropoff_lat,
-                dropoff_lng
-            )
-            duration_minutes = geo.calculate_duration(
+            # Même calcul que /estimate (matrice des points de repère, sinon
+            # distance calculée) : le prix réservé est celui du devis
+            pricing_timestamp = scheduled_at if scheduled_at else datetime.utcnow()
+            price_info = pricing.estimate_trip(
                 pickup_lat,
                 pickup_lng,
                 dropoff_lat,
-                dropoff_lng
-            )
-            
-            print(f"📏 Distance: {distance_km} km")
-            print(f"⏱️ Durée: {duration_minutes} minutes")
-            
-            pricing_timestamp = scheduled_at if scheduled_at else datetime.utcnow()
-            price_info = pricing.calculate_final_price(
-                distance_km,
+                dropoff_lng,
                 ride_mode,
                 pricing_timestamp
             )
-            print(f"🔍 [DEBUG] price_info reçu: {price_info}")
+            distance_km = price_info.get('distance_km')
+            duration_minutes = price_info.get('duration_minutes')
+            logger.debug('💰 [BOOK_RIDE] Prix calculé: %s', price_info, extra={
+                'distance_km': distance_km, 'duration_minutes': duration_minutes
+            })
             base_price = price_info.get('base_price')
             surge_multiplier = price_info.get('surge_multiplier', 1.0)
             final_price = price_info.get('final_price')
             
             # Vérifier que base_price n'est pas None
             if base_price is None:
-                print(f"❌ [ERROR] base_price est None! Calcul direct...")
+                logger.warning('❌ [BOOK_RIDE] base_price est None, calcul direct')
                 base_price = pricing.calculate_base_price(distance_km, ride_mode)
                 surge_multiplier = pricing.calculate_surge_multiplier(pricing_timestamp)
                 final_price = int(base_price * surge_multiplier)
@@ -337,29 +253,17 @@ def book_ride():
             base_price = int(base_price) if base_price is not None else 0
             surge_multiplier = float(surge_multiplier) if surge_multiplier is not None else 1.0
             final_price = int(final_price) if final_price is not None else 0
-            
-            print(f"💵 Prix de base: {base_price} XOF (type: {type(base_price).__name__})")
-            print(f"💵 Multiplicateur: {surge_multiplier} (type: {type(surge_multiplier).__name__})")
-            print(f"💵 Prix final: {final_price} XOF (type: {type(final_price).__name__})")
         else:
             # Si pas de destination, utiliser un prix minimum
-            print("⚠️ Pas de destination fournie, utilisation du prix minimum")
+            logger.debug('⚠️ [BOOK_RIDE] Pas de destination fournie, utilisation du prix minimum')
             base_price = pricing.pricing['base_fare']
             surge_multiplier = pricing.calculate_surge_multiplier(scheduled_at if scheduled_at else datetime.utcnow())
             final_price = int(base_price * surge_multiplier)
         
         # Créer la course
-        print("\n💾 Création de la course...")
-        
-        # Vérification finale avant création
-        print(f"🔍 [FINAL CHECK] Avant création de Ride:")
-        print(f"  base_price: {base_price} (type: {type(base_price).__name__})")
-        print(f"  surge_multiplier: {surge_multiplier} (type: {type(surge_multiplier).__name__})")
-        print(f"  final_price: {final_price} (type: {type(final_price).__name__})")
-        
         # S'assurer que base_price n'est jamais None
         if base_price is None or base_price == 0:
-            print(f"⚠️ [WARNING] base_price est None ou 0, calcul d'urgence...")
+            logger.warning('⚠️ [BOOK_RIDE] base_price est None ou 0, calcul d\'urgence')
             if distance_km:
                 base_price = pricing.calculate_base_price(distance_km, ride_mode)
                 surge_multiplier = pricing.calculate_surge_multiplier(scheduled_at if scheduled_at else datetime.utcnow())
@@ -367,7 +271,6 @@ def book_ride():
             else:
                 base_price = pricing.pricing['base_fare']
                 final_price = base_price
-            print(f"✅ [WARNING] Nouveau base_price: {base_price}")
         
         # Conversion finale en types corrects
         base_price = int(base_price) if base_price else 0
@@ -389,21 +292,14 @@ def book_ride():
             if ride_mode_enum is None:
                 ride_mode_enum = RideMode[ride_mode.upper()]
         except KeyError:
-            print(f"⚠️ Mode inconnu: {ride_mode}, utilisation de CONFORT par défaut")
+            logger.info('⚠️ [BOOK_RIDE] Mode inconnu: %s, utilisation de CONFORT par défaut', ride_mode)
             ride_mode_enum = RideMode.CONFORT
         
-        print(f"🔍 [BOOK] ride_mode reçu: '{ride_mode}' -> Enum: {ride_mode_enum.name}")
-        
         try:
             category_enum = RideCategory[ride_category.upper()]
         except KeyError:
             category_enum = RideCategory.COURSE
         
-        print(f"🔍 [FINAL CHECK] Après conversions:")
-        print(f"  base_price: {base_price} (type: {type(base_price).__name__})")
-        print(f"  surge_multiplier: {surge_multiplier} (type: {type(surge_multiplier).__name__})")
-        print(f"  final_price: {final_price} (type: {type(final_price).__name__})")
-        
         # IMPORTANT: S'assurer que le statut est PENDING et driver_id est None
         # pour que la course soit visible dans /api/v1/drivers/rides
         ride = Ride(
@@ -431,7 +327,6 @@ def book_ride():
         promo_code_id = None
         discount_amount = 0
         if data.get('promo_code'):
-            print(f"🎟️ Vérification du code promo: {data['promo_code']}")
             promo = PromoCode.query.filter_by(code=data['promo_code']).first()
             if promo and promo.is_valid():
                 discount_amount = promo.calculate_discount(final_price)
@@ -439,26 +334,20 @@ def book_ride():
                 ride.promo_code_id = promo.id
                 ride.discount_amount = discount_amount
                 ride.final_price = final_price
-                print(f"✅ Code promo appliqué - Réduction: {discount_amount} XOF")
+                logger.debug('🎟️ [BOOK_RIDE] Code promo appliqué', extra={'discount_amount': discount_amount})
         
         # Sauvegarder la ride d'abord pour obtenir son ID
-        print("\n💾 Sauvegarde de la course dans la base de données...")
         try:
             db.session.add(ride)
             db.session.flush()  # Flush pour obtenir ride.id sans commit
-            print(f"✅ Course créée (flush) - ID: {ride.id}, Utilisateur: {user_id}")
         except Exception as db_error:
             db.session.rollback()
-            print(f"❌ Erreur base de données lors de la création de la course: {db_error}")
-            import traceback
-            traceback.print_exc()
-            print("="*60 + "\n")
+            logger.exception('❌ [BOOK_RIDE] Erreur base de données lors de la création de la course: %s', db_error)
             return jsonify({'error': f'Erreur base de données: {str(db_error)}'}), 500
         
         # Créer le paiement si méthode fournie (après avoir obtenu ride.id)
         payment = None
         if payment_method:
-            print(f"💳 Création du paiement - Méthode: {payment_method}")
             try:
                 payment_method_enum = PaymentMethod[payment_method.upper()]
             except KeyError:
@@ -472,17 +361,16 @@ def book_ride():
                 status=PaymentStatus.PENDING,
             )
             db.session.add(payment)
-            print(f"✅ Paiement créé - Ride ID: {ride.id}, User ID: {user_id}, Montant: {final_price}")
         
         # IMPORTANT: Vérifier et forcer le statut PENDING avant le commit final
         # pour garantir que la course sera visible par les chauffeurs via /api/v1/drivers/rides
         if isinstance(ride.status, RideStatus):
             if ride.status != RideStatus.PENDING:
-                print(f"⚠️ [BOOK_RIDE] Correction du statut: {ride.status} -> PENDING")
+                logger.warning('⚠️ [BOOK_RIDE] Correction du statut: %s -> PENDING', ride.status)
                 ride.status = RideStatus.PENDING
         else:
             if str(ride.status).lower() != 'pending':
-                print(f"⚠️ [BOOK_RIDE] Correction du statut: {ride.status} -> pending")
+                logger.warning('⚠️ [BOOK_RIDE] Correction du statut: %s -> pending', ride.status)
                 try:
                     ride.status = RideStatus.PENDING
                 except:
@@ -490,27 +378,32 @@ def book_ride():
         
         # S'assurer que driver_id est None (pas encore assigné)
         if ride.driver_id is not None:
-            print(f"⚠️ [BOOK_RIDE] Correction de driver_id: {ride.driver_id} -> None")
+            logger.warning('⚠️ [BOOK_RIDE] Correction de driver_id: %s -> None', ride.driver_id)
             ride.driver_id = None
         
         # Commit final
         try:
             db.session.commit()
-            print(f"✅ [BOOK_RIDE] Course et paiement sauvegardés avec succès")
-            print(f"   Ride ID: {ride.id}")
-            print(f"   Utilisateur: {user_id}")
-            print(f"   Statut: {ride.status} (PENDING = visible par les chauffeurs)")
-            print(f"   Driver ID: {ride.driver_id} (None = pas encore assigné)")
-            print(f"   Prix: {ride.final_price} XOF")
-            print(f"   📍 La course est maintenant disponible dans /api/v1/drivers/rides")
+            logger.info('✅ [BOOK_RIDE] Course réservée', extra={
+                'ride_id': ride.id,
+                'ride_mode': ride_mode_enum.value,
+                'distance_km': distance_km,
+                'final_price': ride.final_price,
+                'payment_method': payment_method,
+                'scheduled': scheduled_at is not None,
+            })
         except Exception as db_error:
             db.session.rollback()
-            print(f"❌ Erreur base de données: {db_error}")
-            import traceback
-            traceback.print_exc()
-            print("="*60 + "\n")
+            logger.exception('❌ [BOOK_RIDE] Erreur base de données: %s', db_error)
             return jsonify({'error': f'Erreur base de données: {str(db_error)}'}), 500
         
+        # Mettre à jour l'index d'autocomplétion des adresses
+        try:
+            from services.address_autocomplete_service import record_ride_addresses
+            record_ride_addresses(ride)
+        except Exception as index_error:
+            logger.warning('⚠️ [BOOK_RIDE] Index d\'autocomplétion non mis à jour: %s', index_error)
+        
         # ============================================
         # RÉCUPÉRER LES CHAUFFEURS DISPONIBLES AVEC ETA
         # ============================================
@@ -526,11 +419,9 @@ def book_ride():
                 max_distance_km=10,  # 10 km de rayon maximum
                 max_drivers=10  # Maximum 10 chauffeurs à retourner
             )
-            print(f"🚗 [BOOK_RIDE] {len(available_drivers)} chauffeur(s) disponible(s) trouvé(s)")
+            logger.debug('🚗 [BOOK_RIDE] %d chauffeur(s) disponible(s) trouvé(s)', len(available_drivers))
         except Exception as e:
-            print(f"⚠️ [BOOK_RIDE] Erreur lors de la récupération des chauffeurs disponibles: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception('⚠️ [BOOK_RIDE] Erreur lors de la récupération des chauffeurs disponibles: %s', e)
             # Continuer même si l'erreur survient, la course est créée
         
         result = {
@@ -543,18 +434,11 @@ def book_ride():
             'available_drivers_count': len(available_drivers),  # Nombre de chauffeurs disponibles
         }
         
-        print(f"\n✅ SUCCÈS - Réponse envoyée")
-        print(f"   Chauffeurs disponibles: {len(available_drivers)}")
-        print("="*60 + "\n")
-        
         return jsonify(result), 201
     
     except Exception as e:
         db.session.rollback()
-        print(f"\n❌ ERREUR INATTENDUE: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        print("="*60 + "\n")
+        logger.exception('❌ [BOOK_RIDE] Erreur inattendue: %s', e)
         return jsonify({'error': f'Erreur: {str(e)}'}), 500
 
 
@@ -562,25 +446,46 @@ def book_ride():
 @rides_bp.route('/history', methods=['GET'])
 @jwt_required()
 def get_ride_history():
-    """Obtenir l'historique des courses de l'utilisateur"""
+    """
+    Obtenir l'historique des courses de l'utilisateur
+    
+    - ETag : 304 si If-None-Match correspond (aucune requête SQL)
+    - ?since=<ISO 8601> : seulement les courses modifiées depuis (updated_at),
+      les plus anciennes d'abord ; rappeler avec le `since` renvoyé
+    """
     try:
         user_id = get_jwt_identity()
         # Convertir en int car l'identité est stockée comme string dans le JWT
         user_id = int(user_id) if isinstance(user_id, str) else user_id
         
-        rides = Ride.query.filter_by(user_id=user_id).order_by(Ride.requested_at.desc()).limit(50).all()
+        # Projection 'lite' par défaut (?view=full, ?fields=id,status,...)
+        try:
+            projection, fields = fields_from_request(default='lite', allowed=('lite', 'full'))
+            since = since_from_request()
+        except (SerializerError, FeedError) as e:
+            return jsonify({'error': str(e)}), 400
+        
+        etag = feed_etag(FEED_USER_RIDES, user_id, projection, fields, extra=(since,))
+        if is_not_modified(etag):
+            return not_modified(etag)
+        
+        if since:
+            query = Ride.query.filter(
+                Ride.user_id == user_id, Ride.updated_at >= since
+            ).order_by(Ride.updated_at.asc(), Ride.id.asc()).limit(50)
+        else:
+            query = Ride.query.filter_by(user_id=user_id).order_by(Ride.requested_at.desc()).limit(50)
+        rides = eager_load(query, fields).all()
         
-        print(f"📚 [HISTORY] Récupération de l'historique pour user_id: {user_id}")
-        print(f"📚 [HISTORY] Nombre de courses trouvées: {len(rides)}")
+        logger.debug('📚 [HISTORY] %d course(s) trouvée(s)', len(rides), extra={'delta': since is not None})
         
-        return jsonify({
-            'rides': [ride.to_dict() for ride in rides],
-        }), 200
+        return with_etag(jsonify({
+            'rides': serialize_rides(rides, projection, fields),
+            'since': next_since(rides, since),
+        }), etag), 200
     
     except Exception as e:
-        print(f"❌ [HISTORY] Erreur: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception('❌ [HISTORY] Erreur: %s', e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -672,17 +577,12 @@ def accept_ride(ride_id):
     grâce à la configuration automatic_options=True dans app.py
     """
     try:
-        current_user_id = get_jwt_identity()
-        # Convertir en int car l'identité est stockée comme string dans le JWT
-        current_user_id = int(current_user_id) if isinstance(current_user_id, str) else current_user_id
-        
-        # Vérifier si l'utilisateur est un chauffeur
-        from models import User, Driver
-        user = User.query.get(current_user_id)
-        if not user:
+        # Vérifier si l'utilisateur est un chauffeur (profil porté par le token)
+        identity = current_identity()
+        if not identity:
             return jsonify({"msg": "user not found"}), 404
         
-        driver = Driver.query.filter_by(user_id=user.id).first()
+        driver = db.session.get(Driver, identity.driver_id) if identity.is_driver else None
         if not driver:
             return jsonify({"msg": "only drivers can accept rides"}), 403
         
@@ -739,11 +639,9 @@ def accept_ride(ride_id):
         # Récupérer les informations complètes de la course pour la réponse
         ride_dict = ride.to_dict()
         
-        # Log pour le débogage
-        print(f"✅ [ACCEPT_RIDE] Course {ride.id} acceptée par le chauffeur {driver.id} (user_id: {user.id})")
-        print(f"   Statut: {ride.status}")
-        print(f"   Chauffeur: {driver.full_name}")
-        print(f"   Client: {ride.user_id}")
+        logger.info('✅ [ACCEPT_RIDE] Course acceptée', extra={
+            'ride_id': ride.id, 'driver_id': driver.id, 'client_id': ride.user_id
+        })
         
         return jsonify({
             "msg": "accepted",
@@ -765,8 +663,7 @@ def accept_ride(ride_id):
     
     except Exception as e:
         db.session.rollback()
-        import traceback
-        traceback.print_exc()
+        logger.exception('❌ [ACCEPT_RIDE] Erreur: %s', e)
         return jsonify({'error': f'Erreur lors de l\'acceptation de la course: {str(e)}'}), 500
 
 
@@ -0,0 +1,48 @@
+"""
+Script pour ajouter la colonne online_since à la table drivers
+
+Début de la session en ligne en cours, utilisé pour le temps en ligne de
+driver_stats_daily. db.create_all() n'ajoute pas de colonne à une table
+existante. Le script peut être relancé sans risque.
+
+Usage:
+    python scripts/add_driver_online_since.py
+    python scripts/add_driver_online_since.py --config production
+"""
+import argparse
+import importlib.util
+import os
+import sys
+
+# Ajouter le répertoire parent au path pour les imports
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ajouter drivers.online_since')
+    parser.add_argument('--config', type=str, default='development', help='Configuration Flask')
+    args = parser.parse_args()
+
+    # Importer depuis le fichier app.py (pas le module app/)
+    spec = importlib.util.spec_from_file_location("app_module", os.path.join(backend_dir, "app.py"))
+    app_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app_module)
+    app = app_module.create_app(args.config)
+
+    from extensions import db
+
+    with app.app_context():
+        columns = [col['name'] for col in db.inspect(db.engine).get_columns('drivers')]
+        if 'online_since' in columns:
+            print("✅ Colonne 'online_since' existe déjà")
+            return
+        column_type = 'DATETIME' if db.engine.dialect.name in ('mysql', 'mariadb', 'sqlite') else 'TIMESTAMP'
+        db.session.execute(db.text(f"ALTER TABLE drivers ADD COLUMN online_since {column_type} NULL"))
+        db.session.commit()
+        print("✅ Colonne 'online_since' ajoutée à la table drivers")
+        print("💡 Les sessions en ligne sont comptées à partir du prochain passage en ligne des conducteurs")
+
+
+if __name__ == '__main__':
+    main()
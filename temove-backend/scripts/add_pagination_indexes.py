@@ -0,0 +1,54 @@
+"""
+Script pour créer les index composites de la pagination par curseur
+
+db.create_all() ne crée pas les index des tables déjà existantes : ce script
+ajoute ceux déclarés dans les modèles (rides, users, drivers, payments,
+commissions) s'ils manquent. Il peut être relancé sans risque.
+
+Usage:
+    python scripts/add_pagination_indexes.py
+    python scripts/add_pagination_indexes.py --config production
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import time
+
+# Ajouter le répertoire parent au path pour les imports
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Créer les index de pagination des listes admin')
+    parser.add_argument('--config', type=str, default='development', help='Configuration Flask')
+    args = parser.parse_args()
+
+    # Importer depuis le fichier app.py (pas le module app/)
+    spec = importlib.util.spec_from_file_location("app_module", os.path.join(backend_dir, "app.py"))
+    app_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app_module)
+    app = app_module.create_app(args.config)
+
+    from extensions import db
+    from models import Ride, User, Driver, Payment, Commission
+
+    with app.app_context():
+        inspector = db.inspect(db.engine)
+        for model in (Ride, User, Driver, Payment, Commission):
+            table = model.__table__
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if len(index.columns) < 2:
+                    continue
+                if index.name in existing:
+                    print(f"✅ {table.name}.{index.name} existe déjà")
+                    continue
+                started = time.perf_counter()
+                index.create(bind=db.engine)
+                print(f"✅ {table.name}.{index.name} créé en {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Script pour créer les index FULLTEXT de la recherche admin (MySQL)
+
+Crée les index déclarés dans services/admin_search_service.py
+(FULLTEXT_INDEXES) s'ils manquent. Sur SQLite / PostgreSQL, rien n'est créé :
+la recherche utilise l'index en mémoire.
+
+Usage:
+    python scripts/add_search_indexes.py
+    python scripts/add_search_indexes.py --config production
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import time
+
+# Ajouter le répertoire parent au path pour les imports
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Créer les index FULLTEXT de la recherche admin')
+    parser.add_argument('--config', type=str, default='development', help='Configuration Flask')
+    args = parser.parse_args()
+
+    # Importer depuis le fichier app.py (pas le module app/)
+    spec = importlib.util.spec_from_file_location("app_module", os.path.join(backend_dir, "app.py"))
+    app_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app_module)
+    app = app_module.create_app(args.config)
+
+    from sqlalchemy import text
+    from extensions import db
+    from services.admin_search_service import FULLTEXT_INDEXES
+
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        if dialect not in ('mysql', 'mariadb'):
+            print(f"ℹ️  Base {dialect} : pas d'index FULLTEXT, la recherche utilise l'index en mémoire")
+            return
+
+        inspector = db.inspect(db.engine)
+        for table, index_name, columns in FULLTEXT_INDEXES.values():
+            existing = {index['name'] for index in inspector.get_indexes(table)}
+            if index_name in existing:
+                print(f"✅ {table}.{index_name} existe déjà")
+                continue
+            started = time.perf_counter()
+            db.session.execute(text(
+                f"ALTER TABLE {table} ADD FULLTEXT INDEX {index_name} ({', '.join(columns)})"
+            ))
+            db.session.commit()
+            print(f"✅ {table}.{index_name} créé en {time.perf_counter() - started:.1f}s")
+
+        print("💡 Redémarrer l'application pour utiliser le moteur FULLTEXT (ADMIN_SEARCH_BACKEND=auto)")
+
+
+if __name__ == '__main__':
+    main()
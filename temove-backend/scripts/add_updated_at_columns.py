@@ -0,0 +1,86 @@
+"""
+Script pour ajouter updated_at aux tables rides et payments
+
+Colonne utilisée comme watermark par l'export Parquet incrémental
+(scripts/export_analytics.py). db.create_all() n'ajoute pas de colonne à une
+table existante. Le script :
+- ajoute rides.updated_at et payments.updated_at si elles manquent
+- renseigne les lignes existantes (dernier horodatage connu de la ligne)
+- renseigne users/drivers.updated_at restés vides (date de création)
+- crée les index (updated_at, id) des cinq tables exportées
+
+Il peut être relancé sans risque.
+
+Usage:
+    python scripts/add_updated_at_columns.py
+    python scripts/add_updated_at_columns.py --config production
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import time
+
+# Ajouter le répertoire parent au path pour les imports
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+# Valeur initiale de updated_at par table
+BACKFILL = {
+    'rides': 'COALESCE(completed_at, cancelled_at, started_at, confirmed_at, requested_at)',
+    'payments': 'COALESCE(processed_at, created_at)',
+    'users': 'created_at',
+    'drivers': 'created_at',
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ajouter updated_at (rides, payments) et les index de l\'export')
+    parser.add_argument('--config', type=str, default='development', help='Configuration Flask')
+    args = parser.parse_args()
+
+    # Importer depuis le fichier app.py (pas le module app/)
+    spec = importlib.util.spec_from_file_location("app_module", os.path.join(backend_dir, "app.py"))
+    app_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app_module)
+    app = app_module.create_app(args.config)
+
+    from extensions import db
+    from models import Ride, User, Driver, Payment, Commission
+
+    with app.app_context():
+        column_type = 'DATETIME' if db.engine.dialect.name in ('mysql', 'mariadb', 'sqlite') else 'TIMESTAMP'
+        for table in ('rides', 'payments'):
+            columns = [col['name'] for col in db.inspect(db.engine).get_columns(table)]
+            if 'updated_at' in columns:
+                print(f"✅ Colonne '{table}.updated_at' existe déjà")
+                continue
+            db.session.execute(db.text(f"ALTER TABLE {table} ADD COLUMN updated_at {column_type} NULL"))
+            db.session.commit()
+            print(f"✅ Colonne 'updated_at' ajoutée à la table {table}")
+
+        for table, expression in BACKFILL.items():
+            started = time.perf_counter()
+            result = db.session.execute(db.text(
+                f"UPDATE {table} SET updated_at = {expression} WHERE updated_at IS NULL"
+            ))
+            db.session.commit()
+            print(f"✅ {table}: {result.rowcount} ligne(s) renseignée(s) en {time.perf_counter() - started:.1f}s")
+
+        inspector = db.inspect(db.engine)
+        for model in (Ride, Payment, Commission, User, Driver):
+            table = model.__table__
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name != f'ix_{table.name}_updated_at_id':
+                    continue
+                if index.name in existing:
+                    print(f"✅ {table.name}.{index.name} existe déjà")
+                    continue
+                started = time.perf_counter()
+                index.create(bind=db.engine)
+                print(f"✅ {table.name}.{index.name} créé en {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Script pour (re)construire les tables d'agrégats ride_rollups, payment_rollups
+et commission_summaries
+
+À lancer une fois après le déploiement (création des tables), puis en cas de
+doute sur la cohérence : les tables sont entièrement recalculées depuis
+l'historique des courses, paiements et commissions, par lots courts (un jour
+ou une tranche de conducteurs à la fois) : l'application peut rester en ligne
+pendant la reconstruction. Ensuite, les rollups sont maintenus
+automatiquement à chaque écriture (services/rollup_service.py).
+
+Usage:
+    python scripts/backfill_ride_rollups.py
+    python scripts/backfill_ride_rollups.py --config production --batch-size 100000
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import time
+
+# Ajouter le répertoire parent au path pour les imports
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reconstruire les rollups des courses et paiements')
+    parser.add_argument('--config', type=str, default='development', help='Configuration Flask')
+    parser.add_argument('--batch-size', type=int, default=50000, help='Lignes lues par lot')
+    args = parser.parse_args()
+
+    # Importer depuis le fichier app.py (pas le module app/)
+    spec = importlib.util.spec_from_file_location("app_module", os.path.join(backend_dir, "app.py"))
+    app_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app_module)
+    app = app_module.create_app(args.config)
+
+    from services.rollup_service import backfill_rollups
+
+    with app.app_context():
+        started = time.perf_counter()
+        counts = backfill_rollups(batch_size=args.batch_size)
+        print(f"✅ Rollups reconstruits en {time.perf_counter() - started:.1f}s")
+        print(f"   ride_rollups: {counts['ride_rollups']} lignes")
+        print(f"   payment_rollups: {counts['payment_rollups']} lignes")
+        print(f"   commission_summaries: {counts['commission_summaries']} lignes")
+
+
+if __name__ == '__main__':
+    main()
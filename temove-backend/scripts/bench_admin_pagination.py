@@ -0,0 +1,91 @@
+"""
+Benchmark de la pagination des listes admin (OFFSET vs curseur)
+
+Pour chaque liste, mesure la première page et une page profonde en mode page
+(LIMIT/OFFSET, total exact) et en mode curseur (keyset, sans total), sur une
+base remplie par scripts/seed_bench_data.py.
+
+Usage:
+    python scripts/bench_admin_pagination.py
+    python scripts/bench_admin_pagination.py --deep-page 10000 --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+
+# Ajouter le répertoire parent au path pour les imports
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+sys.path.insert(0, os.path.join(backend_dir, 'scripts'))
+
+from seed_bench_data import create_bench_app, ensure_seeded
+
+
+PER_PAGE = 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de la pagination admin')
+    parser.add_argument('--rides', type=int, default=1000000, help='Nombre de courses de la base')
+    parser.add_argument('--deep-page', type=int, default=10000, help='Numéro de la page profonde')
+    parser.add_argument('--repeat', type=int, default=5, help='Nombre d\'appels par mesure')
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    ensure_seeded(app, args.rides)
+
+    from flask_jwt_extended import create_access_token
+    from extensions import db
+    from models import Ride, User, Driver, Payment, Commission
+    from services.pagination import encode_cursor
+
+    lists = [
+        ('/admin/rides', Ride, Ride.requested_at),
+        ('/admin/payments', Payment, Payment.created_at),
+        ('/admin/commissions', Commission, Commission.created_at),
+        ('/admin/users', User, User.created_at),
+        ('/admin/drivers', Driver, Driver.created_at),
+    ]
+
+    with app.app_context():
+        admin = User.query.filter_by(is_admin=True).first()
+        token = create_access_token(identity=str(admin.id), additional_claims={'role': 'admin'})
+
+        # Curseur équivalent à la page profonde (dernière ligne de la page précédente)
+        deep_cursors = {}
+        for endpoint, model, sort_column in lists:
+            total = db.session.query(db.func.count(model.id)).scalar()
+            page = min(args.deep_page, max(total // PER_PAGE, 1))
+            row = db.session.query(sort_column, model.id).order_by(
+                sort_column.desc(), model.id.desc()
+            ).offset((page - 1) * PER_PAGE - 1).limit(1).first() if page > 1 else None
+            deep_cursors[endpoint] = (page, encode_cursor(*row) if row else '')
+
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    api_prefix = app.config['API_PREFIX']
+
+    def measure(url):
+        latencies = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            response = client.get(url, headers=headers)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                print(f"❌ {url}: HTTP {response.status_code} {response.get_data(as_text=True)[:200]}")
+                break
+        return sum(latencies) / len(latencies)
+
+    print(f"\n{'Liste':<22} {'Page':>7} {'OFFSET (ms)':>12} {'Curseur (ms)':>13}")
+    for endpoint, model, sort_column in lists:
+        deep_page, deep_cursor = deep_cursors[endpoint]
+        base = f'{api_prefix}{endpoint}?per_page={PER_PAGE}'
+        for page, cursor in ((1, ''), (deep_page, deep_cursor)):
+            offset_ms = measure(f'{base}&page={page}')
+            cursor_ms = measure(f'{base}&cursor={cursor}')
+            print(f"{endpoint:<22} {page:>7} {offset_ms:>12.1f} {cursor_ms:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
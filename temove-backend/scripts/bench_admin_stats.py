@@ -0,0 +1,81 @@
+"""
+Benchmark des statistiques du dashboard admin (nombre de requêtes SQL et latence)
+
+Appelle les endpoints /admin/dashboard/stats, /admin/temove/stats,
+/admin/temove-pro/stats et /admin/dashboard/overview sur une base remplie par
+scripts/seed_bench_data.py (1M de courses par défaut).
+
+Usage:
+    python scripts/bench_admin_stats.py
+    DATABASE_URL=mysql+pymysql://... python scripts/bench_admin_stats.py --rides 1000000 --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+
+# Ajouter le répertoire parent au path pour les imports
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+sys.path.insert(0, os.path.join(backend_dir, 'scripts'))
+
+from seed_bench_data import create_bench_app, ensure_seeded
+
+ENDPOINTS = [
+    '/admin/dashboard/stats',
+    '/admin/temove/stats',
+    '/admin/temove-pro/stats',
+    '/admin/dashboard/overview',
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark des statistiques admin')
+    parser.add_argument('--rides', type=int, default=1000000, help='Nombre de courses de la base')
+    parser.add_argument('--repeat', type=int, default=5, help='Nombre d\'appels par endpoint')
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    ensure_seeded(app, args.rides)
+
+    from sqlalchemy import event
+    from flask_jwt_extended import create_access_token
+    from extensions import db
+    from models.user import User
+
+    with app.app_context():
+        admin = User.query.filter_by(is_admin=True).first()
+        token = create_access_token(identity=str(admin.id), additional_claims={'role': 'admin'})
+        engine = db.engine
+
+    queries = []
+
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', count_query)
+
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    api_prefix = app.config['API_PREFIX']
+
+    print(f"\n{'Endpoint':<30} {'Requêtes':>9} {'Moyenne (ms)':>13} {'Max (ms)':>10}")
+    for endpoint in ENDPOINTS:
+        latencies = []
+        query_count = 0
+        for _ in range(args.repeat):
+            queries.clear()
+            start = time.perf_counter()
+            response = client.get(f'{api_prefix}{endpoint}', headers=headers)
+            latencies.append((time.perf_counter() - start) * 1000)
+            query_count = len(queries)
+            if response.status_code != 200:
+                print(f"❌ {endpoint}: HTTP {response.status_code} {response.get_data(as_text=True)[:200]}")
+                break
+        print(f"{endpoint:<30} {query_count:>9} {sum(latencies) / len(latencies):>13.1f} {max(latencies):>10.1f}")
+
+    event.remove(engine, 'before_cursor_execute', count_query)
+
+
+if __name__ == '__main__':
+    main()
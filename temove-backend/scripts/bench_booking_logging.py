@@ -0,0 +1,120 @@
+"""
+Benchmark du débit de réservation selon la configuration des logs
+
+Réserve des courses (POST /rides/book) sur une petite base SQLite temporaire
+et compare plusieurs configurations de services/app_logging.py. Les logs sont
+écrits dans un fichier ; --sink-delay-ms ajoute une attente à chaque écriture
+pour simuler un stdout lent (pipe vers un collecteur de logs chargé) :
+- sync-debug : tout en DEBUG, écrit dans le thread de la requête (équivalent des print())
+- async-debug : tout en DEBUG, écrit par le thread de la file d'attente
+- production : INFO en JSON, file d'attente
+- off : WARNING uniquement, sans ligne par requête
+
+Usage:
+    python scripts/bench_booking_logging.py
+    python scripts/bench_booking_logging.py --bookings 500 --modes sync-debug,production
+    python scripts/bench_booking_logging.py --sink-delay-ms 0.2
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Ajouter le répertoire parent au path pour les imports
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+sys.path.insert(0, os.path.join(backend_dir, 'scripts'))
+
+# Base temporaire (avant l'import de la configuration)
+_workdir = tempfile.mkdtemp(prefix='bench_logging_')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_workdir, 'bench_logging.db')
+
+from seed_bench_data import create_bench_app, seed
+
+
+MODES = {
+    'sync-debug': {'LOG_LEVEL': 'DEBUG', 'LOG_FORMAT': 'text', 'LOG_ASYNC': False, 'LOG_REQUESTS': True},
+    'async-debug': {'LOG_LEVEL': 'DEBUG', 'LOG_FORMAT': 'text', 'LOG_ASYNC': True, 'LOG_REQUESTS': True},
+    'production': {'LOG_LEVEL': 'INFO', 'LOG_FORMAT': 'json', 'LOG_ASYNC': True, 'LOG_REQUESTS': True},
+    'off': {'LOG_LEVEL': 'WARNING', 'LOG_FORMAT': 'json', 'LOG_ASYNC': True, 'LOG_REQUESTS': False},
+}
+
+BOOKING = {
+    'pickup_latitude': 14.6928,
+    'pickup_longitude': -17.4467,
+    'pickup_address': 'Place de l\'Indépendance, Dakar',
+    'dropoff_latitude': 14.7167,
+    'dropoff_longitude': -17.4677,
+    'dropoff_address': 'Mermoz, Dakar',
+    'ride_mode': 'confort',
+    'payment_method': 'cash',
+}
+
+
+class SlowSink:
+    """Fichier dont chaque écriture attend `delay` secondes (stdout bloquant)"""
+
+    def __init__(self, stream, delay):
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, data):
+        time.sleep(self.delay)
+        return self.stream.write(data)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark des réservations selon la configuration des logs')
+    parser.add_argument('--bookings', type=int, default=300, help='Réservations par configuration')
+    parser.add_argument('--modes', type=str, default=','.join(MODES), help='Configurations à mesurer')
+    parser.add_argument('--sink-delay-ms', type=float, default=0.0, help='Attente par écriture de log (ms)')
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    with app.app_context():
+        seed(rides=1000, users=100, drivers=50)
+
+    from flask_jwt_extended import create_access_token
+    from services.app_logging import init_logging, stop_logging
+
+    with app.app_context():
+        token = create_access_token(identity='2')
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    for mode in args.modes.split(','):
+        log_path = os.path.join(_workdir, f'{mode}.log')
+        with open(log_path, 'w', encoding='utf-8') as stream:
+            app.config.update(MODES[mode])
+            init_logging(app, stream=SlowSink(stream, args.sink_delay_ms / 1000) if args.sink_delay_ms else stream)
+            # Échauffement (imports, caches)
+            for _ in range(10):
+                client.post('/api/v1/rides/book', json=BOOKING, headers=headers)
+
+            latencies = []
+            started = time.perf_counter()
+            for _ in range(args.bookings):
+                t0 = time.perf_counter()
+                response = client.post('/api/v1/rides/book', json=BOOKING, headers=headers)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                assert response.status_code == 201, response.get_data(as_text=True)
+            elapsed = time.perf_counter() - started
+            # Attendre l'écriture des logs en file d'attente
+            stop_logging()
+
+        with open(log_path, encoding='utf-8') as stream:
+            lines = sum(1 for _ in stream)
+        latencies.sort()
+        print(f"📊 {mode:<12} {args.bookings / elapsed:6.1f} réservations/s, "
+              f"p50 {statistics.median(latencies):6.2f} ms, p95 {latencies[int(len(latencies) * 0.95)]:6.2f} ms, "
+              f"{lines / (args.bookings + 10):5.1f} ligne(s) de log par réservation, "
+              f"{os.path.getsize(log_path) // 1024} Ko")
+
+
+if __name__ == '__main__':
+    main()
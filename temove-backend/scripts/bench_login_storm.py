@@ -0,0 +1,157 @@
+"""
+Benchmark de la latence des réservations pendant une vague de connexions
+
+Des threads enchaînent les POST /auth/login (bcrypt) pendant qu'un thread
+réserve des courses (POST /rides/book) et mesure leur latence, sur une
+petite base SQLite temporaire. Compare le hachage dans le thread de la
+requête (inline, comportement d'origine) et le pool borné de
+services/password_hasher.py :
+- inline : PASSWORD_HASH_WORKERS=0
+- pool : PASSWORD_HASH_WORKERS=--workers, file de --queue-size
+
+Usage:
+    python scripts/bench_login_storm.py
+    python scripts/bench_login_storm.py --login-threads 16 --duration 20 --rounds 12
+    python scripts/bench_login_storm.py --modes pool --workers 2 --queue-size 8
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+# Ajouter le répertoire parent au path pour les imports
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+sys.path.insert(0, os.path.join(backend_dir, 'scripts'))
+
+# Base temporaire (avant l'import de la configuration)
+_workdir = tempfile.mkdtemp(prefix='bench_login_')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_workdir, 'bench_login.db')
+
+from seed_bench_data import create_bench_app, seed
+
+
+PASSWORD = 'bench-password'
+LOGIN_USERS = 20
+
+BOOKING = {
+    'pickup_latitude': 14.6928,
+    'pickup_longitude': -17.4467,
+    'pickup_address': 'Place de l\'Indépendance, Dakar',
+    'dropoff_latitude': 14.7167,
+    'dropoff_longitude': -17.4677,
+    'dropoff_address': 'Mermoz, Dakar',
+    'ride_mode': 'confort',
+    'payment_method': 'cash',
+}
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def run_mode(app, mode, args, emails, headers):
+    from services.password_hasher import init_password_hasher
+
+    app.config['PASSWORD_HASH_WORKERS'] = 0 if mode == 'inline' else args.workers
+    app.config['PASSWORD_HASH_QUEUE_SIZE'] = args.queue_size
+    hasher = init_password_hasher(app)
+
+    stop = threading.Event()
+    statuses = Counter()
+    login_latencies = []
+
+    def login_storm(index):
+        client = app.test_client()
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            response = client.post('/api/v1/auth/login', json={
+                'email': emails[index % len(emails)], 'password': PASSWORD
+            })
+            statuses[response.status_code] += 1
+            if response.status_code == 200:
+                login_latencies.append((time.perf_counter() - t0) * 1000)
+            elif response.status_code in (429, 503):
+                # Un client respecte Retry-After (raccourci pour le benchmark)
+                time.sleep(0.05)
+
+    client = app.test_client()
+    # Référence sans connexions
+    baseline = []
+    for _ in range(args.bookings):
+        t0 = time.perf_counter()
+        client.post('/api/v1/rides/book', json=BOOKING, headers=headers)
+        baseline.append((time.perf_counter() - t0) * 1000)
+
+    threads = [threading.Thread(target=login_storm, args=(i,), daemon=True) for i in range(args.login_threads)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.5)
+
+    latencies = []
+    deadline = time.perf_counter() + args.duration
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        response = client.post('/api/v1/rides/book', json=BOOKING, headers=headers)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        assert response.status_code == 201, response.get_data(as_text=True)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    baseline.sort()
+    latencies.sort()
+    login_latencies.sort()
+    print(f"📊 {mode:<7} réservations : p50 {statistics.median(latencies):7.1f} ms, "
+          f"p95 {percentile(latencies, 0.95):7.1f} ms (sans connexions : p50 {statistics.median(baseline):5.1f} ms), "
+          f"{len(latencies) / args.duration:5.1f}/s")
+    print(f"   {'':<7} connexions : {statuses[200] / args.duration:5.1f}/s réussies, "
+          f"p50 {statistics.median(login_latencies) if login_latencies else 0:7.1f} ms, "
+          f"refusées 429={statuses[429]} 503={statuses[503]}, autres={sum(statuses.values()) - statuses[200] - statuses[429] - statuses[503]}")
+    print(f"   {'':<7} pool : {hasher.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latence des réservations pendant une vague de connexions')
+    parser.add_argument('--modes', type=str, default='inline,pool', help='inline et/ou pool')
+    parser.add_argument('--login-threads', type=int, default=8, help='Threads de connexion simultanés')
+    parser.add_argument('--duration', type=float, default=10.0, help='Durée de la vague (secondes)')
+    parser.add_argument('--bookings', type=int, default=30, help='Réservations de référence (sans connexions)')
+    parser.add_argument('--rounds', type=int, default=12, help='Coût bcrypt (BCRYPT_LOG_ROUNDS)')
+    parser.add_argument('--workers', type=int, default=1, help='Threads bcrypt du pool')
+    parser.add_argument('--queue-size', type=int, default=4, help='File d\'attente du pool')
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    app.config.update({'BCRYPT_LOG_ROUNDS': args.rounds, 'LOG_LEVEL': 'WARNING', 'LOG_REQUESTS': False})
+
+    from extensions import db
+    from models.user import User
+    from services.app_logging import init_logging
+    from services.password_hasher import init_password_hasher
+    from flask_jwt_extended import create_access_token
+
+    init_logging(app, stream=open(os.devnull, 'w'))
+    init_password_hasher(app)
+    with app.app_context():
+        seed(rides=1000, users=100, drivers=50)
+        users = User.query.order_by(User.id).limit(LOGIN_USERS).all()
+        for user in users:
+            user.set_password(PASSWORD)
+        db.session.commit()
+        emails = [user.email for user in users]
+        token = create_access_token(identity=str(users[-1].id))
+    headers = {'Authorization': f'Bearer {token}'}
+
+    print(f"⏱️ {args.login_threads} threads de connexion pendant {args.duration:.0f} s, bcrypt coût {args.rounds}, "
+          f"{os.cpu_count()} CPU")
+    for mode in args.modes.split(','):
+        run_mode(app, mode, args, emails, headers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark du rendu PDF des rapports (services/pdf_report_renderer.py)
+
+Rend un rapport de courses synthétique (colonnes du rapport « rides ») en
+séquentiel puis avec un pool de processus, et affiche durée, pages et taille.
+
+Usage:
+    python scripts/bench_pdf_reports.py
+    python scripts/bench_pdf_reports.py --rows 100000 --workers 1,2,4
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Ajouter le répertoire parent au path pour les imports
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from services.pdf_report_renderer import render_pdf, PYPDF_AVAILABLE
+from services.report_export_service import REPORT_COLUMNS
+
+STREETS = ['Avenue Cheikh Anta Diop', 'Route de Ouakam', 'Boulevard du Centenaire',
+           'Rue Carnot', 'Corniche Ouest', 'VDN', 'Avenue Bourguiba', 'Route des Almadies']
+STATUSES = ['completed', 'completed', 'completed', 'cancelled', 'in_progress']
+
+
+def synthetic_rides(count, seed=42):
+    """Lignes du rapport des courses (mêmes types que l'export : dates ISO, nombres)"""
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1)
+    for ride_id in range(count, 0, -1):
+        yield [
+            ride_id,
+            f"Client {rng.randint(1, 50000)}",
+            f"Chauffeur {rng.randint(1, 2000)}",
+            f"{rng.randint(1, 200)} {rng.choice(STREETS)}, Dakar",
+            f"{rng.randint(1, 200)} {rng.choice(STREETS)}, Dakar",
+            round(rng.uniform(1, 30), 2),
+            float(rng.randrange(1000, 15000, 50)),
+            rng.choice(STATUSES),
+            (start + timedelta(minutes=ride_id)).isoformat(),
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark du rendu PDF des rapports')
+    parser.add_argument('--rows', type=int, default=100000, help='Nombre de lignes du rapport')
+    parser.add_argument('--workers', type=str, default='1,2,4', help='Nombres de processus à comparer')
+    args = parser.parse_args()
+
+    if not PYPDF_AVAILABLE:
+        print("⚠️ pypdf non installé - rendu séquentiel uniquement (pip install pypdf)")
+
+    columns = REPORT_COLUMNS['rides']
+    with tempfile.TemporaryDirectory() as directory:
+        for workers in [int(value) for value in args.workers.split(',')]:
+            path = os.path.join(directory, f'rides_{workers}.pdf')
+            started = time.perf_counter()
+            rendered = render_pdf(path, 'Rapport des Courses', 'Benchmark', columns,
+                                  synthetic_rides(args.rows), workers=workers)
+            elapsed = time.perf_counter() - started
+            pages = ''
+            if PYPDF_AVAILABLE:
+                from pypdf import PdfReader
+                pages = f", {len(PdfReader(path).pages)} pages"
+            print(f"📄 {workers} processus : {rendered} lignes en {elapsed:.1f}s "
+                  f"({rendered / elapsed:,.0f} lignes/s){pages}, {os.path.getsize(path) // 1024} Ko")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark de la sérialisation des courses (services/ride_serializer.py)
+
+Charge 1000 courses avec chauffeur depuis la base remplie par
+scripts/seed_bench_data.py puis compare :
+- avant : Ride.query ... .all() puis ride.to_dict() (chargement paresseux du chauffeur)
+- après : eager_load() + serialize_rides() pour chaque projection
+
+Usage:
+    python scripts/bench_ride_serializers.py
+    python scripts/bench_ride_serializers.py --rides 1000 --repeat 5
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Ajouter le répertoire parent au path pour les imports
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+sys.path.insert(0, os.path.join(backend_dir, 'scripts'))
+
+from seed_bench_data import create_bench_app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de la sérialisation des courses')
+    parser.add_argument('--rides', type=int, default=1000, help='Nombre de courses sérialisées')
+    parser.add_argument('--repeat', type=int, default=5, help='Nombre de mesures (meilleure gardée)')
+    args = parser.parse_args()
+
+    app = create_bench_app()
+
+    from sqlalchemy import event
+    from extensions import db
+    from models.ride import Ride
+    from services.ride_serializer import PROJECTIONS, eager_load, serialize_rides
+
+    queries = []
+
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    def base_query():
+        return Ride.query.filter(Ride.driver_id.isnot(None)).order_by(Ride.requested_at.desc()).limit(args.rides)
+
+    def before():
+        return [ride.to_dict() for ride in base_query().all()]
+
+    def after(projection):
+        fields = PROJECTIONS[projection]
+        return serialize_rides(eager_load(base_query(), fields).all(), projection, fields)
+
+    cases = [('avant : to_dict()', before)] + [
+        (f'après : {projection}', lambda projection=projection: after(projection)) for projection in PROJECTIONS
+    ]
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', count_query)
+        for label, run in cases:
+            best = None
+            for _ in range(args.repeat):
+                # Session vide : chaque mesure recharge courses et chauffeurs
+                db.session.expunge_all()
+                queries.clear()
+                started = time.perf_counter()
+                payload = run()
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            size = len(json.dumps(payload))
+            print(f"📊 {label:<20} {len(payload)} courses : {best * 1000:7.1f} ms, "
+                  f"{len(queries):4d} requête(s) SQL, JSON {size // 1024} Ko")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Script pour calculer la carte de chaleur de la demande (départs / arrivées)
+
+Agrège les courses des HEATMAP_HISTORY_DAYS derniers jours par cellule ×
+heure de la semaine et enregistre le résultat dans HEATMAP_PATH. À planifier
+chaque nuit (cron) : entre deux calculs, l'application ajoute les nouvelles
+courses au fur et à mesure.
+
+Usage:
+    python scripts/build_demand_heatmap.py
+    python scripts/build_demand_heatmap.py --config production --days 180
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import time
+
+# Ajouter le répertoire parent au path pour les imports
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Calculer la carte de chaleur de la demande')
+    parser.add_argument('--config', type=str, default='development', help='Configuration Flask')
+    parser.add_argument('--days', type=int, default=None, help='Jours d\'historique (0 = tout, défaut: HEATMAP_HISTORY_DAYS)')
+    parser.add_argument('--output', type=str, default=None, help='Fichier de sortie (défaut: HEATMAP_PATH)')
+    args = parser.parse_args()
+
+    # Importer depuis le fichier app.py (pas le module app/)
+    spec = importlib.util.spec_from_file_location("app_module", os.path.join(backend_dir, "app.py"))
+    app_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app_module)
+    app = app_module.create_app(args.config)
+
+    from services.demand_heatmap_service import build_heatmap_from_database, NUMPY_AVAILABLE
+
+    if not NUMPY_AVAILABLE:
+        print("❌ NumPy est requis : pip install numpy")
+        sys.exit(1)
+
+    with app.app_context():
+        days = args.days if args.days is not None else app.config['HEATMAP_HISTORY_DAYS']
+        output = args.output or app.config['HEATMAP_PATH']
+
+        heatmap = build_heatmap_from_database(app.config['HEATMAP_CELL_METERS'], days)
+        started = time.perf_counter()
+        heatmap.save(output)
+        print(f"✅ Carte de chaleur enregistrée dans {output} ({time.perf_counter() - started:.1f}s, "
+              f"{os.path.getsize(output) / 1024:.0f} Ko)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Script pour générer le gazetteer local de Dakar utilisé par le géocodage inverse hors ligne
+
+Le gazetteer contient :
+- les quartiers intégrés (services/reverse_geocoding_service.py)
+- les points de repère (routes/landmarks.py)
+- les rues d'un export OpenStreetMap optionnel (GeoJSON) ou d'un CSV
+
+Usage:
+    python scripts/build_gazetteer.py
+    python scripts/build_gazetteer.py --osm dakar_streets.geojson
+    python scripts/build_gazetteer.py --csv rues.csv --output data/dakar_gazetteer.json
+
+Format CSV attendu (avec en-tête) : name,type,latitude,longitude,quartier
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import datetime
+
+# Ajouter le répertoire parent au path pour les imports
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from config import Config
+from services.reverse_geocoding_service import builtin_entries, KDTree
+
+
+def _centroid(coordinates):
+    """Centroïde simple d'une liste de points [lng, lat]"""
+    lngs = [c[0] for c in coordinates]
+    lats = [c[1] for c in coordinates]
+    return sum(lats) / len(lats), sum(lngs) / len(lngs)
+
+
+def load_osm_streets(path):
+    """Charger les rues nommées d'un export GeoJSON OpenStreetMap"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    streets = []
+    for feature in data.get('features', []):
+        properties = feature.get('properties') or {}
+        geometry = feature.get('geometry') or {}
+        name = properties.get('name')
+        if not name or not properties.get('highway'):
+            continue
+
+        if geometry.get('type') == 'LineString':
+            lines = [geometry['coordinates']]
+        elif geometry.get('type') == 'MultiLineString':
+            lines = geometry['coordinates']
+        else:
+            continue
+
+        # Un point par segment de 5 sommets pour couvrir les rues longues
+        for line in lines:
+            for start in range(0, len(line), 5):
+                lat, lng = _centroid(line[start:start + 5])
+                streets.append({'name': name, 'type': 'street', 'latitude': lat, 'longitude': lng})
+    return streets
+
+
+def load_csv_entries(path):
+    """Charger des entrées depuis un CSV (name,type,latitude,longitude,quartier)"""
+    entries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            entries.append({
+                'name': row['name'],
+                'type': row.get('type') or 'street',
+                'latitude': float(row['latitude']),
+                'longitude': float(row['longitude']),
+                'quartier': row.get('quartier') or None,
+            })
+    return entries
+
+
+def assign_quartiers(entries):
+    """Rattacher chaque rue à son quartier le plus proche"""
+    quartiers = [e for e in entries if e['type'] == 'quartier']
+    tree = KDTree([(q['latitude'], q['longitude']) for q in quartiers])
+    for entry in entries:
+        if entry['type'] == 'street' and not entry.get('quartier'):
+            idx, _ = tree.nearest(entry['latitude'], entry['longitude'])
+            if idx is not None:
+                entry['quartier'] = quartiers[idx]['name']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Générer le gazetteer de Dakar')
+    parser.add_argument('--osm', type=str, default=None, help='Export GeoJSON OpenStreetMap des rues')
+    parser.add_argument('--csv', type=str, default=None, help='CSV d\'entrées supplémentaires')
+    parser.add_argument('--output', type=str, default=Config.GAZETTEER_PATH, help='Fichier de sortie')
+    args = parser.parse_args()
+
+    entries = builtin_entries()
+    if args.osm:
+        streets = load_osm_streets(args.osm)
+        print(f"🛣️  {len(streets)} points de rue chargés depuis {args.osm}")
+        entries.extend(streets)
+    if args.csv:
+        csv_entries = load_csv_entries(args.csv)
+        print(f"📄 {len(csv_entries)} entrées chargées depuis {args.csv}")
+        entries.extend(csv_entries)
+
+    assign_quartiers(entries)
+
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': 1,
+            'generated_at': datetime.utcnow().isoformat(),
+            'entries': entries,
+        }, f, ensure_ascii=False)
+
+    counts = {}
+    for entry in entries:
+        counts[entry['type']] = counts.get(entry['type'], 0) + 1
+    print(f"✅ Gazetteer généré: {args.output} ({counts})")
+
+
+if __name__ == '__main__':
+    main()
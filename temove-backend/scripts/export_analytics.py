@@ -0,0 +1,87 @@
+"""
+Export Parquet incrémental des tables métier pour l'analyse
+
+Écrit rides, payments, commissions, users et drivers dans ANALYTICS_EXPORT_DIR,
+partitionnés par mois (services/analytics_export_service.py). Chaque passage
+n'ajoute que les lignes créées ou modifiées depuis le précédent : à lancer
+toutes les heures ou chaque nuit (cron).
+
+Lecture côté analyste (pandas, DuckDB, Spark...) :
+    pandas.read_parquet('instance/analytics/rides')  # puis garder le dernier updated_at par id
+ou read_export() du service, qui ne garde que la dernière version de chaque ligne.
+
+Usage:
+    python scripts/export_analytics.py
+    python scripts/export_analytics.py --tables rides,payments
+    python scripts/export_analytics.py --full               # tout réexporter (suppressions comprises)
+    python scripts/export_analytics.py --compact            # un fichier dédoublonné par mois
+    python scripts/export_analytics.py --read rides --months 12
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import time
+from datetime import datetime
+
+# Ajouter le répertoire parent au path pour les imports
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Exporter les tables métier en Parquet')
+    parser.add_argument('--config', type=str, default='development', help='Configuration Flask')
+    parser.add_argument('--dir', type=str, default=None, help='Répertoire de l\'export (ANALYTICS_EXPORT_DIR)')
+    parser.add_argument('--tables', type=str, default=None, help='Tables séparées par des virgules')
+    parser.add_argument('--full', action='store_true', help='Réexporter entièrement')
+    parser.add_argument('--compact', action='store_true', help='Compacter chaque mois après l\'export')
+    parser.add_argument('--batch-size', type=int, default=50000, help='Lignes lues par lot')
+    parser.add_argument('--read', type=str, default=None, help='Lire une table exportée (mesure du temps)')
+    parser.add_argument('--months', type=int, default=12, help='Mois lus avec --read')
+    args = parser.parse_args()
+
+    # Importer depuis le fichier app.py (pas le module app/)
+    spec = importlib.util.spec_from_file_location("app_module", os.path.join(backend_dir, "app.py"))
+    app_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app_module)
+    app = app_module.create_app(args.config)
+
+    from services.analytics_export_service import (
+        EXPORT_TABLES, export_table, compact_table, read_export, AnalyticsExportError
+    )
+
+    directory = args.dir or app.config['ANALYTICS_EXPORT_DIR']
+    tables = args.tables.split(',') if args.tables else list(EXPORT_TABLES)
+
+    try:
+        if args.read:
+            today = datetime.utcnow()
+            month_index = today.year * 12 + today.month - 1 - (args.months - 1)
+            start_month = f"{month_index // 12:04d}-{month_index % 12 + 1:02d}"
+            started = time.perf_counter()
+            table = read_export(directory, args.read, start_month=start_month)
+            print(f"📊 {args.read} depuis {start_month} : {table.num_rows} lignes, "
+                  f"{table.num_columns} colonnes lues en {time.perf_counter() - started:.2f}s")
+            return
+
+        with app.app_context():
+            for name in tables:
+                started = time.perf_counter()
+                result = export_table(name, directory, full=args.full, batch_size=args.batch_size)
+                mode = 'complet' if result['full'] else 'incrémental'
+                print(f"✅ {name} ({mode}) : {result['rows']} lignes, {result['files']} fichier(s) "
+                      f"en {time.perf_counter() - started:.1f}s - watermark {result['watermark']}")
+                if args.compact:
+                    started = time.perf_counter()
+                    compacted = compact_table(directory, name)
+                    print(f"🧹 {name} : {compacted['partitions']} mois compactés, "
+                          f"{compacted['rows_before']} → {compacted['rows_after']} lignes "
+                          f"en {time.perf_counter() - started:.1f}s")
+    except AnalyticsExportError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+"""
+Faux fournisseur Google Maps (Directions / Geocoding) avec injection de latence et d'erreurs
+
+Sert à tester le client HTTP partagé (services/http_client.py) sans appel réel.
+
+Usage:
+    # Lancer le serveur (puis GOOGLE_MAPS_BASE_URL=http://127.0.0.1:8765 et une clé quelconque)
+    python scripts/fake_geo_provider.py --port 8765 --latency-ms 50 --slow-rate 0.1 --error-rate 0.05
+
+    # Scénarios automatiques : pool de connexions, budget, hedging, disjoncteur
+    python scripts/fake_geo_provider.py --selftest
+
+Le comportement peut aussi être modifié par requête : ?fake_latency_ms=...&fake_error_rate=...
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Ajouter le répertoire parent au path pour les imports
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+
+class FakeProviderSettings:
+    """Comportement du faux fournisseur (modifiable pendant les tests)"""
+
+    def __init__(self, latency_ms=20, slow_rate=0.0, slow_latency_ms=2000, error_rate=0.0):
+        self.latency_ms = latency_ms
+        self.slow_rate = slow_rate
+        self.slow_latency_ms = slow_latency_ms
+        self.error_rate = error_rate
+        self.requests = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+
+
+def make_handler(settings):
+    class FakeGeoHandler(BaseHTTPRequestHandler):
+        # HTTP/1.1 pour le keep-alive ; en-têtes et corps envoyés en un seul paquet
+        protocol_version = 'HTTP/1.1'
+        wbufsize = -1
+
+        def setup(self):
+            super().setup()
+            with settings.lock:
+                settings.connections += 1
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+            with settings.lock:
+                settings.requests += 1
+
+            latency_ms = float(query.get('fake_latency_ms', settings.latency_ms))
+            error_rate = float(query.get('fake_error_rate', settings.error_rate))
+            if random.random() < settings.slow_rate:
+                latency_ms = settings.slow_latency_ms
+            time.sleep(latency_ms / 1000.0)
+
+            if random.random() < error_rate:
+                self._send_json(503, {'status': 'UNAVAILABLE'})
+                return
+
+            if parsed.path.endswith('/directions/json'):
+                self._send_json(200, {
+                    'status': 'OK',
+                    'routes': [{'legs': [{'duration': {'value': 900}, 'distance': {'value': 7500}}]}],
+                })
+            elif parsed.path.endswith('/geocode/json'):
+                self._send_json(200, {
+                    'status': 'OK',
+                    'results': [{'formatted_address': 'Route de la Corniche, Fann, Dakar'}],
+                })
+            else:
+                self._send_json(404, {'status': 'NOT_FOUND'})
+
+    return FakeGeoHandler
+
+
+class FakeGeoServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Les requêtes abandonnées par le client (budget, hedging) ne sont pas des erreurs
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+
+def start_server(settings, port=0):
+    server = FakeGeoServer(('127.0.0.1', port), make_handler(settings))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def _timed_calls(client, url, count, **kwargs):
+    latencies = []
+    errors = 0
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            client.get_json(url, params={'origin': '14.7,-17.4', 'destination': '14.75,-17.5'}, **kwargs)
+        except Exception:
+            errors += 1
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        'p50': latencies[len(latencies) // 2],
+        'p99': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        'max': latencies[-1],
+        'errors': errors,
+    }
+
+
+def selftest():
+    from services.http_client import ResilientHTTPClient, CircuitOpenError, CircuitBreaker
+
+    settings = FakeProviderSettings(latency_ms=10)
+    server = start_server(settings)
+    url = f'http://127.0.0.1:{server.server_address[1]}/maps/api/directions/json'
+    failures = []
+
+    def check(condition, message):
+        print(f"{'✅' if condition else '❌'} {message}")
+        if not condition:
+            failures.append(message)
+
+    # 1. Keep-alive : 50 appels séquentiels sur une seule connexion
+    client = ResilientHTTPClient('fake', pool_size=4, budget_ms=1000, hedge_after_ms=0)
+    stats = _timed_calls(client, url, 50)
+    check(stats['errors'] == 0 and settings.connections <= 2,
+          f"Pool de connexions: {settings.requests} requêtes, {settings.connections} connexion(s), p50={stats['p50']:.1f} ms")
+
+    # 2. Budget de latence : fournisseur lent (2 s), budget de 300 ms
+    settings.slow_rate = 1.0
+    stats = _timed_calls(client, url, 3, budget_ms=300)
+    check(stats['errors'] == 3 and stats['max'] < 450,
+          f"Budget respecté: max={stats['max']:.0f} ms pour un budget de 300 ms")
+    settings.slow_rate = 0.0
+    client.breaker.record_success()
+
+    # 3. Hedging : 5% de réponses lentes, la requête couverte répond à la place
+    settings.slow_rate = 0.05
+    plain = _timed_calls(client, url, 200, budget_ms=3000, hedge_after_ms=0)
+    hedged = _timed_calls(client, url, 200, budget_ms=3000, hedge_after_ms=100)
+    settings.slow_rate = 0.0
+    check(hedged['p99'] < plain['p99'] / 2,
+          f"Hedging: p99 {plain['p99']:.0f} ms -> {hedged['p99']:.0f} ms")
+
+    # 4. Disjoncteur : erreurs 503 -> ouverture, puis échec immédiat sans appel réseau
+    client = ResilientHTTPClient('fake-breaker', pool_size=4, budget_ms=500, hedge_after_ms=0,
+                                 failure_threshold=3, reset_timeout=1)
+    settings.error_rate = 1.0
+    _timed_calls(client, url, 3)
+    before = settings.requests
+    start = time.perf_counter()
+    try:
+        client.get_json(url)
+        opened = False
+    except CircuitOpenError:
+        opened = True
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    check(opened and settings.requests == before and elapsed_ms < 5,
+          f"Disjoncteur ouvert après 3 échecs (rejet en {elapsed_ms:.2f} ms, aucun appel)")
+
+    # 5. Semi-ouvert : après reset_timeout, un appel d'essai réussi referme le disjoncteur
+    settings.error_rate = 0.0
+    time.sleep(1.1)
+    stats = _timed_calls(client, url, 5)
+    check(stats['errors'] == 0 and client.breaker.state == CircuitBreaker.CLOSED,
+          "Disjoncteur refermé après un appel d'essai réussi")
+
+    server.shutdown()
+    if failures:
+        print(f"\n❌ {len(failures)} scénario(s) en échec")
+        sys.exit(1)
+    print("\n✅ Tous les scénarios sont passés")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Faux fournisseur de géolocalisation')
+    parser.add_argument('--port', type=int, default=8765, help='Port d\'écoute')
+    parser.add_argument('--latency-ms', type=float, default=20, help='Latence de base (ms)')
+    parser.add_argument('--slow-rate', type=float, default=0.0, help='Proportion de réponses lentes')
+    parser.add_argument('--slow-latency-ms', type=float, default=2000, help='Latence des réponses lentes (ms)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Proportion de réponses 503')
+    parser.add_argument('--selftest', action='store_true', help='Exécuter les scénarios de test du client')
+    args = parser.parse_args()
+
+    if args.selftest:
+        selftest()
+        return
+
+    settings = FakeProviderSettings(
+        latency_ms=args.latency_ms,
+        slow_rate=args.slow_rate,
+        slow_latency_ms=args.slow_latency_ms,
+        error_rate=args.error_rate,
+    )
+    server = start_server(settings, args.port)
+    print(f"🛰️  Faux fournisseur sur http://127.0.0.1:{args.port} (Ctrl+C pour arrêter)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Job nocturne des statistiques quotidiennes des conducteurs (driver_stats_daily)
+
+1. découpe à minuit les sessions en ligne encore ouvertes (le temps en ligne
+   de la veille est compté dans la veille)
+2. recalcule les derniers jours depuis les tables rides et commissions, pour
+   rattraper les écritures faites hors de l'ORM (imports, corrections SQL)
+
+Entre deux passages, la table est maintenue à chaque écriture
+(services/driver_stats_service.py). --full reconstruit tout l'historique
+(toujours le cas au premier passage, après le déploiement) ; le recalcul
+avance un jour à la fois, l'application peut rester en ligne.
+
+Usage:
+    python scripts/refresh_driver_stats.py
+    python scripts/refresh_driver_stats.py --days 7
+    python scripts/refresh_driver_stats.py --full --config production
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Ajouter le répertoire parent au path pour les imports
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mettre à jour driver_stats_daily')
+    parser.add_argument('--config', type=str, default='development', help='Configuration Flask')
+    parser.add_argument('--days', type=int, default=2, help='Jours recalculés (aujourd\'hui inclus)')
+    parser.add_argument('--full', action='store_true', help='Recalculer tout l\'historique')
+    parser.add_argument('--batch-size', type=int, default=50000, help='Lignes lues par lot')
+    args = parser.parse_args()
+
+    # Importer depuis le fichier app.py (pas le module app/)
+    spec = importlib.util.spec_from_file_location("app_module", os.path.join(backend_dir, "app.py"))
+    app_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app_module)
+    app = app_module.create_app(args.config)
+
+    from services.driver_stats_service import checkpoint_online_sessions, recompute_driver_stats
+
+    with app.app_context():
+        sessions = checkpoint_online_sessions()
+        print(f"✅ {sessions} session(s) en ligne découpée(s) à minuit")
+
+        today = datetime.utcnow().date()
+        start_day = None if args.full else today - timedelta(days=max(args.days, 1) - 1)
+        started = time.perf_counter()
+        counts = recompute_driver_stats(start_day, None if args.full else today, batch_size=args.batch_size)
+        period = "tout l'historique" if args.full else f"depuis le {start_day.isoformat()}"
+        print(f"✅ driver_stats_daily recalculée ({period}) en {time.perf_counter() - started:.1f}s")
+        print(f"   {counts['rides']} courses et {counts['commissions']} commissions lues")
+        print(f"   {counts['driver_stats_daily']} lignes écrites")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Rapports récurrents et nettoyage du répertoire des rapports
+
+À lancer chaque nuit en heures creuses (cron), par exemple :
+    0 3 * * * cd /srv/temove-backend && python scripts/run_scheduled_reports.py --config production
+
+Génère les rapports de REPORT_SCHEDULES dus ce jour (quotidiens : la veille,
+hebdomadaires le lundi : la semaine précédente, mensuels le 1er : le mois
+précédent). Une demande identique faite ensuite depuis le dashboard réutilise
+le fichier. Applique ensuite l'expiration et le quota disque.
+
+Usage:
+    python scripts/run_scheduled_reports.py
+    python scripts/run_scheduled_reports.py --force      # tous les rapports, quel que soit le jour
+    python scripts/run_scheduled_reports.py --cleanup-only
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import time
+
+# Ajouter le répertoire parent au path pour les imports
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Générer les rapports récurrents et nettoyer les anciens')
+    parser.add_argument('--config', type=str, default='development', help='Configuration Flask')
+    parser.add_argument('--force', action='store_true', help='Générer tous les rapports planifiés')
+    parser.add_argument('--cleanup-only', action='store_true', help='Uniquement le nettoyage')
+    args = parser.parse_args()
+
+    # Importer depuis le fichier app.py (pas le module app/)
+    spec = importlib.util.spec_from_file_location("app_module", os.path.join(backend_dir, "app.py"))
+    app_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app_module)
+    app = app_module.create_app(args.config)
+
+    from services.report_job_service import run_scheduled_reports, cleanup_reports
+
+    with app.app_context():
+        if not args.cleanup_only:
+            started = time.perf_counter()
+            for job, created in run_scheduled_reports(force=args.force):
+                state = 'généré' if created else 'déjà disponible'
+                print(f"✅ {job.report_type}/{job.format} {job.start_date.date()} → {job.end_date.date()} : "
+                      f"{state} ({job.status}, {job.row_count} lignes)")
+            print(f"⏱️  Rapports planifiés traités en {time.perf_counter() - started:.1f}s")
+
+        counts = cleanup_reports()
+        print(f"🧹 {counts['expired_jobs']} job(s) expiré(s), {counts['removed_files']} fichier(s) orphelin(s) "
+              f"supprimé(s), {counts['freed_bytes'] // 1024} Ko libérés")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+"""
+Script pour remplir une base de test avec un grand volume de données (benchmarks)
+
+Génère des utilisateurs, conducteurs, courses réparties sur les derniers mois,
+paiements et commissions avec des insertions groupées (pas d'objets ORM).
+
+Usage:
+    DATABASE_URL=sqlite:///instance/bench.db python scripts/seed_bench_data.py --rides 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Ajouter le répertoire parent au path pour les imports
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+DEFAULT_DATABASE_URL = 'sqlite:///' + os.path.join(backend_dir, 'instance', 'bench.db')
+os.environ.setdefault('DATABASE_URL', DEFAULT_DATABASE_URL)
+
+BATCH_SIZE = 20000
+
+PICKUP_ADDRESSES = [
+    'Place de l\'Indépendance, Plateau', 'Marché Sandaga, Plateau', 'Aéroport AIBD, Diass',
+    'Plage de Yoff', 'Monument de la Renaissance, Ouakam', 'Route de la Corniche, Fann',
+    'Avenue Cheikh Anta Diop, Fann', 'VDN, Sacré-Cœur', 'Liberté 6, Dakar', 'Almadies, Ngor',
+    'Parcelles Assainies U17', 'Grand Yoff, Dakar', 'Mermoz, Dakar', 'HLM Grand Médine',
+]
+
+
+def _batches(rows_iter, size=BATCH_SIZE):
+    batch = []
+    for row in rows_iter:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def seed(rides=1000000, users=20000, drivers=2000, days=120, seed_value=42):
+    """Remplir la base (les tables doivent être vides)"""
+    from extensions import db
+    from models.user import User
+    from models.driver import Driver, DriverStatus
+    from models.ride import Ride, RideStatus, RideCategory, RideMode
+    from models.payment import Payment, PaymentMethod, PaymentStatus
+    from models.commission import Commission
+
+    random.seed(seed_value)
+    now = datetime.utcnow()
+    started = time.perf_counter()
+
+    db.session.execute(User.__table__.insert(), [
+        {
+            'email': f'bench{i}@temove.sn',
+            'password_hash': 'x',
+            'full_name': f'Client {i}',
+            'role': 'client',
+            'is_active': random.random() > 0.05,
+            'is_verified': True,
+            'is_admin': i == 1,
+            'credit_balance': 0,
+            'created_at': now - timedelta(days=random.uniform(0, days * 2)),
+        }
+        for i in range(1, users + 1)
+    ])
+
+    db.session.execute(Driver.__table__.insert(), [
+        {
+            'full_name': f'Chauffeur {i}',
+            'car_make': 'Toyota',
+            'car_model': 'Corolla',
+            'car_color': 'Blanc',
+            'license_plate': f'DK-{i:05d}-B',
+            'status': random.choice(list(DriverStatus)),
+            'is_active': random.random() > 0.1,
+            'is_verified': random.random() > 0.2,
+            'total_rides': 0,
+            'rating_average': round(random.uniform(3.5, 5.0), 2),
+            'rating_count': random.randint(0, 300),
+            'created_at': now - timedelta(days=random.uniform(0, days * 2)),
+        }
+        for i in range(1, drivers + 1)
+    ])
+    db.session.commit()
+    print(f"👥 {users} utilisateurs et {drivers} conducteurs créés")
+
+    statuses = [RideStatus.COMPLETED] * 7 + [RideStatus.CANCELLED] * 2 + [
+        RideStatus.PENDING, RideStatus.DRIVER_ASSIGNED, RideStatus.IN_PROGRESS
+    ]
+    modes = list(RideMode)
+    methods = list(PaymentMethod)
+
+    def ride_rows():
+        for ride_id in range(1, rides + 1):
+            requested_at = now - timedelta(seconds=random.uniform(0, days * 86400))
+            status = random.choice(statuses)
+            distance_km = round(random.uniform(1, 25), 2)
+            base_price = int(500 + distance_km * random.choice([200, 300, 400, 500]))
+            surge = random.choice([1.0, 1.0, 1.0, 1.2, 1.5])
+            yield {
+                'id': ride_id,
+                'user_id': random.randint(1, users),
+                'driver_id': random.randint(1, drivers) if status != RideStatus.PENDING else None,
+                'category': RideCategory.COURSE,
+                'ride_mode': random.choice(modes),
+                'pickup_latitude': 14.65 + random.random() * 0.12,
+                'pickup_longitude': -17.52 + random.random() * 0.15,
+                'pickup_address': random.choice(PICKUP_ADDRESSES),
+                'dropoff_latitude': 14.65 + random.random() * 0.12,
+                'dropoff_longitude': -17.52 + random.random() * 0.15,
+                'dropoff_address': random.choice(PICKUP_ADDRESSES),
+                'distance_km': distance_km,
+                'duration_minutes': int(distance_km * 2),
+                'base_price': base_price,
+                'surge_multiplier': surge,
+                'final_price': int(base_price * surge),
+                'discount_amount': 0,
+                'status': status,
+                'payment_method': 'cash',
+                'requested_at': requested_at,
+                'completed_at': requested_at + timedelta(minutes=30) if status == RideStatus.COMPLETED else None,
+                'cancelled_at': requested_at + timedelta(minutes=5) if status == RideStatus.CANCELLED else None,
+            }
+
+    for batch in _batches(ride_rows()):
+        db.session.execute(Ride.__table__.insert(), batch)
+
+        payments = []
+        commissions = []
+        for ride in batch:
+            completed = ride['status'] == RideStatus.COMPLETED
+            payments.append({
+                'ride_id': ride['id'],
+                'user_id': ride['user_id'],
+                'amount': ride['final_price'],
+                'method': random.choice(methods),
+                'status': PaymentStatus.COMPLETED if completed else PaymentStatus.PENDING,
+                'created_at': ride['requested_at'],
+                'processed_at': ride['completed_at'],
+            })
+            if completed:
+                platform = int(ride['final_price'] * 0.15)
+                commissions.append({
+                    'ride_id': ride['id'],
+                    'driver_id': ride['driver_id'],
+                    'ride_price': ride['final_price'],
+                    'platform_commission': platform,
+                    'driver_earnings': ride['final_price'] - platform,
+                    'service_fee': 0,
+                    'commission_rate': 15.0,
+                    'base_commission': platform,
+                    'surge_commission': 0,
+                    'base_price': ride['base_price'],
+                    'surge_amount': ride['final_price'] - ride['base_price'],
+                    'status': 'paid' if random.random() > 0.3 else 'pending',
+                    'created_at': ride['completed_at'],
+                    'updated_at': ride['completed_at'],
+                })
+        db.session.execute(Payment.__table__.insert(), payments)
+        if commissions:
+            db.session.execute(Commission.__table__.insert(), commissions)
+        db.session.commit()
+        print(f"   🚕 {batch[-1]['id']}/{rides} courses", end='\r')
+
+    print(f"\n✅ Base remplie en {time.perf_counter() - started:.1f}s")
+
+
+def create_bench_app():
+    """Créer l'application sur la base de benchmark (tables créées si besoin)"""
+    # Importer depuis le fichier app.py (pas le module app/)
+    import importlib.util
+
+    spec = importlib.util.spec_from_file_location("app_module", os.path.join(backend_dir, "app.py"))
+    app_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app_module)
+    app = app_module.create_app('production')
+    # Les benchmarks enchaînent les requêtes d'un même client : limites de débit désactivées
+    from services.rate_limiter import init_rate_limiter
+    app.config['RATE_LIMIT_ENABLED'] = False
+    # Pas de construction des index (recherche admin, autocomplétion, carte de chaleur) pendant les mesures
+    app.config['ADMIN_SEARCH_WARMUP'] = False
+    app.config['AUTOCOMPLETE_WARMUP'] = False
+    app.config['HEATMAP_WARMUP'] = False
+    init_rate_limiter(app)
+    return app
+
+
+def ensure_seeded(app, rides):
+    """Remplir la base si elle est vide"""
+    from models.ride import Ride
+
+    with app.app_context():
+        existing = Ride.query.count()
+        if existing == 0:
+            seed(rides=rides)
+        elif existing != rides:
+            print(f"⚠️  La base contient déjà {existing} courses (utiliser une base vide pour {rides})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Remplir une base de benchmark')
+    parser.add_argument('--rides', type=int, default=1000000, help='Nombre de courses')
+    parser.add_argument('--users', type=int, default=20000, help='Nombre d\'utilisateurs')
+    parser.add_argument('--drivers', type=int, default=2000, help='Nombre de conducteurs')
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    with app.app_context():
+        seed(rides=args.rides, users=args.users, drivers=args.drivers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,411 @@
+"""
+Service d'autocomplétion des adresses
+
+Index en mémoire construit à partir de l'historique des courses
+(Ride.pickup_address, Ride.dropoff_address) et des points de repère
+(nom et name_wolof) :
+- un trie de préfixes dont chaque noeud garde les K entrées les plus fréquentes
+- un vocabulaire trié : les entrées des mots commençant par le préfixe
+  complètent les candidats du trie (adresses moins fréquentes mais proches
+  ou récentes)
+- un index de trigrammes sur le vocabulaire pour corriger les fautes de frappe
+
+Le classement combine fréquence, récence et distance à la position de
+l'utilisateur. L'index est construit en arrière-plan dès la première requête
+servie (AUTOCOMPLETE_WARMUP) et mis à jour à chaque nouvelle course ; les
+lectures et les écritures passent par le même verrou.
+"""
+import math
+import re
+from array import array
+from bisect import bisect_left, insort
+import time
+import unicodedata
+from threading import Lock, Thread
+from services.app_logging import get_logger
+
+
+logger = get_logger('places')
+
+
+# Adresses génériques envoyées par défaut par le frontend (à ne pas proposer)
+IGNORED_ADDRESSES = {'adresse de depart', 'adresse d arrivee'}
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+
+def normalize(text):
+    """Normaliser un texte pour la recherche (minuscules, sans accents ni ponctuation)"""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(' ', text.lower()).strip()
+
+
+def _trigrams(text):
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class AddressAutocompleteIndex:
+    """Index d'autocomplétion (trie + trigrammes)"""
+
+    # Nombre d'entrées conservées par noeud du trie (les plus fréquentes)
+    TOP_K_PER_NODE = 16
+    # Entrées retenues au plus par mot saisi (plus fréquentes du trie + entrées des mots du préfixe)
+    MAX_PREFIX_CANDIDATES = 1000
+    # Entrées parcourues au plus pour compléter une recherche à plusieurs mots
+    MAX_SCANNED_POSTINGS = 512
+    # Corrections retenues par mot inconnu et similarité minimale (Jaccard des trigrammes)
+    MAX_CORRECTIONS = 3
+    MIN_CORRECTION_SIMILARITY = 0.4
+
+    # Poids du classement
+    FREQUENCY_WEIGHT = 1.0
+    RECENCY_WEIGHT = 1.5
+    DISTANCE_WEIGHT = 2.0
+    LANDMARK_BONUS = 0.5
+    RECENCY_HALF_LIFE_DAYS = 30
+
+    def __init__(self):
+        self._lock = Lock()
+        self._ids_by_key = {}
+        # Colonnes des entrées (indexées par id)
+        self._labels = []
+        self._tokens = []
+        self._counts = []
+        self._last_used = []
+        self._latitudes = []
+        self._longitudes = []
+        self._landmark_ids = []
+        # Trie : noeud = [enfants (dict), ids les plus fréquents (list)]
+        self._trie = [{}, []]
+        # Mot -> ids des entrées qui le contiennent (ordre d'insertion)
+        self._postings = {}
+        # Mots des entrées, triés (recherche par préfixe)
+        self._vocabulary = []
+        # Trigramme -> mots du vocabulaire (pour la correction)
+        self._vocabulary_trigrams = {}
+
+    def __len__(self):
+        return len(self._labels)
+
+    # ------------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------------
+
+    def add(self, label, latitude=None, longitude=None, used_at=None, count=1,
+            aliases=None, landmark_id=None):
+        """
+        Ajouter une adresse (ou incrémenter sa fréquence si elle existe déjà)
+
+        Args:
+            label: Adresse affichée
+            latitude, longitude: Position de l'adresse (optionnelle)
+            used_at: Date de dernière utilisation (datetime)
+            count: Nombre d'utilisations à ajouter
+            aliases: Autres noms indexés pour la même entrée (ex: name_wolof)
+            landmark_id: ID du point de repère associé
+
+        Returns:
+            ID de l'entrée, ou None si l'adresse est ignorée
+        """
+        key = normalize(label)
+        if not key or key in IGNORED_ADDRESSES:
+            return None
+        used_ts = used_at.timestamp() if used_at else time.time()
+
+        with self._lock:
+            entry_id = self._ids_by_key.get(key)
+            if entry_id is None:
+                entry_id = len(self._labels)
+                self._ids_by_key[key] = entry_id
+                tokens = set(key.split())
+                for alias in aliases or []:
+                    tokens.update(normalize(alias).split())
+                self._labels.append(label)
+                self._tokens.append(tuple(sorted(tokens)))
+                self._counts.append(count)
+                self._last_used.append(used_ts)
+                self._latitudes.append(latitude)
+                self._longitudes.append(longitude)
+                self._landmark_ids.append(landmark_id)
+                for token in tokens:
+                    self._index_posting(entry_id, token)
+            else:
+                self._counts[entry_id] += count
+                self._last_used[entry_id] = max(self._last_used[entry_id], used_ts)
+                if latitude is not None and self._latitudes[entry_id] is None:
+                    self._latitudes[entry_id] = latitude
+                    self._longitudes[entry_id] = longitude
+
+            for token in self._tokens[entry_id]:
+                self._index_token(entry_id, token)
+        return entry_id
+
+    def _index_token(self, entry_id, token):
+        count = self._counts[entry_id]
+        counts = self._counts
+        node = self._trie
+        for char in token:
+            node = node[0].setdefault(char, [{}, []])
+            top = node[1]
+            if entry_id in top:
+                top.sort(key=lambda i: -counts[i])
+            elif len(top) < self.TOP_K_PER_NODE:
+                top.append(entry_id)
+                top.sort(key=lambda i: -counts[i])
+            elif count > counts[top[-1]]:
+                top[-1] = entry_id
+                top.sort(key=lambda i: -counts[i])
+
+    def _index_posting(self, entry_id, token):
+        postings = self._postings.get(token)
+        if postings is None:
+            self._postings[token] = array('I', [entry_id])
+            insort(self._vocabulary, token)
+            # Nouveau mot : l'ajouter au vocabulaire de correction (hors numéros)
+            if len(token) >= 3 and not token.isdigit():
+                for gram in _trigrams(token):
+                    self._vocabulary_trigrams.setdefault(gram, set()).add(token)
+        else:
+            postings.append(entry_id)
+
+    def add_ride(self, ride):
+        """Indexer les adresses de départ et d'arrivée d'une course"""
+        used_at = ride.requested_at
+        self.add(ride.pickup_address, ride.pickup_latitude, ride.pickup_longitude, used_at)
+        if ride.dropoff_address:
+            self.add(ride.dropoff_address, ride.dropoff_latitude, ride.dropoff_longitude, used_at)
+
+    # ------------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------------
+
+    def _prefix_candidates(self, token):
+        """Entrées les plus fréquentes du préfixe, complétées par les entrées des mots qui le commencent"""
+        node = self._trie
+        for char in token:
+            node = node[0].get(char)
+            if node is None:
+                return set()
+        candidates = set(node[1])
+        vocabulary = self._vocabulary
+        position = bisect_left(vocabulary, token)
+        while (len(candidates) < self.MAX_PREFIX_CANDIDATES and position < len(vocabulary)
+               and vocabulary[position].startswith(token)):
+            # Entrées les plus récemment indexées d'abord
+            postings = self._postings[vocabulary[position]]
+            candidates.update(postings[-(self.MAX_PREFIX_CANDIDATES - len(candidates)):])
+            position += 1
+        return candidates
+
+    def _corrections(self, token):
+        """Mots du vocabulaire les plus proches d'un mot inconnu (fautes de frappe)"""
+        grams = _trigrams(token)
+        postings = sorted(
+            (self._vocabulary_trigrams[g] for g in grams if g in self._vocabulary_trigrams),
+            key=len
+        )
+        overlap = {}
+        for posting in postings:
+            for word in posting:
+                overlap[word] = overlap.get(word, 0) + 1
+        scored = []
+        for word, common in overlap.items():
+            similarity = common / (len(grams) + len(word) + 1 - common)
+            if similarity >= self.MIN_CORRECTION_SIMILARITY:
+                scored.append((similarity, word))
+        scored.sort(reverse=True)
+        return [word for _, word in scored[:self.MAX_CORRECTIONS]]
+
+    def _matches(self, entry_id, alternatives):
+        tokens = self._tokens[entry_id]
+        for prefixes, exact_words in alternatives:
+            if not any(t.startswith(p) for p in prefixes for t in tokens) \
+                    and not any(w in tokens for w in exact_words):
+                return False
+        return True
+
+    def _score(self, entry_id, now, latitude, longitude):
+        score = self.FREQUENCY_WEIGHT * math.log1p(self._counts[entry_id])
+        age_days = max(0.0, (now - self._last_used[entry_id]) / 86400)
+        score += self.RECENCY_WEIGHT * 0.5 ** (age_days / self.RECENCY_HALF_LIFE_DAYS)
+        if latitude is not None and self._latitudes[entry_id] is not None:
+            # Distance équirectangulaire (suffisante pour classer)
+            dlat = self._latitudes[entry_id] - latitude
+            dlng = (self._longitudes[entry_id] - longitude) * math.cos(math.radians(latitude))
+            distance_km = 111.32 * math.sqrt(dlat * dlat + dlng * dlng)
+            score += self.DISTANCE_WEIGHT / (1.0 + distance_km)
+        if self._landmark_ids[entry_id] is not None:
+            score += self.LANDMARK_BONUS
+        return score
+
+    def suggest(self, query, latitude=None, longitude=None, limit=8):
+        """
+        Obtenir des suggestions d'adresses
+
+        Args:
+            query: Texte saisi par l'utilisateur
+            latitude, longitude: Position de l'utilisateur (optionnelle)
+            limit: Nombre maximum de suggestions
+
+        Returns:
+            Liste de dicts {address, latitude, longitude, count, landmark_id}
+        """
+        normalized = normalize(query)
+        if not normalized:
+            return []
+        with self._lock:
+            return self._suggest(normalized, latitude, longitude, limit)
+
+    def _suggest(self, normalized, latitude, longitude, limit):
+        # Pour chaque mot saisi : préfixe connu du trie, sinon corrections du vocabulaire
+        alternatives = []
+        candidates = set()
+        for token in normalized.split():
+            top = self._prefix_candidates(token)
+            if top:
+                alternatives.append(((token,), ()))
+                candidates.update(top)
+                continue
+            corrections = self._corrections(token)
+            if corrections:
+                alternatives.append(((), tuple(corrections)))
+                for word in corrections:
+                    candidates.update(self._prefix_candidates(word))
+        if not alternatives:
+            return []
+
+        matches = [entry_id for entry_id in candidates if self._matches(entry_id, alternatives)]
+
+        # Plusieurs mots : compléter en parcourant les entrées récentes du mot complet le plus rare
+        if len(matches) < limit and len(alternatives) > 1:
+            postings = [
+                self._postings[word]
+                for prefixes, exact_words in alternatives
+                for word in prefixes + exact_words
+                if word in self._postings
+            ]
+            if postings:
+                seen = set(matches)
+                rarest = min(postings, key=len)
+                for entry_id in rarest[-self.MAX_SCANNED_POSTINGS:][::-1]:
+                    if entry_id not in seen and self._matches(entry_id, alternatives):
+                        matches.append(entry_id)
+                        seen.add(entry_id)
+
+        now = time.time()
+        ranked = sorted(matches, key=lambda i: -self._score(i, now, latitude, longitude))
+        return [
+            {
+                'address': self._labels[entry_id],
+                'latitude': self._latitudes[entry_id],
+                'longitude': self._longitudes[entry_id],
+                'count': self._counts[entry_id],
+                'landmark_id': self._landmark_ids[entry_id],
+            }
+            for entry_id in ranked[:limit]
+        ]
+
+
+def build_index_from_database():
+    """Construire l'index à partir des points de repère et de l'historique des courses"""
+    from sqlalchemy import func
+    from extensions import db
+    from models.ride import Ride
+    from routes.landmarks import LANDMARKS
+
+    index = AddressAutocompleteIndex()
+
+    for landmark in LANDMARKS:
+        aliases = [landmark['name_wolof']] if landmark.get('name_wolof') else []
+        index.add(
+            landmark['name'],
+            landmark['latitude'],
+            landmark['longitude'],
+            count=1,
+            aliases=aliases,
+            landmark_id=landmark['id'],
+        )
+
+    # Une requête agrégée par type d'adresse (pas de chargement des objets Ride)
+    address_columns = [
+        (Ride.pickup_address, Ride.pickup_latitude, Ride.pickup_longitude),
+        (Ride.dropoff_address, Ride.dropoff_latitude, Ride.dropoff_longitude),
+    ]
+    for address_col, lat_col, lng_col in address_columns:
+        rows = db.session.query(
+            address_col,
+            func.count(Ride.id),
+            func.max(Ride.requested_at),
+            func.avg(lat_col),
+            func.avg(lng_col),
+        ).filter(address_col.isnot(None)).group_by(address_col).yield_per(10000)
+
+        for address, count, last_used, lat, lng in rows:
+            index.add(address, lat, lng, used_at=last_used, count=count)
+
+    return index
+
+
+_index = None
+_index_lock = Lock()
+
+
+def get_autocomplete_index():
+    """Obtenir l'index partagé (attend la construction en cours, ou la fait au premier appel)"""
+    global _index
+    if _index is not None:
+        return _index
+
+    with _index_lock:
+        if _index is None:
+            started = time.perf_counter()
+            _index = build_index_from_database()
+            logger.info("✅ [AUTOCOMPLETE] Index construit en %.1fs (%s adresses)",
+                        time.perf_counter() - started, len(_index))
+        return _index
+
+
+def warm_up(app):
+    """Construire l'index partagé (thread d'arrière-plan)"""
+    from extensions import db
+
+    with app.app_context():
+        try:
+            get_autocomplete_index()
+        except Exception:
+            logger.exception("❌ [AUTOCOMPLETE] Construction de l'index en échec")
+        finally:
+            db.session.remove()
+
+
+def init_autocomplete(app):
+    """
+    Construire l'index dans un thread dès la première requête servie
+
+    Les suggestions demandées pendant la construction l'attendent (jamais
+    d'index partiel). Désactivé par AUTOCOMPLETE_WARMUP=false (construction
+    à la première suggestion).
+    """
+    started = []
+    lock = Lock()
+
+    @app.before_request
+    def start_autocomplete_warm_up():
+        if started or not app.config.get('AUTOCOMPLETE_WARMUP', True):
+            return None
+        with lock:
+            if started:
+                return None
+            started.append(True)
+        Thread(target=warm_up, args=(app,), name='autocomplete-warmup', daemon=True).start()
+        return None
+
+
+def record_ride_addresses(ride):
+    """Mettre à jour l'index avec une nouvelle course (sans effet si l'index n'est pas encore construit)"""
+    if _index is not None:
+        _index.add_ride(ride)
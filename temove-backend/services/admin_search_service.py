@@ -0,0 +1,567 @@
+"""
+Recherche plein texte pour le support (admin) : utilisateurs, conducteurs, courses
+
+Deux moteurs :
+- 'fulltext' : index FULLTEXT MySQL (MATCH ... AGAINST en mode booléen), créés
+  par scripts/add_search_indexes.py
+- 'memory' : index inversé en mémoire (SQLite, PostgreSQL ou MySQL sans index
+  FULLTEXT), construit en arrière-plan dès la première requête servie
+  (ADMIN_SEARCH_WARMUP, sinon à la première recherche) puis tenu à jour à
+  chaque commit
+
+Index en mémoire :
+- un index par type : mot -> ids triés (array), par champ (nom, email,
+  téléphone, plaque, adresse) pour pondérer le classement
+- un vocabulaire trié pour la recherche par préfixe (« mous » -> moussa)
+- les courses sont indexées par adresse distincte (quelques dizaines de
+  milliers), chaque adresse renvoyant aux ids de ses courses : la mémoire et la
+  recherche ne dépendent pas du nombre de courses mais du nombre d'adresses
+
+Tous les mots de la requête doivent correspondre (préfixe accepté). Le score
+additionne, pour chaque mot, le poids du meilleur champ trouvé (correspondance
+exacte > préfixe) ; à score égal, les plus récents d'abord.
+"""
+import re
+import time
+from array import array
+from bisect import bisect_left, insort
+from threading import Lock, Thread
+from services.address_autocomplete_service import normalize
+from services.app_logging import get_logger
+
+
+logger = get_logger('admin')
+
+SEARCH_TYPES = ('users', 'drivers', 'rides')
+
+# Poids des champs dans le classement
+FIELD_WEIGHTS = {
+    'users': {'full_name': 3.0, 'phone': 3.0, 'email': 2.0},
+    'drivers': {'full_name': 3.0, 'phone': 3.0, 'license_plate': 3.0, 'email': 2.0},
+    'rides': {'address': 1.0},
+}
+PREFIX_FACTOR = 0.7
+
+# Mots du vocabulaire retenus au plus par préfixe (les plus courts d'abord)
+MAX_PREFIX_EXPANSIONS = 64
+# Longueur minimale d'un mot de requête recherché par préfixe
+MIN_PREFIX_LENGTH = 2
+# Courses parcourues au plus par recherche (les plus récentes)
+MAX_RIDE_CANDIDATES = 5000
+
+_DIGITS = re.compile(r'\D+')
+_COUNTRY_PREFIXES = ('00221', '221')
+
+
+def _phone_tokens(phone):
+    """Numéro complet et numéro national (sans indicatif), chiffres uniquement"""
+    digits = _DIGITS.sub('', phone or '')
+    if not digits:
+        return []
+    tokens = [digits]
+    for prefix in _COUNTRY_PREFIXES:
+        if digits.startswith(prefix) and len(digits) > len(prefix) + 6:
+            tokens.append(digits[len(prefix):])
+            break
+    return tokens
+
+
+def field_tokens(field, text):
+    """Mots indexés pour un champ"""
+    if not text:
+        return []
+    if field == 'phone':
+        return _phone_tokens(text)
+    tokens = normalize(text).split()
+    if field == 'license_plate' and len(tokens) > 1:
+        # « DK-1234-AB » est aussi trouvé par « DK1234 »
+        tokens.append(''.join(tokens))
+    return tokens
+
+
+def query_tokens(query):
+    """Mots de la requête (un numéro de téléphone saisi avec espaces devient un seul mot)"""
+    compact = _DIGITS.sub('', query or '')
+    if compact and not re.sub(r'[\d\s+().-]', '', query or ''):
+        tokens = _phone_tokens(compact)
+        return tokens[-1:]
+    return normalize(query).split()
+
+
+# ----------------------------------------------------------------------
+# Index inversé
+# ----------------------------------------------------------------------
+
+class InvertedIndex:
+    """Index mot -> ids triés, par champ, avec vocabulaire trié pour les préfixes"""
+
+    def __init__(self, field_weights):
+        self.field_weights = field_weights
+        self._postings = {field: {} for field in field_weights}
+        self._vocabulary = []
+        self._vocabulary_set = set()
+
+    def add(self, doc_id, texts):
+        """Indexer un document : texts = {champ: texte} (idempotent)"""
+        for field, text in texts.items():
+            postings = self._postings[field]
+            for token in set(field_tokens(field, text)):
+                ids = postings.get(token)
+                if ids is None:
+                    ids = postings[token] = array('I')
+                    if token not in self._vocabulary_set:
+                        self._vocabulary_set.add(token)
+                        insort(self._vocabulary, token)
+                if ids and ids[-1] < doc_id:
+                    ids.append(doc_id)
+                else:
+                    position = bisect_left(ids, doc_id)
+                    if position == len(ids) or ids[position] != doc_id:
+                        ids.insert(position, doc_id)
+
+    def remove(self, doc_id, texts):
+        """Retirer un document indexé avec ces textes"""
+        for field, text in texts.items():
+            postings = self._postings[field]
+            for token in set(field_tokens(field, text)):
+                ids = postings.get(token)
+                if not ids:
+                    continue
+                position = bisect_left(ids, doc_id)
+                if position < len(ids) and ids[position] == doc_id:
+                    del ids[position]
+
+    def _expand(self, token):
+        """Mots du vocabulaire commençant par `token` : [(mot, exact)]"""
+        if len(token) < MIN_PREFIX_LENGTH:
+            return [(token, True)] if token in self._vocabulary_set else []
+        vocabulary = self._vocabulary
+        position = bisect_left(vocabulary, token)
+        matches = []
+        while position < len(vocabulary) and vocabulary[position].startswith(token):
+            matches.append(vocabulary[position])
+            position += 1
+        if len(matches) > MAX_PREFIX_EXPANSIONS:
+            matches = sorted(matches, key=len)[:MAX_PREFIX_EXPANSIONS]
+        return [(term, term == token) for term in matches]
+
+    def _lists(self, token):
+        """Listes d'ids d'un mot de requête : [(ids, poids)]"""
+        lists = []
+        for term, exact in self._expand(token):
+            factor = 1.0 if exact else PREFIX_FACTOR
+            for field, weight in self.field_weights.items():
+                ids = self._postings[field].get(term)
+                if ids:
+                    lists.append((ids, weight * factor))
+        return lists
+
+    def search(self, tokens):
+        """Documents contenant tous les mots : {id: score}"""
+        if not tokens:
+            return {}
+        per_token = [self._lists(token) for token in tokens]
+        if any(not lists for lists in per_token):
+            return {}
+
+        # Commencer par le mot le plus sélectif
+        per_token.sort(key=lambda lists: sum(len(ids) for ids, _ in lists))
+        scores = {}
+        for ids, weight in per_token[0]:
+            for doc_id in ids:
+                if scores.get(doc_id, 0) < weight:
+                    scores[doc_id] = weight
+
+        for lists in per_token[1:]:
+            if not scores:
+                break
+            best = {}
+            posting_size = sum(len(ids) for ids, _ in lists)
+            if posting_size <= len(scores) * len(lists) * 4:
+                # Parcourir les listes du mot
+                for ids, weight in lists:
+                    for doc_id in ids:
+                        if doc_id in scores and best.get(doc_id, 0) < weight:
+                            best[doc_id] = weight
+            else:
+                # Peu de candidats : recherche dichotomique dans chaque liste
+                for doc_id in scores:
+                    for ids, weight in lists:
+                        position = bisect_left(ids, doc_id)
+                        if position < len(ids) and ids[position] == doc_id and best.get(doc_id, 0) < weight:
+                            best[doc_id] = weight
+            scores = {doc_id: scores[doc_id] + weight for doc_id, weight in best.items()}
+        return scores
+
+
+class RideAddressIndex:
+    """Courses indexées par adresse distincte (départ et arrivée)"""
+
+    def __init__(self):
+        self.addresses = InvertedIndex(FIELD_WEIGHTS['rides'])
+        self._address_ids = {}
+        self._raw_ids = {}
+        # id d'adresse -> ids de courses triés
+        self._rides = []
+
+    def _address_id(self, address, create):
+        if not address:
+            return None
+        # Texte brut -> id (les mêmes adresses reviennent sur des milliers de courses)
+        address_id = self._raw_ids.get(address)
+        if address_id is not None:
+            return address_id
+        key = normalize(address)
+        if not key:
+            return None
+        address_id = self._address_ids.get(key)
+        if address_id is None:
+            if not create:
+                return None
+            address_id = self._address_ids[key] = len(self._rides)
+            self._rides.append(array('I'))
+            self.addresses.add(address_id, {'address': key})
+        self._raw_ids[address] = address_id
+        return address_id
+
+    def add(self, ride_id, pickup, dropoff):
+        for address in {pickup, dropoff}:
+            address_id = self._address_id(address, create=True)
+            if address_id is None:
+                continue
+            ids = self._rides[address_id]
+            if not ids or ids[-1] < ride_id:
+                ids.append(ride_id)
+            else:
+                position = bisect_left(ids, ride_id)
+                if position == len(ids) or ids[position] != ride_id:
+                    ids.insert(position, ride_id)
+
+    def remove(self, ride_id, pickup, dropoff):
+        for address in {pickup, dropoff}:
+            address_id = self._address_id(address, create=False)
+            if address_id is None:
+                continue
+            ids = self._rides[address_id]
+            position = bisect_left(ids, ride_id)
+            if position < len(ids) and ids[position] == ride_id:
+                del ids[position]
+
+    def search(self, tokens, limit):
+        """Courses dont une adresse contient tous les mots : [(id, score)] les plus récentes d'abord"""
+        address_scores = self.addresses.search(tokens)
+        if not address_scores:
+            return []
+        scores = {}
+        # Adresses par score décroissant ; au plus MAX_RIDE_CANDIDATES courses récentes chacune
+        for address_id, score in sorted(address_scores.items(), key=lambda item: -item[1]):
+            ids = self._rides[address_id]
+            for ride_id in ids[-MAX_RIDE_CANDIDATES:]:
+                if scores.get(ride_id, 0) < score:
+                    scores[ride_id] = score
+            if len(scores) >= MAX_RIDE_CANDIDATES:
+                break
+        return sorted(scores.items(), key=lambda item: (-item[1], -item[0]))[:limit]
+
+
+# ----------------------------------------------------------------------
+# Moteur en mémoire
+# ----------------------------------------------------------------------
+
+def _user_texts(values):
+    return {'full_name': values.get('full_name'), 'email': values.get('email'), 'phone': values.get('phone')}
+
+
+def _driver_texts(values):
+    return {
+        'full_name': values.get('full_name'), 'email': values.get('email'),
+        'phone': values.get('phone'), 'license_plate': values.get('license_plate'),
+    }
+
+
+class MemorySearchBackend:
+    """Index inversés en mémoire, construits depuis la base au premier appel"""
+
+    name = 'memory'
+
+    def __init__(self):
+        self._lock = Lock()
+        self._build_lock = Lock()
+        self._built = False
+        self._building = False
+        self._pending = []
+        self.users = InvertedIndex(FIELD_WEIGHTS['users'])
+        self.drivers = InvertedIndex(FIELD_WEIGHTS['drivers'])
+        self.rides = RideAddressIndex()
+
+    def build(self, batch_size=50000):
+        """Construire les index (un seul appelant, les autres attendent la fin)"""
+        with self._build_lock:
+            if self._built:
+                return
+            with self._lock:
+                self._building = True
+            try:
+                self._load(batch_size)
+            except Exception:
+                # Reconstruit à la prochaine recherche, depuis la base
+                with self._lock:
+                    self._building = False
+                    self._pending = []
+                raise
+
+    def _load(self, batch_size):
+        """Lire les colonnes indexées par lots ordonnés par id"""
+        from extensions import db
+        from models.user import User
+        from models.driver import Driver
+        from models.ride import Ride
+
+        started = time.perf_counter()
+        for model, columns, add in (
+            (User, (User.full_name, User.email, User.phone),
+             lambda row: self.users.add(row[0], {'full_name': row[1], 'email': row[2], 'phone': row[3]})),
+            (Driver, (Driver.full_name, Driver.email, Driver.phone, Driver.license_plate),
+             lambda row: self.drivers.add(row[0], {'full_name': row[1], 'email': row[2],
+                                                   'phone': row[3], 'license_plate': row[4]})),
+            (Ride, (Ride.pickup_address, Ride.dropoff_address),
+             lambda row: self.rides.add(row[0], row[1], row[2])),
+        ):
+            last_id = 0
+            while True:
+                rows = db.session.query(model.id, *columns).filter(
+                    model.id > last_id
+                ).order_by(model.id).limit(batch_size).all()
+                if not rows:
+                    break
+                for row in rows:
+                    add(row)
+                last_id = rows[-1][0]
+
+        with self._lock:
+            # Écritures commitées pendant la construction
+            pending, self._pending = self._pending, []
+            for changes in pending:
+                self._apply(changes)
+            self._built = True
+            self._building = False
+        logger.info('✅ [ADMIN_SEARCH] Index construit en %.1fs', time.perf_counter() - started)
+
+    def apply_changes(self, changes):
+        with self._lock:
+            if self._building:
+                self._pending.append(changes)
+            elif self._built:
+                self._apply(changes)
+
+    def _apply(self, changes):
+        from models.user import User
+        from models.driver import Driver
+        from models.ride import Ride
+
+        for model, index, texts, fields in (
+            (User, self.users, _user_texts, ('full_name', 'email', 'phone')),
+            (Driver, self.drivers, _driver_texts, ('full_name', 'email', 'phone', 'license_plate')),
+        ):
+            for change in changes.get(model, []):
+                if change.action != 'insert' and any(change.changed(f) for f in fields):
+                    index.remove(change.values['id'], texts({f: change.old(f) for f in fields}))
+                if change.action != 'delete':
+                    index.add(change.values['id'], texts(change.values))
+
+        for change in changes.get(Ride, []):
+            v = change.values
+            if change.action != 'insert' and (change.changed('pickup_address') or change.changed('dropoff_address')):
+                self.rides.remove(v['id'], change.old('pickup_address'), change.old('dropoff_address'))
+            if change.action != 'delete':
+                self.rides.add(v['id'], v['pickup_address'], v['dropoff_address'])
+
+    def search(self, search_type, query, limit):
+        if not self._built:
+            self.build()
+        tokens = query_tokens(query)
+        if search_type == 'rides':
+            return self.rides.search(tokens, limit)
+        index = self.users if search_type == 'users' else self.drivers
+        scores = index.search(tokens)
+        return sorted(scores.items(), key=lambda item: (-item[1], -item[0]))[:limit]
+
+
+# ----------------------------------------------------------------------
+# Moteur FULLTEXT (MySQL)
+# ----------------------------------------------------------------------
+
+FULLTEXT_INDEXES = {
+    'users': ('users', 'ft_users_search', ('full_name', 'email', 'phone')),
+    'drivers': ('drivers', 'ft_drivers_search', ('full_name', 'email', 'phone', 'license_plate')),
+    'rides': ('rides', 'ft_rides_search', ('pickup_address', 'dropoff_address')),
+}
+
+
+class FulltextSearchBackend:
+    """MATCH ... AGAINST sur les index FULLTEXT MySQL (tenus à jour par MySQL)"""
+
+    name = 'fulltext'
+
+    def apply_changes(self, changes):
+        pass
+
+    def search(self, search_type, query, limit):
+        from sqlalchemy import text
+        from extensions import db
+
+        tokens = query_tokens(query)
+        if not tokens:
+            return []
+        # Tous les mots obligatoires, recherchés par préfixe
+        boolean_query = ' '.join(f'+{token}*' for token in tokens)
+        table, _, columns = FULLTEXT_INDEXES[search_type]
+        column_list = ', '.join(columns)
+        rows = db.session.execute(text(
+            f"SELECT id, MATCH({column_list}) AGAINST(:q IN BOOLEAN MODE) AS score "
+            f"FROM {table} WHERE MATCH({column_list}) AGAINST(:q IN BOOLEAN MODE) "
+            f"ORDER BY score DESC, id DESC LIMIT :limit"
+        ), {'q': boolean_query, 'limit': limit}).all()
+        return [(row_id, float(score)) for row_id, score in rows]
+
+
+def fulltext_indexes_present():
+    """Indiquer si les index FULLTEXT existent (MySQL uniquement)"""
+    from extensions import db
+
+    if db.engine.dialect.name not in ('mysql', 'mariadb'):
+        return False
+    try:
+        inspector = db.inspect(db.engine)
+        for table, index_name, _ in FULLTEXT_INDEXES.values():
+            if index_name not in {index['name'] for index in inspector.get_indexes(table)}:
+                return False
+        return True
+    except Exception as e:
+        logger.warning('⚠️ [ADMIN_SEARCH] Vérification des index FULLTEXT impossible: %s', e)
+        return False
+
+
+# ----------------------------------------------------------------------
+# API
+# ----------------------------------------------------------------------
+
+_backend = None
+_backend_lock = Lock()
+
+
+def get_search_backend():
+    """Moteur selon ADMIN_SEARCH_BACKEND ('auto', 'fulltext' ou 'memory')"""
+    global _backend
+    if _backend is not None:
+        return _backend
+
+    from flask import current_app
+
+    with _backend_lock:
+        if _backend is None:
+            choice = current_app.config.get('ADMIN_SEARCH_BACKEND', 'auto')
+            if choice == 'fulltext' or (choice == 'auto' and fulltext_indexes_present()):
+                _backend = FulltextSearchBackend()
+            else:
+                _backend = MemorySearchBackend()
+            logger.info('🔎 [ADMIN_SEARCH] Moteur de recherche: %s', _backend.name)
+        return _backend
+
+
+def warm_up(app):
+    """Choisir le moteur et construire l'index en mémoire (thread d'arrière-plan)"""
+    from extensions import db
+
+    with app.app_context():
+        try:
+            backend = get_search_backend()
+            if isinstance(backend, MemorySearchBackend):
+                backend.build()
+        except Exception:
+            logger.exception("❌ [ADMIN_SEARCH] Construction de l'index en échec")
+        finally:
+            db.session.remove()
+
+
+def init_admin_search(app):
+    """
+    Construire l'index dans un thread dès la première requête servie
+
+    Les scripts qui créent l'application sans servir de requête ne le
+    construisent pas. Désactivé par ADMIN_SEARCH_WARMUP=false (construction
+    à la première recherche).
+    """
+    started = []
+    lock = Lock()
+
+    @app.before_request
+    def start_search_warm_up():
+        if started or not app.config.get('ADMIN_SEARCH_WARMUP', True):
+            return None
+        with lock:
+            if started:
+                return None
+            started.append(True)
+        Thread(target=warm_up, args=(app,), name='admin-search-warmup', daemon=True).start()
+        return None
+
+
+def _on_commit(changes):
+    if _backend is not None:
+        _backend.apply_changes(changes)
+
+
+def register_search_hooks():
+    """Tenir l'index en mémoire à jour à chaque commit"""
+    from services import model_events
+    from models.user import User
+    from models.driver import Driver
+    from models.ride import Ride
+
+    model_events.on_commit((User, Driver, Ride), _on_commit)
+
+
+def _serialize(search_type, obj, score):
+    if search_type == 'users':
+        data = {'id': obj.id, 'full_name': obj.full_name, 'email': obj.email, 'phone': obj.phone,
+                'role': obj.role, 'is_active': obj.is_active}
+    elif search_type == 'drivers':
+        data = {'id': obj.id, 'full_name': obj.full_name, 'email': obj.email, 'phone': obj.phone,
+                'license_plate': obj.license_plate, 'is_active': obj.is_active,
+                'is_verified': obj.is_verified}
+    else:
+        data = {'id': obj.id, 'user_id': obj.user_id, 'driver_id': obj.driver_id,
+                'pickup_address': obj.pickup_address, 'dropoff_address': obj.dropoff_address,
+                'status': obj.status.value if obj.status else None, 'final_price': obj.final_price,
+                'requested_at': obj.requested_at.isoformat() if obj.requested_at else None}
+    data['score'] = round(score, 3)
+    return data
+
+
+def search(query, types=SEARCH_TYPES, limit=10):
+    """
+    Rechercher dans les utilisateurs, conducteurs et courses
+
+    Returns:
+        dict {type: [résultats classés]} ; chaque résultat a un champ `score`
+    """
+    from models.user import User
+    from models.driver import Driver
+    from models.ride import Ride
+
+    models = {'users': User, 'drivers': Driver, 'rides': Ride}
+    backend = get_search_backend()
+    results = {}
+    for search_type in types:
+        hits = backend.search(search_type, query, limit)
+        if not hits:
+            results[search_type] = []
+            continue
+        # Charger les lignes trouvées en une requête (les lignes supprimées sont ignorées)
+        model = models[search_type]
+        rows = {obj.id: obj for obj in model.query.filter(model.id.in_([h[0] for h in hits])).all()}
+        results[search_type] = [
+            _serialize(search_type, rows[doc_id], score) for doc_id, score in hits if doc_id in rows
+        ]
+    return results
@@ -0,0 +1,269 @@
+"""
+Service de statistiques du dashboard admin
+
+Chaque groupe de statistiques est calculé par une seule requête agrégée
+(SUM/COUNT conditionnels) : aucun objet ORM n'est chargé. Les courses et
+paiements sont lus dans les rollups quand ils ont été construits. Les résultats
+sont gardés sur l'instance, qui est créée une fois par requête HTTP.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import func, case, and_, or_
+from extensions import db
+from models.user import User
+from models.ride import Ride, RideStatus
+from models.driver import Driver
+from models.commission import Commission, Revenue
+from models.payment import Payment, PaymentStatus
+from services.rollup_service import rollups_ready, ride_series, payment_series, ride_status_totals
+from services.app_logging import get_logger
+
+
+logger = get_logger('admin')
+
+
+# Courses non terminées (affichées « en cours » dans le dashboard)
+IN_PROGRESS_STATUSES = (
+    RideStatus.PENDING,
+    RideStatus.CONFIRMED,
+    RideStatus.DRIVER_ASSIGNED,
+    RideStatus.DRIVER_ARRIVED,
+    RideStatus.IN_PROGRESS,
+)
+
+# Commission appliquée aux paiements quand la table commissions n'existe pas
+DEFAULT_COMMISSION_RATE = 0.15
+
+
+def _count_if(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _sum_if(condition, column):
+    return func.coalesce(func.sum(case((condition, column), else_=0)), 0)
+
+
+def growth(current, previous):
+    """Croissance en pourcentage (0 si la période précédente est vide)"""
+    if not previous:
+        return 0
+    return ((current - previous) / previous) * 100
+
+
+class AdminStatsService:
+    """Statistiques agrégées pour le dashboard admin"""
+
+    def __init__(self, now=None):
+        now = now or datetime.now()
+        self.today = now.date()
+        self.start_of_today = datetime(self.today.year, self.today.month, self.today.day)
+        self.start_of_tomorrow = self.start_of_today + timedelta(days=1)
+        self.start_of_month = datetime(self.today.year, self.today.month, 1)
+        last_month = self.start_of_month - timedelta(days=1)
+        self.last_month = last_month
+        self.start_of_last_month = datetime(last_month.year, last_month.month, 1)
+        self._cache = {}
+
+    def _cached(self, key, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    # ------------------------------------------------------------------
+    # Courses
+    # ------------------------------------------------------------------
+
+    def ride_counts(self):
+        """
+        Nombre de courses : today, completed_today, this_month, last_month,
+        in_progress, total
+        """
+        return self._cached('rides', self._compute_ride_counts)
+
+    def _compute_ride_counts(self):
+        if rollups_ready():
+            return self._compute_ride_counts_from_rollups()
+
+        is_today = and_(Ride.requested_at >= self.start_of_today, Ride.requested_at < self.start_of_tomorrow)
+        is_this_month = Ride.requested_at >= self.start_of_month
+        is_last_month = Ride.requested_at < self.start_of_month
+
+        # Requête 1 : fenêtre des deux derniers mois (filtrée sur requested_at)
+        period = db.session.query(
+            _count_if(is_today),
+            _count_if(and_(is_today, Ride.status == RideStatus.COMPLETED)),
+            _count_if(is_this_month),
+            _count_if(is_last_month),
+        ).filter(Ride.requested_at >= self.start_of_last_month).one()
+
+        # Requête 2 : répartition par statut (index sur status)
+        by_status = dict(
+            db.session.query(Ride.status, func.count(Ride.id)).group_by(Ride.status).all()
+        )
+
+        return {
+            'today': int(period[0]),
+            'completed_today': int(period[1]),
+            'this_month': int(period[2]),
+            'last_month': int(period[3]),
+            'in_progress': sum(by_status.get(status, 0) for status in IN_PROGRESS_STATUSES),
+            'total': sum(by_status.values()),
+        }
+
+    def _compute_ride_counts_from_rollups(self):
+        completed = RideStatus.COMPLETED.value
+        today = ride_series('day', self.start_of_today, self.start_of_tomorrow, group_by=('status',))
+        months = ride_series('month', self.start_of_last_month, self.start_of_tomorrow)
+        by_month = {row['bucket_start']: row['ride_count'] for row in months}
+        by_status = ride_status_totals()
+
+        return {
+            'today': sum(row['ride_count'] for row in today),
+            'completed_today': sum(row['ride_count'] for row in today if row['status'] == completed),
+            'this_month': by_month.get(self.start_of_month, 0),
+            'last_month': by_month.get(self.start_of_last_month, 0),
+            'in_progress': sum(by_status.get(status.value, 0) for status in IN_PROGRESS_STATUSES),
+            'total': sum(by_status.values()),
+        }
+
+    # ------------------------------------------------------------------
+    # Utilisateurs et conducteurs
+    # ------------------------------------------------------------------
+
+    def user_counts(self):
+        """Clients actifs : total, active_30d, new_this_month, new_last_month"""
+        return self._cached('users', self._compute_user_counts)
+
+    def _compute_user_counts(self):
+        thirty_days_ago = datetime.now() - timedelta(days=30)
+        row = db.session.query(
+            func.count(User.id),
+            _count_if(User.created_at >= thirty_days_ago),
+            _count_if(User.created_at >= self.start_of_month),
+            _count_if(and_(User.created_at >= self.start_of_last_month, User.created_at < self.start_of_month)),
+        ).filter(User.is_active == True).one()
+
+        return {
+            'total': int(row[0]),
+            'active_30d': int(row[1]),
+            'new_this_month': int(row[2]),
+            'new_last_month': int(row[3]),
+        }
+
+    def driver_counts(self):
+        """Conducteurs : total (actifs), approved, pending, new_this_month, new_last_month, avg_rating"""
+        return self._cached('drivers', self._compute_driver_counts)
+
+    def _compute_driver_counts(self):
+        is_active = Driver.is_active == True
+        row = db.session.query(
+            _count_if(is_active),
+            _count_if(and_(is_active, Driver.is_verified == True)),
+            _count_if(Driver.is_verified == False),
+            _count_if(and_(is_active, Driver.created_at >= self.start_of_month)),
+            _count_if(and_(
+                is_active,
+                Driver.created_at >= self.start_of_last_month,
+                Driver.created_at < self.start_of_month
+            )),
+            func.avg(case((and_(is_active, Driver.rating_count > 0), Driver.rating_average), else_=None)),
+        ).one()
+
+        return {
+            'total': int(row[0]),
+            'approved': int(row[1]),
+            'pending': int(row[2]),
+            'new_this_month': int(row[3]),
+            'new_last_month': int(row[4]),
+            'avg_rating': float(row[5] or 0.0),
+        }
+
+    # ------------------------------------------------------------------
+    # Revenus
+    # ------------------------------------------------------------------
+
+    def commission_totals(self):
+        """
+        Commissions payées : platform_this_month, driver_earnings_this_month,
+        platform_last_month (None si la table commissions n'existe pas encore)
+        """
+        return self._cached('commissions', self._compute_commission_totals)
+
+    def _compute_commission_totals(self):
+        is_this_month = Commission.created_at >= self.start_of_month
+        try:
+            row = db.session.query(
+                _sum_if(is_this_month, Commission.platform_commission),
+                _sum_if(is_this_month, Commission.driver_earnings),
+                _sum_if(Commission.created_at < self.start_of_month, Commission.platform_commission),
+            ).filter(
+                Commission.created_at >= self.start_of_last_month,
+                Commission.status == 'paid'
+            ).one()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning('⚠️ [ADMIN_STATS] Table commissions pas encore créée: %s', e)
+            return None
+
+        return {
+            'platform_this_month': int(row[0]),
+            'driver_earnings_this_month': int(row[1]),
+            'platform_last_month': int(row[2]),
+        }
+
+    def payment_totals(self):
+        """Paiements complétés : this_month, last_month"""
+        return self._cached('payments', self._compute_payment_totals)
+
+    def _compute_payment_totals(self):
+        if rollups_ready():
+            months = payment_series('month', self.start_of_last_month, self.start_of_tomorrow)
+            by_month = {row['bucket_start']: row['amount_total'] for row in months}
+            return {
+                'this_month': by_month.get(self.start_of_month, 0),
+                'last_month': by_month.get(self.start_of_last_month, 0),
+            }
+
+        try:
+            row = db.session.query(
+                _sum_if(Payment.created_at >= self.start_of_month, Payment.amount),
+                _sum_if(Payment.created_at < self.start_of_month, Payment.amount),
+            ).filter(
+                Payment.created_at >= self.start_of_last_month,
+                Payment.status == PaymentStatus.COMPLETED
+            ).one()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning('⚠️ [ADMIN_STATS] Erreur calcul des paiements: %s', e)
+            return {'this_month': 0, 'last_month': 0}
+
+        return {'this_month': int(row[0]), 'last_month': int(row[1])}
+
+    def monthly_revenue(self):
+        """
+        Revenu total du mois actuel et du mois précédent : table revenues si la
+        ligne existe, sinon somme des paiements complétés
+        """
+        return self._cached('revenue', self._compute_monthly_revenue)
+
+    def _compute_monthly_revenue(self):
+        totals = {}
+        try:
+            rows = db.session.query(Revenue.year, Revenue.month, Revenue.total_revenue).filter(
+                or_(
+                    and_(Revenue.year == self.today.year, Revenue.month == self.today.month),
+                    and_(Revenue.year == self.last_month.year, Revenue.month == self.last_month.month),
+                )
+            ).all()
+            totals = {(year, month): total for year, month, total in rows}
+        except Exception as e:
+            db.session.rollback()
+            logger.warning('⚠️ [ADMIN_STATS] Table revenues pas encore créée: %s', e)
+
+        current = totals.get((self.today.year, self.today.month))
+        last = totals.get((self.last_month.year, self.last_month.month))
+        if current is None or last is None:
+            payments = self.payment_totals()
+            current = payments['this_month'] if current is None else current
+            last = payments['last_month'] if last is None else last
+
+        return {'this_month': current, 'last_month': last}
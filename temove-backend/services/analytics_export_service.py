@@ -0,0 +1,370 @@
+"""
+Export incrémental des tables métier en Parquet pour l'analyse
+
+rides, payments, commissions, users et drivers sont écrits en fichiers Parquet
+partitionnés par mois de création (répertoires month=YYYY-MM, format « hive ») :
+
+    <ANALYTICS_EXPORT_DIR>/rides/month=2026-09/part-20261019T030000123456.parquet
+
+Chaque exécution ne lit que les lignes dont updated_at dépasse le watermark de
+la précédente (index (updated_at, id), lecture par lots) et les ajoute dans un
+nouveau fichier par mois touché. Une ligne modifiée a donc plusieurs versions :
+read_export() et compact_table() ne gardent que la plus récente (updated_at
+maximal par id). Le watermark est relu avec une marge (WATERMARK_OVERLAP) pour
+ne pas manquer les transactions validées pendant l'export ; les doublons ainsi
+produits sont éliminés de la même façon.
+
+Les suppressions ne sont pas propagées : relancer un export complet (--full).
+Les colonnes sensibles (EXCLUDED_COLUMNS) ne sont pas exportées.
+"""
+import json
+import os
+import shutil
+from datetime import datetime, timedelta
+from enum import Enum
+from sqlalchemy import and_, or_, select
+from sqlalchemy import types as sqltypes
+from extensions import db
+from models.user import User
+from models.ride import Ride
+from models.driver import Driver
+from models.commission import Commission
+from models.payment import Payment
+
+try:
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+# Table exportée -> (modèle, colonne de partition mensuelle)
+EXPORT_TABLES = {
+    'rides': (Ride, 'requested_at'),
+    'payments': (Payment, 'created_at'),
+    'commissions': (Commission, 'created_at'),
+    'users': (User, 'created_at'),
+    'drivers': (Driver, 'created_at'),
+}
+
+EXCLUDED_COLUMNS = {'password_hash'}
+
+DEFAULT_BATCH_SIZE = 50000
+
+# Marge de relecture sous le watermark (transactions longues validées après l'export)
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+STATE_FILE = '_watermarks.json'
+PARTITION_FIELD = 'month'
+
+
+class AnalyticsExportError(ValueError):
+    """Table inconnue ou export indisponible"""
+    pass
+
+
+def _require_pyarrow():
+    if not PYARROW_AVAILABLE:
+        raise AnalyticsExportError('pyarrow non installé (pip install pyarrow)')
+
+
+def _check_table(name):
+    if name not in EXPORT_TABLES:
+        raise AnalyticsExportError(f'Table inconnue: {name} (valeurs: {", ".join(EXPORT_TABLES)})')
+
+
+def export_columns(name):
+    """Colonnes exportées d'une table (ordre de la table)"""
+    model, _ = EXPORT_TABLES[name]
+    return [column for column in model.__table__.columns if column.name not in EXCLUDED_COLUMNS]
+
+
+def _arrow_type(column):
+    column_type = column.type
+    if isinstance(column_type, sqltypes.Enum):
+        return pa.string()
+    if isinstance(column_type, sqltypes.Boolean):
+        return pa.bool_()
+    if isinstance(column_type, sqltypes.Integer):
+        return pa.int64()
+    if isinstance(column_type, sqltypes.Numeric):
+        return pa.float64()
+    if isinstance(column_type, sqltypes.DateTime):
+        return pa.timestamp('us')
+    if isinstance(column_type, sqltypes.Date):
+        return pa.date32()
+    return pa.string()
+
+
+def arrow_schema(name):
+    """Schéma Parquet d'une table (identique pour tous les fichiers)"""
+    _require_pyarrow()
+    return pa.schema([pa.field(column.name, _arrow_type(column)) for column in export_columns(name)])
+
+
+def _to_arrow(values, arrow_type):
+    if pa.types.is_string(arrow_type):
+        values = [
+            value.value if isinstance(value, Enum)
+            else json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list))
+            else value if value is None or isinstance(value, str)
+            else str(value)
+            for value in values
+        ]
+    elif pa.types.is_floating(arrow_type):
+        values = [None if value is None else float(value) for value in values]
+    return pa.array(values, type=arrow_type)
+
+
+# ----------------------------------------------------------------------
+# Watermarks
+# ----------------------------------------------------------------------
+
+def _load_state(directory):
+    path = os.path.join(directory, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_state(directory, state):
+    """Écriture atomique (le watermark n'avance que si les fichiers sont en place)"""
+    path = os.path.join(directory, STATE_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def get_watermarks(directory):
+    """Watermark et date du dernier export par table"""
+    return _load_state(directory)
+
+
+# ----------------------------------------------------------------------
+# Export
+# ----------------------------------------------------------------------
+
+def _batches(name, watermark, batch_size):
+    """
+    Lignes à exporter par lots
+
+    Export complet : parcours par id (les updated_at vides sont inclus).
+    Incrémental : updated_at >= watermark - marge, parcours keyset sur (updated_at, id).
+    """
+    model, _ = EXPORT_TABLES[name]
+    columns = export_columns(name)
+    names = [column.name for column in columns]
+    id_idx, updated_idx = names.index('id'), names.index('updated_at')
+    stmt = select(*columns)
+    if watermark is None:
+        stmt = stmt.order_by(model.id).limit(batch_size)
+        last_id = None
+        while True:
+            batch_stmt = stmt if last_id is None else stmt.where(model.id > last_id)
+            rows = db.session.execute(batch_stmt).all()
+            if not rows:
+                return
+            yield rows
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1][id_idx]
+
+    stmt = stmt.where(model.updated_at >= watermark - WATERMARK_OVERLAP).order_by(
+        model.updated_at, model.id
+    ).limit(batch_size)
+    last = None
+    while True:
+        batch_stmt = stmt
+        if last is not None:
+            batch_stmt = stmt.where(or_(
+                model.updated_at > last[0],
+                and_(model.updated_at == last[0], model.id > last[1])
+            ))
+        rows = db.session.execute(batch_stmt).all()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < batch_size:
+            return
+        last = (rows[-1][updated_idx], rows[-1][id_idx])
+
+
+def export_table(name, directory, full=False, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Exporter les lignes nouvelles ou modifiées d'une table
+
+    Args:
+        name: Table (clé de EXPORT_TABLES)
+        directory: Répertoire racine de l'export
+        full: Supprimer l'export existant et tout réexporter
+
+    Returns:
+        dict {table, rows, files, partitions, watermark, full}
+    """
+    _require_pyarrow()
+    _check_table(name)
+    _, partition_column = EXPORT_TABLES[name]
+    table_dir = os.path.join(directory, name)
+    os.makedirs(directory, exist_ok=True)
+    state = _load_state(directory)
+
+    watermark = None
+    if not full and name in state and os.path.isdir(table_dir):
+        watermark = datetime.fromisoformat(state[name]['watermark']) if state[name].get('watermark') else None
+    if watermark is None:
+        # Oublier le watermark avant de vider le répertoire (export complet interrompu = à refaire)
+        full = True
+        if state.pop(name, None) is not None:
+            _save_state(directory, state)
+        shutil.rmtree(table_dir, ignore_errors=True)
+    os.makedirs(table_dir, exist_ok=True)
+
+    schema = arrow_schema(name)
+    names = schema.names
+    partition_idx, updated_idx = names.index(partition_column), names.index('updated_at')
+    run_id = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+    writers = {}
+    new_watermark = watermark
+    exported = 0
+    try:
+        for rows in _batches(name, watermark, batch_size):
+            values = list(zip(*rows))
+            batch = pa.Table.from_arrays(
+                [_to_arrow(column_values, field.type) for column_values, field in zip(values, schema)],
+                schema=schema,
+            )
+            months = pa.array([
+                f"{value.year:04d}-{value.month:02d}" if value else 'unknown' for value in values[partition_idx]
+            ])
+            for month in pc.unique(months).to_pylist():
+                if month not in writers:
+                    partition_dir = os.path.join(table_dir, f"{PARTITION_FIELD}={month}")
+                    os.makedirs(partition_dir, exist_ok=True)
+                    tmp_path = os.path.join(partition_dir, f".part-{run_id}.parquet.tmp")
+                    writers[month] = (pq.ParquetWriter(tmp_path, schema, compression='zstd'), tmp_path)
+                writers[month][0].write_table(batch.filter(pc.equal(months, month)))
+            batch_max = max((value for value in values[updated_idx] if value is not None), default=None)
+            if batch_max is not None and (new_watermark is None or batch_max > new_watermark):
+                new_watermark = batch_max
+            exported += len(rows)
+    except BaseException:
+        for writer, tmp_path in writers.values():
+            writer.close()
+            os.remove(tmp_path)
+        raise
+
+    # Fichiers visibles seulement une fois complets, puis avancement du watermark
+    for writer, tmp_path in writers.values():
+        writer.close()
+        os.replace(tmp_path, os.path.join(os.path.dirname(tmp_path), f"part-{run_id}.parquet"))
+    state[name] = {
+        'watermark': new_watermark.isoformat() if new_watermark else None,
+        'exported_at': datetime.utcnow().isoformat(),
+        'rows': exported,
+    }
+    _save_state(directory, state)
+    return {
+        'table': name,
+        'rows': exported,
+        'files': len(writers),
+        'partitions': sorted(writers),
+        'watermark': state[name]['watermark'],
+        'full': full,
+    }
+
+
+def export_all(directory, tables=None, full=False, batch_size=DEFAULT_BATCH_SIZE):
+    """Exporter plusieurs tables (toutes par défaut)"""
+    return [export_table(name, directory, full=full, batch_size=batch_size) for name in (tables or EXPORT_TABLES)]
+
+
+# ----------------------------------------------------------------------
+# Lecture et compaction
+# ----------------------------------------------------------------------
+
+def _dataset(directory, name):
+    _require_pyarrow()
+    _check_table(name)
+    table_dir = os.path.join(directory, name)
+    if not os.path.isdir(table_dir):
+        raise AnalyticsExportError(f'Aucun export pour {name} dans {directory}')
+    return ds.dataset(
+        table_dir, format='parquet', schema=arrow_schema(name).append(pa.field(PARTITION_FIELD, pa.string())),
+        partitioning=ds.partitioning(pa.schema([(PARTITION_FIELD, pa.string())]), flavor='hive'),
+        exclude_invalid_files=False, ignore_prefixes=['.', '_'],
+    )
+
+
+def latest_versions(table):
+    """Garder la version la plus récente (updated_at maximal) de chaque id"""
+    if table.num_rows == 0:
+        return table
+    table = table.sort_by([('id', 'ascending'), ('updated_at', 'descending')])
+    ids = table.column('id').to_numpy()
+    keep = np.empty(len(ids), dtype=bool)
+    keep[0] = True
+    np.not_equal(ids[1:], ids[:-1], out=keep[1:])
+    return table.filter(pa.array(keep))
+
+
+def read_export(directory, name, start_month=None, end_month=None, columns=None, latest=True):
+    """
+    Lire l'export d'une table (seuls les mois demandés sont ouverts)
+
+    Args:
+        start_month, end_month: Bornes incluses 'YYYY-MM'
+        columns: Colonnes à lire (toutes par défaut ; id et updated_at sont ajoutées si latest)
+        latest: Dédoublonner les versions successives d'une même ligne
+
+    Returns:
+        pyarrow.Table
+    """
+    dataset = _dataset(directory, name)
+    condition = None
+    if start_month:
+        condition = ds.field(PARTITION_FIELD) >= start_month
+    if end_month:
+        upper = ds.field(PARTITION_FIELD) <= end_month
+        condition = upper if condition is None else condition & upper
+    if columns is not None and latest:
+        columns = list(dict.fromkeys(list(columns) + ['id', 'updated_at']))
+    table = dataset.to_table(columns=columns, filter=condition)
+    return latest_versions(table) if latest else table
+
+
+def compact_table(directory, name):
+    """
+    Réécrire chaque mois en un seul fichier dédoublonné
+
+    Returns:
+        dict {table, partitions, rows_before, rows_after}
+    """
+    dataset = _dataset(directory, name)
+    table_dir = os.path.join(directory, name)
+    schema = arrow_schema(name)
+    run_id = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+    partitions = rows_before = rows_after = 0
+    for entry in sorted(os.scandir(table_dir), key=lambda e: e.name):
+        if not entry.is_dir() or not entry.name.startswith(f"{PARTITION_FIELD}="):
+            continue
+        files = [f.path for f in os.scandir(entry.path) if f.name.startswith('part-') and f.name.endswith('.parquet')]
+        if len(files) < 2:
+            continue
+        month = entry.name.split('=', 1)[1]
+        table = dataset.to_table(filter=ds.field(PARTITION_FIELD) == month).select(schema.names)
+        compacted = latest_versions(table).sort_by('id')
+        tmp_path = os.path.join(entry.path, f".part-{run_id}.parquet.tmp")
+        pq.write_table(compacted, tmp_path, compression='zstd')
+        os.replace(tmp_path, os.path.join(entry.path, f"part-{run_id}-compact.parquet"))
+        for path in files:
+            os.remove(path)
+        partitions += 1
+        rows_before += table.num_rows
+        rows_after += compacted.num_rows
+    return {'table': name, 'partitions': partitions, 'rows_before': rows_before, 'rows_after': rows_after}
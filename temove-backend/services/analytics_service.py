@@ -0,0 +1,343 @@
+"""
+Service d'analytique : séries temporelles sur une plage arbitraire
+
+Une série = une métrique agrégée par période (heure, jour, semaine, mois) avec
+des filtres optionnels (mode, catégorie, statut). Chaque série est calculée
+par un seul GROUP BY sur une expression de période (ou lue dans les rollups
+quand ils couvrent la demande), puis les périodes vides sont complétées.
+
+Les périodes entièrement écoulées sont mises en cache : seule la période en
+cours est recalculée. Une écriture qui touche une période écoulée (changement
+de statut d'une ancienne course, ...) invalide les entrées concernées.
+"""
+import calendar
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from threading import Lock
+from sqlalchemy import func, literal_column
+from extensions import db
+from models.ride import Ride, RideStatus, RideCategory, RideMode
+from models.payment import Payment, PaymentStatus
+from models.commission import Commission
+from services import model_events
+from services.rollup_service import rollups_ready, ride_series, payment_series
+
+
+GRANULARITIES = ('hour', 'day', 'week', 'month')
+
+# Métriques disponibles
+METRICS = {
+    'rides': 'Nombre de courses',
+    'gmv': 'Volume d\'affaires (somme des prix finaux, XOF)',
+    'discounts': 'Réductions accordées (XOF)',
+    'commission': 'Commission plateforme (XOF)',
+    'revenue': 'Paiements complétés (XOF)',
+}
+
+# Correspondance métrique -> mesure des rollups
+_RIDE_ROLLUP_MEASURES = {
+    'rides': 'ride_count',
+    'gmv': 'gmv',
+    'discounts': 'discount_total',
+    'commission': 'commission_total',
+}
+
+# Nombre maximum de périodes par série
+MAX_BUCKETS = 5000
+
+
+class AnalyticsError(ValueError):
+    """Paramètres de série invalides"""
+    pass
+
+
+# ----------------------------------------------------------------------
+# Périodes
+# ----------------------------------------------------------------------
+
+def bucket_floor(value, granularity):
+    """Début de la période contenant `value` (semaines commençant le lundi)"""
+    if granularity == 'hour':
+        return value.replace(minute=0, second=0, microsecond=0)
+    day = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        return day
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    raise AnalyticsError(f'Granularité inconnue: {granularity}')
+
+
+def next_bucket(value, granularity):
+    """Début de la période suivante"""
+    if granularity == 'hour':
+        return value + timedelta(hours=1)
+    if granularity == 'day':
+        return value + timedelta(days=1)
+    if granularity == 'week':
+        return value + timedelta(days=7)
+    days_in_month = calendar.monthrange(value.year, value.month)[1]
+    return value.replace(day=1) + timedelta(days=days_in_month)
+
+
+def iter_buckets(start, end, granularity):
+    """Débuts de périodes couvrant [start, end)"""
+    current = bucket_floor(start, granularity)
+    while current < end:
+        yield current
+        current = next_bucket(current, granularity)
+
+
+def bucket_expression(column, granularity, dialect):
+    """
+    Expression SQL donnant le début de période d'une colonne datetime
+
+    Les formats sont des littéraux (pas de paramètres liés) pour que l'expression
+    du SELECT et celle du GROUP BY soient identiques (ONLY_FULL_GROUP_BY).
+    """
+    if dialect == 'sqlite':
+        if granularity == 'week':
+            # 'weekday 0' avance au dimanche (inclus), '-6 days' ramène au lundi
+            return func.strftime(
+                literal_column("'%Y-%m-%d 00:00:00'"), column,
+                literal_column("'weekday 0'"), literal_column("'-6 days'")
+            )
+        formats = {
+            'hour': "'%Y-%m-%d %H:00:00'",
+            'day': "'%Y-%m-%d 00:00:00'",
+            'month': "'%Y-%m-01 00:00:00'",
+        }
+        return func.strftime(literal_column(formats[granularity]), column)
+    if dialect in ('mysql', 'mariadb'):
+        if granularity == 'week':
+            column = func.subdate(column, func.weekday(column))
+        formats = {
+            'hour': "'%Y-%m-%d %H:00:00'",
+            'day': "'%Y-%m-%d 00:00:00'",
+            'week': "'%Y-%m-%d 00:00:00'",
+            'month': "'%Y-%m-01 00:00:00'",
+        }
+        return func.date_format(column, literal_column(formats[granularity]))
+    # PostgreSQL (semaines ISO, commençant le lundi)
+    return func.date_trunc(literal_column(f"'{granularity}'"), column)
+
+
+def _parse_bucket(value):
+    if isinstance(value, datetime):
+        return value
+    return datetime.strptime(str(value)[:19], '%Y-%m-%d %H:%M:%S')
+
+
+# ----------------------------------------------------------------------
+# Calcul
+# ----------------------------------------------------------------------
+
+def _parse_filters(ride_modes=None, categories=None, statuses=None):
+    try:
+        return {
+            'ride_modes': tuple(RideMode(v) for v in ride_modes or ()),
+            'categories': tuple(RideCategory(v) for v in categories or ()),
+            'statuses': tuple(RideStatus(v) for v in statuses or ()),
+        }
+    except ValueError as e:
+        raise AnalyticsError(f'Filtre invalide: {e}')
+
+
+def _apply_ride_filters(query, filters):
+    if filters['ride_modes']:
+        query = query.filter(Ride.ride_mode.in_(filters['ride_modes']))
+    if filters['categories']:
+        query = query.filter(Ride.category.in_(filters['categories']))
+    if filters['statuses']:
+        query = query.filter(Ride.status.in_(filters['statuses']))
+    return query
+
+
+def _query_raw(metric, granularity, start, end, filters):
+    """Un seul GROUP BY sur les tables brutes : {début de période: valeur}"""
+    dialect = db.engine.dialect.name
+
+    if metric == 'revenue':
+        bucket = bucket_expression(Payment.created_at, granularity, dialect)
+        query = db.session.query(bucket, func.sum(Payment.amount)).filter(
+            Payment.created_at >= start,
+            Payment.created_at < end,
+            Payment.status == PaymentStatus.COMPLETED
+        )
+        if any(filters.values()):
+            query = _apply_ride_filters(query.join(Ride, Ride.id == Payment.ride_id), filters)
+    else:
+        bucket = bucket_expression(Ride.requested_at, granularity, dialect)
+        if metric == 'rides':
+            aggregate = func.count(Ride.id)
+        elif metric == 'gmv':
+            aggregate = func.sum(Ride.final_price)
+        elif metric == 'discounts':
+            aggregate = func.sum(Ride.discount_amount)
+        else:
+            aggregate = func.sum(Commission.platform_commission)
+        query = db.session.query(bucket, aggregate).filter(
+            Ride.requested_at >= start,
+            Ride.requested_at < end
+        )
+        if metric == 'commission':
+            query = query.join(Commission, Commission.ride_id == Ride.id)
+        query = _apply_ride_filters(query, filters)
+
+    rows = query.group_by(bucket).all()
+    return {_parse_bucket(b): int(value or 0) for b, value in rows}
+
+
+def _query_rollups(metric, granularity, start, end, filters):
+    """Lecture dans les rollups (None si la demande n'est pas couverte)"""
+    if filters['categories'] or not rollups_ready():
+        return None
+    # Les rollups sont par heure, jour et mois : les semaines sont cumulées depuis les jours
+    rollup_granularity = 'day' if granularity == 'week' else granularity
+
+    if metric == 'revenue':
+        if filters['ride_modes'] or filters['statuses']:
+            return None
+        rows = payment_series(rollup_granularity, start, end)
+        measure = 'amount_total'
+    else:
+        rows = ride_series(
+            rollup_granularity, start, end,
+            statuses=[s.value for s in filters['statuses']],
+            ride_modes=[m.value for m in filters['ride_modes']],
+        )
+        measure = _RIDE_ROLLUP_MEASURES[metric]
+
+    values = {}
+    for row in rows:
+        key = bucket_floor(row['bucket_start'], granularity)
+        values[key] = values.get(key, 0) + row[measure]
+    return values
+
+
+def _compute(metric, granularity, start, end, filters):
+    values = _query_rollups(metric, granularity, start, end, filters)
+    if values is None:
+        values = _query_raw(metric, granularity, start, end, filters)
+    return values
+
+
+# ----------------------------------------------------------------------
+# Cache des périodes écoulées
+# ----------------------------------------------------------------------
+
+class _ClosedWindowCache:
+    """Cache LRU des séries sur des plages entièrement écoulées"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        return None
+
+    def set(self, key, values):
+        with self._lock:
+            self._entries[key] = values
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, timestamps):
+        """Supprimer les entrées dont la plage contient l'un des instants"""
+        if not timestamps:
+            return
+        with self._lock:
+            stale = [
+                key for key in self._entries
+                if any(key[-2] <= ts < key[-1] for ts in timestamps)
+            ]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = _ClosedWindowCache()
+
+
+def _invalidate_on_write(changes):
+    """Invalider le cache quand une écriture touche une période écoulée"""
+    timestamps = set()
+    for change in changes.get(Ride, []):
+        timestamps.add(change.values.get('requested_at'))
+        timestamps.add(change.old('requested_at'))
+    for change in changes.get(Payment, []):
+        timestamps.add(change.values.get('created_at'))
+        timestamps.add(change.old('created_at'))
+    if changes.get(Commission):
+        # La commission est rattachée à la date de la course : invalidation complète (rare)
+        _cache.clear()
+        return
+    _cache.invalidate([ts for ts in timestamps if ts is not None])
+
+
+def register_analytics_hooks():
+    """Brancher l'invalidation du cache des séries sur les écritures"""
+    model_events.on_commit((Ride, Payment, Commission), _invalidate_on_write)
+
+
+# ----------------------------------------------------------------------
+# API
+# ----------------------------------------------------------------------
+
+def time_series(metric, granularity, start, end, ride_modes=None, categories=None, statuses=None, now=None):
+    """
+    Calculer une série temporelle
+
+    Args:
+        metric: 'rides', 'gmv', 'discounts', 'commission' ou 'revenue'
+        granularity: 'hour', 'day', 'week' ou 'month'
+        start, end: Plage [start, end) (datetime UTC)
+        ride_modes, categories, statuses: Filtres (valeurs des Enum)
+
+    Returns:
+        Liste de dicts {bucket_start, value} couvrant toute la plage (0 si vide)
+
+    Raises:
+        AnalyticsError: si les paramètres sont invalides
+    """
+    if metric not in METRICS:
+        raise AnalyticsError(f'Métrique inconnue: {metric} (valeurs: {", ".join(METRICS)})')
+    if granularity not in GRANULARITIES:
+        raise AnalyticsError(f'Granularité inconnue: {granularity} (valeurs: {", ".join(GRANULARITIES)})')
+    if start >= end:
+        raise AnalyticsError('La date de début doit précéder la date de fin')
+
+    filters = _parse_filters(ride_modes, categories, statuses)
+    buckets = list(iter_buckets(start, end, granularity))
+    if len(buckets) > MAX_BUCKETS:
+        raise AnalyticsError(f'Plage trop grande: {len(buckets)} périodes (maximum {MAX_BUCKETS})')
+
+    # Aligner la plage sur les périodes pour que le cache soit réutilisable
+    start = buckets[0]
+    end = next_bucket(buckets[-1], granularity)
+
+    # Les périodes antérieures à la période en cours sont figées
+    cutoff = min(bucket_floor(now or datetime.utcnow(), granularity), end)
+    values = {}
+    if start < cutoff:
+        key = (metric, granularity, tuple(sorted((k, tuple(sorted(e.value for e in v))) for k, v in filters.items())),
+               start, cutoff)
+        closed = _cache.get(key)
+        if closed is None:
+            closed = _compute(metric, granularity, start, cutoff, filters)
+            _cache.set(key, closed)
+        values.update(closed)
+    if cutoff < end:
+        values.update(_compute(metric, granularity, max(start, cutoff), end, filters))
+
+    return [{'bucket_start': b, 'value': values.get(b, 0)} for b in buckets]
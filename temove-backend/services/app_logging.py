@@ -0,0 +1,213 @@
+"""
+Journalisation structurée, non bloquante et échantillonnée
+
+Les diagnostics des routes passent par des loggers `temove.*` (get_logger)
+au lieu de print() :
+- file d'attente : la requête ne fait que déposer l'enregistrement, un thread
+  écrit sur stdout (plus d'écriture synchrone ni de flush sur le chemin critique)
+- format JSON (une ligne par événement, champs en `extra`) ou texte en développement
+- contexte de la requête ajouté à chaque ligne (id, méthode, chemin, endpoint, utilisateur)
+- niveaux par logger (LOG_LEVEL, LOG_LEVELS)
+- échantillonnage par endpoint (LOG_SAMPLE_RATE, LOG_SAMPLE_RATES) : la
+  décision est prise une fois par requête, qui est journalisée en entier ou
+  pas du tout ; les WARNING et plus sont toujours gardés
+- une ligne par requête (logger temove.request) : statut, durée, taille
+
+    logger = get_logger('rides')
+    logger.debug('Prix calculé', extra={'distance_km': distance_km, 'final_price': final_price})
+
+Les messages utilisent les arguments différés du module logging
+(logger.debug('%s', valeur)) : rien n'est formaté si le niveau est filtré.
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from flask import current_app, g, has_request_context, request
+from flask.logging import default_handler
+
+
+ROOT_LOGGER = 'temove'
+REQUEST_LOGGER = 'temove.request'
+
+# Attributs standard d'un LogRecord (le reste vient de `extra`)
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {
+    'message', 'asctime', 'request_id', 'method', 'path', 'endpoint', 'user_id',
+}
+_CONTEXT_ATTRS = ('request_id', 'method', 'path', 'endpoint', 'user_id')
+
+_listener = None
+
+
+def get_logger(name):
+    """Logger de l'application (temove.<name>)"""
+    return logging.getLogger(f'{ROOT_LOGGER}.{name}')
+
+
+def _current_user_id():
+    try:
+        from flask_jwt_extended import get_jwt_identity
+        return get_jwt_identity()
+    except Exception:
+        # JWT non vérifié pour cette requête
+        return None
+
+
+class RequestContextFilter(logging.Filter):
+    """Contexte de la requête en cours + échantillonnage (appelé dans le thread de la requête)"""
+
+    def __init__(self, default_rate=1.0, rates=None):
+        super().__init__()
+        self.default_rate = default_rate
+        self.rates = rates or {}
+
+    def sampled(self):
+        """Décision d'échantillonnage de la requête en cours (prise au premier appel)"""
+        decision = g.get('log_sampled')
+        if decision is None:
+            rate = self.rates.get(request.endpoint, self.default_rate)
+            decision = g.log_sampled = rate >= 1 or random.random() < rate
+        return decision
+
+    def filter(self, record):
+        if not has_request_context():
+            return True
+        if record.levelno < logging.WARNING and not self.sampled():
+            return False
+        if 'request_id' not in g:
+            g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex[:16]
+        record.request_id = g.request_id
+        record.method = request.method
+        record.path = request.path
+        record.endpoint = request.endpoint
+        record.user_id = _current_user_id()
+        return True
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler qui laisse le formatage au thread d'écriture"""
+
+    def prepare(self, record):
+        # Message et trace figés maintenant (les arguments peuvent changer ensuite)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _extra_fields(record):
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS and not key.startswith('_')}
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key in _CONTEXT_ATTRS:
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        entry.update(_extra_fields(record))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Format lisible pour le développement : message puis champs clé=valeur"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s [%(name)s] %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        fields = {key: getattr(record, key, None) for key in ('request_id', 'endpoint', 'user_id')}
+        fields.update(_extra_fields(record))
+        details = ' '.join(f'{key}={value}' for key, value in fields.items() if value is not None)
+        return f'{line} | {details}' if details else line
+
+
+def _request_started():
+    g.request_started = time.perf_counter()
+
+
+def _log_request(response):
+    """Une ligne par requête (statut, durée, taille)"""
+    if not current_app.config.get('LOG_REQUESTS', True):
+        return response
+    logger = logging.getLogger(REQUEST_LOGGER)
+    level = logging.WARNING if response.status_code >= 500 else logging.INFO
+    if logger.isEnabledFor(level) and 'request_started' in g:
+        logger.log(level, '%s %s %s', request.method, request.path, response.status_code, extra={
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - g.request_started) * 1000, 2),
+            'bytes': response.content_length,
+        })
+    return response
+
+
+def stop_logging():
+    """Vider la file d'attente et arrêter le thread d'écriture"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def init_logging(app, stream=None):
+    """
+    Configurer les loggers temove.* et app.logger depuis la configuration
+
+    Peut être rappelé (plusieurs applications dans un même processus) : la
+    configuration précédente est remplacée.
+    """
+    global _listener
+    stop_logging()
+
+    config = app.config
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if config.get('LOG_FORMAT', 'json') == 'json' else TextFormatter())
+
+    if config.get('LOG_ASYNC', True):
+        handler = _DeferredQueueHandler(queue.SimpleQueue())
+        _listener = QueueListener(handler.queue, output, respect_handler_level=False)
+        _listener.start()
+    else:
+        handler = output
+    handler.addFilter(RequestContextFilter(config.get('LOG_SAMPLE_RATE', 1.0), config.get('LOG_SAMPLE_RATES')))
+
+    loggers = [logging.getLogger(ROOT_LOGGER), app.logger]
+    for logger in loggers:
+        for previous in list(logger.handlers):
+            logger.removeHandler(previous)
+        logger.addHandler(handler)
+        logger.propagate = False
+    logging.getLogger(ROOT_LOGGER).setLevel(config.get('LOG_LEVEL', 'INFO'))
+    app.logger.setLevel(config.get('LOG_LEVEL', 'INFO'))
+    for name, level in (config.get('LOG_LEVELS') or {}).items():
+        logging.getLogger(name).setLevel(level)
+    app.logger.removeHandler(default_handler)
+
+    if not app.extensions.get('app_logging'):
+        app.before_request(_request_started)
+        app.after_request(_log_request)
+        app.extensions['app_logging'] = True
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,426 @@
+"""
+Carte de chaleur de la demande (départs et arrivées) par cellule × heure de la semaine
+
+Grille régulière sur l'agglomération de Dakar (cellules de HEATMAP_CELL_METERS,
+500 m par défaut), 168 heures de la semaine (lundi 0h = 0). Dakar est en
+UTC+0 sans heure d'été : les dates UTC sont aussi les heures locales.
+
+- calcul par lots vectorisé (NumPy) sur l'historique des courses
+  (HEATMAP_HISTORY_DAYS derniers jours), enregistré dans HEATMAP_PATH
+  (scripts/build_demand_heatmap.py, à relancer chaque nuit) ; chaque processus
+  relit le fichier quand il change (vérifié toutes les HEATMAP_RELOAD_SECONDS)
+  et, sans fichier lisible, calcule la carte dans un thread d'arrière-plan
+- mise à jour incrémentale à chaque nouvelle course (hook post-commit)
+- lecture : grille dense (binaire uint32) ou liste creuse de cellules (JSON)
+"""
+import math
+import os
+import time
+from datetime import datetime, timedelta
+from threading import Lock, Thread
+from services.app_logging import get_logger
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+logger = get_logger('heatmap')
+
+
+# Emprise de la grille : Dakar, Pikine, Guédiawaye, Rufisque, Diamniadio
+DAKAR_BOUNDS = {'south': 14.60, 'west': -17.55, 'north': 14.90, 'east': -17.05}
+
+HOURS_PER_WEEK = 168
+KINDS = ('pickup', 'dropoff')
+
+_METERS_PER_DEGREE_LAT = 111320.0
+
+
+class HeatmapError(ValueError):
+    """Paramètres de carte de chaleur invalides"""
+    pass
+
+
+class DemandHeatmap:
+    """Compteurs de courses [type, heure de la semaine, ligne, colonne]"""
+
+    def __init__(self, cell_meters=500, bounds=None):
+        if not NUMPY_AVAILABLE:
+            raise HeatmapError("NumPy n'est pas installé")
+        self.bounds = dict(bounds or DAKAR_BOUNDS)
+        self.cell_meters = cell_meters
+        mid_lat = math.radians((self.bounds['south'] + self.bounds['north']) / 2)
+        self.lat_step = cell_meters / _METERS_PER_DEGREE_LAT
+        self.lng_step = cell_meters / (_METERS_PER_DEGREE_LAT * math.cos(mid_lat))
+        self.rows = int(math.ceil((self.bounds['north'] - self.bounds['south']) / self.lat_step))
+        self.cols = int(math.ceil((self.bounds['east'] - self.bounds['west']) / self.lng_step))
+        self.counts = np.zeros((len(KINDS), HOURS_PER_WEEK, self.rows, self.cols), dtype=np.uint32)
+        self.built_at = None
+        self.since = None
+        self.last_ride_id = 0
+        self._lock = Lock()
+
+    # ------------------------------------------------------------------
+    # Agrégation vectorisée
+    # ------------------------------------------------------------------
+
+    def _cells(self, latitudes, longitudes):
+        """Indices (ligne, colonne) et masque des points dans la grille"""
+        rows = np.floor((latitudes - self.bounds['south']) / self.lat_step)
+        cols = np.floor((longitudes - self.bounds['west']) / self.lng_step)
+        inside = (rows >= 0) & (rows < self.rows) & (cols >= 0) & (cols < self.cols)
+        inside &= ~(np.isnan(latitudes) | np.isnan(longitudes))
+        return rows, cols, inside
+
+    def add_points(self, kind_index, hours_of_week, latitudes, longitudes, sign=1):
+        """Ajouter des points (tableaux NumPy de même longueur)"""
+        rows, cols, inside = self._cells(latitudes, longitudes)
+        if not inside.any():
+            return
+        flat = (hours_of_week[inside].astype(np.int64) * self.rows + rows[inside].astype(np.int64)) \
+            * self.cols + cols[inside].astype(np.int64)
+        binned = np.bincount(flat, minlength=HOURS_PER_WEEK * self.rows * self.cols)
+        binned = binned.reshape(HOURS_PER_WEEK, self.rows, self.cols).astype(np.uint32)
+        with self._lock:
+            if sign > 0:
+                self.counts[kind_index] += binned
+            else:
+                self.counts[kind_index] -= np.minimum(self.counts[kind_index], binned)
+
+    def add_rides(self, requested_at, pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, sign=1):
+        """
+        Ajouter un lot de courses
+
+        Args:
+            requested_at: tableau datetime64
+            pickup_lat, pickup_lng, dropoff_lat, dropoff_lng: tableaux float (NaN si absent)
+        """
+        days = requested_at.astype('datetime64[D]')
+        # 1970-01-01 était un jeudi (lundi = 0)
+        weekdays = (days.astype(np.int64) + 3) % 7
+        hours = (requested_at - days).astype('timedelta64[h]').astype(np.int64)
+        hours_of_week = weekdays * 24 + hours
+        self.add_points(0, hours_of_week, pickup_lat, pickup_lng, sign)
+        self.add_points(1, hours_of_week, dropoff_lat, dropoff_lng, sign)
+
+    def add_ride(self, requested_at, pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, sign=1):
+        """Ajouter une course (mise à jour incrémentale)"""
+        if requested_at is None:
+            return
+        hour_of_week = requested_at.weekday() * 24 + requested_at.hour
+        for kind_index, lat, lng in ((0, pickup_lat, pickup_lng), (1, dropoff_lat, dropoff_lng)):
+            if lat is None or lng is None:
+                continue
+            row = int(math.floor((lat - self.bounds['south']) / self.lat_step))
+            col = int(math.floor((lng - self.bounds['west']) / self.lng_step))
+            if 0 <= row < self.rows and 0 <= col < self.cols:
+                with self._lock:
+                    cell = self.counts[kind_index, hour_of_week, row, col]
+                    if sign > 0:
+                        self.counts[kind_index, hour_of_week, row, col] = cell + 1
+                    elif cell > 0:
+                        self.counts[kind_index, hour_of_week, row, col] = cell - 1
+
+    # ------------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------------
+
+    def grid(self, kind='pickup', weekday=None, hour=None):
+        """
+        Grille [ligne, colonne] pour un créneau
+
+        weekday (0 = lundi) et hour (0-23) sont optionnels : sans eux, les
+        heures correspondantes sont cumulées (semaine entière par défaut).
+        """
+        if kind not in KINDS:
+            raise HeatmapError(f'Type inconnu: {kind} (valeurs: {", ".join(KINDS)})')
+        if weekday is not None and not 0 <= weekday <= 6:
+            raise HeatmapError('weekday doit être entre 0 (lundi) et 6 (dimanche)')
+        if hour is not None and not 0 <= hour <= 23:
+            raise HeatmapError('hour doit être entre 0 et 23')
+
+        by_hour = self.counts[KINDS.index(kind)].reshape(7, 24, self.rows, self.cols)
+        days = slice(None) if weekday is None else slice(weekday, weekday + 1)
+        hours = slice(None) if hour is None else slice(hour, hour + 1)
+        return by_hour[days, hours].sum(axis=(0, 1), dtype=np.uint32)
+
+    def metadata(self):
+        return {
+            'bounds': self.bounds,
+            'cell_meters': self.cell_meters,
+            'lat_step': self.lat_step,
+            'lng_step': self.lng_step,
+            'rows': self.rows,
+            'cols': self.cols,
+            'built_at': self.built_at.isoformat() if self.built_at else None,
+            'since': self.since.isoformat() if self.since else None,
+        }
+
+    # ------------------------------------------------------------------
+    # Persistance
+    # ------------------------------------------------------------------
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f'{path}.tmp.npz'
+        with self._lock:
+            np.savez_compressed(
+                tmp_path,
+                counts=self.counts,
+                bounds=np.array([self.bounds[k] for k in ('south', 'west', 'north', 'east')]),
+                cell_meters=np.array(self.cell_meters),
+                built_at=np.array(self.built_at.isoformat() if self.built_at else ''),
+                since=np.array(self.since.isoformat() if self.since else ''),
+                last_ride_id=np.array(self.last_ride_id),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            south, west, north, east = (float(v) for v in data['bounds'])
+            heatmap = cls(int(data['cell_meters']), {'south': south, 'west': west, 'north': north, 'east': east})
+            if data['counts'].shape != heatmap.counts.shape:
+                raise HeatmapError(f'Grille incompatible dans {path}')
+            heatmap.counts = data['counts'].astype(np.uint32)
+            built_at = str(data['built_at'])
+            since = str(data['since'])
+            heatmap.built_at = datetime.fromisoformat(built_at) if built_at else None
+            heatmap.since = datetime.fromisoformat(since) if since else None
+            heatmap.last_ride_id = int(data['last_ride_id'])
+        return heatmap
+
+
+# ----------------------------------------------------------------------
+# Calcul par lots
+# ----------------------------------------------------------------------
+
+def build_heatmap_from_database(cell_meters=500, history_days=90, batch_size=100000):
+    """
+    Calculer la carte de chaleur depuis l'historique des courses
+
+    Les colonnes sont lues par lots ordonnés par id puis agrégées avec
+    np.bincount (pas de boucle Python par course).
+    """
+    from extensions import db
+    from models.ride import Ride
+
+    heatmap = DemandHeatmap(cell_meters)
+    heatmap.built_at = datetime.utcnow()
+    heatmap.since = heatmap.built_at - timedelta(days=history_days) if history_days else None
+
+    started = time.perf_counter()
+    last_id = 0
+    total = 0
+    while True:
+        query = db.session.query(
+            Ride.id, Ride.requested_at,
+            Ride.pickup_latitude, Ride.pickup_longitude,
+            Ride.dropoff_latitude, Ride.dropoff_longitude
+        ).filter(Ride.id > last_id)
+        if heatmap.since:
+            query = query.filter(Ride.requested_at >= heatmap.since)
+        rows = query.order_by(Ride.id).limit(batch_size).all()
+        if not rows:
+            break
+        ids, requested_at, p_lat, p_lng, d_lat, d_lng = zip(*rows)
+        heatmap.add_rides(
+            np.array(requested_at, dtype='datetime64[s]'),
+            np.array(p_lat, dtype=np.float64),
+            np.array(p_lng, dtype=np.float64),
+            np.array([v if v is not None else np.nan for v in d_lat], dtype=np.float64),
+            np.array([v if v is not None else np.nan for v in d_lng], dtype=np.float64),
+        )
+        last_id = ids[-1]
+        total += len(rows)
+
+    heatmap.last_ride_id = last_id
+    logger.info('✅ [HEATMAP] %s courses agrégées en %.1fs (%s×%s cellules de %s m)',
+                total, time.perf_counter() - started, heatmap.rows, heatmap.cols, cell_meters)
+    return heatmap
+
+
+# ----------------------------------------------------------------------
+# Instance partagée
+# ----------------------------------------------------------------------
+
+_heatmap = None
+_heatmap_mtime = None
+_next_check = 0.0
+_heatmap_lock = Lock()
+_build_thread = None
+
+
+def _file_mtime(path):
+    try:
+        return os.path.getmtime(path) if path else None
+    except OSError:
+        return None
+
+
+def _load_heatmap(config):
+    """Lire HEATMAP_PATH complété des courses récentes (None si absent, illisible ou d'une autre grille)"""
+    path = config.get('HEATMAP_PATH')
+    try:
+        heatmap = DemandHeatmap.load(path)
+    except Exception as e:
+        logger.warning('⚠️ [HEATMAP] Lecture de %s impossible: %s', path, e)
+        return None
+    if heatmap.cell_meters != config.get('HEATMAP_CELL_METERS', 500):
+        return None
+    _catch_up(heatmap)
+    return heatmap
+
+
+def _build(app):
+    """Calculer la carte depuis la base et l'enregistrer dans HEATMAP_PATH (thread d'arrière-plan)"""
+    global _heatmap, _heatmap_mtime
+    from extensions import db
+
+    with app.app_context():
+        config = app.config
+        try:
+            heatmap = build_heatmap_from_database(
+                config.get('HEATMAP_CELL_METERS', 500), config.get('HEATMAP_HISTORY_DAYS', 90)
+            )
+            _catch_up(heatmap)
+            path = config.get('HEATMAP_PATH')
+            try:
+                heatmap.save(path)
+            except OSError as e:
+                # Carte gardée en mémoire ; recalculée au prochain démarrage
+                logger.warning('⚠️ [HEATMAP] Enregistrement dans %s impossible: %s', path, e)
+            with _heatmap_lock:
+                _heatmap = heatmap
+                _heatmap_mtime = _file_mtime(path)
+        except Exception:
+            logger.exception('❌ [HEATMAP] Calcul de la carte de chaleur en échec')
+        finally:
+            db.session.remove()
+
+
+def _start_build(app):
+    """Lancer le calcul depuis la base s'il n'est pas déjà en cours (appelé sous _heatmap_lock)"""
+    global _build_thread
+    if _build_thread is not None and _build_thread.is_alive():
+        return
+    _build_thread = Thread(target=_build, args=(app,), name='heatmap-build', daemon=True)
+    _build_thread.start()
+
+
+def get_demand_heatmap():
+    """
+    Carte de chaleur partagée, lue depuis HEATMAP_PATH
+
+    Relue quand la date de modification du fichier change (recalcul nocturne),
+    vérifiée au plus toutes les HEATMAP_RELOAD_SECONDS. Sans fichier lisible,
+    la carte est calculée depuis la base dans un thread : None en attendant
+    (la requête n'attend pas le calcul).
+    """
+    global _heatmap, _heatmap_mtime, _next_check
+    if _heatmap is not None and time.monotonic() < _next_check:
+        return _heatmap
+
+    from flask import current_app
+
+    config = current_app.config
+    with _heatmap_lock:
+        now = time.monotonic()
+        if _heatmap is None or now >= _next_check:
+            mtime = _file_mtime(config.get('HEATMAP_PATH'))
+            if mtime is not None and mtime != _heatmap_mtime:
+                heatmap = _load_heatmap(config)
+                if heatmap is not None:
+                    _heatmap = heatmap
+                _heatmap_mtime = mtime
+            if _heatmap is None:
+                _start_build(current_app._get_current_object())
+            _next_check = now + config.get('HEATMAP_RELOAD_SECONDS', 60)
+        return _heatmap
+
+
+def warm_up(app):
+    """Lire le fichier ou lancer le calcul de la carte (thread d'arrière-plan)"""
+    from extensions import db
+
+    with app.app_context():
+        try:
+            get_demand_heatmap()
+        except Exception:
+            logger.exception('❌ [HEATMAP] Chargement de la carte de chaleur en échec')
+        finally:
+            db.session.remove()
+
+
+def init_heatmap(app):
+    """
+    Charger la carte dans un thread dès la première requête servie
+
+    Les scripts qui créent l'application sans servir de requête ne la
+    chargent pas. Désactivé par HEATMAP_WARMUP=false (chargement à la
+    première consultation).
+    """
+    if not NUMPY_AVAILABLE:
+        return
+    started = []
+    lock = Lock()
+
+    @app.before_request
+    def start_heatmap_warm_up():
+        if started or not app.config.get('HEATMAP_WARMUP', True):
+            return None
+        with lock:
+            if started:
+                return None
+            started.append(True)
+        Thread(target=warm_up, args=(app,), name='heatmap-warmup', daemon=True).start()
+        return None
+
+
+def _catch_up(heatmap):
+    """Ajouter les courses créées depuis le calcul enregistré"""
+    from extensions import db
+    from models.ride import Ride
+
+    rows = db.session.query(
+        Ride.id, Ride.requested_at,
+        Ride.pickup_latitude, Ride.pickup_longitude,
+        Ride.dropoff_latitude, Ride.dropoff_longitude
+    ).filter(Ride.id > heatmap.last_ride_id).order_by(Ride.id).all()
+    for ride_id, *values in rows:
+        heatmap.add_ride(*values)
+        heatmap.last_ride_id = ride_id
+
+
+def _on_commit(changes):
+    from models.ride import Ride
+
+    heatmap = _heatmap
+    if heatmap is None:
+        return
+    for change in changes.get(Ride, []):
+        v = change.values
+        # Les courses antérieures à la fenêtre d'historique ne sont pas comptées
+        if v['requested_at'] is None or (heatmap.since and v['requested_at'] < heatmap.since):
+            continue
+        if change.action == 'insert' and v['id'] > heatmap.last_ride_id:
+            sign = 1
+        elif change.action == 'delete':
+            sign = -1
+        else:
+            continue
+        heatmap.add_ride(v['requested_at'], v['pickup_latitude'], v['pickup_longitude'],
+                         v['dropoff_latitude'], v['dropoff_longitude'], sign=sign)
+
+
+def register_heatmap_hooks():
+    """Mettre à jour la carte de chaleur à chaque nouvelle course"""
+    if not NUMPY_AVAILABLE:
+        return
+    from services import model_events
+    from models.ride import Ride
+
+    model_events.on_commit(Ride, _on_commit)
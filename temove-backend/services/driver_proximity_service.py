@@ -54,7 +54,7 @@ class DriverProximityService:
                 Driver.current_longitude.isnot(None)
             ).all()
             
-            current_app.logger.info(f"[DRIVER_PROXIMITY] Trouvé {len(available_drivers)} chauffeurs ONLINE")
+            current_app.logger.debug(f"[DRIVER_PROXIMITY] Trouvé {len(available_drivers)} chauffeurs ONLINE")
             
             # Calculer la distance et l'ETA pour chaque chauffeur
             drivers_with_eta = []
@@ -113,7 +113,7 @@ class DriverProximityService:
             # Limiter le nombre de résultats
             drivers_with_eta = drivers_with_eta[:max_drivers]
             
-            current_app.logger.info(f"[DRIVER_PROXIMITY] {len(drivers_with_eta)} chauffeurs disponibles trouvés pour pickup ({pickup_lat}, {pickup_lng})")
+            current_app.logger.debug(f"[DRIVER_PROXIMITY] {len(drivers_with_eta)} chauffeurs disponibles trouvés pour pickup ({pickup_lat}, {pickup_lng})")
             
             return drivers_with_eta
             
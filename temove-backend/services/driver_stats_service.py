@@ -0,0 +1,417 @@
+"""
+Service des statistiques quotidiennes des conducteurs (driver_stats_daily)
+
+- maintenance incrémentale : chaque flush contenant des courses, des commissions
+  ou l'ouverture / fermeture d'une session en ligne applique ses deltas par upsert
+- recalcul nocturne des derniers jours depuis les tables brutes, un jour par
+  transaction sous le marqueur RollupState 'driver_stats', et découpage à
+  minuit des sessions en ligne ouvertes (scripts/refresh_driver_stats.py)
+- lectures : revenus d'un conducteur sur une période (TéMove Pro) et
+  classements des conducteurs (dashboard admin), uniquement depuis les agrégats
+
+Les jours sont en UTC. Le taux d'acceptation n'est pas calculé : les propositions
+de course ne sont pas enregistrées (une course n'a un driver_id qu'une fois
+acceptée). Les taux sont rapportés aux courses attribuées au conducteur.
+"""
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import Float, cast, delete, func, or_, true, update
+from extensions import db
+from models.ride import Ride, RideStatus
+from models.driver import Driver
+from models.commission import Commission
+from models.rollup import DriverStatsDaily
+from services import model_events
+from services.rollup_service import (
+    add_deltas, enum_value, upsert_deltas,
+    ensure_marker, lock_marker, marker_present, mark_backfilled, replace_rows,
+)
+
+
+DRIVER_MEASURES = (
+    'assigned_rides', 'completed_rides', 'cancelled_rides', 'fares_total',
+    'pickup_eta_seconds', 'pickup_eta_count',
+    'earnings_total', 'platform_commission_total',
+    'online_seconds',
+)
+_INDEX = {m: i for i, m in enumerate(DRIVER_MEASURES)}
+
+# Ligne de RollupState créée par recompute_driver_stats()
+DRIVER_STATS_MARKER = 'driver_stats'
+
+# Mesures calculées depuis les tables brutes (le temps en ligne n'a pas d'historique brut)
+_RECOMPUTED_MEASURES = DRIVER_MEASURES[:-1]
+
+_RIDE_COLUMNS = ('driver_id', 'requested_at', 'status', 'final_price', 'confirmed_at', 'started_at')
+_COMMISSION_COLUMNS = ('driver_id', 'created_at', 'driver_earnings', 'platform_commission')
+
+PERIODS = ('today', 'week', 'month')
+MAX_PERIOD_DAYS = 92
+
+
+class DriverStatsError(ValueError):
+    """Paramètre invalide (période, métrique de classement, ...)"""
+
+
+def _vector(sign=1, **values):
+    vector = [0] * len(DRIVER_MEASURES)
+    for measure, value in values.items():
+        vector[_INDEX[measure]] = sign * (value or 0)
+    return vector
+
+
+# ----------------------------------------------------------------------
+# Mesures d'une ligne
+# ----------------------------------------------------------------------
+
+def _pickup_eta(confirmed_at, started_at):
+    """Secondes entre l'acceptation et la prise en charge (None si inconnues ou incohérentes)"""
+    if confirmed_at is None or started_at is None or started_at < confirmed_at:
+        return None
+    return int((started_at - confirmed_at).total_seconds())
+
+
+def _ride_entry(driver_id, requested_at, status, final_price, confirmed_at, started_at, sign=1):
+    """(clé, mesures) d'une course attribuée, ou None si la course n'a pas de conducteur"""
+    if driver_id is None or requested_at is None:
+        return None
+    status = enum_value(status)
+    completed = status == RideStatus.COMPLETED.value
+    eta = _pickup_eta(confirmed_at, started_at)
+    return (driver_id, requested_at.date()), _vector(
+        sign,
+        assigned_rides=1,
+        completed_rides=1 if completed else 0,
+        cancelled_rides=1 if status == RideStatus.CANCELLED.value else 0,
+        fares_total=final_price if completed else 0,
+        pickup_eta_seconds=eta,
+        pickup_eta_count=1 if eta is not None else 0,
+    )
+
+
+def _commission_entry(driver_id, created_at, driver_earnings, platform_commission, sign=1):
+    if driver_id is None or created_at is None:
+        return None
+    return (driver_id, created_at.date()), _vector(
+        sign, earnings_total=driver_earnings, platform_commission_total=platform_commission
+    )
+
+
+def _split_by_day(start, end):
+    """Découper l'intervalle [start, end) en (jour, secondes)"""
+    while start < end:
+        next_day = datetime.combine(start.date() + timedelta(days=1), time.min)
+        chunk_end = min(end, next_day)
+        yield start.date(), int((chunk_end - start).total_seconds())
+        start = chunk_end
+
+
+def _add_entry(deltas, entry):
+    if entry is not None:
+        key, vector = entry
+        add_deltas(deltas, [key], vector)
+
+
+# ----------------------------------------------------------------------
+# Maintenance incrémentale
+# ----------------------------------------------------------------------
+
+def _apply_driver_stats_changes(connection, changes):
+    deltas = defaultdict(lambda: [0] * len(DRIVER_MEASURES))
+
+    # Verrou partagé sur le marqueur (voir rollup_service.marker_present) ;
+    # avant le premier recalcul, les courses et commissions seront comptées
+    # par celui-ci, seul le temps en ligne (sans historique brut) est appliqué
+    recomputed = marker_present(connection, DRIVER_STATS_MARKER)
+
+    for change in changes.get(Ride, []) if recomputed else ():
+        v = change.values
+        if change.action == 'insert':
+            _add_entry(deltas, _ride_entry(*(v[c] for c in _RIDE_COLUMNS)))
+        elif change.action == 'delete':
+            _add_entry(deltas, _ride_entry(*(v[c] for c in _RIDE_COLUMNS), sign=-1))
+        elif any(change.changed(c) for c in _RIDE_COLUMNS):
+            _add_entry(deltas, _ride_entry(*(change.old(c) for c in _RIDE_COLUMNS), sign=-1))
+            _add_entry(deltas, _ride_entry(*(v[c] for c in _RIDE_COLUMNS)))
+
+    for change in changes.get(Commission, []) if recomputed else ():
+        v = change.values
+        if change.action == 'insert':
+            _add_entry(deltas, _commission_entry(*(v[c] for c in _COMMISSION_COLUMNS)))
+        elif change.action == 'delete':
+            _add_entry(deltas, _commission_entry(*(v[c] for c in _COMMISSION_COLUMNS), sign=-1))
+        elif any(change.changed(c) for c in _COMMISSION_COLUMNS):
+            _add_entry(deltas, _commission_entry(*(change.old(c) for c in _COMMISSION_COLUMNS), sign=-1))
+            _add_entry(deltas, _commission_entry(*(v[c] for c in _COMMISSION_COLUMNS)))
+
+    # Sessions en ligne : comptées à leur fermeture (ou à leur découpage à minuit)
+    now = datetime.utcnow()
+    for change in changes.get(Driver, []):
+        if change.action == 'insert' or not change.changed('online_since'):
+            continue
+        since = change.old('online_since')
+        if since is None:
+            continue
+        until = now if change.action == 'delete' else (change.values['online_since'] or now)
+        for day, seconds in _split_by_day(since, until):
+            add_deltas(deltas, [(change.values['id'], day)], _vector(online_seconds=seconds))
+
+    upsert_deltas(connection, DriverStatsDaily, ('driver_id', 'day'), DRIVER_MEASURES, deltas)
+
+
+def register_driver_stats_hooks():
+    """Brancher la maintenance de driver_stats_daily sur les écritures de courses, commissions et conducteurs"""
+    model_events.on_flush((Ride, Commission, Driver), _apply_driver_stats_changes)
+
+
+# ----------------------------------------------------------------------
+# Job nocturne
+# ----------------------------------------------------------------------
+
+def checkpoint_online_sessions(now=None):
+    """
+    Découper à minuit les sessions en ligne ouvertes avant aujourd'hui
+
+    Le temps écoulé jusqu'à minuit est compté (par le hook) dans les jours
+    passés, et la session continue à partir de minuit.
+
+    Returns:
+        nombre de sessions découpées
+    """
+    midnight = datetime.combine((now or datetime.utcnow()).date(), time.min)
+    drivers = Driver.query.filter(Driver.online_since < midnight).all()
+    for driver in drivers:
+        driver.online_since = midnight
+    db.session.commit()
+    return len(drivers)
+
+
+def _recompute_day(day, batch_size):
+    """Remplacer les lignes d'un jour (sous le verrou du marqueur), temps en ligne conservé"""
+    lock_marker(DRIVER_STATS_MARKER)
+    start = datetime.combine(day, time.min)
+    end = start + timedelta(days=1)
+    totals = defaultdict(lambda: [0] * len(DRIVER_MEASURES))
+
+    def scan(model, columns, time_column, entry):
+        read = 0
+        last_id = 0
+        while True:
+            rows = db.session.query(model.id, *[getattr(model, c) for c in columns]).filter(
+                model.id > last_id, model.driver_id.isnot(None), time_column >= start, time_column < end
+            ).order_by(model.id).limit(batch_size).all()
+            if not rows:
+                return read
+            for row in rows:
+                _add_entry(totals, entry(*row[1:]))
+            read += len(rows)
+            last_id = rows[-1][0]
+
+    rides_read = scan(Ride, _RIDE_COLUMNS, Ride.requested_at, _ride_entry)
+    commissions_read = scan(Commission, _COMMISSION_COLUMNS, Commission.created_at, _commission_entry)
+
+    online = db.session.query(DriverStatsDaily.driver_id, DriverStatsDaily.online_seconds).filter(
+        DriverStatsDaily.day == day, DriverStatsDaily.online_seconds != 0
+    ).all()
+    for driver_id, online_seconds in online:
+        totals[(driver_id, day)][_INDEX['online_seconds']] += online_seconds
+
+    written = replace_rows(DriverStatsDaily, ('driver_id', 'day'), DRIVER_MEASURES, totals,
+                           DriverStatsDaily.day == day)
+    db.session.commit()
+    return written, rides_read, commissions_read
+
+
+def recompute_driver_stats(start_day=None, end_day=None, batch_size=50000):
+    """
+    Recalculer driver_stats_daily depuis les tables rides et commissions
+
+    Les lignes des jours [start_day, end_day] (tout l'historique si non précisés,
+    et toujours lors du premier recalcul) sont remplacées un jour à la fois,
+    chaque jour dans sa transaction sous le verrou exclusif du marqueur
+    'driver_stats' : les écritures concurrentes attendent la fin du jour en
+    cours, puis appliquent leurs deltas sur les lignes recalculées. Le temps en
+    ligne, qui n'existe que dans les agrégats, est conservé.
+
+    Returns:
+        dict avec le nombre de lignes écrites et de courses / commissions lues
+    """
+    ensure_marker(DRIVER_STATS_MARKER)
+
+    if lock_marker(DRIVER_STATS_MARKER) is None:
+        # Premier recalcul : les courses et commissions écrites avant le
+        # marqueur n'ont pas été comptées, quel que soit leur jour
+        start_day = end_day = None
+    full = start_day is None and end_day is None
+    if start_day is None or end_day is None:
+        first, last = db.session.query(
+            func.min(Ride.requested_at), func.max(Ride.requested_at)
+        ).filter(Ride.driver_id.isnot(None)).one()
+        commission_first, commission_last = db.session.query(
+            func.min(Commission.created_at), func.max(Commission.created_at)
+        ).filter(Commission.driver_id.isnot(None)).one()
+        days = [value.date() for value in (first, last, commission_first, commission_last) if value is not None]
+        start_day = start_day or (min(days) if days else end_day)
+        end_day = end_day or (max(days) if days else start_day)
+    if full:
+        # Hors de l'historique : plus de course ni de commission, seul le temps en ligne reste
+        outside = or_(DriverStatsDaily.day < start_day, DriverStatsDaily.day > end_day) if days else true()
+        db.session.execute(delete(DriverStatsDaily).where(outside, DriverStatsDaily.online_seconds == 0))
+        db.session.execute(update(DriverStatsDaily).where(outside).values(
+            **{m: 0 for m in _RECOMPUTED_MEASURES}
+        ))
+    db.session.commit()
+
+    counts = {'driver_stats_daily': 0, 'rides': 0, 'commissions': 0}
+    day = start_day
+    while day is not None and day <= end_day:
+        written, rides_read, commissions_read = _recompute_day(day, batch_size)
+        counts['driver_stats_daily'] += written
+        counts['rides'] += rides_read
+        counts['commissions'] += commissions_read
+        day += timedelta(days=1)
+
+    if full:
+        mark_backfilled(DRIVER_STATS_MARKER)
+    return counts
+
+
+# ----------------------------------------------------------------------
+# Lectures
+# ----------------------------------------------------------------------
+
+def period_bounds(period='week', start=None, end=None, today=None):
+    """
+    Jours [début, fin] d'une période
+
+    Args:
+        period: 'today', 'week' (depuis lundi) ou 'month' (depuis le 1er)
+        start, end: dates ISO (YYYY-MM-DD), prioritaires sur `period`
+    """
+    today = today or datetime.utcnow().date()
+    if start or end:
+        try:
+            end_day = date.fromisoformat(end) if end else today
+            start_day = date.fromisoformat(start) if start else end_day - timedelta(days=6)
+        except ValueError:
+            raise DriverStatsError('start / end doivent être des dates YYYY-MM-DD')
+        if start_day > end_day:
+            raise DriverStatsError('start doit précéder end')
+        if (end_day - start_day).days >= MAX_PERIOD_DAYS:
+            raise DriverStatsError(f'Période limitée à {MAX_PERIOD_DAYS} jours')
+        return start_day, end_day
+    if period == 'today':
+        return today, today
+    if period == 'week':
+        return today - timedelta(days=today.weekday()), today
+    if period == 'month':
+        return today.replace(day=1), today
+    raise DriverStatsError(f"period doit être l'une de: {', '.join(PERIODS)}")
+
+
+def _with_rates(totals):
+    """Ajouter les taux et moyennes dérivés des sommes"""
+    assigned = totals['assigned_rides']
+    totals['completion_rate'] = round(totals['completed_rides'] / assigned * 100, 1) if assigned else None
+    totals['cancellation_rate'] = round(totals['cancelled_rides'] / assigned * 100, 1) if assigned else None
+    totals['average_pickup_eta_seconds'] = (
+        round(totals['pickup_eta_seconds'] / totals['pickup_eta_count']) if totals['pickup_eta_count'] else None
+    )
+    totals['online_hours'] = round(totals['online_seconds'] / 3600, 2)
+    return totals
+
+
+def driver_period_stats(driver_id, start_day, end_day, online_since=None, now=None):
+    """
+    Statistiques d'un conducteur jour par jour sur [start_day, end_day]
+
+    Args:
+        online_since: début de la session en ligne en cours, ajoutée au temps en
+            ligne (elle n'est comptée dans les agrégats qu'à sa fermeture)
+
+    Returns:
+        dict {days: [mesures par jour, jours vides inclus], totals: sommes et taux}
+    """
+    rows = DriverStatsDaily.query.filter(
+        DriverStatsDaily.driver_id == driver_id,
+        DriverStatsDaily.day >= start_day,
+        DriverStatsDaily.day <= end_day,
+    ).all()
+    by_day = {row.day: [getattr(row, m) for m in DRIVER_MEASURES] for row in rows}
+
+    if online_since is not None:
+        for day, seconds in _split_by_day(online_since, now or datetime.utcnow()):
+            if start_day <= day <= end_day:
+                by_day.setdefault(day, [0] * len(DRIVER_MEASURES))[_INDEX['online_seconds']] += seconds
+
+    days = []
+    totals = [0] * len(DRIVER_MEASURES)
+    day = start_day
+    while day <= end_day:
+        values = by_day.get(day, [0] * len(DRIVER_MEASURES))
+        days.append(dict({'day': day.isoformat()}, **dict(zip(DRIVER_MEASURES, values))))
+        totals = [t + v for t, v in zip(totals, values)]
+        day += timedelta(days=1)
+
+    return {'days': days, 'totals': _with_rates(dict(zip(DRIVER_MEASURES, totals)))}
+
+
+def _ratio(numerator, denominator):
+    return cast(func.sum(numerator), Float) / func.nullif(func.sum(denominator), 0)
+
+
+# Métriques de classement : (expression, décroissant, dénominateur requis)
+LEADERBOARD_METRICS = {
+    'earnings': (lambda: func.sum(DriverStatsDaily.earnings_total), True, None),
+    'completed_rides': (lambda: func.sum(DriverStatsDaily.completed_rides), True, None),
+    'fares': (lambda: func.sum(DriverStatsDaily.fares_total), True, None),
+    'online_hours': (lambda: func.sum(DriverStatsDaily.online_seconds), True, None),
+    'completion_rate': (lambda: _ratio(DriverStatsDaily.completed_rides, DriverStatsDaily.assigned_rides),
+                        True, DriverStatsDaily.assigned_rides),
+    'cancellation_rate': (lambda: _ratio(DriverStatsDaily.cancelled_rides, DriverStatsDaily.assigned_rides),
+                          False, DriverStatsDaily.assigned_rides),
+    'pickup_eta': (lambda: _ratio(DriverStatsDaily.pickup_eta_seconds, DriverStatsDaily.pickup_eta_count),
+                   False, DriverStatsDaily.pickup_eta_count),
+}
+
+
+def driver_leaderboard(metric, start_day, end_day, limit=20, offset=0, min_rides=0):
+    """
+    Classement des conducteurs sur [start_day, end_day]
+
+    Args:
+        metric: clé de LEADERBOARD_METRICS (les taux et le temps d'approche
+            ignorent les conducteurs sans course attribuée / mesurée)
+        min_rides: nombre minimal de courses attribuées sur la période
+
+    Returns:
+        (lignes, nombre de conducteurs classés) ; chaque ligne est un dict
+        {rank, driver_id, <sommes>, <taux>}
+    """
+    if metric not in LEADERBOARD_METRICS:
+        raise DriverStatsError(f"metric doit être l'une de: {', '.join(LEADERBOARD_METRICS)}")
+    expression, descending, denominator = LEADERBOARD_METRICS[metric]
+    score = expression()
+
+    query = db.session.query(
+        DriverStatsDaily.driver_id,
+        *[func.sum(getattr(DriverStatsDaily, m)) for m in DRIVER_MEASURES]
+    ).filter(
+        DriverStatsDaily.day >= start_day,
+        DriverStatsDaily.day <= end_day,
+    ).group_by(DriverStatsDaily.driver_id)
+    if denominator is not None:
+        query = query.having(func.sum(denominator) > 0)
+    if min_rides:
+        query = query.having(func.sum(DriverStatsDaily.assigned_rides) >= min_rides)
+
+    total = db.session.query(func.count()).select_from(query.subquery()).scalar() or 0
+    rows = query.order_by(
+        score.desc() if descending else score.asc(), DriverStatsDaily.driver_id
+    ).limit(limit).offset(offset).all()
+
+    return [
+        dict({'rank': offset + position, 'driver_id': driver_id},
+             **_with_rates(dict(zip(DRIVER_MEASURES, [int(v or 0) for v in values]))))
+        for position, (driver_id, *values) in enumerate(rows, start=1)
+    ], total
@@ -0,0 +1,188 @@
+"""
+Versions des flux de courses (ETag et GET conditionnel)
+
+Les applications interrogent en boucle /rides/history et /drivers/rides. Chaque
+flux a un compteur de version incrémenté après chaque commit qui l'écrit :
+- user_rides (par client) : une course du client est créée / modifiée
+- pending_rides : une course en attente sans chauffeur apparaît ou disparaît
+- driver_profiles / drivers : fiche des chauffeurs affichée dans les courses
+
+L'ETag est calculé depuis ces compteurs, sans requête SQL : si le client
+renvoie le même (If-None-Match), la route répond 304 sans charger les courses.
+
+Les compteurs sont propres à chaque processus (comme services/response_cache.py) :
+l'ETag contient un identifiant du processus et une tranche de FEED_ETAG_TTL
+secondes, donc une écriture faite par un autre worker est vue au plus tard à
+la tranche suivante. La tranche couvre aussi les champs calculés depuis
+l'heure courante (estimated_arrival).
+
+    etag = feed_etag(FEED_USER_RIDES, user_id, projection, fields)
+    if is_not_modified(etag):
+        return not_modified(etag)
+    ...
+    return with_etag(jsonify(...), etag), 200
+"""
+import hashlib
+import os
+import time
+from datetime import datetime, timezone
+from threading import Lock
+from flask import current_app, request
+
+
+FEED_USER_RIDES = 'user_rides'
+FEED_PENDING_RIDES = 'pending_rides'
+DRIVER_PROFILES = 'driver_profiles'
+DRIVERS = 'drivers'
+
+# Colonnes du chauffeur renvoyées par la projection 'lite' (services/ride_serializer.py)
+DRIVER_PROFILE_FIELDS = (
+    'full_name', 'phone', 'car_make', 'car_model', 'car_color', 'license_plate', 'rating_average',
+)
+
+
+class FeedError(ValueError):
+    """Paramètre de flux invalide (since)"""
+    pass
+
+
+class FeedVersions:
+    """Compteurs de version par (flux, propriétaire)"""
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = Lock()
+        # Distingue les ETag de chaque processus (compteurs indépendants)
+        self.epoch = os.urandom(4).hex()
+
+    def get(self, feed, owner=None):
+        return self._versions.get((feed, owner), 0)
+
+    def bump(self, keys):
+        with self._lock:
+            for key in keys:
+                self._versions[key] = self._versions.get(key, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._versions.clear()
+
+
+_versions = FeedVersions()
+
+
+def get_feed_versions():
+    return _versions
+
+
+def feed_etag(feed, owner=None, projection=None, fields=(), extra=()):
+    """
+    ETag d'un flux pour la projection et les paramètres demandés
+
+    À calculer avant la requête des courses : une écriture commitée entre les
+    deux donne un ETag plus ancien que les données, jamais l'inverse.
+    """
+    ttl = current_app.config.get('FEED_ETAG_TTL', 30)
+    parts = [
+        _versions.epoch,
+        str(int(time.time() // ttl) if ttl else 0),
+        feed, str(owner), str(_versions.get(feed, owner)),
+        str(projection), ','.join(fields),
+    ]
+    if 'driver' in fields:
+        # 'lite' n'affiche que la fiche du chauffeur, les autres vues aussi sa position et son statut
+        dependency = DRIVER_PROFILES if projection == 'lite' else DRIVERS
+        parts.append(f'{dependency}:{_versions.get(dependency)}')
+    parts.extend(str(value) for value in extra)
+    return hashlib.blake2b('|'.join(parts).encode('utf-8'), digest_size=12).hexdigest()
+
+
+def is_not_modified(etag):
+    """Le client a déjà cette version (If-None-Match)"""
+    return request.if_none_match.contains_weak(etag)
+
+
+def _cache_headers(response, etag):
+    # ETag faible : le corps peut être compressé (services/response_compression.py)
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def not_modified(etag):
+    """Réponse 304 sans corps"""
+    return _cache_headers(current_app.response_class(status=304), etag)
+
+
+def with_etag(response, etag):
+    """Ajouter l'ETag du flux à une réponse 200"""
+    return _cache_headers(response, etag)
+
+
+def since_from_request():
+    """
+    Paramètre ?since= (ISO 8601) en datetime UTC naïf, None s'il est absent
+
+    Raises:
+        FeedError: date invalide
+    """
+    value = request.args.get('since')
+    if not value:
+        return None
+    try:
+        since = datetime.fromisoformat(value.strip().replace(' ', '+'))
+    except ValueError:
+        raise FeedError(f'Paramètre since invalide: {value} (format ISO 8601 attendu)')
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    return since
+
+
+def next_since(rides, since=None):
+    """
+    Valeur de since pour le prochain appel : dernier updated_at renvoyé
+
+    Le filtre updated_at >= since renvoie à nouveau les courses de cette date
+    (précision à la seconde en MySQL) : le client les remplace par leur id.
+    """
+    latest = max((ride.updated_at for ride in rides if ride.updated_at), default=since)
+    return latest.isoformat() if latest else None
+
+
+def _status_value(status):
+    return getattr(status, 'value', status)
+
+
+def _is_open(driver_id, status):
+    """Course visible dans le flux des chauffeurs (en attente, sans chauffeur)"""
+    return driver_id is None and _status_value(status) == 'pending'
+
+
+def _on_commit(changes):
+    from models.ride import Ride
+    from models.driver import Driver
+
+    keys = set()
+    for change in changes.get(Ride, ()):
+        for user_id in (change.values.get('user_id'), change.old('user_id')):
+            if user_id is not None:
+                keys.add((FEED_USER_RIDES, user_id))
+        opened = _is_open(change.values.get('driver_id'), change.values.get('status'))
+        was_open = change.action != 'insert' and _is_open(change.old('driver_id'), change.old('status'))
+        if opened or was_open:
+            keys.add((FEED_PENDING_RIDES, None))
+    for change in changes.get(Driver, ()):
+        keys.add((DRIVERS, None))
+        if any(change.changed(field) for field in DRIVER_PROFILE_FIELDS):
+            keys.add((DRIVER_PROFILES, None))
+    if keys:
+        _versions.bump(keys)
+
+
+def register_feed_version_hooks():
+    """Incrémenter les versions des flux à chaque commit qui écrit des courses ou des chauffeurs"""
+    from services import model_events
+    from models.ride import Ride
+    from models.driver import Driver
+
+    model_events.on_commit((Ride, Driver), _on_commit)
@@ -3,14 +3,22 @@ Service de géolocalisation
 """
 from geopy.distance import geodesic
 from config import Config
-import requests
+from services.http_client import get_http_client, ExternalServiceError
+from services.app_logging import get_logger
+
+logger = get_logger('geo')
 
 
 class GeolocationService:
     """Service pour les calculs de géolocalisation"""
     
+    # Budgets de latence (ms) des appels Google Maps
+    DIRECTIONS_BUDGET_MS = 1500
+    GEOCODE_BUDGET_MS = 1000
+    
     def __init__(self):
         self.google_api_key = Config.GOOGLE_MAPS_API_KEY
+        self.google_base_url = Config.GOOGLE_MAPS_BASE_URL.rstrip('/')
     
     def calculate_distance(self, lat1, lng1, lat2, lng2):
         """Calculer la distance entre deux points (en km)"""
@@ -33,21 +41,25 @@ class GeolocationService:
             return self.calculate_duration(lat1, lng1, lat2, lng2)
         
         try:
-            url = 'https://maps.googleapis.com/maps/api/directions/json'
+            url = f'{self.google_base_url}/maps/api/directions/json'
             params = {
                 'origin': f'{lat1},{lng1}',
                 'destination': f'{lat2},{lng2}',
                 'key': self.google_api_key,
                 'language': 'fr',
             }
-            response = requests.get(url, params=params, timeout=5)
-            data = response.json()
+            data = get_http_client('google_maps').get_json(
+                url, params=params, budget_ms=self.DIRECTIONS_BUDGET_MS
+            )
             
-            if data['status'] == 'OK' and data['routes']:
+            if data.get('status') == 'OK' and data.get('routes'):
                 duration_seconds = data['routes'][0]['legs'][0]['duration']['value']
                 return int(duration_seconds / 60)
-        except Exception:
-            pass
+            logger.warning('⚠️ [GEO] Directions API: statut %s', data.get('status'))
+        except ExternalServiceError as e:
+            logger.warning('⚠️ [GEO] Directions API indisponible, estimation locale: %s', e)
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            logger.warning('⚠️ [GEO] Réponse Directions API invalide: %s', e)
         
         # Fallback si l'API échoue
         distance_km = self.calculate_distance(lat1, lng1, lat2, lng2)
@@ -55,9 +67,19 @@ class GeolocationService:
     
     def get_address(self, lat, lng):
         """Obtenir l'adresse à partir des coordonnées (reverse geocoding)"""
-        if self.google_api_key:
-            return self._get_address_google(lat, lng)
-        return None
+        if Config.REVERSE_GEOCODING_PROVIDER == 'google' and self.google_api_key:
+            address = self._get_address_google(lat, lng)
+            if address:
+                return address
+        return self._get_address_offline(lat, lng)
+    
+    def _get_address_offline(self, lat, lng):
+        """Obtenir l'adresse avec le gazetteer local (sans appel réseau)"""
+        try:
+            from services.reverse_geocoding_service import get_offline_geocoder
+            return get_offline_geocoder().get_address(lat, lng)
+        except Exception:
+            return None
     
     def _get_address_google(self, lat, lng):
         """Obtenir l'adresse avec Google Geocoding API"""
@@ -65,19 +87,23 @@ class GeolocationService:
             return None
         
         try:
-            url = 'https://maps.googleapis.com/maps/api/geocode/json'
+            url = f'{self.google_base_url}/maps/api/geocode/json'
             params = {
                 'latlng': f'{lat},{lng}',
                 'key': self.google_api_key,
                 'language': 'fr',
             }
-            response = requests.get(url, params=params, timeout=5)
-            data = response.json()
+            data = get_http_client('google_maps').get_json(
+                url, params=params, budget_ms=self.GEOCODE_BUDGET_MS
+            )
             
-            if data['status'] == 'OK' and data['results']:
+            if data.get('status') == 'OK' and data.get('results'):
                 return data['results'][0]['formatted_address']
-        except Exception:
-            pass
+            logger.warning('⚠️ [GEO] Geocoding API: statut %s', data.get('status'))
+        except ExternalServiceError as e:
+            logger.warning('⚠️ [GEO] Geocoding API indisponible, repli hors ligne: %s', e)
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            logger.warning('⚠️ [GEO] Réponse Geocoding API invalide: %s', e)
         
         return None
 
@@ -0,0 +1,210 @@
+"""
+Client HTTP partagé pour les fournisseurs externes (Google Maps, ...)
+
+- une session `requests` par fournisseur (pool de connexions + keep-alive)
+- un disjoncteur (circuit breaker) qui coupe les appels vers un fournisseur en
+  échec et laisse l'appelant utiliser son repli immédiatement
+- un budget de latence par appel (tentatives comprises)
+- des requêtes « couvertes » (hedged) : une seconde tentative est lancée si la
+  première n'a pas répondu après un délai, la première réponse valide gagne
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from threading import Lock
+import requests
+from requests.adapters import HTTPAdapter
+from config import Config
+
+
+class ExternalServiceError(Exception):
+    """Erreur d'appel à un fournisseur externe"""
+    pass
+
+
+class CircuitOpenError(ExternalServiceError):
+    """Le disjoncteur est ouvert : le fournisseur n'est pas appelé"""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur à trois états :
+    - closed : les appels passent, les échecs consécutifs sont comptés
+    - open : les appels sont refusés pendant `reset_timeout` secondes
+    - half_open : un seul appel d'essai passe ; succès -> closed, échec -> open
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_progress = False
+        self._lock = Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow_request(self):
+        """Indiquer si un appel peut être tenté"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_in_progress = False
+            # half_open : un seul appel d'essai à la fois
+            if self._trial_in_progress:
+                return False
+            self._trial_in_progress = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_progress = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._trial_in_progress = False
+
+
+class ResilientHTTPClient:
+    """Client HTTP avec pool de connexions, disjoncteur, budget de latence et requêtes couvertes"""
+
+    # Délai de connexion maximal (secondes), indépendamment du budget
+    CONNECT_TIMEOUT = 1.0
+
+    def __init__(self, name, pool_size=None, budget_ms=None, hedge_after_ms=None,
+                 failure_threshold=None, reset_timeout=None):
+        """
+        Args:
+            name: Nom du fournisseur (logs)
+            pool_size: Nombre de connexions gardées ouvertes
+            budget_ms: Budget de latence par défaut d'un appel (ms)
+            hedge_after_ms: Délai avant la requête couverte (ms, 0 = désactivé)
+            failure_threshold: Échecs consécutifs avant ouverture du disjoncteur
+            reset_timeout: Durée d'ouverture du disjoncteur (secondes)
+        """
+        self.name = name
+        pool_size = pool_size or Config.EXTERNAL_HTTP_POOL_SIZE
+        self.budget_ms = budget_ms if budget_ms is not None else Config.EXTERNAL_HTTP_BUDGET_MS
+        self.hedge_after_ms = (
+            hedge_after_ms if hedge_after_ms is not None else Config.EXTERNAL_HTTP_HEDGE_AFTER_MS
+        )
+        self.breaker = CircuitBreaker(
+            failure_threshold=failure_threshold or Config.EXTERNAL_HTTP_FAILURE_THRESHOLD,
+            reset_timeout=reset_timeout or Config.EXTERNAL_HTTP_RESET_TIMEOUT,
+        )
+
+        self.session = requests.Session()
+        # Pas de retry automatique : les nouvelles tentatives passent par le budget et le hedging
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # Deux tentatives possibles par appel (principale + couverte)
+        self._executor = ThreadPoolExecutor(
+            max_workers=pool_size * 2, thread_name_prefix=f'http-{name}'
+        )
+
+    def _attempt(self, url, params, deadline):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise ExternalServiceError(f'{self.name}: budget de latence épuisé')
+        response = self.session.get(
+            url, params=params, timeout=(min(self.CONNECT_TIMEOUT, remaining), remaining)
+        )
+        if response.status_code >= 500 or response.status_code == 429:
+            raise ExternalServiceError(f'{self.name}: HTTP {response.status_code}')
+        response.raise_for_status()
+        return response.json()
+
+    def get_json(self, url, params=None, budget_ms=None, hedge_after_ms=None):
+        """
+        Effectuer un GET et retourner la réponse JSON
+
+        Args:
+            url: URL appelée
+            params: Paramètres de la requête
+            budget_ms: Budget de latence de l'appel (ms), tentatives comprises
+            hedge_after_ms: Délai avant la requête couverte (ms, 0 = désactivé)
+
+        Raises:
+            CircuitOpenError: si le disjoncteur est ouvert (aucun appel réseau)
+            ExternalServiceError: si l'appel échoue ou dépasse le budget
+        """
+        if not self.breaker.allow_request():
+            raise CircuitOpenError(f'{self.name}: disjoncteur ouvert')
+
+        budget_ms = budget_ms if budget_ms is not None else self.budget_ms
+        hedge_after_ms = hedge_after_ms if hedge_after_ms is not None else self.hedge_after_ms
+        deadline = time.monotonic() + budget_ms / 1000.0
+
+        pending = {self._executor.submit(self._attempt, url, params, deadline)}
+        hedged = not hedge_after_ms or hedge_after_ms >= budget_ms
+        last_error = None
+
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            wait_for = remaining if hedged else min(remaining, hedge_after_ms / 1000.0)
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                for other in pending:
+                    other.cancel()
+                self.breaker.record_success()
+                return result
+
+            # Lancer la requête couverte si la première tarde (ou a échoué rapidement)
+            if not hedged:
+                hedged = True
+                pending.add(self._executor.submit(self._attempt, url, params, deadline))
+
+        for future in pending:
+            future.cancel()
+        self.breaker.record_failure()
+        if last_error is None:
+            raise ExternalServiceError(f'{self.name}: budget de {budget_ms} ms dépassé')
+        if isinstance(last_error, ExternalServiceError):
+            raise last_error
+        raise ExternalServiceError(f'{self.name}: {last_error}') from last_error
+
+
+_clients = {}
+_clients_lock = Lock()
+
+
+def get_http_client(name):
+    """Obtenir le client partagé d'un fournisseur (créé au premier appel)"""
+    client = _clients.get(name)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        if name not in _clients:
+            _clients[name] = ResilientHTTPClient(name)
+        return _clients[name]
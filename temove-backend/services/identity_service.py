@@ -0,0 +1,192 @@
+"""
+Identité de l'utilisateur connecté sans requête par appel
+
+Les routes protégées chargeaient l'utilisateur puis son profil chauffeur
+(User.query.get + Driver.query.filter_by) à chaque appel, et
+_check_admin_access relisait l'utilisateur pour chaque route admin.
+
+- le token d'accès porte les claims role, is_admin et driver_id (identity_claims)
+- current_identity() les lit depuis le JWT déjà vérifié : aucune requête SQL
+- un commit qui change le rôle, le statut actif ou le profil chauffeur d'un
+  utilisateur publie la date du changement (services/token_revocation.py,
+  partagée entre les workers) : les claims des tokens émis avant ne sont
+  plus crus et l'identité est relue en base (une requête), puis gardée
+  IDENTITY_CACHE_TTL secondes dans un cache LRU (relue aussi si un autre
+  worker publie un changement plus récent)
+
+    identity = current_identity()
+    if not identity or not identity.is_driver:
+        return jsonify({"msg": "not a driver"}), 403
+    driver = db.session.get(Driver, identity.driver_id)
+"""
+import time
+from collections import OrderedDict
+from threading import Lock
+from flask import current_app, g
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from extensions import db
+from services.token_revocation import get_blocklist, token_issued_at
+
+
+MAX_ENTRIES = 10000
+
+# Claims ajoutés au token d'accès
+CLAIM_KEYS = ('role', 'is_admin', 'driver_id')
+
+# Colonnes de l'utilisateur qui changent son identité
+USER_IDENTITY_FIELDS = ('role', 'is_admin', 'is_active')
+
+
+class Identity:
+    """Utilisateur connecté : rôle, administrateur, profil chauffeur"""
+
+    __slots__ = ('id', 'role', 'is_admin', 'is_active', 'driver_id')
+
+    def __init__(self, id, role=None, is_admin=False, is_active=True, driver_id=None):
+        self.id = id
+        self.role = role
+        self.is_admin = bool(is_admin)
+        self.is_active = bool(is_active)
+        self.driver_id = driver_id
+
+    @property
+    def is_driver(self):
+        return self.driver_id is not None
+
+    def __repr__(self):
+        return f'<Identity {self.id} {self.role} driver={self.driver_id}>'
+
+
+class IdentityCache:
+    """Identités relues en base (LRU + TTL), avec leur date de lecture"""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        """(identité, date de lecture) ou None si absente ou expirée"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[2] <= time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def set(self, identity, loaded_at, ttl):
+        with self._lock:
+            self._entries[identity.id] = (identity, loaded_at, time.monotonic() + ttl)
+            self._entries.move_to_end(identity.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+_cache = IdentityCache()
+
+
+def get_identity_cache():
+    return _cache
+
+
+def _driver_id_for(user_id):
+    from models.driver import Driver
+    return db.session.query(Driver.id).filter(Driver.user_id == user_id).order_by(Driver.id).limit(1).scalar()
+
+
+def identity_claims(user, driver_id=None):
+    """Claims du token d'accès de `user` (profil chauffeur cherché si driver_id n'est pas fourni)"""
+    if driver_id is None:
+        driver_id = _driver_id_for(user.id)
+    return {
+        'role': user.role,
+        'is_admin': bool(getattr(user, 'is_admin', False)),
+        'driver_id': driver_id,
+    }
+
+
+def load_identity(user_id):
+    """Relire l'identité en base (une requête) et la mettre en cache"""
+    from models.user import User
+    from models.driver import Driver
+
+    loaded_at = time.time()
+    row = db.session.query(User.id, User.role, User.is_admin, User.is_active, Driver.id).outerjoin(
+        Driver, Driver.user_id == User.id
+    ).filter(User.id == user_id).order_by(Driver.id).first()
+    if row is None:
+        return None
+    identity = Identity(row[0], row[1], row[2], row[3], row[4])
+    _cache.set(identity, loaded_at, current_app.config.get('IDENTITY_CACHE_TTL', 60))
+    return identity
+
+
+def resolve_identity(user_id, claims):
+    """Identité depuis les claims du token, le cache ou la base"""
+    blocklist = get_blocklist()
+    cached = _cache.get(user_id)
+    if cached is not None and not blocklist.claims_changed_after(user_id, cached[1]):
+        return cached[0]
+    if all(key in claims for key in CLAIM_KEYS) and not blocklist.claims_changed_after(user_id, token_issued_at(claims)):
+        return Identity(user_id, claims['role'], claims['is_admin'], True, claims['driver_id'])
+    return load_identity(user_id)
+
+
+def current_identity():
+    """
+    Identité du JWT vérifié de la requête en cours (None si l'utilisateur n'existe plus)
+
+    À appeler après @jwt_required() / verify_jwt_in_request().
+    """
+    if 'identity' not in g:
+        user_id = get_jwt_identity()
+        user_id = int(user_id) if isinstance(user_id, str) else user_id
+        g.identity = resolve_identity(user_id, get_jwt())
+    return g.identity
+
+
+def _on_commit(changes):
+    from models.user import User
+    from models.driver import Driver
+
+    user_ids = set()
+    for change in changes.get(User, ()):
+        if change.action != 'insert' and any(change.changed(field) for field in USER_IDENTITY_FIELDS):
+            user_ids.add(change.values.get('id'))
+    for change in changes.get(Driver, ()):
+        if change.changed('user_id'):
+            user_ids.update((change.values.get('user_id'), change.old('user_id')))
+    user_ids.discard(None)
+    _cache.invalidate(user_ids)
+    for user_id in user_ids:
+        get_blocklist().mark_claims_changed(user_id)
+
+
+def register_identity_hooks():
+    """Invalider les identités à chaque commit qui change un rôle, un statut actif ou un profil chauffeur"""
+    from services import model_events
+    from models.user import User
+    from models.driver import Driver
+
+    model_events.on_commit((User, Driver), _on_commit)
@@ -0,0 +1,116 @@
+"""
+Encodeur JSON des réponses (jsonify)
+
+orjson quand il est installé (plusieurs fois plus rapide que json sur les
+listes de courses), sinon la bibliothèque standard. Les deux gèrent nativement :
+- datetime / date / time -> ISO 8601 (au lieu du format HTTP de Flask)
+- Enum -> valeur
+- Decimal, UUID -> texte
+- tableaux et scalaires numpy -> listes / nombres
+
+Les routes peuvent donc renvoyer directement les dates et énumérations sans
+.isoformat() ni .value. Choix de l'encodeur : JSON_BACKEND (auto, orjson, stdlib).
+
+Le temps d'encodage est noté dans g pour les métriques des réponses
+(services/response_compression.py).
+"""
+import dataclasses
+import json
+import time
+import uuid
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from enum import Enum
+from flask import g
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+JSON_BACKENDS = ('auto', 'orjson', 'stdlib')
+
+
+def _default(value):
+    """Types non gérés nativement par l'encodeur"""
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if hasattr(value, 'tolist'):  # numpy
+        return value.tolist()
+    if hasattr(value, '__html__'):  # markupsafe
+        return str(value.__html__())
+    raise TypeError(f'Objet de type {type(value).__name__} non sérialisable en JSON')
+
+
+class FastJSONProvider(JSONProvider):
+    """
+    JSONProvider de l'application (app.json)
+
+    Mêmes réglages que le provider par défaut de Flask : clés triées,
+    indentation en mode debug.
+    """
+
+    sort_keys = True
+    compact = None
+    mimetype = 'application/json'
+
+    def __init__(self, app, backend='auto'):
+        super().__init__(app)
+        if backend not in JSON_BACKENDS:
+            raise ValueError(f'JSON_BACKEND inconnu: {backend} (valeurs: {", ".join(JSON_BACKENDS)})')
+        if backend == 'orjson' and not ORJSON_AVAILABLE:
+            raise ImportError('orjson')
+        self.backend = 'orjson' if backend != 'stdlib' and ORJSON_AVAILABLE else 'stdlib'
+
+    def _indent(self):
+        return self.compact is False or (self.compact is None and self._app.debug)
+
+    def dumps_bytes(self, obj, **kwargs):
+        """Encoder en UTF-8 (sans passer par str avec orjson)"""
+        if self.backend == 'orjson' and not kwargs:
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if self._indent():
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=_default, option=option)
+        return self.dumps(obj, **kwargs).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if self.backend == 'orjson' and not kwargs:
+            return self.dumps_bytes(obj).decode('utf-8')
+        kwargs.setdefault('default', _default)
+        kwargs.setdefault('ensure_ascii', False)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        if self._indent():
+            kwargs.setdefault('indent', 2)
+        else:
+            kwargs.setdefault('separators', (',', ':'))
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.backend == 'orjson' and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        started = time.perf_counter()
+        data = self.dumps_bytes(obj) + b'\n'
+        g.json_encode_ms = g.get('json_encode_ms', 0.0) + (time.perf_counter() - started) * 1000
+        return self._app.response_class(data, mimetype=self.mimetype)
+
+
+def init_json_provider(app):
+    """Installer l'encodeur JSON_BACKEND sur l'application"""
+    app.json = FastJSONProvider(app, app.config.get('JSON_BACKEND', 'auto'))
+    return app.json
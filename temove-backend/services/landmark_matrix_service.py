@@ -0,0 +1,152 @@
+"""
+Service de matrice précalculée entre points de repère
+
+Les trajets entre points de repère (AIBD, Yoff, Sandaga, Monument, Gorée)
+sont très fréquents. La distance, la durée et le prix de base par mode sont
+calculés une seule fois au démarrage et stockés dans des tableaux compacts
+(`array`). Une estimation dont le départ et l'arrivée sont proches d'un point
+de repère est alors servie sans aucun calcul géographique.
+"""
+import math
+from array import array
+from threading import Lock
+from config import Config
+
+
+class LandmarkMatrix:
+    """Matrice distance / durée / prix de base entre points de repère"""
+
+    # Rayon (km) dans lequel une coordonnée est rattachée à un point de repère
+    SNAP_RADIUS_KM = 0.3
+
+    # Vitesse moyenne à Dakar (identique à PricingService.estimate_trip)
+    AVERAGE_SPEED_KMH = 30
+
+    # Nombre de km par degré de latitude
+    KM_PER_DEGREE = 111.32
+
+    def __init__(self, landmarks, pricing, fingerprint=None):
+        from services.geolocation_service import GeolocationService
+
+        geo = GeolocationService()
+        self.fingerprint = fingerprint
+        self.size = len(landmarks)
+        self.landmark_ids = [l['id'] for l in landmarks]
+        self.modes = [mode for mode in pricing if mode != 'base_fare']
+        self._mode_index = {mode: idx for idx, mode in enumerate(self.modes)}
+
+        # Boîtes de rattachement (en degrés) précalculées pour chaque point
+        self._snap_boxes = []
+        for landmark in landmarks:
+            lat = landmark['latitude']
+            lng = landmark['longitude']
+            dlat = self.SNAP_RADIUS_KM / self.KM_PER_DEGREE
+            dlng = self.SNAP_RADIUS_KM / (self.KM_PER_DEGREE * math.cos(math.radians(lat)))
+            self._snap_boxes.append((lat - dlat, lat + dlat, lng - dlng, lng + dlng))
+
+        n = self.size
+        base_fare = pricing['base_fare']
+        self.distances_km = array('d', [0.0]) * (n * n)
+        self.durations_minutes = array('H', [0]) * (n * n)
+        # Un tableau par mode, indexé par i * n + j
+        self.base_prices = [array('d', [0.0]) * (n * n) for _ in self.modes]
+
+        for i, origin in enumerate(landmarks):
+            for j, destination in enumerate(landmarks):
+                if i == j:
+                    distance_km = 0.0
+                else:
+                    distance_km = geo.calculate_distance(
+                        origin['latitude'], origin['longitude'],
+                        destination['latitude'], destination['longitude']
+                    )
+                cell = i * n + j
+                self.distances_km[cell] = distance_km
+                self.durations_minutes[cell] = int((distance_km / self.AVERAGE_SPEED_KMH) * 60)
+                for mode_idx, mode in enumerate(self.modes):
+                    self.base_prices[mode_idx][cell] = (distance_km * pricing[mode]) + base_fare
+
+    def snap(self, lat, lng):
+        """
+        Rattacher une coordonnée à un point de repère
+
+        Returns:
+            Index du point de repère, ou None si la coordonnée n'est proche d'aucun
+        """
+        for idx, (min_lat, max_lat, min_lng, max_lng) in enumerate(self._snap_boxes):
+            if min_lat <= lat <= max_lat and min_lng <= lng <= max_lng:
+                return idx
+        return None
+
+    def lookup(self, origin_idx, destination_idx, ride_mode):
+        """
+        Lire une cellule de la matrice
+
+        Returns:
+            dict avec distance_km, duration_minutes et base_price (sans surge),
+            ou None si le mode est inconnu
+        """
+        # Même repli que PricingService.calculate_base_price
+        mode_idx = self._mode_index.get(ride_mode, self._mode_index.get('confort'))
+        if mode_idx is None:
+            return None
+        cell = origin_idx * self.size + destination_idx
+        return {
+            'distance_km': self.distances_km[cell],
+            'duration_minutes': self.durations_minutes[cell],
+            'base_price': self.base_prices[mode_idx][cell],
+        }
+
+    def lookup_trip(self, pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, ride_mode):
+        """Chercher un trajet dans la matrice (None si départ ou arrivée hors points de repère)"""
+        origin_idx = self.snap(pickup_lat, pickup_lng)
+        if origin_idx is None:
+            return None
+        destination_idx = self.snap(dropoff_lat, dropoff_lng)
+        if destination_idx is None:
+            return None
+        result = self.lookup(origin_idx, destination_idx, ride_mode)
+        if result is not None:
+            result['pickup_landmark_id'] = self.landmark_ids[origin_idx]
+            result['dropoff_landmark_id'] = self.landmark_ids[destination_idx]
+        return result
+
+
+_matrix = None
+_matrix_lock = Lock()
+
+
+def _compute_fingerprint(landmarks, pricing):
+    """Empreinte des points de repère et de la tarification (change si l'un d'eux change)"""
+    return (
+        tuple((l['id'], l['latitude'], l['longitude']) for l in landmarks),
+        tuple(sorted(pricing.items())),
+    )
+
+
+def get_landmark_matrix():
+    """
+    Obtenir la matrice des points de repère
+
+    La matrice est reconstruite automatiquement si les points de repère
+    ou la tarification (Config.PRICING) ont changé depuis le dernier calcul.
+    """
+    global _matrix
+    from routes.landmarks import LANDMARKS
+
+    fingerprint = _compute_fingerprint(LANDMARKS, Config.PRICING)
+    matrix = _matrix
+    if matrix is not None and matrix.fingerprint == fingerprint:
+        return matrix
+
+    with _matrix_lock:
+        if _matrix is None or _matrix.fingerprint != fingerprint:
+            _matrix = LandmarkMatrix(LANDMARKS, Config.PRICING, fingerprint=fingerprint)
+        return _matrix
+
+
+def invalidate_landmark_matrix():
+    """Forcer la reconstruction de la matrice au prochain accès"""
+    global _matrix
+    with _matrix_lock:
+        _matrix = None
@@ -0,0 +1,183 @@
+"""
+Hooks d'écriture sur les modèles (courses, paiements, commissions, ...)
+
+Centralise la détection des écritures pour que les structures dérivées
+(rollups, caches, index) soient mises à jour sans modifier chaque route :
+
+- les handlers « flush » reçoivent la connexion de la transaction en cours et
+  écrivent dans la même transaction (annulés avec elle en cas de rollback)
+- les handlers « commit » sont appelés après le commit, pour les structures en
+  mémoire (cache, index) ; rien n'est appelé si la transaction est annulée
+
+Chaque changement est un `ModelChange` : modèle, action (insert/update/delete),
+valeurs des colonnes après écriture et anciennes valeurs des colonnes modifiées.
+"""
+from collections import defaultdict
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from services.app_logging import get_logger
+
+
+logger = get_logger('model_events')
+
+
+class ModelChange:
+    """Écriture d'une ligne détectée au flush"""
+
+    __slots__ = ('model', 'action', 'values', 'old_values')
+
+    def __init__(self, model, action, values, old_values):
+        self.model = model
+        self.action = action
+        self.values = values
+        self.old_values = old_values
+
+    def changed(self, key):
+        """Indiquer si une colonne a été modifiée (toujours vrai pour insert/delete)"""
+        return self.action != 'update' or key in self.old_values
+
+    def old(self, key):
+        """Valeur avant l'écriture (valeur actuelle si la colonne n'a pas changé)"""
+        if self.action == 'insert':
+            return None
+        return self.old_values.get(key, self.values.get(key))
+
+    def __repr__(self):
+        return f'<ModelChange {self.model.__name__} {self.action} {self.values.get("id")}>'
+
+
+_flush_handlers = []
+_commit_handlers = []
+_tracked_models = set()
+_installed = False
+
+_PENDING_KEY = 'model_events_pending'
+
+
+def _as_tuple(models):
+    return tuple(models) if isinstance(models, (list, tuple, set)) else (models,)
+
+
+def _noop_set(target, value, oldvalue, initiator):
+    return value
+
+
+def _track(models):
+    """
+    Suivre les modèles et charger l'ancienne valeur des colonnes modifiées
+
+    Après un commit, les attributs sont expirés : sans `active_history`, une
+    affectation ne garderait pas l'ancienne valeur (statut précédent, ...).
+    """
+    for model in models:
+        if model in _tracked_models:
+            continue
+        for attr in inspect(model).column_attrs:
+            event.listen(getattr(model, attr.key), 'set', _noop_set, active_history=True, retval=True)
+        _tracked_models.add(model)
+
+
+def on_flush(models, handler):
+    """
+    Enregistrer un handler transactionnel : handler(connection, changes)
+
+    `changes` est un dict {modèle: [ModelChange]} limité aux modèles demandés.
+    Appelé à chaque flush contenant des écritures sur l'un de ces modèles.
+    """
+    models = _as_tuple(models)
+    _flush_handlers.append((models, handler))
+    _track(models)
+    _install()
+
+
+def on_commit(models, handler):
+    """
+    Enregistrer un handler post-commit : handler(changes)
+
+    `changes` est un dict {modèle: [ModelChange]} cumulant tous les flush de la transaction.
+    """
+    models = _as_tuple(models)
+    _commit_handlers.append((models, handler))
+    _track(models)
+    _install()
+
+
+def _select(changes, models):
+    return {model: changes[model] for model in models if model in changes}
+
+
+def _snapshot(obj, action):
+    state = inspect(obj)
+    values = {}
+    old_values = {}
+    for attr in state.mapper.column_attrs:
+        key = attr.key
+        history = state.attrs[key].history
+        if history.added:
+            values[key] = history.added[0]
+        elif history.unchanged:
+            values[key] = history.unchanged[0]
+        else:
+            values[key] = state.dict.get(key)
+        if action == 'update' and history.deleted:
+            old_values[key] = history.deleted[0]
+    return ModelChange(type(obj), action, values, old_values)
+
+
+def _collect_changes(session):
+    changes = defaultdict(list)
+    for action, objects in (('insert', session.new), ('update', session.dirty), ('delete', session.deleted)):
+        for obj in objects:
+            if type(obj) not in _tracked_models:
+                continue
+            if action == 'update' and not session.is_modified(obj, include_collections=False):
+                continue
+            changes[type(obj)].append(_snapshot(obj, action))
+    return changes
+
+
+def _after_flush(session, flush_context):
+    changes = _collect_changes(session)
+    if not changes:
+        return
+
+    connection = None
+    for models, handler in _flush_handlers:
+        selected = _select(changes, models)
+        if selected:
+            connection = connection or session.connection()
+            handler(connection, selected)
+
+    if _commit_handlers:
+        pending = session.info.setdefault(_PENDING_KEY, defaultdict(list))
+        for model, model_changes in changes.items():
+            pending[model].extend(model_changes)
+
+
+def _after_commit(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    for models, handler in _commit_handlers:
+        selected = _select(pending, models)
+        if not selected:
+            continue
+        try:
+            handler(selected)
+        except Exception:
+            # Le commit est déjà fait : une structure dérivée en échec ne doit pas casser la requête
+            logger.exception('⚠️ [MODEL_EVENTS] Handler post-commit %s en échec', getattr(handler, '__name__', handler))
+
+
+def _after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _install():
+    global _installed
+    if _installed:
+        return
+    event.listen(Session, 'after_flush', _after_flush)
+    event.listen(Session, 'after_commit', _after_commit)
+    event.listen(Session, 'after_soft_rollback', lambda session, previous_transaction: _after_rollback(session))
+    _installed = True
@@ -0,0 +1,184 @@
+"""
+Pagination des listes admin
+
+Deux modes, choisis selon les paramètres de la requête :
+
+- curseur (`?cursor=...`) : pagination « keyset » sur (date, id) décroissants.
+  Chaque page est un simple parcours d'index à partir de la dernière ligne
+  de la page précédente : le temps de réponse ne dépend pas de la profondeur.
+- page (`?page=N`, mode historique) : LIMIT/OFFSET, conservé pour les clients
+  existants. Chaque réponse contient aussi `next_cursor` pour basculer.
+
+Le total est optionnel (`?count=exact|approx|none`) : un COUNT exact parcourt
+toutes les lignes filtrées ; `approx` lit les statistiques de la table (sans
+filtre) ou compte au plus APPROX_COUNT_CAP lignes.
+"""
+import base64
+import json
+import math
+from datetime import datetime
+from flask import request
+from sqlalchemy import and_, or_, func, select, text
+from extensions import db
+from services.app_logging import get_logger
+
+
+logger = get_logger('pagination')
+
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 100
+
+# Au-delà, le total approximatif est annoncé comme « au moins N »
+APPROX_COUNT_CAP = 10000
+
+COUNT_MODES = ('exact', 'approx', 'none')
+
+
+class PaginationError(ValueError):
+    """Paramètres de pagination invalides"""
+    pass
+
+
+# ----------------------------------------------------------------------
+# Curseurs
+# ----------------------------------------------------------------------
+
+def encode_cursor(sort_value, row_id):
+    """Curseur opaque (base64 URL) pointant après la ligne (sort_value, row_id)"""
+    payload = json.dumps({'v': sort_value.isoformat(), 'id': row_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Retourner (sort_value, row_id) depuis un curseur"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(payload['v']), int(payload['id'])
+    except (ValueError, KeyError, TypeError) as e:
+        raise PaginationError(f'Curseur invalide: {e}')
+
+
+# ----------------------------------------------------------------------
+# Totaux
+# ----------------------------------------------------------------------
+
+def _table_row_estimate(table_name):
+    """Nombre de lignes d'une table selon les statistiques du SGBD (None si indisponible)"""
+    dialect = db.engine.dialect.name
+    try:
+        if dialect in ('mysql', 'mariadb'):
+            return db.session.execute(text(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :name"
+            ), {'name': table_name}).scalar()
+        if dialect == 'postgresql':
+            estimate = db.session.execute(text(
+                "SELECT reltuples::bigint FROM pg_class WHERE relname = :name"
+            ), {'name': table_name}).scalar()
+            return estimate if estimate is not None and estimate >= 0 else None
+        if dialect == 'sqlite':
+            # Les id sont croissants : max(rowid) est lu directement dans le B-tree
+            return db.session.execute(text(f'SELECT max(rowid) FROM "{table_name}"')).scalar() or 0
+    except Exception as e:
+        logger.warning('⚠️ [PAGINATION] Estimation du nombre de lignes de %s impossible: %s', table_name, e)
+    return None
+
+
+def count_rows(query, mode):
+    """
+    Compter les lignes d'une requête
+
+    Returns:
+        (total, is_estimate) ; total vaut None en mode 'none'
+    """
+    if mode == 'none':
+        return None, False
+
+    counted = query.order_by(None)
+    if mode == 'exact':
+        return counted.count(), False
+
+    # Sans filtre, les statistiques de la table suffisent
+    entity = query.column_descriptions[0]['entity']
+    if query.whereclause is None:
+        estimate = _table_row_estimate(entity.__tablename__)
+        if estimate is not None:
+            return int(estimate), True
+
+    # Avec filtre : compter au plus APPROX_COUNT_CAP + 1 lignes
+    capped = counted.with_entities(entity.id).limit(APPROX_COUNT_CAP + 1).subquery()
+    total = db.session.execute(select(func.count()).select_from(capped)).scalar()
+    if total > APPROX_COUNT_CAP:
+        return APPROX_COUNT_CAP, True
+    return total, False
+
+
+# ----------------------------------------------------------------------
+# Pagination
+# ----------------------------------------------------------------------
+
+def paginate_query(query, sort_column, id_column, exact_total=None):
+    """
+    Paginer une requête triée par (sort_column, id_column) décroissants
+
+    Lit les paramètres `cursor`, `page`, `per_page` et `count` de la requête HTTP.
+    `exact_total` : total déjà connu (table d'agrégats, ...), évite le COUNT.
+
+    Returns:
+        (items, pagination) où pagination est le dict à renvoyer au client
+
+    Raises:
+        PaginationError: si un paramètre est invalide
+    """
+    per_page = request.args.get('per_page', DEFAULT_PER_PAGE, type=int)
+    per_page = max(1, min(per_page, MAX_PER_PAGE))
+    cursor = request.args.get('cursor')
+    page = request.args.get('page', type=int)
+
+    # Mode historique par défaut : total exact uniquement si le client pagine par numéro de page
+    default_count = 'none' if cursor is not None else 'exact'
+    count_mode = request.args.get('count', default_count)
+    if count_mode not in COUNT_MODES:
+        raise PaginationError(f'count invalide: {count_mode} (valeurs: {", ".join(COUNT_MODES)})')
+
+    if exact_total is not None and count_mode != 'none':
+        total, is_estimate = exact_total, False
+    else:
+        total, is_estimate = count_rows(query, count_mode)
+    ordered = query.order_by(sort_column.desc(), id_column.desc())
+
+    if cursor is not None:
+        if cursor:
+            sort_value, row_id = decode_cursor(cursor)
+            # La borne `sort_column <= sort_value` permet au SGBD de démarrer le parcours d'index
+            # directement au curseur (l'OR seul n'est pas toujours transformé en intervalle)
+            ordered = ordered.filter(and_(
+                sort_column <= sort_value,
+                or_(sort_column < sort_value, id_column < row_id)
+            ))
+        rows = ordered.limit(per_page + 1).all()
+        offset = None
+    else:
+        page = max(page or 1, 1)
+        offset = (page - 1) * per_page
+        rows = ordered.offset(offset).limit(per_page + 1).all()
+
+    has_more = len(rows) > per_page
+    items = rows[:per_page]
+    next_cursor = None
+    if has_more:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+
+    pagination = {
+        'per_page': per_page,
+        'total': total,
+        'total_is_estimate': is_estimate,
+        'has_more': has_more,
+        'next_cursor': next_cursor,
+    }
+    if offset is not None:
+        pagination['page'] = page
+        pagination['pages'] = math.ceil(total / per_page) if total is not None else None
+    return items, pagination
@@ -0,0 +1,200 @@
+"""
+Hachage des mots de passe (bcrypt) dans un pool de threads borné
+
+/auth/login et /auth/register calculaient bcrypt dans le thread de la
+requête : lors d'un pic de connexions (le matin) ou d'une vague de
+credential stuffing, toutes les requêtes hachaient en même temps et les
+réservations attendaient le CPU.
+
+- PASSWORD_HASH_WORKERS threads dédiés (bcrypt libère le GIL) : au plus
+  autant de hachages simultanés par processus, le reste du CPU reste aux
+  autres routes (0 = dans le thread de la requête, comportement d'origine)
+- file bornée (PASSWORD_HASH_QUEUE_SIZE) : au-delà, refus immédiat en 429
+  avec Retry-After au lieu d'empiler les requêtes
+- attente bornée (PASSWORD_HASH_TIMEOUT_MS) : 503 si le hachage n'a pas
+  commencé à temps
+- coût configurable (BCRYPT_LOG_ROUNDS) : un hash d'un autre coût est
+  recalculé à la connexion suivante (upgrade_password_hash)
+
+    user.set_password(password)      # hash_password
+    user.check_password(password)    # verify_password
+"""
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from threading import BoundedSemaphore, Lock
+from flask import current_app, has_app_context, jsonify
+from flask_bcrypt import generate_password_hash, check_password_hash
+
+
+DEFAULT_ROUNDS = 12
+RETRY_AFTER_SECONDS = 1
+
+
+class PasswordHashError(Exception):
+    """Hachage refusé (pool saturé) : réponse HTTP status_code avec Retry-After"""
+
+    status_code = 503
+
+    def __init__(self, message, retry_after=RETRY_AFTER_SECONDS):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class PasswordHashBusy(PasswordHashError):
+    """File d'attente pleine"""
+
+    status_code = 429
+
+
+class PasswordHashTimeout(PasswordHashError):
+    """Hachage non commencé dans le délai"""
+
+    status_code = 503
+
+
+def hash_rounds(password_hash):
+    """Coût d'un hash bcrypt ($2b$12$...), None s'il n'est pas lisible"""
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """Pool de threads bcrypt avec file d'attente et attente bornées"""
+
+    def __init__(self, workers=1, queue_size=4, timeout_ms=2000, rounds=DEFAULT_ROUNDS):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout_ms / 1000
+        self.rounds = rounds
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='bcrypt') if workers > 0 else None
+        # Hachages en cours + en attente
+        self._slots = BoundedSemaphore(workers + queue_size) if workers > 0 else None
+        self._lock = Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def _count(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def _release(self, future):
+        self._slots.release()
+        self._count(_in_flight=-1, completed=0 if future.cancelled() else 1)
+
+    def _run(self, fn, *args):
+        if self._executor is None:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            self._count(rejected=1)
+            raise PasswordHashBusy('Trop de connexions en cours, réessayez dans un instant')
+        self._count(_in_flight=1)
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # Retiré de la file s'il n'a pas commencé ; commencé, il est attendu (travail non perdu)
+            if not future.cancel():
+                return future.result()
+            self._count(timeouts=1)
+            raise PasswordHashTimeout('Service de connexion surchargé, réessayez dans un instant')
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.rounds).decode('utf-8')
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        return hash_rounds(password_hash) != self.rounds
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queue_size': self.queue_size,
+                'rounds': self.rounds,
+                'in_flight': self._in_flight,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+            }
+
+
+_hasher = None
+
+
+def _create_hasher(config):
+    return PasswordHasher(
+        workers=config.get('PASSWORD_HASH_WORKERS', 1),
+        queue_size=config.get('PASSWORD_HASH_QUEUE_SIZE', 4),
+        timeout_ms=config.get('PASSWORD_HASH_TIMEOUT_MS', 2000),
+        rounds=config.get('BCRYPT_LOG_ROUNDS', DEFAULT_ROUNDS),
+    )
+
+
+def get_password_hasher():
+    """Pool configuré par init_password_hasher (créé depuis la configuration sinon)"""
+    global _hasher
+    if _hasher is None:
+        _hasher = _create_hasher(current_app.config if has_app_context() else {})
+    return _hasher
+
+
+def hash_password(password):
+    return get_password_hasher().hash(password)
+
+
+def verify_password(password_hash, password):
+    return get_password_hasher().verify(password_hash, password)
+
+
+def upgrade_password_hash(user, password):
+    """
+    Recalculer le hash au coût configuré après une connexion réussie
+
+    Sans effet si le coût est déjà le bon ; ignoré si le pool est saturé
+    (le hash sera recalculé à une prochaine connexion).
+    """
+    from extensions import db
+
+    hasher = get_password_hasher()
+    if not hasher.needs_rehash(user.password_hash):
+        return False
+    try:
+        user.password_hash = hasher.hash(password)
+    except PasswordHashError:
+        return False
+    db.session.commit()
+    return True
+
+
+def _handle_password_hash_error(error):
+    response = jsonify({'error': str(error)})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, error.status_code
+
+
+def init_password_hasher(app):
+    """
+    Créer le pool depuis la configuration et répondre 429/503 quand il est saturé
+
+    Peut être rappelé après un changement de configuration : le pool précédent est arrêté.
+    """
+    global _hasher
+    if _hasher is not None:
+        _hasher.shutdown()
+    _hasher = _create_hasher(app.config)
+    if not app.extensions.get('password_hasher'):
+        app.register_error_handler(PasswordHashError, _handle_password_hash_error)
+        app.extensions['password_hasher'] = True
+    return _hasher
+
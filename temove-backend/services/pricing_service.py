@@ -52,8 +52,27 @@ class PricingService:
             'final_price': final_price,
         }
     
-    def estimate_trip(self, pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, ride_mode='confort'):
-        """Estimer un trajet complet"""
+    def estimate_trip(self, pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, ride_mode='confort', timestamp=None):
+        """
+        Estimer un trajet complet
+
+        Utilisé par l'estimation et par la réservation (même distance, même prix) ;
+        `timestamp` : heure de la course pour la majoration (maintenant par défaut).
+        """
+        timestamp = timestamp or datetime.utcnow()
+
+        # Trajet entre deux points de repère : réponse directe depuis la matrice
+        landmark_trip = self._lookup_landmark_trip(
+            pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, ride_mode
+        )
+        if landmark_trip:
+            return self._build_estimate(
+                landmark_trip['distance_km'],
+                landmark_trip['duration_minutes'],
+                landmark_trip['base_price'],
+                timestamp
+            )
+        
         from services.geolocation_service import GeolocationService
         
         geo = GeolocationService()
@@ -68,19 +87,36 @@ class PricingService:
         duration_minutes = int((distance_km / 30) * 60)
         
         # Calculer le prix
-        timestamp = datetime.utcnow()
-        pricing = self.calculate_final_price(distance_km, ride_mode, timestamp)
+        base_price = self.calculate_base_price(distance_km, ride_mode)
+        
+        return self._build_estimate(distance_km, duration_minutes, base_price, timestamp)
+    
+    def _build_estimate(self, distance_km, duration_minutes, base_price, timestamp):
+        """Construire la réponse d'estimation à partir du prix de base (sans surge)"""
+        surge_multiplier = self.calculate_surge_multiplier(timestamp)
         
         return {
             'distance_km': round(distance_km, 2),
             'duration_minutes': duration_minutes,
-            'base_price': pricing['base_price'],
-            'surge_multiplier': pricing['surge_multiplier'],
-            'final_price': pricing['final_price'],
+            'base_price': int(base_price),
+            'surge_multiplier': surge_multiplier,
+            'final_price': int(base_price * surge_multiplier),
             'formatted_distance': self._format_distance(distance_km),
             'formatted_duration': self._format_duration(duration_minutes),
         }
     
+    @staticmethod
+    def _lookup_landmark_trip(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, ride_mode):
+        """Chercher le trajet dans la matrice des points de repère (None si hors matrice)"""
+        try:
+            from services.landmark_matrix_service import get_landmark_matrix
+            return get_landmark_matrix().lookup_trip(
+                pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, ride_mode
+            )
+        except Exception:
+            # La matrice n'est qu'un raccourci : en cas de problème, calcul classique
+            return None
+    
     @staticmethod
     def _format_distance(km):
         """Formatter la distance"""
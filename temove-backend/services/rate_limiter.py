@@ -0,0 +1,282 @@
+"""
+Limitation de débit par seau à jetons (token bucket)
+
+Un client qui boucle sur /rides/estimate, /rides/book, /auth/login ou
+/auth/request-otp occupait les workers sans limite. Chaque politique
+(RATE_LIMITS) donne `limit` requêtes par `period` secondes, par clé :
+- 'ip' : adresse du client (routes sans authentification)
+- 'user' : utilisateur du JWT vérifié (adresse IP sinon)
+- 'driver' : profil chauffeur du JWT (services/identity_service.py), utilisateur sinon
+
+Le seau contient au plus `limit` jetons et se remplit de limit/period
+jetons par seconde : les rafales courtes passent, le débit soutenu est
+borné. Au-delà : 429 avec Retry-After (secondes avant le prochain jeton).
+
+Stores (RATE_LIMIT_STORE) :
+- 'memory' : seaux du processus (chaque worker a sa limite) ; sert aussi de
+  remplaçant local du store partagé pour les tests
+- 'redis' : seaux partagés entre les workers (script Lua atomique, REDIS_URL) ;
+  en cas d'erreur Redis la requête passe (pas de panne du service)
+
+    @auth_bp.route('/login', methods=['POST'])
+    @rate_limit('auth_login')
+    def login(): ...
+
+    # Routes qui vérifient le JWT dans la vue : après verify_jwt_in_request()
+    limited = check_rate_limit('ride_book')
+    if limited:
+        return limited
+
+Une politique absente de RATE_LIMITS n'est pas limitée.
+"""
+import heapq
+import math
+import time
+from functools import wraps
+from threading import Lock
+from flask import jsonify, request
+from services.app_logging import get_logger
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+KEY_TYPES = ('ip', 'user', 'driver')
+MAX_BUCKETS = 100000
+# Part des seaux libérée quand MAX_BUCKETS est atteint sans seau plein
+PRUNE_FRACTION = 0.1
+REDIS_PREFIX = 'temove:ratelimit:'
+
+# Seau à jetons atomique côté Redis (horloge du serveur, identique pour tous les workers)
+_REDIS_TAKE = """
+local limit = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+if tokens == nil then
+    tokens = limit
+else
+    tokens = math.min(limit, tokens + (now - tonumber(bucket[2])) * rate)
+end
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((limit - tokens) / rate * 1000) + 1000)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RateLimitError(ValueError):
+    """Politique de limitation invalide"""
+
+
+class Policy:
+    """`limit` requêtes par `period` secondes et par clé"""
+
+    __slots__ = ('name', 'limit', 'period', 'key', 'rate')
+
+    def __init__(self, name, limit, period, key='user'):
+        if key not in KEY_TYPES:
+            raise RateLimitError(f"Clé de limitation inconnue pour {name}: {key} (attendu: {', '.join(KEY_TYPES)})")
+        if limit < 1 or period <= 0:
+            raise RateLimitError(f"Limite invalide pour {name}: {limit} / {period} s")
+        self.name = name
+        self.limit = limit
+        self.period = period
+        self.key = key
+        self.rate = limit / period
+
+
+class MemoryBucketStore:
+    """Seaux du processus : (jetons, date, date où le seau est plein)"""
+
+    def __init__(self, max_buckets=MAX_BUCKETS):
+        self.max_buckets = max_buckets
+        self._buckets = {}
+        self._lock = Lock()
+
+    def take(self, key, limit, rate):
+        """Prendre un jeton : (autorisé, secondes avant le prochain jeton, jetons restants)"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_buckets:
+                    self._prune(now)
+                tokens = limit
+            else:
+                tokens = min(limit, bucket[0] + (now - bucket[1]) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now, now + (limit - tokens) / rate)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate, tokens
+
+    def _prune(self, now):
+        # Un seau de nouveau plein équivaut à un seau absent
+        full = [key for key, bucket in self._buckets.items() if bucket[2] <= now]
+        for key in full:
+            del self._buckets[key]
+        if full:
+            return
+        # Sinon, oublier les seaux les plus proches d'être pleins : une clé
+        # bloquée (seau vide) garde sa limite, même sous un flot de clés nouvelles
+        evicted = heapq.nsmallest(
+            max(1, int(self.max_buckets * PRUNE_FRACTION)), self._buckets.items(), key=lambda item: item[1][2]
+        )
+        for key, _ in evicted:
+            del self._buckets[key]
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class RedisBucketStore:
+    """Seaux partagés entre les workers"""
+
+    def __init__(self, url, prefix=REDIS_PREFIX):
+        self.client = redis.Redis.from_url(url, socket_timeout=0.05)
+        self.prefix = prefix
+        self._take = self.client.register_script(_REDIS_TAKE)
+
+    def take(self, key, limit, rate):
+        try:
+            allowed, tokens = self._take(keys=[self.prefix + key], args=[limit, rate])
+        except redis.RedisError:
+            return True, 0.0, 0.0
+        tokens = float(tokens)
+        return bool(allowed), 0.0 if allowed else (1 - tokens) / rate, tokens
+
+    def clear(self):
+        for key in self.client.scan_iter(f'{self.prefix}*'):
+            self.client.delete(key)
+
+
+class RateLimiter:
+    """Politiques par nom et store des seaux"""
+
+    def __init__(self, store=None, policies=None, enabled=True):
+        self.store = store or MemoryBucketStore()
+        self.policies = policies or {}
+        self.enabled = enabled
+        self.allowed = {}
+        self.limited = {}
+
+    def hit(self, policy, key):
+        """Compter une requête : (autorisée, secondes avant le prochain jeton, jetons restants)"""
+        allowed, retry_after, remaining = self.store.take(f'{policy.name}:{key}', policy.limit, policy.rate)
+        counters = self.allowed if allowed else self.limited
+        counters[policy.name] = counters.get(policy.name, 0) + 1
+        return allowed, retry_after, remaining
+
+    def stats(self):
+        return {
+            'store': type(self.store).__name__,
+            'enabled': self.enabled,
+            'policies': {
+                name: {
+                    'limit': policy.limit,
+                    'period': policy.period,
+                    'key': policy.key,
+                    'allowed': self.allowed.get(name, 0),
+                    'limited': self.limited.get(name, 0),
+                }
+                for name, policy in self.policies.items()
+            },
+        }
+
+
+_limiter = RateLimiter()
+
+
+def get_rate_limiter():
+    return _limiter
+
+
+def _client_ip():
+    return request.remote_addr or 'unknown'
+
+
+def _request_key(kind):
+    """Clé du client pour la requête en cours (JWT déjà vérifié pour 'user' / 'driver')"""
+    if kind == 'ip':
+        return 'ip:' + _client_ip()
+    from flask_jwt_extended import get_jwt_identity
+    try:
+        user_id = get_jwt_identity()
+    except RuntimeError:
+        # JWT non vérifié pour cette requête
+        user_id = None
+    if user_id is None:
+        return 'ip:' + _client_ip()
+    if kind == 'driver':
+        from services.identity_service import current_identity
+        identity = current_identity()
+        if identity is not None and identity.is_driver:
+            return f'driver:{identity.driver_id}'
+    return f'user:{user_id}'
+
+
+def _too_many_requests(policy, retry_after):
+    seconds = max(1, math.ceil(retry_after))
+    response = jsonify({
+        'error': f'Trop de requêtes, réessayez dans {seconds} s',
+        'retry_after': seconds,
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(seconds)
+    response.headers['X-RateLimit-Limit'] = f'{policy.limit};w={policy.period:g}'
+    response.headers['X-RateLimit-Remaining'] = '0'
+    return response
+
+
+def check_rate_limit(name):
+    """Réponse 429 si la requête en cours dépasse la politique `name`, None sinon"""
+    limiter = _limiter
+    policy = limiter.policies.get(name)
+    if policy is None or not limiter.enabled:
+        return None
+    allowed, retry_after, _ = limiter.hit(policy, _request_key(policy.key))
+    return None if allowed else _too_many_requests(policy, retry_after)
+
+
+def rate_limit(name):
+    """Décorateur : appliquer la politique `name` avant la vue (sous @jwt_required() pour 'user' / 'driver')"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            limited = check_rate_limit(name)
+            if limited is not None:
+                return limited
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def init_rate_limiter(app):
+    """Configurer les politiques et le store depuis la configuration"""
+    global _limiter
+    config = app.config
+    policies = {
+        name: Policy(name, spec['limit'], spec['period'], spec.get('key', 'user'))
+        for name, spec in (config.get('RATE_LIMITS') or {}).items()
+    }
+    backend = config.get('RATE_LIMIT_STORE', 'memory')
+    if backend == 'redis' and not REDIS_AVAILABLE:
+        get_logger('rate_limit').warning('⚠️ redis non installé - limites de débit par processus (pip install redis)')
+        backend = 'memory'
+    store = RedisBucketStore(config['REDIS_URL']) if backend == 'redis' else MemoryBucketStore()
+    _limiter = RateLimiter(store, policies, config.get('RATE_LIMIT_ENABLED', True))
+    return _limiter
@@ -0,0 +1,313 @@
+"""
+Export des rapports admin en flux (CSV / Excel)
+
+Les lignes sont lues par lots (pagination keyset sur (date, id) décroissants,
+colonnes uniquement, sans objets ORM) et écrites au fur et à mesure :
+
+- CSV : chaque lot est encodé puis envoyé au client (réponse en flux)
+- Excel : classeur openpyxl en mode write-only, écrit dans un fichier
+  temporaire puis envoyé par morceaux
+
+La mémoire utilisée ne dépend pas du nombre de lignes : un export de plusieurs
+millions de courses n'est plus tronqué à 1000 lignes. Les colonnes sont celles
+des rapports existants (ReportService.prepare_*_data).
+"""
+import csv
+import io
+import tempfile
+from datetime import datetime
+from enum import Enum
+from sqlalchemy import and_, or_, func, select
+from extensions import db
+from models.user import User
+from models.ride import Ride
+from models.driver import Driver
+from models.commission import Commission
+from models.payment import Payment
+
+try:
+    from openpyxl import Workbook
+    from openpyxl.utils import get_column_letter
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+
+DEFAULT_BATCH_SIZE = 5000
+
+# Lignes par feuille Excel (limite du format, en-tête compris)
+XLSX_MAX_ROWS = 1048576
+
+EXPORT_FORMATS = {
+    'csv': ('csv', 'text/csv; charset=utf-8'),
+    'excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+REPORT_TITLES = {
+    'revenue': 'Rapport des Revenus',
+    'rides': 'Rapport des Courses',
+    'drivers': 'Rapport des Conducteurs',
+    'users': 'Rapport des Utilisateurs',
+    'commissions': 'Rapport des Commissions',
+    'payments': 'Rapport des Paiements',
+}
+
+REPORT_COLUMNS = {
+    'revenue': ['Date', 'Revenus (XOF)', 'Nombre de courses'],
+    'rides': ['ID', 'Client', 'Chauffeur', 'Départ', 'Destination', 'Distance (km)', 'Prix (XOF)', 'Statut', 'Date'],
+    'drivers': ['ID', 'Nom', 'Email', 'Téléphone', 'Plaque', 'Véhicule', 'Note', 'Courses', 'Statut'],
+    'users': ['ID', 'Nom', 'Email', 'Téléphone', 'Courses', 'Statut', 'Date d\'inscription'],
+    'commissions': ['ID', 'Chauffeur', 'Course ID', 'Prix course (XOF)', 'Commission (XOF)', 'Taux (%)',
+                    'Statut', 'Date', 'Payée le'],
+    'payments': ['ID', 'Course ID', 'Montant (XOF)', 'Méthode', 'Statut', 'Date'],
+}
+
+
+class ReportExportError(ValueError):
+    """Type de rapport ou format d'export invalide"""
+    pass
+
+
+def _cell(value):
+    """Valeur d'une cellule : énumérations et dates en texte, None en vide"""
+    if value is None:
+        return ''
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+# ----------------------------------------------------------------------
+# Lecture par lots
+# ----------------------------------------------------------------------
+
+def _keyset_batches(stmt, sort_column, id_column, start, end, batch_size, key):
+    """
+    Parcourir une requête par lots triés par (sort_column, id_column) décroissants
+
+    Chaque lot reprend après la dernière ligne du précédent (même prédicat que
+    la pagination par curseur des listes admin) : pas d'OFFSET, pas de curseur
+    serveur gardé ouvert entre deux lots. `key(row)` renvoie (date, id) d'une ligne.
+    """
+    stmt = stmt.where(sort_column >= start, sort_column <= end).order_by(
+        sort_column.desc(), id_column.desc()
+    ).limit(batch_size)
+    last = None
+    while True:
+        batch_stmt = stmt
+        if last is not None:
+            batch_stmt = stmt.where(and_(
+                sort_column <= last[0],
+                or_(sort_column < last[0], id_column < last[1])
+            ))
+        rows = db.session.execute(batch_stmt).all()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < batch_size:
+            return
+        last = key(rows[-1])
+
+
+def _rides_batches(start, end, batch_size):
+    client = User.__table__.alias('client')
+    stmt = select(
+        Ride.id, client.c.full_name, Driver.full_name, Ride.pickup_address, Ride.dropoff_address,
+        Ride.distance_km, Ride.final_price, Ride.status, Ride.requested_at
+    ).select_from(Ride).outerjoin(client, client.c.id == Ride.user_id).outerjoin(Driver, Driver.id == Ride.driver_id)
+    yield from _keyset_batches(stmt, Ride.requested_at, Ride.id, start, end, batch_size,
+                               key=lambda row: (row[8], row[0]))
+
+
+def _drivers_batches(start, end, batch_size):
+    stmt = select(
+        Driver.id, Driver.full_name, Driver.email, Driver.phone, Driver.license_plate,
+        Driver.car_make, Driver.car_model, Driver.rating_average, Driver.total_rides, Driver.status,
+        Driver.created_at
+    )
+    for rows in _keyset_batches(stmt, Driver.created_at, Driver.id, start, end, batch_size,
+                                key=lambda row: (row[10], row[0])):
+        yield [
+            (d_id, name, email, phone, plate, f"{make or ''} {model or ''}".strip(), rating, total, status)
+            for d_id, name, email, phone, plate, make, model, rating, total, status, _ in rows
+        ]
+
+
+def _users_batches(start, end, batch_size):
+    stmt = select(
+        User.id, User.full_name, User.email, User.phone, User.is_active, User.created_at
+    )
+    for rows in _keyset_batches(stmt, User.created_at, User.id, start, end, batch_size,
+                                key=lambda row: (row[5], row[0])):
+        # Nombre de courses des utilisateurs du lot en une requête (index rides.user_id)
+        ride_counts = dict(db.session.execute(
+            select(Ride.user_id, func.count(Ride.id))
+            .where(Ride.user_id.in_([row[0] for row in rows]))
+            .group_by(Ride.user_id)
+        ).all())
+        yield [
+            (u_id, name, email, phone, ride_counts.get(u_id, 0), 'Actif' if is_active else 'Inactif', created_at)
+            for u_id, name, email, phone, is_active, created_at in rows
+        ]
+
+
+def _commissions_batches(start, end, batch_size):
+    stmt = select(
+        Commission.id, Driver.full_name, Commission.ride_id, Commission.ride_price,
+        Commission.platform_commission, Commission.commission_rate, Commission.status,
+        Commission.created_at, Commission.paid_at
+    ).select_from(Commission).outerjoin(Driver, Driver.id == Commission.driver_id)
+    yield from _keyset_batches(stmt, Commission.created_at, Commission.id, start, end, batch_size,
+                               key=lambda row: (row[7], row[0]))
+
+
+def _payments_batches(start, end, batch_size):
+    stmt = select(
+        Payment.id, Payment.ride_id, Payment.amount, Payment.method, Payment.status, Payment.created_at
+    )
+    yield from _keyset_batches(stmt, Payment.created_at, Payment.id, start, end, batch_size,
+                               key=lambda row: (row[5], row[0]))
+
+
+def _revenue_batches(start, end, batch_size):
+    """Revenus des courses terminées par jour (séries de l'analytique : rollups ou un GROUP BY)"""
+    from services.analytics_service import time_series
+
+    if start >= end:
+        return
+    amounts = time_series('gmv', 'day', start, end, statuses=['completed'])
+    counts = time_series('rides', 'day', start, end, statuses=['completed'])
+    yield [
+        (amount['bucket_start'].date().isoformat(), amount['value'], count['value'])
+        for amount, count in zip(amounts, counts) if count['value']
+    ]
+
+
+_BATCHES = {
+    'revenue': _revenue_batches,
+    'rides': _rides_batches,
+    'drivers': _drivers_batches,
+    'users': _users_batches,
+    'commissions': _commissions_batches,
+    'payments': _payments_batches,
+}
+
+
+def iter_report_batches(report_type, start, end, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Lignes d'un rapport par lots (listes de tuples dans l'ordre de REPORT_COLUMNS)
+
+    Raises:
+        ReportExportError: si le type de rapport est inconnu
+    """
+    if report_type not in _BATCHES:
+        raise ReportExportError(f'Type de rapport inconnu: {report_type} (valeurs: {", ".join(_BATCHES)})')
+    for rows in _BATCHES[report_type](start, end, batch_size):
+        yield [[_cell(value) for value in row] for row in rows]
+
+
+# ----------------------------------------------------------------------
+# Écriture
+# ----------------------------------------------------------------------
+
+def export_filename(report_type, start, end, format_type):
+    """Nom du fichier exporté (même convention que ReportService)"""
+    extension = EXPORT_FORMATS[format_type][0]
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return f"{report_type}_{start.strftime('%Y%m%d')}_{end.strftime('%Y%m%d')}_{timestamp}.{extension}"
+
+
+def _csv_chunks(report_type, start, end, batch_size):
+    """Morceaux (bytes, nombre de lignes) d'un rapport CSV : l'en-tête puis un morceau par lot"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(REPORT_COLUMNS[report_type])
+    yield ('\ufeff' + buffer.getvalue()).encode('utf-8'), 0
+    for rows in iter_report_batches(report_type, start, end, batch_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8'), len(rows)
+
+
+def stream_csv(report_type, start, end, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Générer un rapport CSV par morceaux (bytes UTF-8 avec BOM pour Excel)
+
+    Un morceau par lot de lignes lues.
+    """
+    for chunk, _ in _csv_chunks(report_type, start, end, batch_size):
+        yield chunk
+
+
+def write_csv(report_type, start, end, fileobj, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Écrire un rapport CSV dans `fileobj` (fichier binaire)
+
+    Returns:
+        Nombre de lignes de données écrites
+    """
+    written = 0
+    for chunk, rows in _csv_chunks(report_type, start, end, batch_size):
+        fileobj.write(chunk)
+        written += rows
+    return written
+
+
+def write_xlsx(report_type, start, end, fileobj, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Écrire un rapport Excel dans `fileobj` (classeur write-only, ligne par ligne)
+
+    Au-delà de XLSX_MAX_ROWS lignes, l'export continue sur une nouvelle feuille.
+
+    Returns:
+        Nombre de lignes de données écrites
+    """
+    if not OPENPYXL_AVAILABLE:
+        raise ImportError('openpyxl')
+    columns = REPORT_COLUMNS[report_type]
+    workbook = Workbook(write_only=True)
+
+    def new_sheet(number):
+        sheet = workbook.create_sheet('Données' if number == 1 else f'Données {number}')
+        for idx, column in enumerate(columns, start=1):
+            sheet.column_dimensions[get_column_letter(idx)].width = min(max(len(column) + 2, 14), 50)
+        sheet.append(columns)
+        return sheet
+
+    sheets = 1
+    sheet = new_sheet(sheets)
+    sheet_rows = 1
+    written = 0
+    for rows in iter_report_batches(report_type, start, end, batch_size):
+        for row in rows:
+            if sheet_rows >= XLSX_MAX_ROWS:
+                sheets += 1
+                sheet = new_sheet(sheets)
+                sheet_rows = 1
+            sheet.append(row)
+            sheet_rows += 1
+        written += len(rows)
+    if not written:
+        sheet.append(['Aucune donnée disponible pour cette période'])
+    workbook.save(fileobj)
+    return written
+
+
+def stream_xlsx(report_type, start, end, batch_size=DEFAULT_BATCH_SIZE, chunk_size=256 * 1024):
+    """
+    Générer un rapport Excel par morceaux
+
+    Le format XLSX (archive zip) ne peut être envoyé qu'une fois terminé : le
+    classeur est écrit dans un fichier temporaire, puis lu par morceaux.
+    """
+    with tempfile.TemporaryFile() as tmp:
+        write_xlsx(report_type, start, end, tmp, batch_size)
+        tmp.seek(0)
+        while True:
+            chunk = tmp.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
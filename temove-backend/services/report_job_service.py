@@ -0,0 +1,385 @@
+"""
+Génération des rapports admin en arrière-plan
+
+- les demandes sont enregistrées dans report_jobs puis exécutées par un pool
+  de workers (threads) : la requête HTTP répond tout de suite (202) et le client
+  suit le statut avant de télécharger le fichier
+- déduplication : une demande identique (même type, format et période) à un
+  job en cours ou terminé réutilise ce job et son fichier
+- nettoyage : fichiers supprimés au-delà de REPORT_MAX_AGE_HOURS, puis les moins
+  récemment téléchargés tant que le répertoire dépasse REPORT_DISK_QUOTA_MB
+- rapports récurrents : REPORT_SCHEDULES, générés en heures creuses par
+  scripts/run_scheduled_reports.py (tâche cron)
+
+Le pool est propre à chaque processus, l'état des jobs est en base : avec
+plusieurs workers HTTP, le statut et le téléchargement fonctionnent depuis
+n'importe lequel (répertoire des rapports partagé).
+"""
+import hashlib
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timedelta
+from threading import Lock
+from flask import current_app
+from extensions import db
+from models.report_job import ReportJob, ReportJobStatus
+from services.app_logging import get_logger
+from services.report_export_service import (
+    REPORT_COLUMNS, REPORT_TITLES, EXPORT_FORMATS, iter_report_batches, write_csv, write_xlsx
+)
+
+
+logger = get_logger('reports')
+
+REPORT_FORMATS = ('csv', 'excel', 'pdf')
+
+# Un rapport dont la période n'est pas close n'est réutilisé que pendant ce délai
+FRESH_RESULT_SECONDS = 300
+
+# Un job resté « running » au-delà est considéré comme perdu (processus redémarré)
+JOB_TIMEOUT = timedelta(hours=1)
+
+# Un job resté « pending » au-delà (depuis sa création) n'a jamais été pris par
+# un worker : file d'attente perdue au redémarrage du processus
+PENDING_TIMEOUT = timedelta(hours=1)
+
+# Au-delà, le PDF (≈ 37 lignes par page) n'est plus lisible : utiliser CSV/Excel
+PDF_MAX_ROWS = 200000
+
+SCHEDULE_FREQUENCIES = ('daily', 'weekly', 'monthly')
+
+_ACTIVE_STATUSES = (ReportJobStatus.PENDING, ReportJobStatus.RUNNING, ReportJobStatus.DONE)
+
+
+class ReportJobError(ValueError):
+    """Paramètres de rapport invalides"""
+    pass
+
+
+_executor = None
+_executor_lock = Lock()
+# Vérification + création d'un job atomiques dans le processus (demandes identiques simultanées)
+_submit_lock = Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=current_app.config.get('REPORT_WORKERS', 2), thread_name_prefix='report'
+            )
+        return _executor
+
+
+def _reports_dir():
+    path = current_app.config.get('REPORTS_DIR', 'reports')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def job_key(report_type, format_type, start, end):
+    """Empreinte des paramètres d'un rapport (déduplication)"""
+    raw = f'{report_type}|{format_type}|{start.isoformat()}|{end.isoformat()}'
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _reusable(job, now):
+    """Indiquer si le résultat (ou le calcul en cours) d'un job peut servir une nouvelle demande"""
+    if job.status == ReportJobStatus.PENDING:
+        return now - job.created_at < PENDING_TIMEOUT
+    if job.status == ReportJobStatus.RUNNING:
+        return job.started_at is None or now - job.started_at < JOB_TIMEOUT
+    if not job.file_path or not os.path.exists(job.file_path):
+        return False
+    # Période close avant la génération : le fichier reste valable jusqu'à son expiration
+    if job.end_date < job.finished_at:
+        return True
+    return (now - job.finished_at).total_seconds() < FRESH_RESULT_SECONDS
+
+
+def _fail_stale(job, now):
+    """Passer en échec un job « pending » ou « running » qui a dépassé son délai"""
+    job.error = ('Job jamais démarré (délai dépassé)' if job.status == ReportJobStatus.PENDING
+                 else 'Job interrompu (délai dépassé)')
+    job.status = ReportJobStatus.FAILED
+    job.finished_at = now
+
+
+# ----------------------------------------------------------------------
+# Soumission et exécution
+# ----------------------------------------------------------------------
+
+def submit_report_job(report_type, format_type, start, end, user_id=None, scheduled=False, run_inline=False):
+    """
+    Demander un rapport
+
+    Args:
+        start, end: période [start, end] (datetime)
+        run_inline: générer dans le thread appelant (scripts) au lieu du pool
+
+    Returns:
+        (job, created) : created=False si un job identique a été réutilisé
+
+    Raises:
+        ReportJobError: si le type, le format ou la période est invalide
+    """
+    if report_type not in REPORT_COLUMNS:
+        raise ReportJobError(f'Type de rapport inconnu: {report_type} (valeurs: {", ".join(REPORT_COLUMNS)})')
+    if format_type not in REPORT_FORMATS:
+        raise ReportJobError(f'Format non supporté: {format_type} (valeurs: {", ".join(REPORT_FORMATS)})')
+    if start > end:
+        raise ReportJobError('La date de début doit précéder la date de fin')
+
+    key = job_key(report_type, format_type, start, end)
+    with _submit_lock:
+        existing = ReportJob.query.filter(
+            ReportJob.job_key == key, ReportJob.status.in_(_ACTIVE_STATUSES)
+        ).order_by(ReportJob.id.desc()).first()
+        now = datetime.utcnow()
+        if existing is not None:
+            if _reusable(existing, now):
+                return existing, False
+            if existing.status in (ReportJobStatus.PENDING, ReportJobStatus.RUNNING):
+                _fail_stale(existing, now)
+
+        job = ReportJob(
+            job_key=key, report_type=report_type, format=format_type, start_date=start, end_date=end,
+            requested_by=user_id, scheduled=scheduled,
+        )
+        db.session.add(job)
+        db.session.commit()
+
+    if run_inline:
+        run_report_job(job.id)
+        db.session.refresh(job)
+    else:
+        app = current_app._get_current_object()
+        _get_executor().submit(_run_in_app_context, app, job.id)
+    return job, True
+
+
+def _run_in_app_context(app, job_id):
+    with app.app_context():
+        try:
+            run_report_job(job_id)
+        finally:
+            db.session.remove()
+
+
+def generate_report_file(report_type, format_type, start, end, path):
+    """
+    Écrire un rapport dans `path`
+
+    Returns:
+        (chemin du fichier, nombre de lignes)
+    """
+    if format_type == 'csv':
+        with open(path, 'wb') as f:
+            return path, write_csv(report_type, start, end, f)
+    if format_type == 'excel':
+        with open(path, 'wb') as f:
+            return path, write_xlsx(report_type, start, end, f)
+
+    from services.report_service import ReportService
+    row_count = 0
+
+    def rows():
+        nonlocal row_count
+        for batch in iter_report_batches(report_type, start, end):
+            for row in batch:
+                if row_count >= PDF_MAX_ROWS:
+                    return
+                row_count += 1
+                yield row
+
+    filepath = ReportService.generate_pdf_report(
+        report_type=report_type, data=rows(), start_date=start, end_date=end,
+        title=REPORT_TITLES[report_type], filename=os.path.basename(path),
+        columns=REPORT_COLUMNS[report_type], workers=current_app.config.get('PDF_RENDER_WORKERS', 1),
+    )
+    if os.path.abspath(filepath) != os.path.abspath(path):
+        shutil.move(filepath, path)
+    return path, row_count
+
+
+def run_report_job(job_id):
+    """Générer le fichier d'un job (appelé par un worker du pool ou directement)"""
+    job = db.session.get(ReportJob, job_id)
+    if job is None or job.status != ReportJobStatus.PENDING:
+        return
+    job.status = ReportJobStatus.RUNNING
+    job.started_at = datetime.utcnow()
+    db.session.commit()
+
+    extension = 'pdf' if job.format == 'pdf' else EXPORT_FORMATS[job.format][0]
+    filename = (f"job{job.id}_{job.report_type}_{job.start_date.strftime('%Y%m%d')}_"
+                f"{job.end_date.strftime('%Y%m%d')}.{extension}")
+    path = os.path.join(_reports_dir(), filename)
+    try:
+        path, row_count = generate_report_file(job.report_type, job.format, job.start_date, job.end_date, path)
+        job.status = ReportJobStatus.DONE
+        job.file_path = path
+        job.file_size = os.path.getsize(path)
+        job.row_count = row_count
+        logger.info('✅ [REPORT_JOB] Job %s (%s/%s) : %s lignes, %s Ko',
+                    job.id, job.report_type, job.format, row_count, job.file_size // 1024)
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(ReportJob, job_id)
+        job.status = ReportJobStatus.FAILED
+        job.error = str(e)
+        if os.path.exists(path):
+            os.remove(path)
+        logger.exception('❌ [REPORT_JOB] Job %s en échec: %s', job_id, e)
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+    try:
+        cleanup_reports()
+    except Exception:
+        db.session.rollback()
+        logger.exception('⚠️ [REPORT_JOB] Nettoyage des rapports en échec')
+
+
+def mark_downloaded(job):
+    """Noter le téléchargement d'un job (les moins récemment utilisés partent en premier)"""
+    job.last_accessed_at = datetime.utcnow()
+    db.session.commit()
+
+
+# ----------------------------------------------------------------------
+# Nettoyage
+# ----------------------------------------------------------------------
+
+def _expire(job):
+    if job.file_path and os.path.exists(job.file_path):
+        os.remove(job.file_path)
+    job.status = ReportJobStatus.EXPIRED
+
+
+def cleanup_reports(now=None):
+    """
+    Supprimer les rapports expirés puis appliquer le quota disque
+
+    1. jobs terminés depuis plus de REPORT_MAX_AGE_HOURS
+    2. fichiers du répertoire sans job actif (rapports synchrones) plus vieux que ce délai
+    3. tant que le répertoire dépasse REPORT_DISK_QUOTA_MB : jobs les moins récemment
+       téléchargés (ou générés) en premier
+
+    Les jobs « running » depuis plus de JOB_TIMEOUT et « pending » depuis plus
+    de PENDING_TIMEOUT passent en échec.
+
+    Returns:
+        dict {expired_jobs, removed_files, freed_bytes}
+    """
+    now = now or datetime.utcnow()
+    directory = _reports_dir()
+    max_age = timedelta(hours=current_app.config.get('REPORT_MAX_AGE_HOURS', 24))
+    quota = current_app.config.get('REPORT_DISK_QUOTA_MB', 500) * 1024 * 1024
+    expired_jobs = removed_files = freed = 0
+
+    for job in ReportJob.query.filter(db.or_(
+        db.and_(ReportJob.status == ReportJobStatus.RUNNING, ReportJob.started_at < now - JOB_TIMEOUT),
+        db.and_(ReportJob.status == ReportJobStatus.PENDING, ReportJob.created_at < now - PENDING_TIMEOUT),
+    )).all():
+        _fail_stale(job, now)
+
+    for job in ReportJob.query.filter(
+        ReportJob.status == ReportJobStatus.DONE, ReportJob.finished_at < now - max_age
+    ).all():
+        freed += job.file_size or 0
+        _expire(job)
+        expired_jobs += 1
+    db.session.commit()
+
+    active_paths = {
+        os.path.abspath(path) for (path,) in db.session.query(ReportJob.file_path).filter(
+            ReportJob.status.in_(_ACTIVE_STATUSES), ReportJob.file_path.isnot(None)
+        ).all()
+    }
+    cutoff = (now - max_age).timestamp()
+    total = 0
+    for entry in os.scandir(directory):
+        if not entry.is_file():
+            continue
+        stat = entry.stat()
+        if os.path.abspath(entry.path) not in active_paths and stat.st_mtime < cutoff:
+            os.remove(entry.path)
+            removed_files += 1
+            freed += stat.st_size
+            continue
+        total += stat.st_size
+
+    if total > quota:
+        oldest_first = ReportJob.query.filter(ReportJob.status == ReportJobStatus.DONE).order_by(
+            db.func.coalesce(ReportJob.last_accessed_at, ReportJob.finished_at)
+        ).all()
+        for job in oldest_first:
+            if total <= quota:
+                break
+            total -= job.file_size or 0
+            freed += job.file_size or 0
+            _expire(job)
+            expired_jobs += 1
+        db.session.commit()
+
+    return {'expired_jobs': expired_jobs, 'removed_files': removed_files, 'freed_bytes': freed}
+
+
+# ----------------------------------------------------------------------
+# Rapports récurrents
+# ----------------------------------------------------------------------
+
+def schedule_period(frequency, today):
+    """
+    Dernière période écoulée d'une fréquence
+
+    daily : la veille ; weekly : la semaine précédente (lundi-dimanche) ;
+    monthly : le mois précédent
+    """
+    if frequency == 'daily':
+        first = last = today - timedelta(days=1)
+    elif frequency == 'weekly':
+        first = today - timedelta(days=today.weekday() + 7)
+        last = first + timedelta(days=6)
+    elif frequency == 'monthly':
+        last = today.replace(day=1) - timedelta(days=1)
+        first = last.replace(day=1)
+    else:
+        raise ReportJobError(f'Fréquence inconnue: {frequency} (valeurs: {", ".join(SCHEDULE_FREQUENCIES)})')
+    return datetime.combine(first, time.min), datetime.combine(last, time.max)
+
+
+def is_schedule_due(frequency, today):
+    """Les rapports hebdomadaires sont générés le lundi, les mensuels le 1er du mois"""
+    if frequency == 'weekly':
+        return today.weekday() == 0
+    if frequency == 'monthly':
+        return today.day == 1
+    return True
+
+
+def run_scheduled_reports(today=None, force=False):
+    """
+    Générer les rapports récurrents dus aujourd'hui (REPORT_SCHEDULES)
+
+    Chaque rapport couvre la dernière période écoulée ; une demande identique
+    faite ensuite depuis le dashboard réutilise le fichier.
+
+    Returns:
+        Liste de (job, created)
+    """
+    today = today or datetime.utcnow().date()
+    results = []
+    for schedule in current_app.config.get('REPORT_SCHEDULES', []):
+        frequency = schedule.get('frequency', 'daily')
+        if not force and not is_schedule_due(frequency, today):
+            continue
+        start, end = schedule_period(frequency, today)
+        results.append(submit_report_job(
+            schedule['report_type'], schedule.get('format', 'excel'), start, end,
+            scheduled=True, run_inline=True,
+        ))
+    return results
@@ -8,8 +8,7 @@ sur la machine hôte et peuvent être supprimés après téléchargement.
 """
 import os
 from datetime import datetime
-from typing import Dict, List, Optional
-import json
+from typing import Dict, Iterable, List, Optional
 
 try:
     import pandas as pd
@@ -133,34 +132,37 @@ class ReportService:
     @staticmethod
     def generate_pdf_report(
         report_type: str,
-        data: List[Dict],
+        data: Iterable,
         start_date: datetime,
         end_date: datetime,
         title: str,
-        filename: Optional[str] = None
+        filename: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        workers: int = 1
     ) -> str:
         """
         Générer un rapport PDF
         
+        Rendu par pages de taille fixe (en-têtes répétés, totaux en fin de
+        rapport), voir services/pdf_report_renderer.py.
+        
         Args:
             report_type: Type de rapport
-            data: Liste de dictionnaires contenant les données
+            data: Liste de dictionnaires, ou lignes (listes de valeurs) si `columns` est fourni
             start_date: Date de début
             end_date: Date de fin
             title: Titre du rapport
             filename: Nom de fichier (optionnel)
+            columns: En-têtes des colonnes quand `data` contient des lignes
+            workers: Processus de rendu pour les gros rapports (1 = séquentiel)
         
         Returns:
             Chemin du fichier généré
         """
-        # Vérifier et importer reportlab
-        try:
-            from reportlab.lib import colors
-            from reportlab.lib.pagesizes import A4
-            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import inch
-        except ImportError:
+        from services.pdf_report_renderer import render_pdf, REPORTLAB_AVAILABLE
+        
+        # Vérifier reportlab
+        if not REPORTLAB_AVAILABLE:
             raise Exception(
                 "❌ reportlab n'est pas installé dans l'environnement virtuel actuel.\n"
                 "📦 Pour installer:\n"
@@ -178,94 +180,19 @@ class ReportService:
         
         filepath = os.path.join(ReportService.REPORTS_DIR, filename)
         
-        # Créer le document PDF
-        doc = SimpleDocTemplate(filepath, pagesize=A4)
-        elements = []
-        
-        # Styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            textColor=colors.HexColor('#FFC800'),  # Couleur TéMove
-            spaceAfter=30,
-            alignment=1  # Centré
-        )
-        
-        # Titre
-        elements.append(Paragraph(title, title_style))
-        elements.append(Spacer(1, 0.2*inch))
-        
-        # Informations de période
-        period_text = f"Période: {start_date.strftime('%d/%m/%Y')} - {end_date.strftime('%d/%m/%Y')}"
-        elements.append(Paragraph(period_text, styles['Normal']))
-        elements.append(Spacer(1, 0.2*inch))
-        
-        # Générer la date de génération
-        generated_text = f"Généré le: {datetime.now().strftime('%d/%m/%Y à %H:%M')}"
-        elements.append(Paragraph(generated_text, styles['Normal']))
-        elements.append(Spacer(1, 0.3*inch))
-        
-        # Tableau de données
-        if data:
-            # Préparer les données pour le tableau
-            table_data = []
-            
-            # En-têtes
-            if data:
-                headers = list(data[0].keys())
-                # Formater les en-têtes
-                formatted_headers = [str(h).replace('_', ' ').title() for h in headers]
-                table_data.append(formatted_headers)
-                
-                # Données
-                for row in data:
-                    formatted_row = []
-                    for header in headers:
-                        value = row.get(header, '')
-                        # Formater les valeurs
-                        if isinstance(value, (int, float)):
-                            if 'price' in str(header).lower() or 'amount' in str(header).lower() or 'commission' in str(header).lower():
-                                formatted_row.append(f"{value:,.0f} XOF")
-                            else:
-                                formatted_row.append(str(value))
-                        elif isinstance(value, datetime):
-                            formatted_row.append(value.strftime('%d/%m/%Y %H:%M'))
-                        elif isinstance(value, dict):
-                            formatted_row.append(json.dumps(value, ensure_ascii=False))
-                        else:
-                            formatted_row.append(str(value))
-                    table_data.append(formatted_row)
-            
-            # Créer le tableau
-            table = Table(table_data)
-            
-            # Style du tableau
-            table.setStyle(TableStyle([
-                # En-têtes
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#FFC800')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('TOPPADDING', (0, 0), (-1, 0), 12),
-                # Données
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ]))
-            
-            elements.append(table)
+        # Lignes : dictionnaires (colonnes = clés du premier) ou listes de valeurs
+        if columns is None:
+            data = list(data)
+            columns = list(data[0].keys()) if data else ['']
+            rows = ([row.get(column, '') for column in columns] for row in data)
         else:
-            elements.append(Paragraph("Aucune donnée disponible pour cette période", styles['Normal']))
+            rows = data
         
-        # Générer le PDF
-        doc.build(elements)
+        subtitle = (
+            f"Période: {start_date.strftime('%d/%m/%Y')} - {end_date.strftime('%d/%m/%Y')}"
+            f"    Généré le: {datetime.now().strftime('%d/%m/%Y à %H:%M')}"
+        )
+        render_pdf(filepath, title, subtitle, columns, rows, workers=workers)
         
         print(f"Rapport PDF généré: {filepath}")
         return filepath
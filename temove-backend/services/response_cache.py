@@ -0,0 +1,205 @@
+"""
+Cache des réponses des endpoints de lecture (dashboard admin)
+
+- durée de vie (TTL) par endpoint
+- clé = endpoint + paramètres de la requête (les réponses ne dépendent pas de
+  l'admin connecté ; l'accès est vérifié à chaque appel, même en cache)
+- invalidation par étiquettes : chaque entrée déclare les données dont elle
+  dépend ('rides', 'payments', ...) et un commit qui écrit ces données la supprime
+- single-flight : si plusieurs requêtes manquent la même clé en même temps,
+  une seule calcule la réponse et les autres attendent son résultat
+
+Le cache est propre à chaque processus : avec plusieurs workers, une écriture
+n'invalide que le cache du worker qui l'a faite, les autres expirent au TTL.
+"""
+import time
+from collections import OrderedDict
+from functools import wraps
+from threading import Event, Lock
+from flask import current_app, make_response, request
+
+
+# Étiquettes d'invalidation par modèle
+MODEL_TAGS = {
+    'Ride': 'rides',
+    'Payment': 'payments',
+    'Commission': 'commissions',
+    'User': 'users',
+    'Driver': 'drivers',
+}
+
+MAX_ENTRIES = 256
+
+# Attente maximale d'un calcul en cours avant de calculer soi-même (secondes)
+SINGLE_FLIGHT_TIMEOUT = 30
+
+
+class ResponseCache:
+    """Cache LRU de réponses (corps, statut, type) avec TTL et étiquettes"""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._inflight = {}
+        # Compteur d'invalidations par étiquette (écarte un résultat calculé pendant une écriture)
+        self._generations = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry['expires_at'] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def generation(self, tags):
+        with self._lock:
+            return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def set(self, key, data, status, mimetype, ttl, tags, generation=None):
+        with self._lock:
+            if generation is not None and generation != tuple(self._generations.get(tag, 0) for tag in tags):
+                return
+            self._entries[key] = {
+                'data': data,
+                'status': status,
+                'mimetype': mimetype,
+                'tags': frozenset(tags),
+                'expires_at': time.monotonic() + ttl,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def begin(self, key):
+        """
+        Réserver le calcul d'une clé
+
+        Returns:
+            (leader, event) : leader=True si l'appelant doit calculer la réponse,
+            sinon attendre `event` puis relire le cache
+        """
+        with self._lock:
+            event = self._inflight.get(key)
+            if event is not None:
+                return False, event
+            event = self._inflight[key] = Event()
+            return True, event
+
+    def end(self, key):
+        with self._lock:
+            event = self._inflight.pop(key, None)
+        if event is not None:
+            event.set()
+
+    def invalidate(self, tags):
+        """Supprimer les entrées qui dépendent de l'une des étiquettes"""
+        tags = set(tags)
+        if not tags:
+            return
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+            stale = [key for key, entry in self._entries.items() if entry['tags'] & tags]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = ResponseCache()
+
+
+def get_response_cache():
+    return _cache
+
+
+def _cache_key():
+    args = tuple(sorted((key, tuple(request.args.getlist(key))) for key in request.args))
+    return (request.endpoint, args)
+
+
+def _build_response(entry, state, ttl):
+    response = current_app.response_class(entry['data'], status=entry['status'], mimetype=entry['mimetype'])
+    response.headers['X-Cache'] = state
+    response.headers['Cache-Control'] = f'private, max-age={ttl}'
+    return response
+
+
+def cached_response(ttl, tags, guard=None):
+    """
+    Mettre en cache la réponse d'un endpoint GET
+
+    Args:
+        ttl: durée de vie en secondes
+        tags: données dont dépend la réponse (voir MODEL_TAGS)
+        guard: fonction appelée avant toute lecture du cache ; si elle renvoie une
+            réponse (erreur d'accès, ...), celle-ci est renvoyée telle quelle
+
+    Seules les réponses 200 sont mises en cache. Désactivé si
+    ADMIN_RESPONSE_CACHE_ENABLED est faux.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not current_app.config.get('ADMIN_RESPONSE_CACHE_ENABLED', True):
+                return view(*args, **kwargs)
+            if guard is not None:
+                denied = guard()
+                if denied is not None:
+                    return denied
+
+            key = _cache_key()
+            entry = _cache.get(key)
+            if entry is not None:
+                _cache.hits += 1
+                return _build_response(entry, 'HIT', ttl)
+
+            leader, event = _cache.begin(key)
+            if not leader:
+                # Une autre requête calcule la même réponse : attendre son résultat
+                event.wait(SINGLE_FLIGHT_TIMEOUT)
+                entry = _cache.get(key)
+                if entry is not None:
+                    _cache.hits += 1
+                    return _build_response(entry, 'HIT', ttl)
+                return view(*args, **kwargs)
+
+            _cache.misses += 1
+            generation = _cache.generation(tags)
+            try:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200 and not response.direct_passthrough:
+                    _cache.set(key, response.get_data(), response.status_code, response.mimetype,
+                               ttl, tags, generation=generation)
+                response.headers['X-Cache'] = 'MISS'
+                response.headers.setdefault('Cache-Control', f'private, max-age={ttl}')
+                return response
+            finally:
+                _cache.end(key)
+        return wrapper
+    return decorator
+
+
+def _invalidate_on_write(changes):
+    _cache.invalidate(MODEL_TAGS[model.__name__] for model in changes if model.__name__ in MODEL_TAGS)
+
+
+def register_response_cache_hooks():
+    """Invalider les réponses en cache à chaque commit qui écrit des courses, paiements, ..."""
+    from services import model_events
+    from models.ride import Ride
+    from models.payment import Payment
+    from models.commission import Commission
+    from models.user import User
+    from models.driver import Driver
+
+    model_events.on_commit((Ride, Payment, Commission, User, Driver), _invalidate_on_write)
@@ -0,0 +1,167 @@
+"""
+Compression des réponses et métriques de taille / temps d'encodage
+
+Les listes (courses, admin, carte des conducteurs) partent vers des mobiles en
+réseau cellulaire : au-delà de COMPRESS_MIN_SIZE octets, le corps est
+compressé selon l'en-tête Accept-Encoding du client (br si brotli est
+installé, sinon gzip). Ne sont pas compressés :
+- les réponses en flux (exports CSV/Excel) et les fichiers (send_file)
+- les types déjà compressés (PDF, images, xlsx, parquet)
+- les réponses qui ont déjà un Content-Encoding
+
+Métriques par endpoint (processus courant) : taille JSON, taille envoyée,
+temps d'encodage JSON (services/json_provider.py) et de compression. Elles sont
+aussi renvoyées dans l'en-tête Server-Timing de chaque réponse.
+"""
+import gzip
+import time
+from threading import Lock
+from flask import current_app, g, request
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'text/html',
+    'text/plain',
+    'text/csv',
+    'text/css',
+    'text/xml',
+}
+
+
+def _compress_gzip(data):
+    return gzip.compress(data, compresslevel=current_app.config.get('COMPRESS_LEVEL', 6))
+
+
+def _compress_brotli(data):
+    return brotli.compress(data, quality=current_app.config.get('COMPRESS_BROTLI_QUALITY', 4))
+
+
+# Encodages par ordre de préférence à qualité égale côté client
+ENCODERS = {'br': _compress_brotli, 'gzip': _compress_gzip} if BROTLI_AVAILABLE else {'gzip': _compress_gzip}
+
+
+class ResponseMetrics:
+    """Compteurs par endpoint : tailles et temps d'encodage / compression"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, body_bytes, sent_bytes, encode_ms, compress_ms, encoding):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = {
+                    'requests': 0, 'compressed': 0, 'body_bytes': 0, 'sent_bytes': 0,
+                    'max_body_bytes': 0, 'encode_ms': 0.0, 'max_encode_ms': 0.0, 'compress_ms': 0.0,
+                }
+            stats['requests'] += 1
+            stats['body_bytes'] += body_bytes
+            stats['sent_bytes'] += sent_bytes
+            stats['max_body_bytes'] = max(stats['max_body_bytes'], body_bytes)
+            stats['encode_ms'] += encode_ms
+            stats['max_encode_ms'] = max(stats['max_encode_ms'], encode_ms)
+            if encoding:
+                stats['compressed'] += 1
+                stats['compress_ms'] += compress_ms
+
+    def snapshot(self):
+        """Métriques par endpoint (moyennes et taux de compression), plus gros volume en premier"""
+        with self._lock:
+            items = [(endpoint, dict(stats)) for endpoint, stats in self._endpoints.items()]
+        result = []
+        for endpoint, stats in items:
+            count = stats['requests']
+            result.append({
+                'endpoint': endpoint,
+                'requests': count,
+                'compressed': stats['compressed'],
+                'body_bytes': stats['body_bytes'],
+                'sent_bytes': stats['sent_bytes'],
+                'avg_body_bytes': round(stats['body_bytes'] / count),
+                'max_body_bytes': stats['max_body_bytes'],
+                'compression_ratio': round(stats['sent_bytes'] / stats['body_bytes'], 3) if stats['body_bytes'] else None,
+                'avg_encode_ms': round(stats['encode_ms'] / count, 3),
+                'max_encode_ms': round(stats['max_encode_ms'], 3),
+                'avg_compress_ms': round(stats['compress_ms'] / stats['compressed'], 3) if stats['compressed'] else None,
+            })
+        result.sort(key=lambda item: item['body_bytes'], reverse=True)
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+_metrics = ResponseMetrics()
+
+
+def get_response_metrics():
+    return _metrics
+
+
+def _negotiate():
+    """Encodage accepté par le client (None si aucun)"""
+    return request.accept_encodings.best_match(list(ENCODERS))
+
+
+def _compress_response(response):
+    """Compresser le corps si possible ; renvoie (encodage, durée en ms)"""
+    if not current_app.config.get('COMPRESSION_ENABLED', True):
+        return None, 0.0
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return None, 0.0
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES or 'Content-Encoding' in response.headers:
+        return None, 0.0
+    if response.content_length is None or response.content_length < current_app.config.get('COMPRESS_MIN_SIZE', 1024):
+        return None, 0.0
+    response.vary.add('Accept-Encoding')
+    encoding = _negotiate()
+    if not encoding:
+        return None, 0.0
+
+    started = time.perf_counter()
+    data = ENCODERS[encoding](response.get_data())
+    elapsed = (time.perf_counter() - started) * 1000
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    # Le corps envoyé dépend de l'encodage : un ETag fort ne l'identifie plus
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return encoding, elapsed
+
+
+def register_response_compression(app):
+    """Compression et métriques de toutes les réponses de l'application"""
+
+    @app.after_request
+    def compress_response(response):
+        # Flux et fichiers : ni compressés ni mesurés (corps non chargé en mémoire)
+        if response.is_streamed or response.direct_passthrough:
+            return response
+
+        body_bytes = response.content_length or 0
+        encode_ms = g.get('json_encode_ms', 0.0)
+        encoding, compress_ms = _compress_response(response)
+
+        timings = []
+        if encode_ms:
+            timings.append(f'json;dur={encode_ms:.2f}')
+        if encoding:
+            timings.append(f'{encoding};dur={compress_ms:.2f}')
+        if timings:
+            response.headers['Server-Timing'] = ', '.join(timings)
+
+        _metrics.record(request.endpoint or 'unknown', body_bytes, response.content_length or 0,
+                        encode_ms, compress_ms, encoding)
+        return response
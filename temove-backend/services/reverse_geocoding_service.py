@@ -0,0 +1,243 @@
+"""
+Service de géocodage inverse hors ligne
+
+Charge un gazetteer local de Dakar (rues, quartiers, points de repère) dans un
+KD-tree et répond aux recherches d'adresse la plus proche sans appel réseau.
+Le fichier est généré par scripts/build_gazetteer.py ; s'il est absent, le
+service utilise les quartiers intégrés et les points de repère.
+"""
+import json
+import math
+import os
+from collections import OrderedDict
+from threading import Lock
+from config import Config
+
+
+# Centroïdes approximatifs des principaux quartiers de Dakar (données de base)
+DAKAR_QUARTIERS = [
+    ('Plateau', 14.6708, -17.4381),
+    ('Médina', 14.6833, -17.4500),
+    ('Gueule Tapée', 14.6880, -17.4580),
+    ('Colobane', 14.6940, -17.4470),
+    ('Fann', 14.6950, -17.4650),
+    ('Point E', 14.6990, -17.4600),
+    ('Mermoz', 14.7080, -17.4760),
+    ('Sicap Baobab', 14.7100, -17.4650),
+    ('HLM', 14.7130, -17.4450),
+    ('Dieuppeul', 14.7150, -17.4530),
+    ('Sacré-Cœur', 14.7190, -17.4680),
+    ('Liberté', 14.7200, -17.4600),
+    ('Ouakam', 14.7240, -17.4900),
+    ('Hann', 14.7250, -17.4300),
+    ('Grand Yoff', 14.7330, -17.4520),
+    ('Almadies', 14.7420, -17.5200),
+    ('Patte d\'Oie', 14.7470, -17.4450),
+    ('Ngor', 14.7480, -17.5120),
+    ('Pikine', 14.7550, -17.3900),
+    ('Yoff', 14.7570, -17.4700),
+    ('Parcelles Assainies', 14.7640, -17.4400),
+    ('Cambérène', 14.7690, -17.4300),
+    ('Guédiawaye', 14.7770, -17.3950),
+    ('Keur Massar', 14.7800, -17.3200),
+    ('Rufisque', 14.7150, -17.2730),
+    ('Diamniadio', 14.7210, -17.1840),
+]
+
+
+class KDTree:
+    """KD-tree 2D minimal (plus proche voisin) sur des coordonnées projetées en km"""
+
+    # Latitude de référence pour la projection équirectangulaire (Dakar)
+    REFERENCE_LATITUDE = 14.7
+    KM_PER_DEGREE = 111.32
+
+    def __init__(self, points):
+        """
+        Args:
+            points: liste de tuples (latitude, longitude)
+        """
+        self._cos_ref = math.cos(math.radians(self.REFERENCE_LATITUDE))
+        self._xs = [lng * self._cos_ref * self.KM_PER_DEGREE for _, lng in points]
+        self._ys = [lat * self.KM_PER_DEGREE for lat, _ in points]
+        # Noeuds : (index du point, axe, gauche, droite)
+        self._nodes = []
+        self._root = self._build(list(range(len(points))), 0)
+
+    def _build(self, indices, depth):
+        if not indices:
+            return -1
+        axis = depth % 2
+        coords = self._xs if axis == 0 else self._ys
+        indices.sort(key=lambda i: coords[i])
+        median = len(indices) // 2
+        node_id = len(self._nodes)
+        self._nodes.append([indices[median], axis, -1, -1])
+        self._nodes[node_id][2] = self._build(indices[:median], depth + 1)
+        self._nodes[node_id][3] = self._build(indices[median + 1:], depth + 1)
+        return node_id
+
+    def nearest(self, lat, lng):
+        """
+        Trouver le point le plus proche
+
+        Returns:
+            tuple (index du point, distance en km), ou (None, None) si l'arbre est vide
+        """
+        if self._root < 0:
+            return None, None
+        qx = lng * self._cos_ref * self.KM_PER_DEGREE
+        qy = lat * self.KM_PER_DEGREE
+        xs, ys, nodes = self._xs, self._ys, self._nodes
+
+        best_idx = None
+        best_dist2 = float('inf')
+        # Pile de (noeud, distance² minimale au plan de coupe parent)
+        stack = [(self._root, 0.0)]
+        while stack:
+            node_id, plane_dist2 = stack.pop()
+            if node_id < 0 or plane_dist2 >= best_dist2:
+                continue
+            point_idx, axis, left, right = nodes[node_id]
+            dx = xs[point_idx] - qx
+            dy = ys[point_idx] - qy
+            dist2 = dx * dx + dy * dy
+            if dist2 < best_dist2:
+                best_dist2 = dist2
+                best_idx = point_idx
+            diff = dx if axis == 0 else dy
+            near, far = (left, right) if diff > 0 else (right, left)
+            # L'autre côté n'est exploré que si le plan de coupe est plus proche que le meilleur
+            stack.append((far, diff * diff))
+            stack.append((near, 0.0))
+        return best_idx, math.sqrt(best_dist2)
+
+
+class OfflineReverseGeocoder:
+    """Géocodeur inverse hors ligne basé sur un gazetteer local"""
+
+    # Distance maximale (km) pour nommer une rue ou un point de repère
+    MAX_STREET_DISTANCE_KM = 0.15
+    MAX_LANDMARK_DISTANCE_KM = 0.3
+    # Au-delà de cette distance du quartier le plus proche, la zone n'est pas couverte
+    MAX_QUARTIER_DISTANCE_KM = 5.0
+
+    CACHE_SIZE = 10000
+    # Arrondi des coordonnées pour le cache (~11 m)
+    CACHE_PRECISION = 4
+
+    def __init__(self, entries):
+        """
+        Args:
+            entries: liste de dicts {name, type, latitude, longitude, quartier (optionnel)}
+                     avec type parmi 'street', 'quartier', 'landmark'
+        """
+        self._entries = {}
+        self._trees = {}
+        for entry_type in ('street', 'quartier', 'landmark'):
+            typed = [e for e in entries if e.get('type') == entry_type]
+            self._entries[entry_type] = typed
+            self._trees[entry_type] = KDTree([(e['latitude'], e['longitude']) for e in typed])
+        self._cache = OrderedDict()
+        self._cache_lock = Lock()
+
+    @classmethod
+    def from_file(cls, path):
+        """Charger un gazetteer généré par scripts/build_gazetteer.py"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data.get('entries', []))
+
+    @classmethod
+    def from_builtin(cls):
+        """Construire un gazetteer minimal (quartiers intégrés + points de repère)"""
+        return cls(builtin_entries())
+
+    def _nearest(self, entry_type, lat, lng, max_distance_km):
+        idx, distance_km = self._trees[entry_type].nearest(lat, lng)
+        if idx is None or distance_km > max_distance_km:
+            return None
+        return self._entries[entry_type][idx]
+
+    def lookup(self, lat, lng):
+        """
+        Obtenir l'adresse la plus proche
+
+        Returns:
+            dict {address, street, quartier, landmark} ou None si hors zone couverte
+        """
+        key = (round(lat, self.CACHE_PRECISION), round(lng, self.CACHE_PRECISION))
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        result = self._lookup_uncached(lat, lng)
+
+        with self._cache_lock:
+            self._cache[key] = result
+            if len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return result
+
+    def _lookup_uncached(self, lat, lng):
+        quartier = self._nearest('quartier', lat, lng, self.MAX_QUARTIER_DISTANCE_KM)
+        if not quartier:
+            return None
+        landmark = self._nearest('landmark', lat, lng, self.MAX_LANDMARK_DISTANCE_KM)
+        street = self._nearest('street', lat, lng, self.MAX_STREET_DISTANCE_KM)
+
+        quartier_name = (street or {}).get('quartier') or quartier['name']
+        parts = []
+        if landmark:
+            parts.append(landmark['name'])
+        if street:
+            parts.append(street['name'])
+        parts.extend([quartier_name, 'Dakar'])
+
+        return {
+            'address': ', '.join(parts),
+            'street': street['name'] if street else None,
+            'quartier': quartier_name,
+            'landmark': landmark['name'] if landmark else None,
+        }
+
+    def get_address(self, lat, lng):
+        """Obtenir l'adresse formatée (None si hors zone couverte)"""
+        result = self.lookup(lat, lng)
+        return result['address'] if result else None
+
+
+def builtin_entries():
+    """Entrées intégrées : quartiers de Dakar et points de repère"""
+    from routes.landmarks import LANDMARKS
+
+    entries = [
+        {'name': name, 'type': 'quartier', 'latitude': lat, 'longitude': lng}
+        for name, lat, lng in DAKAR_QUARTIERS
+    ]
+    entries.extend(
+        {'name': l['name'], 'type': 'landmark', 'latitude': l['latitude'], 'longitude': l['longitude']}
+        for l in LANDMARKS
+    )
+    return entries
+
+
+_geocoder = None
+_geocoder_lock = Lock()
+
+
+def get_offline_geocoder():
+    """Obtenir le géocodeur hors ligne partagé (chargé au premier appel)"""
+    global _geocoder
+    if _geocoder is not None:
+        return _geocoder
+
+    with _geocoder_lock:
+        if _geocoder is None:
+            path = Config.GAZETTEER_PATH
+            if path and os.path.exists(path):
+                _geocoder = OfflineReverseGeocoder.from_file(path)
+            else:
+                _geocoder = OfflineReverseGeocoder.from_builtin()
+        return _geocoder
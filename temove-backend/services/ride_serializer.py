@@ -0,0 +1,213 @@
+"""
+Sérialisation des courses par projections
+
+Les listes de courses n'ont pas besoin de tout Ride.to_dict() (estimation
+d'arrivée, fiche complète du chauffeur) : chaque endpoint choisit une
+projection nommée, que le client peut restreindre avec ?fields=.
+
+- lite  : historique et listes des applications (chauffeur résumé)
+- full  : équivalent de Ride.to_dict() (détail d'une course)
+- admin : full sans estimation d'arrivée, avec le client et les dates d'annulation
+
+Les relations utilisées par les champs demandés (driver, user) sont chargées
+avec la requête des courses (eager_load) : une seule requête au lieu d'une
+par course.
+
+    projection, fields = fields_from_request(default='lite', allowed=('lite', 'full'))
+    rides = eager_load(query, fields).all()
+    return jsonify({'rides': serialize_rides(rides, projection, fields)})
+"""
+from flask import request
+from sqlalchemy.orm import joinedload
+from models.ride import Ride
+
+
+class SerializerError(ValueError):
+    """Projection ou champs demandés invalides"""
+    pass
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _enum(value):
+    return value.value if value is not None and hasattr(value, 'value') else value
+
+
+def _driver_lite(driver):
+    if driver is None:
+        return None
+    return {
+        'id': driver.id,
+        'full_name': driver.full_name,
+        'phone': driver.phone,
+        'car_make': driver.car_make,
+        'car_model': driver.car_model,
+        'car_color': driver.car_color,
+        'license_plate': driver.license_plate,
+        'rating_average': driver.rating_average,
+    }
+
+
+def _driver_full(driver):
+    return driver.to_dict() if driver is not None else None
+
+
+def _user_lite(user):
+    if user is None:
+        return None
+    return {
+        'id': user.id,
+        'full_name': user.full_name,
+        'email': user.email,
+        'phone': user.phone,
+    }
+
+
+# Champ -> valeur (le champ driver dépend de la projection, voir RideSerializer)
+RIDE_FIELDS = {
+    'id': lambda ride: ride.id,
+    'user_id': lambda ride: ride.user_id,
+    'driver_id': lambda ride: ride.driver_id,
+    'category': lambda ride: _enum(ride.category),
+    'ride_mode': lambda ride: _enum(ride.ride_mode),
+    'pickup': lambda ride: {
+        'latitude': ride.pickup_latitude,
+        'longitude': ride.pickup_longitude,
+        'address': ride.pickup_address,
+    },
+    'dropoff': lambda ride: {
+        'latitude': ride.dropoff_latitude,
+        'longitude': ride.dropoff_longitude,
+        'address': ride.dropoff_address,
+    } if ride.dropoff_latitude else None,
+    'pickup_address': lambda ride: ride.pickup_address,
+    'dropoff_address': lambda ride: ride.dropoff_address,
+    'distance_km': lambda ride: ride.distance_km,
+    'duration_minutes': lambda ride: ride.duration_minutes,
+    'base_price': lambda ride: ride.base_price,
+    'surge_multiplier': lambda ride: ride.surge_multiplier,
+    'discount_amount': lambda ride: ride.discount_amount,
+    'final_price': lambda ride: ride.final_price,
+    'status': lambda ride: _enum(ride.status),
+    'payment_method': lambda ride: ride.payment_method,
+    'scheduled_at': lambda ride: _iso(ride.scheduled_at),
+    'is_scheduled': lambda ride: ride.is_scheduled(),
+    'requested_at': lambda ride: _iso(ride.requested_at),
+    'confirmed_at': lambda ride: _iso(ride.confirmed_at),
+    'started_at': lambda ride: _iso(ride.started_at),
+    'completed_at': lambda ride: _iso(ride.completed_at),
+    'cancelled_at': lambda ride: _iso(ride.cancelled_at),
+    'updated_at': lambda ride: _iso(ride.updated_at),
+    'driver': lambda ride: _driver_full(ride.driver),
+    'user': lambda ride: _user_lite(ride.user),
+    # Informations sur le temps d'arrivée
+    'estimated_arrival': lambda ride: ride.get_estimated_arrival(),
+}
+
+_FULL_FIELDS = (
+    'id', 'user_id', 'driver_id', 'category', 'ride_mode', 'pickup', 'dropoff', 'distance_km',
+    'duration_minutes', 'base_price', 'surge_multiplier', 'discount_amount', 'final_price', 'status',
+    'payment_method', 'scheduled_at', 'is_scheduled', 'requested_at', 'confirmed_at', 'started_at',
+    'completed_at', 'updated_at', 'driver', 'estimated_arrival',
+)
+
+PROJECTIONS = {
+    'lite': (
+        'id', 'status', 'category', 'ride_mode', 'pickup', 'dropoff', 'distance_km', 'duration_minutes',
+        'final_price', 'payment_method', 'scheduled_at', 'requested_at', 'completed_at', 'driver',
+    ),
+    'full': _FULL_FIELDS,
+    'admin': tuple(f for f in _FULL_FIELDS if f != 'estimated_arrival') + ('cancelled_at', 'user'),
+}
+
+# Champs qui ne sont dans aucune projection mais peuvent être demandés explicitement
+_EXTRA_FIELDS = ('pickup_address', 'dropoff_address')
+
+# Champ -> relation chargée avec les courses
+_RELATIONS = {
+    'driver': 'driver',
+    'user': 'user',
+}
+
+
+def resolve_fields(view=None, fields=None, default='lite', allowed=('lite', 'full')):
+    """
+    Projection et champs à sérialiser
+
+    Args:
+        view: Projection demandée (défaut : `default`)
+        fields: Champs demandés (liste ou chaîne séparée par des virgules), parmi
+            ceux des projections autorisées
+        allowed: Projections autorisées pour l'endpoint
+
+    Returns:
+        (projection, tuple de champs)
+
+    Raises:
+        SerializerError: projection non autorisée ou champ inconnu
+    """
+    projection = view or default
+    if projection not in allowed:
+        raise SerializerError(f'Vue inconnue: {projection} (valeurs: {", ".join(allowed)})')
+    if not fields:
+        return projection, PROJECTIONS[projection]
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    fields = [f.strip() for f in fields if f.strip()]
+    available = set(_EXTRA_FIELDS).union(*(PROJECTIONS[name] for name in allowed))
+    unknown = [f for f in fields if f not in available]
+    if unknown:
+        raise SerializerError(f'Champs inconnus: {", ".join(unknown)}')
+    # L'id est toujours renvoyé (pagination, clés côté client)
+    return projection, tuple(dict.fromkeys(['id'] + fields))
+
+
+def fields_from_request(default='lite', allowed=('lite', 'full'), extra=()):
+    """
+    resolve_fields() depuis ?view= et ?fields=
+
+    `extra` : champs ajoutés à la projection par défaut de l'endpoint (sans ?fields=)
+    """
+    fields = request.args.get('fields')
+    projection, resolved = resolve_fields(request.args.get('view'), fields, default, allowed)
+    if not fields and extra:
+        resolved = tuple(dict.fromkeys(resolved + tuple(extra)))
+    return projection, resolved
+
+
+def eager_load(query, fields):
+    """Charger avec la requête (JOIN) les relations des champs demandés"""
+    options = [joinedload(getattr(Ride, _RELATIONS[f])) for f in fields if f in _RELATIONS]
+    return query.options(*options) if options else query
+
+
+class RideSerializer:
+    """Sérialiseur d'une projection (getters résolus une fois pour toute la liste)"""
+
+    def __init__(self, projection='full', fields=None):
+        if projection not in PROJECTIONS:
+            raise SerializerError(f'Vue inconnue: {projection} (valeurs: {", ".join(PROJECTIONS)})')
+        fields = fields or PROJECTIONS[projection]
+        getters = dict(RIDE_FIELDS)
+        if projection == 'lite':
+            getters['driver'] = lambda ride: _driver_lite(ride.driver)
+        self.fields = tuple(fields)
+        self._getters = [(name, getters[name]) for name in self.fields]
+
+    def serialize(self, ride):
+        return {name: getter(ride) for name, getter in self._getters}
+
+    def serialize_many(self, rides):
+        return [self.serialize(ride) for ride in rides]
+
+
+def serialize_ride(ride, projection='full', fields=None):
+    """Sérialiser une course"""
+    return RideSerializer(projection, fields).serialize(ride)
+
+
+def serialize_rides(rides, projection='lite', fields=None):
+    """Sérialiser une liste de courses"""
+    return RideSerializer(projection, fields).serialize_many(rides)
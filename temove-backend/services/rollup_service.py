@@ -0,0 +1,664 @@
+"""
+Service des tables d'agrégats (rollups) des courses et paiements
+
+- maintenance incrémentale : à chaque flush contenant des courses, paiements ou
+  commissions, les deltas sont appliqués par upsert dans la même transaction
+- totaux cumulés des commissions par conducteur et par statut
+- reconstruction depuis l'historique (scripts/backfill_ride_rollups.py) par
+  lots courts, sous le marqueur RollupState 'rollups' : tant que le marqueur
+  n'existe pas, la maintenance incrémentale n'écrit rien ; tant que la première
+  reconstruction n'est pas terminée, les lectures se font sur les tables brutes
+  (des lignes partielles ne sont jamais lues)
+- lectures pour les graphiques et KPI du dashboard admin
+
+Les périodes sont en UTC, comme requested_at / created_at.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from enum import Enum
+from sqlalchemy import and_, or_, func, select, update, delete
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from models.ride import Ride
+from models.payment import Payment, PaymentStatus
+from models.commission import Commission
+from models.rollup import RideRollup, PaymentRollup, CommissionSummary, RollupState
+from services import model_events
+
+
+GRANULARITIES = ('hour', 'day', 'month')
+
+# Ligne de RollupState écrite par backfill_rollups()
+ROLLUP_MARKER = 'rollups'
+
+RIDE_MEASURES = ('ride_count', 'gmv', 'discount_total', 'commission_total')
+PAYMENT_MEASURES = ('payment_count', 'amount_total')
+COMMISSION_MEASURES = ('commission_count', 'ride_price_total', 'platform_total',
+                       'driver_earnings_total', 'service_fee_total')
+
+# Colonnes de Commission correspondant aux mesures (hors compteur)
+_COMMISSION_COLUMNS = ('ride_price', 'platform_commission', 'driver_earnings', 'service_fee')
+
+
+def bucket_start(value, granularity):
+    """Début de la période contenant `value`"""
+    if granularity == 'hour':
+        return value.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        return value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == 'month':
+        return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f'Granularité inconnue: {granularity}')
+
+
+def enum_value(value):
+    """Valeur d'un Enum (les valeurs lues par les hooks peuvent être l'Enum ou sa valeur)"""
+    return value.value if isinstance(value, Enum) else value
+
+
+# ----------------------------------------------------------------------
+# Upsert des deltas
+# ----------------------------------------------------------------------
+
+def upsert_deltas(connection, model, key_columns, measures, deltas):
+    """
+    Appliquer des deltas {clé: [mesures]} à une table d'agrégats
+
+    Utilise INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE selon la base.
+    """
+    table = model.__table__
+    dialect = connection.dialect.name
+
+    for key, values in deltas.items():
+        if not any(values):
+            continue
+        row = dict(zip(key_columns, key))
+        row.update(zip(measures, values))
+
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            stmt = insert(table).values(**row)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(key_columns),
+                set_={m: table.c[m] + stmt.excluded[m] for m in measures},
+            )
+            connection.execute(stmt)
+        elif dialect in ('mysql', 'mariadb'):
+            from sqlalchemy.dialects.mysql import insert
+            stmt = insert(table).values(**row)
+            stmt = stmt.on_duplicate_key_update({m: table.c[m] + stmt.inserted[m] for m in measures})
+            connection.execute(stmt)
+        else:
+            conditions = [table.c[k] == v for k, v in zip(key_columns, key)]
+            result = connection.execute(
+                update(table).where(*conditions).values(
+                    {m: table.c[m] + v for m, v in zip(measures, values)}
+                )
+            )
+            if result.rowcount == 0:
+                connection.execute(table.insert().values(**row))
+
+
+def add_deltas(deltas, granularity_keys, signed_values):
+    """Ajouter les mesures signées à chaque clé de `deltas` (defaultdict de listes)"""
+    for key in granularity_keys:
+        current = deltas[key]
+        for idx, value in enumerate(signed_values):
+            current[idx] += value
+
+
+def _ride_keys(requested_at, ride_mode, status):
+    if requested_at is None:
+        return []
+    ride_mode = enum_value(ride_mode)
+    status = enum_value(status)
+    return [(g, bucket_start(requested_at, g), ride_mode, status) for g in GRANULARITIES]
+
+
+def _payment_keys(created_at, method):
+    if created_at is None:
+        return []
+    method = enum_value(method)
+    return [(g, bucket_start(created_at, g), method) for g in GRANULARITIES]
+
+
+# ----------------------------------------------------------------------
+# Maintenance incrémentale
+# ----------------------------------------------------------------------
+
+def marker_present(connection, name):
+    """
+    Indiquer si le marqueur `name` existe (reconstruction commencée ou terminée)
+
+    Verrou partagé sur le marqueur jusqu'à la fin de la transaction : un lot
+    de reconstruction en cours (verrou exclusif, voir lock_marker) fait
+    attendre les écritures, qui appliquent ensuite leurs deltas sur les
+    lignes reconstruites.
+    """
+    return connection.execute(
+        select(RollupState.name)
+        .where(RollupState.name == name)
+        .with_for_update(read=True)
+    ).first() is not None
+
+
+def _apply_ride_changes(connection, changes):
+    if not marker_present(connection, ROLLUP_MARKER):
+        # Rollups jamais construits : la reconstruction comptera ces lignes
+        return
+
+    ride_deltas = defaultdict(lambda: [0, 0, 0, 0])
+    payment_deltas = defaultdict(lambda: [0, 0])
+
+    ride_changes = changes.get(Ride, [])
+    commission_changes = changes.get(Commission, [])
+    new_commission_rides = {c.values['ride_id'] for c in commission_changes if c.action == 'insert'}
+
+    # Commissions existantes des courses dont les dimensions changent (déplacées avec la course)
+    moved_ride_ids = [
+        c.values['id'] for c in ride_changes
+        if c.action != 'insert' and c.values['id'] not in new_commission_rides
+        and any(c.changed(k) for k in ('requested_at', 'ride_mode', 'status'))
+    ]
+    commissions_by_ride = {}
+    if moved_ride_ids:
+        commissions_by_ride = dict(connection.execute(
+            select(Commission.ride_id, Commission.platform_commission)
+            .where(Commission.ride_id.in_(moved_ride_ids))
+        ).all())
+
+    for change in ride_changes:
+        v = change.values
+        commission = commissions_by_ride.get(v['id'], 0)
+        new_measures = [1, v['final_price'] or 0, v['discount_amount'] or 0, commission]
+        new_keys = _ride_keys(v['requested_at'], v['ride_mode'], v['status'])
+
+        if change.action == 'insert':
+            add_deltas(ride_deltas, new_keys, new_measures)
+        elif change.action == 'delete':
+            add_deltas(ride_deltas, new_keys, [-m for m in new_measures])
+        elif any(change.changed(k) for k in ('requested_at', 'ride_mode', 'status', 'final_price', 'discount_amount')):
+            old_keys = _ride_keys(change.old('requested_at'), change.old('ride_mode'), change.old('status'))
+            old_measures = [1, change.old('final_price') or 0, change.old('discount_amount') or 0, commission]
+            add_deltas(ride_deltas, old_keys, [-m for m in old_measures])
+            add_deltas(ride_deltas, new_keys, new_measures)
+
+    # Commissions : rattachées à la période / au mode / au statut de leur course
+    commission_deltas = {}
+    for change in commission_changes:
+        if change.action == 'update':
+            if not change.changed('platform_commission'):
+                continue
+            delta = (change.values['platform_commission'] or 0) - (change.old('platform_commission') or 0)
+        else:
+            sign = 1 if change.action == 'insert' else -1
+            delta = sign * (change.values['platform_commission'] or 0)
+        commission_deltas[change.values['ride_id']] = commission_deltas.get(change.values['ride_id'], 0) + delta
+
+    if commission_deltas:
+        rides = connection.execute(
+            select(Ride.id, Ride.requested_at, Ride.ride_mode, Ride.status)
+            .where(Ride.id.in_(list(commission_deltas)))
+        ).all()
+        for ride_id, requested_at, ride_mode, status in rides:
+            add_deltas(ride_deltas, _ride_keys(requested_at, ride_mode, status), [0, 0, 0, commission_deltas[ride_id]])
+
+    # Paiements : seuls les paiements complétés sont agrégés
+    for change in changes.get(Payment, []):
+        v = change.values
+        is_completed = enum_value(v['status']) == PaymentStatus.COMPLETED.value
+        if change.action == 'insert':
+            if is_completed:
+                add_deltas(payment_deltas, _payment_keys(v['created_at'], v['method']), [1, v['amount'] or 0])
+        elif change.action == 'delete':
+            if is_completed:
+                add_deltas(payment_deltas, _payment_keys(v['created_at'], v['method']), [-1, -(v['amount'] or 0)])
+        elif any(change.changed(k) for k in ('status', 'amount', 'method', 'created_at')):
+            was_completed = enum_value(change.old('status')) == PaymentStatus.COMPLETED.value
+            if was_completed:
+                add_deltas(payment_deltas, _payment_keys(change.old('created_at'), change.old('method')),
+                     [-1, -(change.old('amount') or 0)])
+            if is_completed:
+                add_deltas(payment_deltas, _payment_keys(v['created_at'], v['method']), [1, v['amount'] or 0])
+
+    upsert_deltas(connection, RideRollup, ('granularity', 'bucket_start', 'ride_mode', 'status'),
+                   RIDE_MEASURES, ride_deltas)
+    upsert_deltas(connection, PaymentRollup, ('granularity', 'bucket_start', 'method'),
+                   PAYMENT_MEASURES, payment_deltas)
+
+
+def _commission_measures(values, sign):
+    return [sign] + [sign * (values[c] or 0) for c in _COMMISSION_COLUMNS]
+
+
+def _apply_commission_changes(connection, changes):
+    """Totaux par conducteur × statut : création, changement de statut (mark-paid), suppression"""
+    if not marker_present(connection, ROLLUP_MARKER):
+        # Totaux jamais construits : pas de delta sur un résumé vide (compteurs négatifs)
+        return
+
+    deltas = defaultdict(lambda: [0] * len(COMMISSION_MEASURES))
+    for change in changes.get(Commission, []):
+        v = change.values
+        if change.action == 'insert':
+            add_deltas(deltas, [(v['driver_id'], v['status'])], _commission_measures(v, 1))
+        elif change.action == 'delete':
+            add_deltas(deltas, [(v['driver_id'], v['status'])], _commission_measures(v, -1))
+        elif any(change.changed(k) for k in ('driver_id', 'status', *_COMMISSION_COLUMNS)):
+            old = {c: change.old(c) for c in _COMMISSION_COLUMNS}
+            add_deltas(deltas, [(change.old('driver_id'), change.old('status'))], _commission_measures(old, -1))
+            add_deltas(deltas, [(v['driver_id'], v['status'])], _commission_measures(v, 1))
+
+    upsert_deltas(connection, CommissionSummary, ('driver_id', 'status'), COMMISSION_MEASURES, deltas)
+
+
+def register_rollup_hooks():
+    """Brancher la maintenance des rollups sur les écritures de courses, paiements et commissions"""
+    model_events.on_flush((Ride, Payment, Commission), _apply_ride_changes)
+    model_events.on_flush(Commission, _apply_commission_changes)
+
+
+# ----------------------------------------------------------------------
+# Reconstruction depuis l'historique
+# ----------------------------------------------------------------------
+
+# Conducteurs par lot de reconstruction des totaux des commissions
+COMMISSION_DRIVERS_PER_BATCH = 1000
+
+
+def ensure_marker(name):
+    """Créer le marqueur `name` s'il n'existe pas : la maintenance incrémentale s'applique dès lors"""
+    if db.session.get(RollupState, name) is None:
+        db.session.add(RollupState(name=name))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Créé au même moment par une autre reconstruction
+        db.session.rollback()
+
+
+def lock_marker(name):
+    """
+    Verrou exclusif sur le marqueur jusqu'au prochain commit (verrou d'écriture sous SQLite)
+
+    Les écritures qui maintiennent les agrégats (voir marker_present) attendent
+    la fin du lot en cours : chaque lot de reconstruction est court.
+
+    Returns:
+        date de la dernière reconstruction complète (None avant la première)
+    """
+    # Écriture sans effet : pose le verrou
+    db.session.execute(
+        update(RollupState).where(RollupState.name == name).values(backfilled_at=RollupState.backfilled_at)
+    )
+    return db.session.query(RollupState.backfilled_at).filter(RollupState.name == name).scalar()
+
+
+def mark_backfilled(name):
+    """Terminer une reconstruction complète : les lectures passent sur les agrégats"""
+    lock_marker(name)
+    db.session.execute(update(RollupState).where(RollupState.name == name).values(backfilled_at=datetime.utcnow()))
+    db.session.commit()
+
+
+def day_starts(first, last):
+    """Débuts des jours de `first` à `last` inclus"""
+    day = datetime.combine(first.date(), time.min)
+    while day <= last:
+        yield day
+        day += timedelta(days=1)
+
+
+def _next_month(value):
+    return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def replace_rows(model, key_columns, measures, totals, *conditions):
+    """Remplacer les lignes d'agrégats sélectionnées par `conditions` (transaction en cours)"""
+    db.session.execute(delete(model).where(*conditions))
+    if totals:
+        db.session.execute(model.__table__.insert(), [
+            dict(zip(key_columns, key), **dict(zip(measures, values))) for key, values in totals.items()
+        ])
+    return len(totals)
+
+
+def _rebuild_ride_day(day, batch_size):
+    """Lignes 'hour' et 'day' des courses d'un jour"""
+    lock_marker(ROLLUP_MARKER)
+    end = day + timedelta(days=1)
+    totals = defaultdict(lambda: [0, 0, 0, 0])
+    last_id = 0
+    while True:
+        rows = db.session.query(
+            Ride.id, Ride.requested_at, Ride.ride_mode, Ride.status,
+            Ride.final_price, Ride.discount_amount, Commission.platform_commission
+        ).outerjoin(Commission, Commission.ride_id == Ride.id).filter(
+            Ride.requested_at >= day, Ride.requested_at < end, Ride.id > last_id
+        ).order_by(Ride.id).limit(batch_size).all()
+        if not rows:
+            break
+        for ride_id, requested_at, ride_mode, status, final_price, discount, commission in rows:
+            keys = [k for k in _ride_keys(requested_at, ride_mode, status) if k[0] != 'month']
+            add_deltas(totals, keys, [1, final_price or 0, discount or 0, commission or 0])
+        last_id = rows[-1][0]
+
+    written = replace_rows(
+        RideRollup, ('granularity', 'bucket_start', 'ride_mode', 'status'), RIDE_MEASURES, totals,
+        RideRollup.granularity != 'month', RideRollup.bucket_start >= day, RideRollup.bucket_start < end,
+    )
+    db.session.commit()
+    return written
+
+
+def _rebuild_payment_day(day, batch_size):
+    """Lignes 'hour' et 'day' des paiements complétés d'un jour"""
+    lock_marker(ROLLUP_MARKER)
+    end = day + timedelta(days=1)
+    totals = defaultdict(lambda: [0, 0])
+    last_id = 0
+    while True:
+        rows = db.session.query(
+            Payment.id, Payment.created_at, Payment.method, Payment.amount
+        ).filter(
+            Payment.created_at >= day, Payment.created_at < end, Payment.id > last_id,
+            Payment.status == PaymentStatus.COMPLETED
+        ).order_by(Payment.id).limit(batch_size).all()
+        if not rows:
+            break
+        for payment_id, created_at, method, amount in rows:
+            keys = [k for k in _payment_keys(created_at, method) if k[0] != 'month']
+            add_deltas(totals, keys, [1, amount or 0])
+        last_id = rows[-1][0]
+
+    written = replace_rows(
+        PaymentRollup, ('granularity', 'bucket_start', 'method'), PAYMENT_MEASURES, totals,
+        PaymentRollup.granularity != 'month', PaymentRollup.bucket_start >= day, PaymentRollup.bucket_start < end,
+    )
+    db.session.commit()
+    return written
+
+
+def _rebuild_month(model, dimensions, measures, month):
+    """Lignes 'month' recalculées depuis les lignes 'day' (déjà reconstruites) du mois"""
+    lock_marker(ROLLUP_MARKER)
+    columns = [getattr(model, d) for d in dimensions]
+    rows = db.session.query(
+        *columns, *[func.sum(getattr(model, m)) for m in measures]
+    ).filter(
+        model.granularity == 'day', model.bucket_start >= month, model.bucket_start < _next_month(month)
+    ).group_by(*columns).all()
+    totals = {
+        ('month', month, *row[:len(dimensions)]): [int(v or 0) for v in row[len(dimensions):]]
+        for row in rows
+    }
+
+    written = replace_rows(
+        model, ('granularity', 'bucket_start', *dimensions), measures, totals,
+        model.granularity == 'month', model.bucket_start == month,
+    )
+    db.session.commit()
+    return written
+
+
+def _rebuild_period_rollups(model, dimensions, measures, bounds, rebuild_day, batch_size):
+    """Reconstruire jour par jour sur [premier, dernier], chaque mois dès que ses jours sont faits"""
+    first, last = bounds
+    if first is None:
+        return 0
+    written = 0
+    for day in day_starts(first, last):
+        written += rebuild_day(day, batch_size)
+        following = day + timedelta(days=1)
+        if following.day == 1 or following > last:
+            written += _rebuild_month(model, dimensions, measures, day.replace(day=1))
+    return written
+
+
+def _rebuild_commission_drivers(first_driver, last_driver):
+    """Totaux des commissions des conducteurs first_driver..last_driver"""
+    lock_marker(ROLLUP_MARKER)
+    rows = db.session.query(
+        Commission.driver_id, Commission.status, func.count(Commission.id),
+        *[func.sum(getattr(Commission, c)) for c in _COMMISSION_COLUMNS]
+    ).filter(
+        Commission.driver_id >= first_driver, Commission.driver_id <= last_driver
+    ).group_by(Commission.driver_id, Commission.status).all()
+    totals = {(driver_id, status): [int(v or 0) for v in values] for driver_id, status, *values in rows}
+
+    written = replace_rows(
+        CommissionSummary, ('driver_id', 'status'), COMMISSION_MEASURES, totals,
+        CommissionSummary.driver_id >= first_driver, CommissionSummary.driver_id <= last_driver,
+    )
+    db.session.commit()
+    return written
+
+
+def _outside_periods(model, bounds):
+    """Lignes d'agrégats hors des jours / mois couverts par [premier, dernier]"""
+    first, last = bounds
+    if first is None:
+        return model.bucket_start.isnot(None)
+    first_day = datetime.combine(first.date(), time.min)
+    end_day = datetime.combine(last.date(), time.min) + timedelta(days=1)
+    return or_(
+        and_(model.granularity != 'month', or_(model.bucket_start < first_day, model.bucket_start >= end_day)),
+        and_(model.granularity == 'month', or_(model.bucket_start < first_day.replace(day=1),
+                                               model.bucket_start >= _next_month(end_day - timedelta(days=1)))),
+    )
+
+
+def backfill_rollups(batch_size=50000):
+    """
+    Reconstruire les rollups depuis les tables rides, payments et commissions
+
+    La reconstruction avance par lots courts, chacun dans sa transaction sous
+    le verrou exclusif du marqueur : une écriture concurrente n'attend que la
+    fin du lot en cours, jamais toute la reconstruction.
+    - courses et paiements : un jour à la fois (lignes 'hour' et 'day', lues
+      par lots de `batch_size` ordonnés par id), puis les lignes 'month'
+      depuis les lignes 'day' du mois
+    - commissions : par tranche de COMMISSION_DRIVERS_PER_BATCH conducteurs
+
+    Le marqueur est créé avant le premier lot : la maintenance incrémentale
+    s'applique dès lors. Une période déjà reconstruite reste exacte, une
+    période pas encore reconstruite sera remplacée ; aucun delta n'est perdu
+    ni compté deux fois. Les lectures passent sur les rollups à la fin de la
+    première reconstruction (backfilled_at).
+
+    Returns:
+        dict avec le nombre de lignes d'agrégats écrites par table
+    """
+    ensure_marker(ROLLUP_MARKER)
+
+    # Bornes lues sous le verrou ; les lignes d'agrégats hors bornes ne
+    # correspondent à aucune ligne brute
+    lock_marker(ROLLUP_MARKER)
+    ride_bounds = db.session.query(func.min(Ride.requested_at), func.max(Ride.requested_at)).one()
+    payment_bounds = db.session.query(func.min(Payment.created_at), func.max(Payment.created_at)).filter(
+        Payment.status == PaymentStatus.COMPLETED
+    ).one()
+    first_driver, last_driver = db.session.query(func.min(Commission.driver_id), func.max(Commission.driver_id)).one()
+    db.session.execute(delete(RideRollup).where(_outside_periods(RideRollup, ride_bounds)))
+    db.session.execute(delete(PaymentRollup).where(_outside_periods(PaymentRollup, payment_bounds)))
+    if first_driver is None:
+        db.session.execute(delete(CommissionSummary))
+    else:
+        db.session.execute(delete(CommissionSummary).where(
+            or_(CommissionSummary.driver_id < first_driver, CommissionSummary.driver_id > last_driver)
+        ))
+    db.session.commit()
+
+    counts = {
+        'ride_rollups': _rebuild_period_rollups(
+            RideRollup, ('ride_mode', 'status'), RIDE_MEASURES, ride_bounds, _rebuild_ride_day, batch_size
+        ),
+        'payment_rollups': _rebuild_period_rollups(
+            PaymentRollup, ('method',), PAYMENT_MEASURES, payment_bounds, _rebuild_payment_day, batch_size
+        ),
+        'commission_summaries': 0,
+    }
+    if first_driver is not None:
+        for start in range(first_driver, last_driver + 1, COMMISSION_DRIVERS_PER_BATCH):
+            counts['commission_summaries'] += _rebuild_commission_drivers(
+                start, min(last_driver, start + COMMISSION_DRIVERS_PER_BATCH - 1)
+            )
+
+    mark_backfilled(ROLLUP_MARKER)
+    _ready_cache.clear()
+    return counts
+
+
+# ----------------------------------------------------------------------
+# Lectures
+# ----------------------------------------------------------------------
+
+_ready_cache = {}
+
+
+def _marker_set():
+    return db.session.query(RollupState.backfilled_at).filter(
+        RollupState.name == ROLLUP_MARKER
+    ).scalar() is not None
+
+
+def rollups_ready():
+    """Indiquer si les rollups ont été construits (sinon les lectures se font sur les tables brutes)"""
+    if _ready_cache.get('ready'):
+        return True
+    try:
+        ready = _marker_set()
+    except Exception:
+        db.session.rollback()
+        ready = False
+    if ready:
+        _ready_cache['ready'] = True
+    return ready
+
+
+def ride_series(granularity, start, end, group_by=(), statuses=None, ride_modes=None):
+    """
+    Mesures des courses par période sur [start, end)
+
+    Args:
+        granularity: 'hour', 'day' ou 'month'
+        group_by: dimensions supplémentaires ('ride_mode', 'status')
+        statuses, ride_modes: filtres (valeurs des Enum)
+
+    Returns:
+        Liste de dicts {bucket_start, <dimensions>, ride_count, gmv, discount_total, commission_total}
+    """
+    dimensions = [getattr(RideRollup, d) for d in group_by]
+    query = db.session.query(
+        RideRollup.bucket_start,
+        *dimensions,
+        *[func.sum(getattr(RideRollup, m)) for m in RIDE_MEASURES]
+    ).filter(
+        RideRollup.granularity == granularity,
+        RideRollup.bucket_start >= bucket_start(start, granularity),
+        RideRollup.bucket_start < end,
+    )
+    if statuses:
+        query = query.filter(RideRollup.status.in_(statuses))
+    if ride_modes:
+        query = query.filter(RideRollup.ride_mode.in_(ride_modes))
+    query = query.group_by(RideRollup.bucket_start, *dimensions).order_by(RideRollup.bucket_start)
+
+    keys = ['bucket_start', *group_by, *RIDE_MEASURES]
+    return [
+        {key: (int(value or 0) if key in RIDE_MEASURES else value) for key, value in zip(keys, row)}
+        for row in query.all()
+    ]
+
+
+def payment_series(granularity, start, end):
+    """
+    Paiements complétés par période sur [start, end)
+
+    Returns:
+        Liste de dicts {bucket_start, payment_count, amount_total}
+    """
+    rows = db.session.query(
+        PaymentRollup.bucket_start,
+        func.sum(PaymentRollup.payment_count),
+        func.sum(PaymentRollup.amount_total),
+    ).filter(
+        PaymentRollup.granularity == granularity,
+        PaymentRollup.bucket_start >= bucket_start(start, granularity),
+        PaymentRollup.bucket_start < end,
+    ).group_by(PaymentRollup.bucket_start).order_by(PaymentRollup.bucket_start).all()
+
+    return [
+        {'bucket_start': b, 'payment_count': int(count or 0), 'amount_total': int(amount or 0)}
+        for b, count, amount in rows
+    ]
+
+
+def ride_status_totals():
+    """Nombre total de courses par statut (toutes périodes, depuis les rollups mensuels)"""
+    rows = db.session.query(RideRollup.status, func.sum(RideRollup.ride_count)).filter(
+        RideRollup.granularity == 'month'
+    ).group_by(RideRollup.status).all()
+    return {status: int(count or 0) for status, count in rows}
+
+
+def commission_summary_ready():
+    """Indiquer si les totaux des commissions ont été construits (même marqueur que les rollups)"""
+    return rollups_ready()
+
+
+def commission_status_totals(statuses=None):
+    """
+    Totaux des commissions par statut (lecture de quelques lignes par conducteur)
+
+    Returns:
+        dict {statut: {commission_count, ride_price_total, platform_total, ...}}
+    """
+    query = db.session.query(
+        CommissionSummary.status,
+        *[func.sum(getattr(CommissionSummary, m)) for m in COMMISSION_MEASURES]
+    )
+    if statuses:
+        query = query.filter(CommissionSummary.status.in_(statuses))
+    rows = query.group_by(CommissionSummary.status).all()
+    return {
+        status: dict(zip(COMMISSION_MEASURES, [int(v or 0) for v in values]))
+        for status, *values in rows
+    }
+
+
+def commission_driver_totals(statuses=None, driver_ids=None, limit=50, offset=0):
+    """
+    Totaux des commissions par conducteur, triés par commission plateforme décroissante
+
+    Returns:
+        (lignes, nombre de conducteurs) ; chaque ligne est un dict
+        {driver_id, <mesures>, by_status: {statut: platform_total}}
+    """
+    query = db.session.query(CommissionSummary)
+    if statuses:
+        query = query.filter(CommissionSummary.status.in_(statuses))
+    if driver_ids:
+        query = query.filter(CommissionSummary.driver_id.in_(driver_ids))
+
+    total = query.with_entities(func.count(func.distinct(CommissionSummary.driver_id))).scalar() or 0
+    platform_total = func.sum(CommissionSummary.platform_total)
+    page = query.with_entities(CommissionSummary.driver_id).group_by(
+        CommissionSummary.driver_id
+    ).order_by(platform_total.desc(), CommissionSummary.driver_id).limit(limit).offset(offset).subquery()
+
+    rows = query.filter(CommissionSummary.driver_id.in_(select(page.c.driver_id))).all()
+    by_driver = {}
+    for row in rows:
+        entry = by_driver.setdefault(row.driver_id, dict(
+            {'driver_id': row.driver_id, 'by_status': {}}, **{m: 0 for m in COMMISSION_MEASURES}
+        ))
+        for m in COMMISSION_MEASURES:
+            entry[m] += getattr(row, m)
+        entry['by_status'][row.status] = row.platform_total
+
+    ordered = sorted(by_driver.values(), key=lambda e: (-e['platform_total'], e['driver_id']))
+    return ordered, total
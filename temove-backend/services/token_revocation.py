@@ -0,0 +1,265 @@
+"""
+Révocation des tokens JWT vérifiée en mémoire
+
+check_if_token_revoked renvoyait toujours False : impossible de couper
+l'accès d'un utilisateur ou d'un chauffeur banni avant l'expiration de son
+token (24 h). Une requête en base à chaque appel coûterait plus que la
+vérification du token elle-même ; la liste est donc gardée en mémoire :
+
+- JTI révoqués (déconnexion), gardés jusqu'à l'expiration du token
+- par utilisateur, « tokens émis avant » : tous ses tokens sont révoqués
+  (compte ou profil chauffeur désactivé, révocation par un admin), gardé
+  la durée de vie d'un token
+- par utilisateur, « claims modifiés » : les claims role / is_admin /
+  driver_id des tokens émis avant ne sont plus crus (services/identity_service.py)
+
+L'iat du JWT est à la seconde : chaque token porte aussi sa date d'émission
+en millisecondes (claim iat_ms), comparée aux dates des événements. Un token
+émis juste après une révocation, dans la même seconde, reste valide.
+
+Les workers partagent ces événements par un store (REVOCATION_STORE) :
+'local' (dans le processus, pour un seul worker et les tests) ou 'redis'
+(REDIS_URL). Chaque worker relit les nouveaux événements au plus toutes les
+REVOCATION_SYNC_SECONDS : la vérification d'un token reste une lecture de
+dictionnaire, et une révocation est vue partout après ce délai.
+
+    revoke_token(jwt_payload)        # déconnexion
+    revoke_user_tokens(user_id)      # tous les tokens de l'utilisateur
+"""
+import itertools
+import json
+import time
+from threading import Lock
+from services.app_logging import get_logger
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+# Types d'événements
+REVOKED_TOKEN = 'jti'
+REVOKED_USER = 'user'
+CLAIMS_CHANGED = 'claims'
+
+REDIS_KEY = 'temove:token_revocations'
+
+# Durée de vie par défaut d'un token (secondes), remplacée par init_token_revocation
+DEFAULT_TOKEN_LIFETIME = 86400
+
+# Date d'émission du token en millisecondes (additional_claims_loader dans app.py)
+ISSUED_AT_CLAIM = 'iat_ms'
+
+
+def issued_at_claim():
+    """Claim ajouté à chaque token créé"""
+    return {ISSUED_AT_CLAIM: int(time.time() * 1000)}
+
+
+def token_issued_at(payload):
+    """Date d'émission d'un token (secondes) : iat_ms, sinon iat pour les tokens émis sans ce claim"""
+    if ISSUED_AT_CLAIM in payload:
+        return payload[ISSUED_AT_CLAIM] / 1000
+    return payload.get('iat', 0)
+
+
+class LocalRevocationStore:
+    """Journal des événements dans le processus (remplace un store partagé)"""
+
+    def __init__(self):
+        self._events = []
+        self._sequence = itertools.count(1)
+        self._lock = Lock()
+
+    def publish(self, event):
+        with self._lock:
+            self._events.append((next(self._sequence), event))
+
+    def pull(self, cursor):
+        """Événements publiés après `cursor` et nouveau curseur"""
+        now = time.time()
+        with self._lock:
+            self._events = [(seq, event) for seq, event in self._events if event[3] > now]
+            events = [(seq, event) for seq, event in self._events if seq > cursor]
+        return [event for _, event in events], (events[-1][0] if events else cursor)
+
+
+class RedisRevocationStore:
+    """Journal des événements dans un sorted set Redis (score = numéro de séquence)"""
+
+    def __init__(self, url, key=REDIS_KEY):
+        self.client = redis.Redis.from_url(url)
+        self.key = key
+
+    def publish(self, event):
+        sequence = self.client.incr(f'{self.key}:seq')
+        self.client.zadd(self.key, {json.dumps([sequence, *event]): sequence})
+        self._trim()
+
+    def _trim(self):
+        # Les événements sont à peu près triés par expiration : retirer les plus anciens expirés
+        now = time.time()
+        expired = []
+        for member in self.client.zrange(self.key, 0, 99):
+            if json.loads(member)[4] > now:
+                break
+            expired.append(member)
+        if expired:
+            self.client.zrem(self.key, *expired)
+
+    def pull(self, cursor):
+        members = self.client.zrangebyscore(self.key, f'({cursor}', '+inf')
+        events = [json.loads(member) for member in members]
+        return [tuple(event[1:]) for event in events], (events[-1][0] if events else cursor)
+
+
+class TokenBlocklist:
+    """Copie en mémoire des révocations, synchronisée depuis le store"""
+
+    def __init__(self, store=None, sync_seconds=1.0, token_lifetime=DEFAULT_TOKEN_LIFETIME):
+        self.store = store or LocalRevocationStore()
+        self.sync_seconds = sync_seconds
+        self.token_lifetime = token_lifetime
+        # Clé -> (date, expiration) ; les clés utilisateur sont des str (sub du JWT)
+        self._tokens = {}
+        self._users = {}
+        self._claims = {}
+        self._cursor = 0
+        self._next_sync = 0.0
+        self._next_purge = 0.0
+        self._lock = Lock()
+
+    def _table(self, kind):
+        return {REVOKED_TOKEN: self._tokens, REVOKED_USER: self._users, CLAIMS_CHANGED: self._claims}[kind]
+
+    def _apply(self, events):
+        for kind, key, at, expires_at in events:
+            table = self._table(kind)
+            previous = table.get(key)
+            if previous is None or previous[0] < at:
+                table[key] = (at, expires_at)
+
+    def _publish(self, kind, key, expires_at, at=None):
+        event = (kind, str(key), at or time.time(), expires_at)
+        self.store.publish(event)
+        # Effet immédiat dans ce worker, sans attendre la synchronisation
+        with self._lock:
+            self._apply([event])
+
+    def sync(self, force=False):
+        """Relire les événements publiés par les autres workers (au plus toutes les sync_seconds)"""
+        now = time.monotonic()
+        if not force and now < self._next_sync:
+            return
+        with self._lock:
+            if not force and now < self._next_sync:
+                return
+            self._next_sync = now + self.sync_seconds
+            events, self._cursor = self.store.pull(self._cursor)
+            self._apply(events)
+            if now >= self._next_purge:
+                self._purge()
+                self._next_purge = now + 60
+
+    def _purge(self):
+        now = time.time()
+        for table in (self._tokens, self._users, self._claims):
+            for key in [key for key, (_, expires_at) in table.items() if expires_at <= now]:
+                del table[key]
+
+    def revoke_token(self, jti, expires_at):
+        self._publish(REVOKED_TOKEN, jti, expires_at)
+
+    def revoke_user(self, user_id):
+        now = time.time()
+        self._publish(REVOKED_USER, user_id, now + self.token_lifetime, at=now)
+
+    def mark_claims_changed(self, user_id):
+        now = time.time()
+        self._publish(CLAIMS_CHANGED, user_id, now + self.token_lifetime, at=now)
+
+    def is_revoked(self, payload):
+        """Token révoqué (JTI ou émis avant la révocation de tous les tokens de l'utilisateur)"""
+        self.sync()
+        if payload.get('jti') in self._tokens:
+            return True
+        revoked = self._users.get(str(payload.get('sub')))
+        return revoked is not None and token_issued_at(payload) <= revoked[0]
+
+    def claims_changed_after(self, user_id, timestamp):
+        """Identité de l'utilisateur modifiée après `timestamp` (token_issued_at ou date de lecture)"""
+        self.sync()
+        changed = self._claims.get(str(user_id))
+        return changed is not None and changed[0] >= timestamp
+
+    def stats(self):
+        return {
+            'store': type(self.store).__name__,
+            'revoked_tokens': len(self._tokens),
+            'revoked_users': len(self._users),
+            'changed_claims': len(self._claims),
+            'cursor': self._cursor,
+        }
+
+
+_blocklist = TokenBlocklist()
+
+
+def get_blocklist():
+    return _blocklist
+
+
+def revoke_token(jwt_payload):
+    """Révoquer un token (déconnexion) jusqu'à son expiration"""
+    _blocklist.revoke_token(jwt_payload['jti'], jwt_payload.get('exp') or time.time() + _blocklist.token_lifetime)
+
+
+def revoke_user_tokens(user_id):
+    """Révoquer tous les tokens déjà émis pour l'utilisateur"""
+    _blocklist.revoke_user(user_id)
+
+
+def _lifetime(value):
+    return value.total_seconds() if hasattr(value, 'total_seconds') else DEFAULT_TOKEN_LIFETIME
+
+
+def init_token_revocation(app):
+    """Configurer le store et la durée de vie des révocations depuis la configuration"""
+    global _blocklist
+    config = app.config
+    backend = config.get('REVOCATION_STORE', 'local')
+    if backend == 'redis' and not REDIS_AVAILABLE:
+        get_logger('auth').warning('⚠️ redis non installé - révocations limitées au processus (pip install redis)')
+        backend = 'local'
+    store = RedisRevocationStore(config['REDIS_URL']) if backend == 'redis' else LocalRevocationStore()
+    # Les refresh tokens vivent plus longtemps que les tokens d'accès
+    lifetime = max(_lifetime(config.get('JWT_ACCESS_TOKEN_EXPIRES')), _lifetime(config.get('JWT_REFRESH_TOKEN_EXPIRES')))
+    _blocklist = TokenBlocklist(store, config.get('REVOCATION_SYNC_SECONDS', 1.0), lifetime)
+    return _blocklist
+
+
+def _on_commit(changes):
+    from models.user import User
+    from models.driver import Driver
+
+    user_ids = set()
+    for change in changes.get(User, ()):
+        if change.action == 'update' and change.changed('is_active') and not change.values.get('is_active'):
+            user_ids.add(change.values.get('id'))
+    for change in changes.get(Driver, ()):
+        if change.action == 'update' and change.changed('is_active') and not change.values.get('is_active'):
+            user_ids.add(change.values.get('user_id'))
+    user_ids.discard(None)
+    for user_id in user_ids:
+        revoke_user_tokens(user_id)
+
+
+def register_revocation_hooks():
+    """Révoquer les tokens d'un compte ou d'un profil chauffeur désactivé au commit"""
+    from services import model_events
+    from models.user import User
+    from models.driver import Driver
+
+    model_events.on_commit((User, Driver), _on_commit)